@@ -6,9 +6,9 @@
 import sys
 import os
 import time
-import json
 import re
-from typing import Optional, List, Dict, Tuple
+import threading
+from typing import Callable, Optional, List, Dict, Iterator, TextIO, Tuple
 from datetime import datetime
 
 # 添加 Open-AutoGLM 到 Python 路径（如果 phone_agent 不可用则尝试添加）
@@ -35,15 +35,29 @@ except ImportError:
     from phone_agent.model import ModelConfig
 
 # 导入反盗版系统模块（使用相对导入）
-from .product_database import ProductDatabase, GenuineProduct
+from .product_database import create_product_database, GenuineProduct
 from .piracy_detector import PiracyDetector, ProductInfo, DetectionResult
 from .report_manager import ReportManager, ReportRecord
 from .reporter import create_reporter, ReportContext
+from .report_guard import ReportGuard
+from .response_cache import ResponseCache, capture_screen
+from .response_parser import extract_json, normalize_fields
+from .report_pipeline import ReportJob, ReportPipeline
+from .patrol_checkpoint import CheckpointStore, PatrolCheckpoint, checkpoint_path, item_fingerprint
+from .model_pool import ModelClientPool, attach_pool, get_shared_pool
+from .keyword_scheduler import KeywordScheduler, KeywordStatsStore
+from .result_sink import ResultSink, iter_results, session_results_path
 from .config_anti_piracy import (
-    PATHS, DETECTOR_CONFIG, AGENT_CONFIG, SUPPORTED_PLATFORMS,
+    PATHS, DETECTOR_CONFIG, REPORT_LOG_CONFIG, REPORT_GUARD_CONFIG, PRODUCT_DB_CONFIG, AGENT_CONFIG,
+    RESPONSE_CACHE_CONFIG, REPORT_PIPELINE_CONFIG, PATROL_CHECKPOINT_CONFIG, MODEL_POOL_CONFIG,
+    KEYWORD_SCHEDULER_CONFIG,
+    SUPPORTED_PLATFORMS,
     get_task_prompt, get_ui_text, get_report_reason
 )
 
+# 价格字符串中的数字
+_PRICE_PATTERN = re.compile(r'\d+\.?\d*')
+
 
 class AntiPiracyAgent:
     """反盗版巡查 Agent"""
@@ -53,7 +67,8 @@ class AntiPiracyAgent:
         model_config: ModelConfig,
         agent_config: Optional[AgentConfig] = None,
         platform: str = "xiaohongshu",
-        test_mode: bool = False
+        test_mode: bool = False,
+        model_pool: Optional[ModelClientPool] = None
     ):
         """
         初始化反盗版 Agent
@@ -63,6 +78,7 @@ class AntiPiracyAgent:
             agent_config: Agent 配置
             platform: 目标平台(xiaohongshu/xianyu/taobao)
             test_mode: 是否为测试模式(不实际举报)
+            model_pool: 模型服务连接池,默认按 MODEL_POOL_CONFIG 使用进程内共享的连接池
         """
         # 初始化配置
         if agent_config is None:
@@ -72,19 +88,38 @@ class AntiPiracyAgent:
             )
 
         # 初始化基础 Agent
+        self.model_config = model_config
         self.base_agent = PhoneAgent(
             model_config=model_config,
             agent_config=agent_config
         )
+        if model_pool is None and MODEL_POOL_CONFIG.get("enabled", True):
+            pool_options = {k: v for k, v in MODEL_POOL_CONFIG.items() if k != "enabled"}
+            model_pool = get_shared_pool(model_config.base_url, model_config.api_key, **pool_options)
+        self.model_pool = model_pool if model_pool is not None and attach_pool(self.base_agent, model_pool) else None
 
         # 初始化反盗版组件
-        self.product_db = ProductDatabase(PATHS["product_database"])
+        self.product_db = create_product_database(PATHS["product_database"], **PRODUCT_DB_CONFIG)
         self.detector = PiracyDetector(
             self.product_db,
             price_threshold=DETECTOR_CONFIG["price_threshold"],
-            similarity_threshold=DETECTOR_CONFIG["similarity_threshold"]
+            similarity_threshold=DETECTOR_CONFIG["similarity_threshold"],
+            profile=DETECTOR_CONFIG.get("profile", False),
+            confidence_threshold=DETECTOR_CONFIG["confidence_threshold"],
+            rules=DETECTOR_CONFIG.get("rules"),
+            official_confidence=DETECTOR_CONFIG.get("official_confidence", 0.9)
+        )
+        self.report_manager = ReportManager(PATHS["report_log"], **REPORT_LOG_CONFIG)
+        guard_options = {k: v for k, v in REPORT_GUARD_CONFIG.items() if k != "enabled"}
+        self.report_guard = (
+            ReportGuard(PATHS["report_guard"], **guard_options)
+            if REPORT_GUARD_CONFIG.get("enabled", True) else None
+        )
+        cache_options = {k: v for k, v in RESPONSE_CACHE_CONFIG.items() if k != "enabled"}
+        self.response_cache = (
+            ResponseCache(PATHS["response_cache"], screen_provider=self._capture_screen, **cache_options)
+            if RESPONSE_CACHE_CONFIG.get("enabled", True) else None
         )
-        self.report_manager = ReportManager(PATHS["report_log"])
 
         # 平台配置
         self.platform = platform
@@ -99,8 +134,16 @@ class AntiPiracyAgent:
             "checked_count": 0,
             "piracy_count": 0,
             "reported_count": 0,
-            "results": []
+            "duplicate_skipped": 0,
+            "results_path": None
         }
+        # 举报阶段可能在后台线程中更新会话计数
+        self._session_lock = threading.Lock()
+        self.report_pipeline: Optional[ReportPipeline] = None
+        self._report_device: Optional[Tuple] = None
+        # 巡查断点(每处理完一个商品写入,中断后可续查);每个平台+关键词一个文件,巡查开始时打开
+        self.checkpoint_store: Optional[CheckpointStore] = None
+        self._checkpoint: Optional[PatrolCheckpoint] = None
 
         # 截图目录
         self.screenshot_dir = PATHS["screenshots_dir"]
@@ -111,7 +154,9 @@ class AntiPiracyAgent:
             platform=platform,
             agent=self.base_agent,
             report_manager=self.report_manager,
-            screenshot_dir=self.screenshot_dir
+            screenshot_dir=self.screenshot_dir,
+            guard=self.report_guard,
+            response_cache=self.response_cache
         )
 
         print(f"✅ 反盗版 Agent 初始化完成")
@@ -121,7 +166,9 @@ class AntiPiracyAgent:
     def start_patrol(
         self,
         keyword: str = "得到",
-        max_items: int = 10
+        max_items: int = 10,
+        resume: bool = False,
+        stop_when: Optional[Callable[[str, bool], bool]] = None
     ) -> Dict:
         """
         开始巡查
@@ -129,6 +176,9 @@ class AntiPiracyAgent:
         Args:
             keyword: 搜索关键词
             max_items: 最多检查的商品数量
+            resume: 是否从上次中断的断点继续(恢复已完成的结果,滚动回原位置后从下一个商品开始)
+            stop_when: 每检查完一个商品调用一次,参数为(商品指纹, 是否盗版),返回 True 时提前结束
+                (多关键词巡查用于检测收益递减)
 
         Returns:
             巡查结果统计
@@ -143,15 +193,28 @@ class AntiPiracyAgent:
             "checked_count": 0,
             "piracy_count": 0,
             "reported_count": 0,
-            "results": []
+            "duplicate_skipped": 0,
+            "results_path": None
         }
+        checkpoint = self._open_checkpoint(keyword, max_items, resume)
+        # 检测结果逐条写入结果文件,内存中只保留计数
+        sink = self._open_result_sink(checkpoint)
+        pipeline = self._create_report_pipeline()
+        self.report_pipeline = pipeline
+        completed = False
 
         try:
             # Step 1: 启动应用并搜索
             self._launch_and_search(keyword)
 
+            # 续查时滚动回中断时的位置
+            if checkpoint.scroll_count:
+                print(f"📜 滚动回断点位置(第 {checkpoint.scroll_count} 次滚动后)...")
+                for _ in range(checkpoint.scroll_count):
+                    self._scroll_down()
+
             # Step 2: 浏览并检查搜索结果
-            for i in range(max_items):
+            for i in range(checkpoint.next_index, max_items):
                 print(f"\n--- 检查第 {i + 1}/{max_items} 个商品 ---")
 
                 # 提取当前商品信息
@@ -159,29 +222,44 @@ class AntiPiracyAgent:
 
                 if not product_info:
                     print("⚠️ 无法提取商品信息,跳过")
+                    self._save_checkpoint(next_index=i + 1)
                     continue
 
-                # 检测是否为盗版
-                detection_result = self._detect_piracy(product_info)
-
-                # 记录结果
-                self.current_session["checked_count"] += 1
-                self.current_session["results"].append({
-                    "product_info": product_info,
-                    "detection_result": detection_result
-                })
-
-                # 如果检测到盗版,执行举报
-                if detection_result.is_piracy:
-                    self.current_session["piracy_count"] += 1
-
-                    if not self.test_mode:
-                        success = self._report_piracy(product_info, detection_result)
-                        if success:
+                fingerprint = item_fingerprint(product_info.platform, product_info.shop_name, product_info.title)
+                is_piracy = False
+                if checkpoint.is_processed(fingerprint):
+                    # 列表顺序变化时,已处理过的商品可能出现在新位置
+                    print("⏭️  上次巡查已处理过该商品,跳过")
+                else:
+                    # 检测是否为盗版
+                    detection_result = self._detect_piracy(product_info)
+
+                    # 记录结果
+                    self.current_session["checked_count"] += 1
+                    sink.append({
+                        "index": i + 1,
+                        "fingerprint": fingerprint,
+                        "keyword": keyword,
+                        "product_info": product_info.to_dict(),
+                        "detection_result": detection_result.to_dict()
+                    })
+                    with self._session_lock:
+                        checkpoint.mark_processed(fingerprint, result_count=sink.count)
+
+                    # 如果检测到盗版,执行举报
+                    is_piracy = detection_result.is_piracy
+                    if is_piracy:
+                        self.current_session["piracy_count"] += 1
+
+                        if not self.test_mode:
+                            # 交给举报阶段(inline 方式下立即举报,其他方式排队)
+                            with self._session_lock:
+                                checkpoint.pending_reports.append(fingerprint)
+                            self._save_checkpoint(next_index=i)
+                            pipeline.submit(ReportJob(product_info, detection_result))
+                        else:
+                            print("⚠️ 测试模式:跳过实际举报操作")
                             self.current_session["reported_count"] += 1
-                    else:
-                        print("⚠️ 测试模式:跳过实际举报操作")
-                        self.current_session["reported_count"] += 1
 
                 # 返回列表继续
                 self._back_to_list()
@@ -189,24 +267,261 @@ class AntiPiracyAgent:
                 # 检查是否需要滚动加载更多
                 if (i + 1) % 5 == 0:
                     self._scroll_down()
+                    checkpoint.scroll_count += 1
 
+                self._save_checkpoint(next_index=i + 1)
+                if stop_when is not None and stop_when(fingerprint, is_piracy):
+                    print("📉 本页已没有新商品,提前结束该关键词")
+                    break
                 time.sleep(AGENT_CONFIG["wait_after_action"])
 
+            completed = True
+
         except Exception as e:
             print(f"❌ 巡查过程出错: {e}")
             import traceback
             traceback.print_exc()
 
         finally:
-            # 生成巡查报告
-            report = self._generate_patrol_report()
+            # 举报队列中剩余的商品(deferred 方式在此批量举报)
+            try:
+                pipeline.close()
+            except Exception as e:
+                print(f"❌ 举报队列处理出错: {e}")
+            self.current_session["report_queue"] = pipeline.get_stats()
+            sink.close()
+
+            # 正常结束时删除断点,中断时保留(可用 resume=True 继续)
+            if self.checkpoint_store is not None:
+                if completed:
+                    self.checkpoint_store.clear()
+                else:
+                    self._save_checkpoint()
+                    print(f"💾 巡查进度已保存到断点: {self.checkpoint_store.path}")
+            self._checkpoint = None
+
+            # 生成巡查报告(逐条读取结果文件直接输出,不在内存中拼接)
             print("\n" + "=" * 60)
             print("巡查完成!")
             print("=" * 60)
-            print(report)
+            self._write_patrol_report(sys.stdout)
 
             return self.current_session
 
+    def start_keyword_patrol(
+        self,
+        keywords: Optional[List[str]] = None,
+        total_items: int = 30,
+        resume: bool = False
+    ) -> Dict:
+        """
+        多关键词巡查
+
+        按各关键词历史盗版率(KEYWORD_SCHEDULER_CONFIG)把商品预算分配给整组关键词,
+        期望收益高的关键词先巡查;某个关键词连续一页没有新商品时提前结束,剩余预算重新分配给其余关键词。
+
+        Args:
+            keywords: 搜索关键词列表,默认为平台配置的 search_keywords
+            total_items: 所有关键词合计最多检查的商品数量
+            resume: 是否从断点继续(只对断点所属的关键词生效)
+
+        Returns:
+            巡查结果统计(各关键词会话计数之和、各关键词的结果文件 results_paths,以及 keywords 调度统计)
+        """
+        keywords = keywords or self.platform_config.get("search_keywords", [])
+        # 统计文件可能同时被其他巡查任务写入,每个关键词结束时在文件锁内合并
+        stats_store = KeywordStatsStore(PATHS["keyword_stats"])
+        scheduler = KeywordScheduler(self.platform, keywords, store=stats_store, **KEYWORD_SCHEDULER_CONFIG)
+        summary = {
+            "start_time": datetime.now(),
+            "checked_count": 0,
+            "piracy_count": 0,
+            "reported_count": 0,
+            "duplicate_skipped": 0,
+            "results_paths": {}
+        }
+
+        pending = list(scheduler.keywords)
+        remaining = total_items
+        while pending and remaining > 0:
+            plan = scheduler.allocate(remaining, pending)
+            if not plan:
+                break
+            print("\n🗂️  关键词预算: " + ", ".join(f"{keyword} {budget} 个" for keyword, budget in plan))
+            keyword, budget = plan[0]
+            pending.remove(keyword)
+
+            run = scheduler.start_run(keyword, budget)
+            session = self.start_patrol(keyword=keyword, max_items=budget, resume=resume, stop_when=run.observe)
+            scheduler.finish_run(run)
+            remaining -= run.checked if run.saturated else budget
+
+            for key in ("checked_count", "piracy_count", "reported_count", "duplicate_skipped"):
+                summary[key] += session.get(key, 0)
+            summary["results_paths"][keyword] = session.get("results_path")
+
+        summary["keywords"] = scheduler.get_statistics()
+        stats_store.close()
+        print(f"\n📊 多关键词巡查: 检查 {summary['checked_count']} 个商品, 发现 {summary['piracy_count']} 个疑似盗版, "
+              f"每设备小时 {summary['keywords']['hits_per_hour']:.1f} 个")
+        return summary
+
+    def _open_checkpoint(self, keyword: str, max_items: int, resume: bool) -> PatrolCheckpoint:
+        """
+        创建本次巡查的断点;续查时读取上次的断点并恢复会话
+
+        Args:
+            keyword: 搜索关键词
+            max_items: 最多检查的商品数量
+            resume: 是否从断点继续
+
+        Returns:
+            巡查进度
+        """
+        self.checkpoint_store = (
+            CheckpointStore(checkpoint_path(PATHS["patrol_checkpoint"], self.platform, keyword))
+            if PATROL_CHECKPOINT_CONFIG.get("enabled", True) else None
+        )
+        checkpoint = None
+        if resume and self.checkpoint_store is not None:
+            checkpoint = self.checkpoint_store.load(keyword=keyword, platform=self.platform)
+            if checkpoint is None:
+                print("⚠️  没有可用的断点,从头开始巡查")
+
+        if checkpoint is None:
+            checkpoint = PatrolCheckpoint(keyword=keyword, platform=self.platform, max_items=max_items)
+        else:
+            checkpoint.max_items = max_items
+            self._restore_session(checkpoint)
+            print(f"♻️  从断点继续: 已完成 {checkpoint.next_index} 个商品, "
+                  f"已有 {checkpoint.result_count} 条结果, 滚动 {checkpoint.scroll_count} 次")
+
+        self._checkpoint = checkpoint
+        self._save_checkpoint()
+        return checkpoint
+
+    def _restore_session(self, checkpoint: PatrolCheckpoint) -> None:
+        """从断点恢复会话计数;中断时未完成的举报记为待处理(商品信息从结果文件中读取)"""
+        for key, value in checkpoint.counters.items():
+            if key in self.current_session and isinstance(value, int):
+                self.current_session[key] = value
+
+        # 进程被强制终止时,已提交的举报可能还在队列中
+        pending = set(checkpoint.pending_reports)
+        for count, record in enumerate(iter_results(checkpoint.results_path), 1):
+            if not pending or count > checkpoint.result_count:
+                break
+            if record.get("fingerprint") not in pending:
+                continue
+            pending.discard(record["fingerprint"])
+            detection = record["detection_result"]
+            matched_id = detection.get("matched_product_id")
+            self._drop_report_job(
+                ReportJob(
+                    ProductInfo.from_dict(record["product_info"]),
+                    DetectionResult.from_dict(
+                        detection, self.product_db.get_product(matched_id) if matched_id else None
+                    )
+                ),
+                reason="巡查中断,举报未完成"
+            )
+        checkpoint.pending_reports.clear()
+
+    def _open_result_sink(self, checkpoint: PatrolCheckpoint) -> ResultSink:
+        """
+        打开本次巡查的结果文件;续查时沿用断点中的文件,截断到断点记录的条数后继续追加
+
+        Args:
+            checkpoint: 巡查进度
+
+        Returns:
+            结果文件
+        """
+        if checkpoint.results_path:
+            sink = ResultSink(checkpoint.results_path, keep=checkpoint.result_count)
+        else:
+            checkpoint.results_path = session_results_path(PATHS["patrol_results_dir"], checkpoint.keyword)
+            sink = ResultSink(checkpoint.results_path)
+        checkpoint.result_count = sink.count
+        self.current_session["results_path"] = sink.path
+        self._save_checkpoint()
+        return sink
+
+    def iter_results(self) -> Iterator[Dict]:
+        """
+        逐条读取本次巡查的检测结果
+
+        Yields:
+            结果字典(fingerprint、product_info、detection_result 等)
+        """
+        return iter_results(self.current_session.get("results_path"))
+
+    def _save_checkpoint(self, next_index: Optional[int] = None) -> None:
+        """
+        写入断点(会话计数取自当前会话)
+
+        Args:
+            next_index: 下一个要处理的商品序号,为 None 时不变
+        """
+        checkpoint = self._checkpoint
+        if checkpoint is None or self.checkpoint_store is None:
+            return
+        with self._session_lock:
+            if next_index is not None:
+                checkpoint.next_index = next_index
+            checkpoint.counters = {
+                key: value for key, value in self.current_session.items()
+                if isinstance(value, int)
+            }
+            try:
+                self.checkpoint_store.save(checkpoint)
+            except OSError as e:
+                print(f"⚠️  写入断点失败: {e}")
+
+    def _finish_pending_report(self, product_info: ProductInfo) -> None:
+        """举报流程结束(无论成功与否)后从断点的待举报列表中移除"""
+        checkpoint = self._checkpoint
+        if checkpoint is None:
+            return
+        fingerprint = item_fingerprint(product_info.platform, product_info.shop_name, product_info.title)
+        with self._session_lock:
+            if fingerprint in checkpoint.pending_reports:
+                checkpoint.pending_reports.remove(fingerprint)
+        self._save_checkpoint()
+
+    def _record_evidence(self, path: str) -> None:
+        """把证据文件路径记入断点"""
+        checkpoint = self._checkpoint
+        if checkpoint is None or not path:
+            return
+        with self._session_lock:
+            if path not in checkpoint.evidence:
+                checkpoint.evidence.append(path)
+
+    def _run_task(self, task_key: str, **kwargs):
+        """
+        执行任务提示词
+
+        RESPONSE_CACHE_CONFIG 中列出的只读提取任务先按当前屏幕查询响应缓存,
+        其他任务直接执行。
+
+        Args:
+            task_key: 任务键名
+            **kwargs: 格式化参数
+
+        Returns:
+            模型响应
+        """
+        task = get_task_prompt(task_key, **kwargs)
+        if self.response_cache is None:
+            return self.base_agent.run(task)
+        return self.response_cache.run(self.base_agent.run, task_key, task, kwargs)
+
+    def _capture_screen(self) -> Optional[bytes]:
+        """截取当前屏幕(用于响应缓存的屏幕指纹)"""
+        agent_config = getattr(self.base_agent, "agent_config", None)
+        return capture_screen(getattr(agent_config, "device_id", None))
+
     def _launch_and_search(self, keyword: str) -> bool:
         """
         启动应用并搜索
@@ -219,14 +534,8 @@ class AntiPiracyAgent:
         """
         print(f"\n🚀 启动 {self.platform_config['name']} 并搜索'{keyword}'...")
 
-        task = get_task_prompt(
-            "launch_and_search",
-            platform=self.platform_config['name'],
-            keyword=keyword
-        )
-
         try:
-            self.base_agent.run(task)
+            self._run_task("launch_and_search", platform=self.platform_config['name'], keyword=keyword)
             print("✅ 应用启动和搜索完成")
             time.sleep(3)  # 等待搜索结果加载
 
@@ -234,8 +543,7 @@ class AntiPiracyAgent:
             if self.platform == "xiaohongshu":
                 print("\n📱 小红书平台：切换到商品标签...")
                 try:
-                    switch_task = get_task_prompt("switch_to_products_tab")
-                    self.base_agent.run(switch_task)
+                    self._run_task("switch_to_products_tab")
                     print("✅ 已切换到商品标签")
                     time.sleep(2)  # 等待商品列表加载
                 except Exception as e:
@@ -271,88 +579,38 @@ class AntiPiracyAgent:
         print(f"\n📋 提取第 {index + 1} 个商品信息...")
 
         try:
-            # 进入商品详情
-            if not self._enter_detail(index):
-                print(f"⚠️  无法进入商品详情页，跳过")
-                return None
+            combined = AGENT_CONFIG.get("extraction_mode", "combined") == "combined"
+            if combined:
+                # 合并模式: 一次任务完成进入详情和提取,减少一半模型调用
+                print("   进入详情页并使用AI视觉模型识别页面内容...")
+                task_key, task_args = "enter_and_extract", {"index": index + 1}
+            else:
+                # 进入商品详情
+                if not self._enter_detail(index):
+                    print(f"⚠️  无法进入商品详情页，跳过")
+                    return None
 
-            # 使用 AutoGLM 多模态能力提取商品信息
-            print("   使用AI视觉模型识别页面内容...")
-            task = get_task_prompt("extract_info")
+                # 使用 AutoGLM 多模态能力提取商品信息
+                print("   使用AI视觉模型识别页面内容...")
+                task_key, task_args = "extract_info", {}
 
             # 调用 Agent 让其识别页面内容
             # AutoGLM 会通过多模态模型理解当前屏幕内容
             try:
-                response = self.base_agent.run(task)
+                response = self._run_task(task_key, **task_args)
                 print(f"   模型响应: {response[:200] if response else 'None'}...")
 
                 # 解析模型响应
                 parsed_data = self._parse_model_response(str(response)) if response else None
 
                 if parsed_data and isinstance(parsed_data, dict):
+                    if combined and parsed_data.get("status") == "not_found":
+                        print(f"⚠️  无法进入商品详情页，跳过")
+                        return None
+
                     # 调试：打印解析后的所有字段
                     print(f"   📊 解析的字段: {list(parsed_data.keys())}")
-
-                    # 从解析的数据中提取信息（支持多种字段名）
-                    title = (parsed_data.get('title') or
-                            parsed_data.get('商品标题') or
-                            parsed_data.get('product_title') or
-                            f"未识别商品_{index}")
-
-                    # 店铺名称 - 支持多种可能的字段名
-                    shop_name = (parsed_data.get('shop_name') or
-                                parsed_data.get('店铺名称') or
-                                parsed_data.get('卖家昵称') or
-                                parsed_data.get('卖家名称') or
-                                parsed_data.get('商家名称') or
-                                parsed_data.get('seller_name') or
-                                parsed_data.get('store_name') or
-                                parsed_data.get('shopName') or
-                                parsed_data.get('seller') or
-                                parsed_data.get('shop') or
-                                None)
-
-                    # 如果店铺名称为空或为默认值，尝试备用方案提取
-                    if not shop_name or shop_name in ["未知店铺", "未知", "", None]:
-                        print("   ⚠️  首次提取店铺名称失败，使用备用方案...")
-                        shop_name = self._extract_shop_name_fallback()
-
-                    if not shop_name:
-                        shop_name = "未知店铺"
-
-                    price_val = (parsed_data.get('price') or
-                                parsed_data.get('价格') or
-                                parsed_data.get('商品价格') or
-                                parsed_data.get('售价'))
-
-                    # 处理价格
-                    price = 0.0
-                    if price_val:
-                        try:
-                            # 尝试从字符串中提取数字
-                            price_str = str(price_val).replace('¥', '').replace('元', '').strip()
-                            price = float(re.findall(r'\d+\.?\d*', price_str)[0])
-                        except (ValueError, IndexError):
-                            print(f"   ⚠️  无法解析价格: {price_val}")
-
-                    description = parsed_data.get('description') or parsed_data.get('商品描述')
-                    ocr_text = parsed_data.get('ocr_text') or parsed_data.get('all_text')
-
-                    product_info = ProductInfo(
-                        title=title,
-                        shop_name=shop_name,
-                        price=price,
-                        description=description,
-                        ocr_text=ocr_text,
-                        platform=self.platform_config['name']
-                    )
-
-                    print(f"✅ 成功提取商品信息:")
-                    print(f"   标题: {title}")
-                    print(f"   店铺: {shop_name}")
-                    print(f"   价格: ¥{price}")
-
-                    return product_info
+                    return self._build_product_info(parsed_data, index)
                 else:
                     print(f"⚠️  模型未返回有效的JSON数据")
 
@@ -376,6 +634,63 @@ class AntiPiracyAgent:
             traceback.print_exc()
             return None
 
+    def _build_product_info(self, parsed_data: Dict, index: int) -> ProductInfo:
+        """
+        根据模型返回的JSON构造商品信息
+
+        店铺名称缺失时才使用备用方案单独提取。
+
+        Args:
+            parsed_data: 解析后的模型响应
+            index: 商品索引(0开始)
+
+        Returns:
+            商品信息对象
+        """
+        # 统一字段名（商品标题/卖家昵称/售价等别名）
+        fields = normalize_fields(parsed_data)
+        title = fields.get('title') or f"未识别商品_{index}"
+        shop_name = fields.get('shop_name')
+
+        # 如果店铺名称为空或为默认值，尝试备用方案提取
+        if not shop_name or shop_name in ["未知店铺", "未知", "", None]:
+            print("   ⚠️  首次提取店铺名称失败，使用备用方案...")
+            shop_name = self._extract_shop_name_fallback()
+
+        if not shop_name:
+            shop_name = "未知店铺"
+
+        price_val = fields.get('price')
+
+        # 处理价格
+        price = 0.0
+        if price_val:
+            try:
+                # 尝试从字符串中提取数字
+                price_str = str(price_val).replace('¥', '').replace('元', '').strip()
+                price = float(_PRICE_PATTERN.findall(price_str)[0])
+            except (ValueError, IndexError):
+                print(f"   ⚠️  无法解析价格: {price_val}")
+
+        description = fields.get('description')
+        ocr_text = fields.get('ocr_text')
+
+        product_info = ProductInfo(
+            title=title,
+            shop_name=shop_name,
+            price=price,
+            description=description,
+            ocr_text=ocr_text,
+            platform=self.platform_config['name']
+        )
+
+        print(f"✅ 成功提取商品信息:")
+        print(f"   标题: {title}")
+        print(f"   店铺: {shop_name}")
+        print(f"   价格: ¥{price}")
+
+        return product_info
+
     def _enter_detail(self, index: int) -> bool:
         """
         进入商品详情页
@@ -386,10 +701,8 @@ class AntiPiracyAgent:
         Returns:
             是否成功
         """
-        task = get_task_prompt("enter_detail", index=index + 1)
-
         try:
-            self.base_agent.run(task)
+            self._run_task("enter_detail", index=index + 1)
             time.sleep(2)  # 等待详情页加载
             return True
         except Exception as e:
@@ -406,8 +719,7 @@ class AntiPiracyAgent:
             店铺名称或None
         """
         try:
-            task = get_task_prompt("extract_shop_name_only")
-            response = self.base_agent.run(task)
+            response = self._run_task("extract_shop_name_only")
 
             if response:
                 # 清理响应，提取纯文本店铺名
@@ -451,10 +763,120 @@ class AntiPiracyAgent:
 
         return result
 
+    def _create_report_pipeline(self) -> ReportPipeline:
+        """
+        根据 REPORT_PIPELINE_CONFIG 创建本次巡查的举报流水线
+
+        Returns:
+            举报流水线
+        """
+        mode = REPORT_PIPELINE_CONFIG.get("mode", "inline")
+        if mode == "device":
+            agent, reporter = self._get_report_device()
+        else:
+            agent, reporter = self.base_agent, self.reporter
+        return ReportPipeline(
+            report_queued=lambda job: self._report_job(job, agent, reporter),
+            report_inline=self._report_job,
+            on_drop=self._drop_report_job,
+            mode=mode,
+            queue_size=REPORT_PIPELINE_CONFIG.get("queue_size", 20),
+            backpressure=REPORT_PIPELINE_CONFIG.get("backpressure", "block"),
+            name="report-worker"
+        )
+
+    def _get_report_device(self) -> Tuple:
+        """
+        创建(或复用)第二台设备上的举报 Agent 和举报器
+
+        Returns:
+            (PhoneAgent, 举报器)
+        """
+        if self._report_device is None:
+            device_id = REPORT_PIPELINE_CONFIG.get("report_device_id")
+            if not device_id:
+                raise ValueError("device 举报方式需要配置 REPORT_PIPELINE_CONFIG['report_device_id']")
+            agent = PhoneAgent(
+                model_config=self.model_config,
+                agent_config=AgentConfig(max_steps=AGENT_CONFIG["max_steps"], device_id=device_id, verbose=True)
+            )
+            if self.model_pool is not None:
+                attach_pool(agent, self.model_pool)
+            reporter = create_reporter(
+                platform=self.platform,
+                agent=agent,
+                report_manager=self.report_manager,
+                screenshot_dir=self.screenshot_dir,
+                guard=self.report_guard,
+                response_cache=self.response_cache
+            )
+            self._report_device = (agent, reporter)
+            print(f"📱 举报设备: {device_id}")
+        return self._report_device
+
+    def _report_job(self, job: ReportJob, agent=None, reporter=None) -> bool:
+        """
+        举报一个商品
+
+        Args:
+            job: 待举报的商品
+            agent: 执行举报的 PhoneAgent,指定时先在该设备上重新打开商品详情页;
+                为 None 时在浏览设备的当前页面上举报
+            reporter: 该设备对应的举报器
+
+        Returns:
+            是否举报成功
+        """
+        product_info = job.product_info
+        try:
+            if agent is not None:
+                print(f"\n📂 重新打开待举报商品: {product_info.title}")
+                try:
+                    agent.run(get_task_prompt(
+                        "open_listing",
+                        platform=self.platform_config['name'],
+                        title=product_info.title,
+                        shop_name=product_info.shop_name,
+                        price=product_info.price
+                    ))
+                except Exception as e:
+                    print(f"❌ 打开商品详情页失败: {e}")
+                    return False
+
+            success = self._report_piracy(product_info, job.detection_result, reporter)
+            if success:
+                with self._session_lock:
+                    self.current_session["reported_count"] += 1
+            return success
+        finally:
+            self._finish_pending_report(product_info)
+
+    def _drop_report_job(self, job: ReportJob, reason: str = "举报队列已满,未提交") -> None:
+        """
+        记为待处理的举报,留待人工或下次处理
+
+        Args:
+            job: 未举报的商品
+            reason: 记录在举报状态中的原因(举报队列已满、巡查中断等)
+        """
+        product_info = job.product_info
+        report = self.report_manager.create_report(
+            platform=product_info.platform,
+            target_title=product_info.title,
+            target_shop=product_info.shop_name,
+            target_price=product_info.price,
+            detection_result=job.detection_result.to_dict(),
+            target_url=product_info.url
+        )
+        self.report_manager.update_status(report.report_id, "pending", reason)
+        print(f"⏭️  {reason},记为待处理: {report.report_id}")
+        self._finish_pending_report(product_info)
+
     def _report_piracy(
         self,
         product_info: ProductInfo,
-        detection_result: DetectionResult
+        detection_result: DetectionResult,
+        reporter=None
     ) -> bool:
         """
         举报盗版商品
@@ -469,12 +891,24 @@ class AntiPiracyAgent:
         Args:
             product_info: 商品信息
             detection_result: 检测结果
+            reporter: 执行举报的举报器,默认为浏览设备的举报器
 
         Returns:
             是否举报成功
         """
         print(f"\n📢 执行举报操作...")
 
+        # 窗口期内已举报过的店铺/商品不再创建举报记录
+        if self.report_guard is not None:
+            duplicate_reason = self.report_guard.check(
+                product_info.platform, product_info.shop_name, product_info.title
+            )
+            if duplicate_reason:
+                print(f"⏭️  跳过重复举报: {duplicate_reason}")
+                with self._session_lock:
+                    self.current_session["duplicate_skipped"] += 1
+                return False
+
         # 创建举报记录
         report = self.report_manager.create_report(
             platform=product_info.platform,
@@ -500,7 +934,7 @@ class AntiPiracyAgent:
 
         # 使用举报器执行举报流程
         try:
-            success = self.reporter.execute_report(context)
+            success = (reporter or self.reporter).execute_report(context)
 
             if success:
                 # 更新举报状态
@@ -516,6 +950,7 @@ class AntiPiracyAgent:
                         report.report_id,
                         context.screenshot_path
                     )
+                    self._record_evidence(context.screenshot_path)
 
                 print(f"✅ 举报成功! (举报ID: {report.report_id})")
                 return True
@@ -569,10 +1004,8 @@ class AntiPiracyAgent:
         Returns:
             是否成功
         """
-        task = get_task_prompt("back_to_list")
-
         try:
-            self.base_agent.run(task)
+            self._run_task("back_to_list")
             time.sleep(1)
             return True
         except Exception as e:
@@ -601,7 +1034,7 @@ class AntiPiracyAgent:
         """
         解析模型返回的JSON响应
 
-        支持多种JSON格式：
+        支持多种JSON格式（单次扫描，见 response_parser.extract_json）：
         1. 纯JSON: {"key": "value"}
         2. 代码块: ```json {...} ```
         3. 嵌套在文本中的JSON
@@ -616,78 +1049,23 @@ class AntiPiracyAgent:
             print("   ⚠️  模型响应为空")
             return None
 
-        # 打印原始响应的前200个字符用于调试
-        print(f"   🔍 原始响应预览: {response[:200]}...")
-
-        try:
-            # 方法1: 直接解析JSON
-            result = json.loads(response)
-            print("   ✅ 使用方法1解析成功（直接JSON）")
-            return result
-        except json.JSONDecodeError as e:
-            print(f"   ⚠️  方法1失败: {str(e)[:50]}")
-
-        try:
-            # 方法2: 查找JSON代码块
-            # 匹配 ```json ... ``` 或 ``` ... ```
-            json_pattern = r'```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```'
-            matches = re.findall(json_pattern, response, re.DOTALL)
-            if matches:
-                result = json.loads(matches[0])
-                print("   ✅ 使用方法2解析成功（代码块）")
-                return result
-        except (json.JSONDecodeError, IndexError) as e:
-            print(f"   ⚠️  方法2失败: {str(e)[:50]}")
-
-        try:
-            # 方法3: 查找嵌套的JSON对象（支持嵌套花括号）
-            # 更强大的正则，支持嵌套
-            json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-            matches = re.findall(json_pattern, response, re.DOTALL)
-            if matches:
-                # 尝试最长的匹配（通常是完整的JSON）
-                matches_sorted = sorted(matches, key=len, reverse=True)
-                for match in matches_sorted:
-                    try:
-                        result = json.loads(match)
-                        print("   ✅ 使用方法3解析成功（嵌套JSON）")
-                        return result
-                    except json.JSONDecodeError:
-                        continue
-        except Exception as e:
-            print(f"   ⚠️  方法3失败: {str(e)[:50]}")
-
-        try:
-            # 方法4: 查找简单的JSON对象（无嵌套）
-            json_pattern = r'(\{[^{}]+\})'
-            matches = re.findall(json_pattern, response, re.DOTALL)
-            if matches:
-                for match in matches:
-                    try:
-                        result = json.loads(match)
-                        print("   ✅ 使用方法4解析成功（简单JSON）")
-                        return result
-                    except json.JSONDecodeError:
-                        continue
-        except Exception as e:
-            print(f"   ⚠️  方法4失败: {str(e)[:50]}")
-
-        # 所有方法都失败
-        print(f"   ❌ 所有解析方法均失败")
-        print(f"   完整响应: {response}")
-        return None
+        result = extract_json(response)
+        if result is None:
+            print(f"   ❌ 模型响应中没有有效的JSON")
+            print(f"   完整响应: {response}")
+        return result
 
-    def _generate_patrol_report(self) -> str:
+    def _write_patrol_report(self, out: TextIO) -> None:
         """
-        生成巡查报告
+        生成巡查报告并写入 out(逐条读取结果文件,不把全部结果载入内存)
 
-        Returns:
-            报告文本
+        Args:
+            out: 输出流
         """
         session = self.current_session
         duration = (datetime.now() - session["start_time"]).total_seconds() if session["start_time"] else 0
 
-        report = f"""
+        out.write(f"""
 ╔══════════════════════════════════════════════════╗
 ║           反盗版巡查报告                          ║
 ╚══════════════════════════════════════════════════╝
@@ -697,25 +1075,36 @@ class AntiPiracyAgent:
 🔍 检查商品数: {session['checked_count']}
 ❌ 发现疑似盗版: {session['piracy_count']}
 📢 已举报数: {session['reported_count']}
+⏭️  跳过重复举报: {session.get('duplicate_skipped', 0)}
+📥 举报队列: {self._format_queue_stats(session.get('report_queue'))}
 
 ╔══════════════════════════════════════════════════╗
 ║           检测结果详情                            ║
 ╚══════════════════════════════════════════════════╝
-"""
+""")
 
-        for i, result in enumerate(session["results"], 1):
+        for i, result in enumerate(iter_results(session.get("results_path")), 1):
             product = result["product_info"]
             detection = result["detection_result"]
 
-            report += f"""
-[{i}] {product.title}
-    店铺: {product.shop_name}
-    价格: ¥{product.price}
-    结果: {'🚨 疑似盗版' if detection.is_piracy else '✅ 正常'}
-    置信度: {detection.confidence:.0%}
-"""
-
-        return report
+            out.write(f"""
+[{i}] {product.get('title')}
+    店铺: {product.get('shop_name')}
+    价格: ¥{product.get('price')}
+    结果: {'🚨 疑似盗版' if detection.get('is_piracy') else '✅ 正常'}
+    置信度: {detection.get('confidence', 0):.0%}
+""")
+
+    @staticmethod
+    def _format_queue_stats(stats: Optional[Dict]) -> str:
+        """格式化举报队列统计"""
+        if not stats:
+            return "N/A"
+        return (
+            f"{stats['mode']} 方式, 入队 {stats['enqueued']}, 立即举报 {stats['inline']}, "
+            f"丢弃 {stats['dropped']}, 最大深度 {stats['max_depth']}/{stats['capacity']}, "
+            f"平均等待 {stats['avg_wait_seconds']:.1f} 秒"
+        )
 
     def add_genuine_product(self, product: GenuineProduct) -> bool:
         """
@@ -739,7 +1128,10 @@ class AntiPiracyAgent:
         return {
             "session": self.current_session,
             "database_stats": self.product_db.get_stats(),
-            "report_stats": self.report_manager.get_statistics()
+            "report_stats": self.report_manager.get_statistics(),
+            "response_cache_stats": self.response_cache.get_statistics() if self.response_cache else None,
+            "report_queue_stats": self.report_pipeline.get_stats() if self.report_pipeline else None,
+            "model_pool_stats": self.model_pool.get_stats() if self.model_pool else None
         }
 
 
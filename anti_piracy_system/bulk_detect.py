@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+离线批量检测脚本
+
+从 JSONL 文件(或标准输入)读取已归档的商品信息(ProductInfo),
+使用进程池并行检测,并按输入顺序以 JSONL 格式流式输出检测结果。
+无需连接手机,适用于阈值或正版商品库变更后重新评估历史商品。
+
+使用方法:
+    python bulk_detect.py listings.jsonl -o results.jsonl
+    cat listings.jsonl | python bulk_detect.py --workers 4 > results.jsonl
+
+输入格式(每行一个 JSON 对象,字段同 ProductInfo):
+    {"title": "众合法考客观题学习包", "shop_name": "某个人卖家", "price": 99.0, "platform": "小红书"}
+
+输出格式(每行一个 JSON 对象):
+    {"line": 1, "product_info": {...}, "detection_result": {...}}
+    解析或检测失败的行输出 {"line": 1, "error": "..."}
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 添加项目根目录到路径,以包方式导入反盗版系统模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_piracy_system.product_database import create_product_database
+from anti_piracy_system.piracy_detector import PiracyDetector, ProductInfo
+from anti_piracy_system.config_anti_piracy import PATHS, DETECTOR_CONFIG
+
+
+# 每个工作进程持有的检测器(在进程初始化时加载一次)
+_worker_detector: Optional[PiracyDetector] = None
+
+
+def _init_worker(
+    db_path: str,
+    price_threshold: float,
+    similarity_threshold: float,
+    profile: bool = False
+) -> None:
+    """
+    工作进程初始化: 加载一次正版商品库并创建检测器
+
+    Args:
+        db_path: 正版商品数据库路径
+        price_threshold: 价格阈值
+        similarity_threshold: 内容相似度阈值
+        profile: 是否记录各阶段耗时和匹配方法
+    """
+    global _worker_detector
+    # 数据库加载信息输出到 stderr,避免污染 stdout 上的 JSONL 结果
+    with contextlib.redirect_stdout(sys.stderr):
+        product_db = create_product_database(db_path)
+    _worker_detector = PiracyDetector(
+        product_db,
+        price_threshold=price_threshold,
+        similarity_threshold=similarity_threshold,
+        profile=profile,
+        confidence_threshold=DETECTOR_CONFIG["confidence_threshold"],
+        rules=DETECTOR_CONFIG.get("rules"),
+        official_confidence=DETECTOR_CONFIG.get("official_confidence", 0.9)
+    )
+
+
+def _detect_line(line_no: int, line: str) -> Dict:
+    """
+    检测单行输入
+
+    Args:
+        line_no: 行号(从1开始)
+        line: JSON 文本
+
+    Returns:
+        输出记录
+    """
+    try:
+        product_info = ProductInfo.from_dict(json.loads(line))
+        result = _worker_detector.detect(product_info)
+        return {
+            "line": line_no,
+            "product_info": product_info.to_dict(),
+            "detection_result": result.to_dict()
+        }
+    except Exception as e:
+        return {"line": line_no, "error": f"{type(e).__name__}: {e}"}
+
+
+def _detect_chunk(chunk: List[Tuple[int, str]]) -> List[Tuple[str, str]]:
+    """
+    检测一批输入行,返回序列化后的输出行
+
+    Args:
+        chunk: (行号, JSON 文本) 列表
+
+    Returns:
+        (状态, JSONL 输出行) 列表,状态为 piracy/normal/error
+    """
+    outputs = []
+    for line_no, line in chunk:
+        record = _detect_line(line_no, line)
+        if "error" in record:
+            status = "error"
+        elif record["detection_result"]["is_piracy"]:
+            status = "piracy"
+        else:
+            status = "normal"
+        outputs.append((status, json.dumps(record, ensure_ascii=False)))
+    return outputs
+
+
+def _iter_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """将输入行按 chunk_size 分批,跳过空行"""
+    chunk: List[Tuple[int, str]] = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        chunk.append((line_no, line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_detections(
+    lines: Iterable[str],
+    db_path: str = PATHS["product_database"],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    max_pending: Optional[int] = None,
+    price_threshold: float = DETECTOR_CONFIG["price_threshold"],
+    similarity_threshold: float = DETECTOR_CONFIG["similarity_threshold"],
+    profile: bool = False
+) -> Iterator[Tuple[str, str]]:
+    """
+    流式批量检测
+
+    输入按 chunk_size 分批提交到进程池,同时在途的批次数不超过 max_pending,
+    结果按输入顺序逐行产出,内存占用与输入总量无关。
+
+    Args:
+        lines: JSONL 输入行
+        db_path: 正版商品数据库路径
+        workers: 工作进程数,0 表示在当前进程内检测,None 表示 CPU 核数
+        chunk_size: 每个批次的行数
+        max_pending: 最多在途批次数,默认 workers * 4
+        price_threshold: 价格阈值
+        similarity_threshold: 内容相似度阈值
+        profile: 是否在结果中记录各阶段耗时和匹配方法
+
+    Yields:
+        (状态, JSONL 输出行) - 状态为 piracy/normal/error,输出行不含换行符
+    """
+    init_args = (db_path, price_threshold, similarity_threshold, profile)
+    chunks = _iter_chunks(lines, chunk_size)
+
+    if workers == 0:
+        _init_worker(*init_args)
+        for chunk in chunks:
+            yield from _detect_chunk(chunk)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=init_args
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_detect_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="离线批量盗版检测(JSONL 输入/输出)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  # 从文件读取,结果写入文件
+  python bulk_detect.py listings.jsonl -o results.jsonl
+
+  # 从标准输入读取,使用 4 个工作进程
+  cat listings.jsonl | python bulk_detect.py --workers 4 > results.jsonl
+
+  # 调整阈值后重新评估
+  python bulk_detect.py listings.jsonl --price-threshold 0.5
+        """
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="JSONL 输入文件,'-' 表示标准输入(默认)"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default="-",
+        help="JSONL 输出文件,'-' 表示标准输出(默认)"
+    )
+    parser.add_argument(
+        "--db",
+        default=PATHS["product_database"],
+        help="正版商品数据库路径(.json 或 .db)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="工作进程数(默认 CPU 核数, 0 表示不使用进程池)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="每个批次的行数"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="最多在途批次数(默认 workers * 4)"
+    )
+    parser.add_argument(
+        "--price-threshold",
+        type=float,
+        default=DETECTOR_CONFIG["price_threshold"],
+        help="价格阈值"
+    )
+    parser.add_argument(
+        "--similarity-threshold",
+        type=float,
+        default=DETECTOR_CONFIG["similarity_threshold"],
+        help="内容相似度阈值"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="在结果中记录各阶段耗时、匹配方法和候选商品数"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    args = parse_args(argv)
+
+    infile = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    total = 0
+    piracy_count = 0
+    error_count = 0
+    start = time.time()
+
+    try:
+        for status, out_line in iter_detections(
+            infile,
+            db_path=args.db,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_pending=args.max_pending,
+            price_threshold=args.price_threshold,
+            similarity_threshold=args.similarity_threshold,
+            profile=args.profile
+        ):
+            outfile.write(out_line + "\n")
+            total += 1
+            if status == "error":
+                error_count += 1
+            elif status == "piracy":
+                piracy_count += 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    elapsed = time.time() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(
+        f"✅ 批量检测完成: {total} 条, 疑似盗版 {piracy_count} 条, 失败 {error_count} 条, "
+        f"耗时 {elapsed:.1f} 秒 ({rate:.0f} 条/秒)",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+紧凑记录类型模块
+
+长时间运行的后台持有大量正版商品和举报记录,普通 dataclass 每个实例都带一个 __dict__,
+ISO 时间字符串、店铺名、平台名、状态等重复字符串各占一份内存。本模块提供:
+
+1. CompactRecord: 使用 __slots__ 的记录基类,按 _fields 提供 to_dict/from_dict/__eq__/__repr__
+2. intern_text / intern_strings: 驻留重复出现的短字符串,相同的字符串列表共享同一个元组
+3. pack_timestamp / unpack_timestamp: ISO 时间字符串与整数(微秒)互相转换,
+   无法无损转换的格式(带时区、只有日期等)原样保留字符串
+
+to_dict 的输出与原 dataclass 的 asdict 相同(列表字段输出列表,时间输出 ISO 字符串)。
+"""
+
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# 相同字符串列表(如多个商品共用的官方店铺列表)共享同一个元组
+_shared_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_SHARED_TUPLES_LIMIT = 100000
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    """驻留字符串(店铺名、平台、状态等取值有限的字段),None 原样返回"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_strings(values: Optional[Iterable[str]], share: bool = False) -> Tuple[str, ...]:
+    """
+    将字符串列表转换为驻留字符串组成的元组
+
+    Args:
+        values: 字符串列表,None 视为空列表
+        share: 是否与内容相同的其他元组共享同一个对象(适合重复率高的字段,如官方店铺)
+
+    Returns:
+        字符串元组
+    """
+    if not values:
+        return ()
+    result = tuple(intern_text(value) for value in values)
+    if share:
+        shared = _shared_tuples.get(result)
+        if shared is not None:
+            return shared
+        if len(_shared_tuples) < _SHARED_TUPLES_LIMIT:
+            _shared_tuples[result] = result
+    return result
+
+
+def pack_timestamp(value: Union[str, int, None]) -> Union[str, int, None]:
+    """
+    将 datetime.isoformat() 生成的本地时间字符串转换为整数微秒
+
+    Args:
+        value: ISO 时间字符串(或已转换的整数)
+
+    Returns:
+        整数微秒;无法无损还原为原字符串时返回原值
+    """
+    if type(value) is not str or not _is_isoformat_shape(value):
+        return value
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if (len(value) == 26) != (moment.microsecond != 0):
+        # isoformat() 在微秒为 0 时省略小数部分
+        return value
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _is_isoformat_shape(value: str) -> bool:
+    """是否为 isoformat() 输出的形状 YYYY-MM-DDTHH:MM:SS[.ffffff](比重新格式化后比较快得多)"""
+    length = len(value)
+    return (
+        (length == 19 or (length == 26 and value[19] == "."))
+        and value[4] == "-" and value[7] == "-" and value[10] == "T"
+        and value[13] == ":" and value[16] == ":"
+    )
+
+
+def unpack_timestamp(value: Union[str, int, None]) -> Optional[str]:
+    """将 pack_timestamp 的结果还原为 ISO 时间字符串"""
+    if type(value) is int:
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+    return value
+
+
+def _plain(value: Any) -> Any:
+    """递归复制为 JSON 友好的普通对象(元组输出为列表),与 asdict 一样不共享可变对象"""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+class CompactRecord:
+    """
+    __slots__ 记录基类
+
+    子类声明 _fields(公开字段名,顺序与构造函数参数一致)和 __slots__,
+    在 __init__ 中完成字符串驻留、列表转元组和时间转整数。
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return {name: _plain(getattr(self, name)) for name in self._fields}
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """从字典创建对象"""
+        return cls(**data)
+
+    def _values(self) -> Tuple:
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None  # 与 dataclass 一致: 可变记录不可哈希
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{self.__class__.__name__}({args})"
@@ -10,8 +10,14 @@ from typing import Dict, List
 
 # 文件路径配置
 PATHS = {
+    # 正版商品数据库: .json 为 JSON 文件; 改为 .db 使用带索引的 SQLite,首次打开时自动迁移同名 .json
     "product_database": "data/genuine_products.json",
     "report_log": "logs/report_history.json",
+    "report_guard": "data/report_guard.db",  # 重复举报防护索引(同名 .bloom 为布隆过滤器)
+    "response_cache": "data/response_cache.db",  # 模型响应缓存
+    "patrol_checkpoint": "data/patrol_checkpoint.json",  # 巡查断点(--resume 续查),实际文件按平台+关键词区分
+    "keyword_stats": "data/keyword_stats.json",  # 各平台关键词的累计盗版率(多关键词巡查分配预算)
+    "patrol_results_dir": "logs/patrol_results",  # 每次巡查的检测结果(JSONL,逐条写入)
     "screenshots_dir": "screenshots",
     "temp_dir": "temp"
 }
@@ -20,7 +26,44 @@ PATHS = {
 DETECTOR_CONFIG = {
     "price_threshold": 0.7,  # 价格阈值,低于原价70%触发警告
     "similarity_threshold": 0.6,  # 内容相似度阈值
-    "confidence_threshold": 0.7  # 判定为盗版的置信度阈值
+    "confidence_threshold": 0.7,  # 判定为盗版的置信度阈值
+    "profile": False,  # 是否在检测结果中记录各阶段耗时和匹配方法
+    "official_confidence": 0.9,  # 官方店铺判定为正版时的置信度
+    # 检测规则流水线: 按 cost 从低到高执行,可疑时累加 weight 到置信度,
+    # 结果确定后跳过剩余规则
+    "rules": [
+        {"name": "shop", "weight": 0.4, "cost": 1},  # 店铺不在官方授权列表
+        {"name": "price", "weight": 0.4, "cost": 1},  # 价格低于原价阈值
+        {"name": "content", "weight": 0.2, "cost": 10}  # 内容与正版高度相似(最昂贵)
+    ]
+}
+
+# 举报记录日志配置
+REPORT_LOG_CONFIG = {
+    "fsync_policy": "always",  # 日志刷盘策略: always(每条fsync)/interval(按间隔)/never(交给操作系统)
+    "fsync_interval": 1.0,  # interval 策略下两次 fsync 的最小间隔(秒)
+    "compact_threshold": 1000,  # 日志累计多少条事件后在后台合并为快照
+    "durability": "sync",  # 持久化策略: sync(每次修改同步写日志)/write_behind(后台批量写入,崩溃可能丢失最近的修改)
+    "flush_interval": 1.0,  # write_behind 策略下两次批量写入的最长间隔(秒)
+    "max_batch": 100,  # write_behind 策略下待写事件达到该数量时立即写入
+    "snapshot_cache": True  # 快照文件未变化时从二进制快照(.snapshot)加载记录和索引,跳过 JSON 解析
+}
+
+# 正版商品数据库持久化配置
+PRODUCT_DB_CONFIG = {
+    "durability": "sync",  # sync(每次修改后保存)/write_behind(后台合并保存)
+    "flush_interval": 2.0,  # write_behind 策略下两次保存的最长间隔(秒)
+    "max_batch": 500,  # write_behind 策略下累计多少次修改后立即保存
+    "snapshot_cache": True  # 文件未变化时从二进制快照(.snapshot)加载,跳过 JSON 解析(仅 JSON 文件)
+}
+
+# 重复举报防护配置
+REPORT_GUARD_CONFIG = {
+    "enabled": True,
+    "shop_window_days": 7,  # 同一店铺再次举报的最短间隔(天),0 表示不按店铺去重,None 表示永不重复举报
+    "listing_window_days": 30,  # 同一商品再次举报的最短间隔(天),含义同上
+    "capacity": 100000,  # 布隆过滤器预期元素数
+    "error_rate": 0.01  # 布隆过滤器误判率(误判只会多查一次磁盘索引)
 }
 
 # Agent 配置
@@ -29,7 +72,55 @@ AGENT_CONFIG = {
     "scroll_count": 5,  # 滚动浏览的最大次数
     "item_check_limit": 10,  # 每次运行检查的最大商品数
     "wait_after_action": 2.0,  # 操作后等待时间(秒)
-    "screenshot_interval": 1.0  # 截图间隔(秒)
+    "screenshot_interval": 1.0,  # 截图间隔(秒)
+    "extraction_mode": "combined"  # 商品信息提取方式: combined(进入详情并提取,一次模型任务)/separate(进入详情、提取分两次)
+}
+
+# 模型响应缓存配置: 相同屏幕、相同提示词的只读提取任务直接返回上次的响应
+RESPONSE_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 5000,  # 最多保留的缓存条数,超出后淘汰最久未使用的条目
+    # 可缓存的任务(TASK_PROMPTS 键名)及有效期(秒),None 表示不过期。
+    # 只能列出在详情页上执行的只读提取任务(以详情页截图为键);进入详情、返回、滚动、举报等操作任务
+    # 必须真正执行,enter_and_extract 执行前的屏幕是列表页,无法确认进入的详情页与缓存一致,也不要加入
+    "tasks": {
+        "extract_info": 7 * 86400,
+        "extract_shop_name_only": 7 * 86400
+    }
+}
+
+# 举报流水线配置: 浏览阶段把检测出的盗版商品放入有界队列,举报阶段从队列取出执行
+REPORT_PIPELINE_CONFIG = {
+    "mode": "inline",  # inline(浏览设备上立即举报)/deferred(巡查结束后批量举报)/device(第二台设备并行举报)
+    "queue_size": 20,  # 举报队列容量
+    "backpressure": "block",  # 队列满时: block(等待;deferred 方式下按 drop 处理)/inline(立即在浏览设备上举报)/drop(记为待处理)
+    "report_device_id": None  # device 方式下举报设备的 ID(需登录同一账号)
+}
+
+# 模型服务连接池配置(同一进程内的巡查任务、举报设备共用)
+MODEL_POOL_CONFIG = {
+    "enabled": True,  # 模型请求走共享连接池;关闭时每个 PhoneAgent 使用自带的客户端
+    "max_connections": 8,  # 保留的空闲 keep-alive 连接数
+    "max_concurrency": 4,  # 全局同时进行的模型请求数,超出的请求排队
+    "max_retries": 3,  # 502/503/504 及连接错误的重试次数
+    "backoff_base": 0.5,  # 重试退避基准(秒),第 n 次重试等待 [0, base*2^n] 内的随机时间
+    "backoff_max": 8.0,  # 单次退避上限(秒)
+    "timeout": 120  # 单次请求超时(秒)
+}
+
+# 多关键词巡查调度配置
+KEYWORD_SCHEDULER_CONFIG = {
+    "min_items": 2,  # 每个关键词至少检查的商品数(保持探索)
+    "window": 5,  # 收益递减检测窗口(一页商品数,与滚动间隔一致)
+    "min_new": 1,  # 窗口内新商品少于该数时提前结束关键词
+    "prior_hits": 1.0,  # 盗版率 Beta 先验: 新关键词视为 5 个商品中有 1 个盗版
+    "prior_misses": 4.0,
+    "thompson": True  # Thompson 采样分配(否则按后验均值,分配结果固定)
+}
+
+# 巡查断点配置
+PATROL_CHECKPOINT_CONFIG = {
+    "enabled": True  # 每处理完一个商品写入断点,巡查中断后可用 --resume 从断点继续
 }
 
 # 支持的平台配置
@@ -162,6 +253,44 @@ TASK_PROMPTS = {
 - shop_name 是最关键的字段，必须准确提取
 - 店铺名通常在圆形头像旁边，不是商品标题
 - price 只需数字，不要带¥符号
+""",
+
+    # 进入商品详情并提取信息(合并模式: 一次任务完成导航和提取)
+    "enter_and_extract": """
+请完成以下任务，完成后直接给出结果：
+1. 在当前搜索结果列表中点击第{index}个商品/笔记，进入详情页
+2. 等待详情页加载完成，不要点击"进店"、"购买"、"举报"等其他按钮
+3. 识别详情页上的店铺名称、商品标题、价格和描述
+
+【店铺名称识别】
+- 位于商品图片下方、商品标题附近，小圆形头像右边的文字就是店铺名/卖家昵称
+- 可能显示为"XXX的店"、"XXX旗舰店"或纯账号名，也可能在"进店"按钮旁边
+
+【输出约定】任务结束时的回复只包含一个JSON对象，不要任何其他文字：
+
+```json
+{{
+  "status": "ok",
+  "shop_name": "店铺名称（头像旁边的文字）",
+  "title": "商品标题",
+  "price": 898.0,
+  "description": "商品描述"
+}}
+```
+
+- status: 成功进入详情页为 "ok"；第{index}个商品不存在或无法打开为 "not_found"，其他字段填 null
+- 页面上找不到的字段填 null，不要猜测
+- price 只需数字，不要带¥符号
+""",
+
+    # 重新打开待举报的商品(延迟举报、第二台设备举报)
+    "open_listing": """
+请打开以下商品的详情页，准备举报：
+1. 如果{platform}应用未打开，先启动应用
+2. 在搜索框中搜索: "{title}"
+3. 如果有"商品"标签，切换到商品标签
+4. 在搜索结果中找到店铺为"{shop_name}"、价格约¥{price}的商品，点击进入详情页
+5. 停留在详情页，不要进行其他操作
 """,
 
     # 执行举报
@@ -0,0 +1,119 @@
+"""
+跨进程文件锁模块
+
+api_server 以子进程运行 test/test_detection.py,backend 的任务线程运行 AntiPiracyAgent,
+它们共享 logs/report_history.json 和 data/genuine_products.json。FileLock 在数据文件旁
+的 .lock 文件上加排他锁(POSIX 使用 fcntl.flock,Windows 使用 msvcrt.locking),
+同一进程内可重入,也可以代替 threading.RLock 保护进程内的共享状态。
+
+锁文件内容是一个版本号: 持锁方替换或改名共享文件后调用 bump_generation() 递增,
+其他进程比较版本号即可判断文件是否被替换。文件被删除重建后 inode 可能被复用、
+修改时间精度也有限,因此不用 (inode, 大小, 修改时间) 判断。
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class FileLock:
+    """可重入的跨进程排他锁"""
+
+    def __init__(self, path: str):
+        """
+        初始化文件锁(首次加锁时才创建锁文件)
+
+        Args:
+            path: 锁文件路径
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        """加锁,其他进程持有锁时阻塞等待"""
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        """解锁(与 acquire 成对调用)"""
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._thread_lock.release()
+
+    def _open(self) -> int:
+        if self._fd is None:
+            lock_dir = os.path.dirname(self.path)
+            if lock_dir:
+                os.makedirs(lock_dir, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _lock_file(self) -> None:
+        self._open()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def generation(self) -> int:
+        """
+        读取锁文件中的版本号(持有锁时调用)
+
+        Returns:
+            版本号,锁文件为空时为 0
+        """
+        fd = self._open()
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = os.read(fd, 32).strip()
+        return int(raw) if raw.isdigit() else 0
+
+    def bump_generation(self) -> int:
+        """
+        递增锁文件中的版本号(持有锁时调用)
+
+        Returns:
+            递增后的版本号
+        """
+        generation = self.generation() + 1
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, str(generation).encode("ascii"))
+        return generation
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def close(self) -> None:
+        """关闭锁文件描述符"""
+        with self._thread_lock:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
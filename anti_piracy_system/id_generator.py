@@ -0,0 +1,152 @@
+"""
+全局唯一 ID 生成模块
+
+举报记录和巡查任务的 ID 原先由秒级时间戳加当前记录数拼成,多个 Agent 或多台设备
+写入同一存储时会重复并互相覆盖。本模块生成按时间排序的 128 位 ID:
+
+    | 48 位毫秒时间戳 | 16 位节点号 | 64 位序列号 |
+
+- 时间戳: 启动时的墙上时间加单调时钟的流逝时间,进程内不会回退
+- 节点号: 由主机名、进程号和设备号哈希得到,也可以通过环境变量 ANTI_PIRACY_NODE_ID 指定
+- 序列号: 进程内 itertools.count 计数器(由 GIL 保证原子递增,无需加锁),起点随机,
+  节点号相同的两个进程在同一毫秒也不会产生相同的序列号
+
+ID 以 26 位 Crockford Base32 编码(与 ULID 相同的字母表),字符串顺序即时间顺序,
+可以直接作为日志和索引的聚簇键做范围扫描。
+"""
+
+import hashlib
+import itertools
+import os
+import random
+import socket
+import time
+from datetime import datetime
+from typing import Optional, Union
+
+# Crockford Base32 字母表,按 ASCII 升序排列,保证字符串顺序与数值顺序一致
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: index for index, char in enumerate(_ALPHABET)}
+_ENCODED_LENGTH = 26
+
+_TIMESTAMP_BITS = 48
+_NODE_BITS = 16
+_SEQUENCE_BITS = 64
+_NODE_MASK = (1 << _NODE_BITS) - 1
+_SEQUENCE_MASK = (1 << _SEQUENCE_BITS) - 1
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(_ENCODED_LENGTH):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _decode(text: str) -> int:
+    value = 0
+    for char in text.upper():
+        value = (value << 5) | _DECODE[char]
+    return value
+
+
+def _default_node(device_id: Optional[str] = None) -> int:
+    """根据环境变量或主机名、进程号、设备号生成节点号"""
+    configured = os.environ.get("ANTI_PIRACY_NODE_ID")
+    if configured:
+        return int(configured) & _NODE_MASK
+    source = f"{socket.gethostname()}|{os.getpid()}|{device_id or ''}"
+    return int.from_bytes(hashlib.blake2b(source.encode("utf-8"), digest_size=2).digest(), "big")
+
+
+class IdGenerator:
+    """按时间排序的 128 位 ID 生成器"""
+
+    def __init__(self, node: Optional[Union[int, str]] = None):
+        """
+        初始化 ID 生成器
+
+        Args:
+            node: 节点号(整数)或设备标识(字符串),默认由主机名和进程号生成
+        """
+        if isinstance(node, int):
+            self.node = node & _NODE_MASK
+        else:
+            self.node = _default_node(node)
+        self._epoch_ms = time.time_ns() // 1_000_000
+        self._monotonic_start = time.monotonic_ns()
+        self._sequence = itertools.count(random.getrandbits(_SEQUENCE_BITS - 2))
+
+    def _now_ms(self) -> int:
+        return self._epoch_ms + (time.monotonic_ns() - self._monotonic_start) // 1_000_000
+
+    def next_int(self) -> int:
+        """生成下一个 128 位整数 ID"""
+        sequence = next(self._sequence) & _SEQUENCE_MASK
+        timestamp = self._now_ms() & ((1 << _TIMESTAMP_BITS) - 1)
+        return (timestamp << (_NODE_BITS + _SEQUENCE_BITS)) | (self.node << _SEQUENCE_BITS) | sequence
+
+    def next_id(self, prefix: str = "") -> str:
+        """
+        生成下一个字符串 ID
+
+        Args:
+            prefix: ID 前缀,如 "report" 生成 "report_01J..."
+
+        Returns:
+            可按字符串排序的 ID
+        """
+        encoded = _encode(self.next_int())
+        return f"{prefix}_{encoded}" if prefix else encoded
+
+
+def id_timestamp(id_str: str) -> Optional[datetime]:
+    """
+    解析 ID 中的生成时间
+
+    Args:
+        id_str: next_id 生成的 ID
+
+    Returns:
+        生成时间,旧格式 ID 返回None
+    """
+    encoded = id_str.rsplit("_", 1)[-1]
+    if len(encoded) != _ENCODED_LENGTH or any(char not in _DECODE for char in encoded.upper()):
+        return None
+    timestamp_ms = _decode(encoded) >> (_NODE_BITS + _SEQUENCE_BITS)
+    return datetime.fromtimestamp(timestamp_ms / 1000)
+
+
+def id_lower_bound(moment: datetime, prefix: str = "") -> str:
+    """
+    生成某一时刻之后所有 ID 的下界,用于按时间范围扫描
+
+    Args:
+        moment: 起始时间
+        prefix: ID 前缀
+
+    Returns:
+        不大于该时刻之后生成的任何 ID 的字符串
+    """
+    timestamp_ms = int(moment.timestamp() * 1000)
+    encoded = _encode(timestamp_ms << (_NODE_BITS + _SEQUENCE_BITS))
+    return f"{prefix}_{encoded}" if prefix else encoded
+
+
+_default_generator = IdGenerator()
+
+
+def _reset_default_generator() -> None:
+    """fork 出的子进程重新生成节点号和序列号起点,避免与父进程及兄弟进程重复"""
+    global _default_generator
+    _default_generator = IdGenerator()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_default_generator)
+
+
+def new_id(prefix: str = "") -> str:
+    """使用进程内共享的生成器生成 ID"""
+    return _default_generator.next_id(prefix)
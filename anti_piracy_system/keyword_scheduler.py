@@ -0,0 +1,366 @@
+"""多关键词巡查调度模块
+
+每个平台配置了多个搜索关键词(SUPPORTED_PLATFORMS[...]["search_keywords"]),不同关键词
+搜出的盗版比例差别很大,不同关键词的结果也大量重复。本模块把一次巡查的商品预算分配给
+整组关键词,让同样的设备时间检出更多盗版:
+
+1. 按平台+关键词持久化累计统计(检查数、盗版数、新商品数、耗时),跨巡查积累
+2. 类似多臂老虎机: 每个关键词的盗版率取 Beta 后验(Thompson 采样或后验均值),
+   按期望收益比例分配剩余预算,收益最高的关键词先巡查;每个关键词至少分到 min_items 个以保持探索
+3. 收益递减检测: 连续一页(window 个)商品中新商品少于 min_new 个(都已在本次巡查的其他关键词
+   下见过)时提前结束该关键词,剩余预算留给后面的关键词;记录出现递减的深度,下次分配时以此为上限
+
+后台同时运行的多个巡查任务共用一个统计文件: 写入时在文件锁内重新读取,只把本次巡查的增量
+累加到最新的统计上,不会覆盖其他任务写入的结果。模块只依赖 file_lock。
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .file_lock import FileLock
+
+STATS_VERSION = 1
+
+
+@dataclass
+class KeywordStats:
+    """关键词累计统计"""
+    platform: str                            # 平台
+    keyword: str                             # 搜索关键词
+    runs: int = 0                            # 巡查次数
+    checked: int = 0                         # 检查的商品数
+    hits: int = 0                            # 检出的疑似盗版数
+    new_listings: int = 0                    # 首次见到的商品数(本次巡查中未在其他关键词下出现)
+    seconds: float = 0.0                     # 累计巡查耗时
+    saturation_depth: Optional[int] = None   # 最近一次出现收益递减时已检查的商品数
+    last_run: Optional[str] = None           # 最近巡查时间
+
+    def expected_yield(self, prior_hits: float, prior_misses: float) -> float:
+        """盗版率的后验均值"""
+        return (self.hits + prior_hits) / (self.checked + prior_hits + prior_misses)
+
+    def hits_per_hour(self) -> float:
+        """每设备小时检出的盗版数"""
+        return self.hits / self.seconds * 3600 if self.seconds else 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'KeywordStats':
+        """从字典创建对象(忽略未知字段)"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class KeywordStatsStore:
+    """关键词统计文件(JSON)读写"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = FileLock(path + ".lock")
+
+    def load(self) -> Dict[Tuple[str, str], KeywordStats]:
+        """
+        读取统计
+
+        Returns:
+            (平台, 关键词) -> 统计;文件不存在或损坏时返回空字典
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️  关键词统计文件无法读取,重新统计: {e}")
+            return {}
+        if data.get("version") != STATS_VERSION:
+            return {}
+        stats = (KeywordStats.from_dict(item) for item in data.get("keywords", []))
+        return {(item.platform, item.keyword): item for item in stats}
+
+    def save(self, stats: Iterable[KeywordStats]) -> None:
+        """
+        原子写入统计(先写临时文件再替换)
+
+        整体覆盖文件;巡查中累加结果应使用 update,否则会覆盖其他任务同时写入的统计。
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 每个写入方使用自己的临时文件,互不截断
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with self._lock:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"version": STATS_VERSION, "keywords": [asdict(item) for item in stats]},
+                        f, ensure_ascii=False, indent=2
+                    )
+                os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def update(self, platform: str, keyword: str,
+               apply: Callable[[KeywordStats], None]) -> Dict[Tuple[str, str], KeywordStats]:
+        """
+        在文件锁内重新读取统计,修改一个关键词后写回
+
+        Args:
+            platform: 平台
+            keyword: 搜索关键词
+            apply: 修改该关键词统计的函数(累加本次巡查的增量)
+
+        Returns:
+            写入后的全部统计
+        """
+        with self._lock:
+            stats = self.load()
+            apply(stats.setdefault((platform, keyword), KeywordStats(platform, keyword)))
+            self.save(stats.values())
+        return stats
+
+    def close(self) -> None:
+        """关闭锁文件"""
+        self._lock.close()
+
+
+class KeywordRun:
+    """一个关键词的一次巡查(逐个商品记录结果并检测收益递减)"""
+
+    def __init__(self, keyword: str, budget: int, seen: Set[str], window: int, min_new: int):
+        """
+        Args:
+            keyword: 搜索关键词
+            budget: 分配的商品数
+            seen: 本次巡查中已见过的商品指纹(各关键词共用)
+            window: 收益递减检测窗口(一页商品数)
+            min_new: 窗口内新商品少于该数时视为收益递减
+        """
+        self.keyword = keyword
+        self.budget = budget
+        self.checked = 0
+        self.hits = 0
+        self.new_listings = 0
+        self.saturated = False
+        self.started_at = time.time()
+        self.seconds = 0.0
+        self._seen = seen
+        self._window: Deque[bool] = deque(maxlen=max(1, window))
+        self._min_new = min_new
+
+    def observe(self, fingerprint: str, is_piracy: bool) -> bool:
+        """
+        记录一个商品
+
+        Args:
+            fingerprint: 商品指纹
+            is_piracy: 是否检出盗版
+
+        Returns:
+            是否应提前结束该关键词(收益递减)
+        """
+        is_new = fingerprint not in self._seen
+        self._seen.add(fingerprint)
+        self.checked += 1
+        self.new_listings += is_new
+        self.hits += bool(is_piracy and is_new)
+        self._window.append(is_new)
+        if len(self._window) == self._window.maxlen and sum(self._window) < self._min_new:
+            self.saturated = True
+        return self.saturated
+
+
+class KeywordScheduler:
+    """多关键词预算分配"""
+
+    def __init__(
+        self,
+        platform: str,
+        keywords: List[str],
+        store: Optional[KeywordStatsStore] = None,
+        min_items: int = 2,
+        window: int = 5,
+        min_new: int = 1,
+        prior_hits: float = 1.0,
+        prior_misses: float = 4.0,
+        thompson: bool = True,
+        rng: Optional[random.Random] = None
+    ):
+        """
+        初始化调度器
+
+        Args:
+            platform: 平台
+            keywords: 关键词列表(重复的只保留一个)
+            store: 统计文件,None 时只在内存中统计
+            min_items: 每个关键词至少分配的商品数(保持探索)
+            window: 收益递减检测窗口(一页商品数)
+            min_new: 窗口内新商品少于该数时提前结束关键词
+            prior_hits: 盗版率 Beta 先验的命中数
+            prior_misses: 盗版率 Beta 先验的未命中数(先验均值 = hits / (hits + misses))
+            thompson: 是否用 Thompson 采样(否则用后验均值,分配结果固定)
+            rng: 随机数生成器
+        """
+        if not keywords:
+            raise ValueError("关键词列表不能为空")
+        self.platform = platform
+        self.keywords = list(dict.fromkeys(keywords))
+        self.store = store
+        self.min_items = max(1, min_items)
+        self.window = window
+        self.min_new = min_new
+        self.prior_hits = prior_hits
+        self.prior_misses = prior_misses
+        self.thompson = thompson
+        self.rng = rng or random.Random()
+        self.seen: Set[str] = set()
+        self.runs: List[KeywordRun] = []
+
+        self.stats: Dict[Tuple[str, str], KeywordStats] = store.load() if store else {}
+        for keyword in self.keywords:
+            self.stats.setdefault((platform, keyword), KeywordStats(platform, keyword))
+
+    def _stats(self, keyword: str) -> KeywordStats:
+        return self.stats[(self.platform, keyword)]
+
+    def _score(self, keyword: str) -> float:
+        """关键词的期望盗版率(Thompson 采样时从后验分布中抽样)"""
+        stats = self._stats(keyword)
+        if not self.thompson:
+            return stats.expected_yield(self.prior_hits, self.prior_misses)
+        return self.rng.betavariate(
+            stats.hits + self.prior_hits,
+            max(0, stats.checked - stats.hits) + self.prior_misses
+        )
+
+    def allocate(self, total_items: int, keywords: Optional[List[str]] = None) -> List[Tuple[str, int]]:
+        """
+        按期望收益比例分配商品预算
+
+        每个关键词至少 min_items 个(预算不足时只分给收益最高的几个),
+        上次出现收益递减的关键词不超过当时的深度,多出的预算按比例分给其他关键词。
+
+        Args:
+            total_items: 商品总预算
+            keywords: 参与分配的关键词,默认全部
+
+        Returns:
+            [(关键词, 商品数)],按期望收益从高到低排列,不含分到 0 个的关键词
+        """
+        candidates = list(keywords) if keywords is not None else list(self.keywords)
+        scores = {keyword: self._score(keyword) for keyword in candidates}
+        order = sorted(candidates, key=lambda keyword: scores[keyword], reverse=True)
+        caps = {
+            keyword: max(self.min_items, self._stats(keyword).saturation_depth or total_items)
+            for keyword in order
+        }
+
+        budgets = {keyword: 0 for keyword in order}
+        remaining = total_items
+        for keyword in order:
+            if remaining <= 0:
+                break
+            floor = min(self.min_items, caps[keyword], remaining)
+            budgets[keyword] = floor
+            remaining -= floor
+
+        # 剩余预算按收益比例分给未达上限的关键词
+        while remaining > 0:
+            open_keywords = [keyword for keyword in order if budgets[keyword] < caps[keyword]]
+            if not open_keywords:
+                break
+            weights = {keyword: scores[keyword] for keyword in open_keywords}
+            total_weight = sum(weights.values())
+            if total_weight <= 0:
+                weights = dict.fromkeys(open_keywords, 1.0)
+                total_weight = len(open_keywords)
+            shares = {keyword: remaining * weights[keyword] / total_weight for keyword in open_keywords}
+            granted = 0
+            for keyword in open_keywords:
+                extra = min(int(shares[keyword]), caps[keyword] - budgets[keyword])
+                budgets[keyword] += extra
+                granted += extra
+            if granted == 0:
+                # 份额都不足 1 个时,按份额从大到小各补 1 个
+                for keyword in sorted(open_keywords, key=lambda k: shares[k], reverse=True)[:remaining]:
+                    budgets[keyword] += 1
+                    granted += 1
+            remaining -= granted
+
+        return [(keyword, budgets[keyword]) for keyword in order if budgets[keyword] > 0]
+
+    def start_run(self, keyword: str, budget: int) -> KeywordRun:
+        """开始巡查一个关键词"""
+        run = KeywordRun(keyword, budget, self.seen, self.window, self.min_new)
+        self.runs.append(run)
+        return run
+
+    def finish_run(self, run: KeywordRun) -> None:
+        """记录一个关键词的巡查结果并写入统计文件(累加到文件中最新的统计上)"""
+        run.seconds = time.time() - run.started_at
+        if self.store is None:
+            self._apply_run(run, self._stats(run.keyword))
+            return
+        try:
+            latest = self.store.update(self.platform, run.keyword, lambda stats: self._apply_run(run, stats))
+        except OSError as e:
+            print(f"⚠️  写入关键词统计失败: {e}")
+            self._apply_run(run, self._stats(run.keyword))
+            return
+        # 同时取得其他任务写入的统计;文件中还没有的关键词补上空统计
+        for keyword in self.keywords:
+            latest.setdefault((self.platform, keyword), KeywordStats(self.platform, keyword))
+        self.stats = latest
+
+    def _apply_run(self, run: KeywordRun, stats: KeywordStats) -> None:
+        """把一次关键词巡查的结果累加到统计上"""
+        stats.runs += 1
+        stats.checked += run.checked
+        stats.hits += run.hits
+        stats.new_listings += run.new_listings
+        stats.seconds += run.seconds
+        stats.last_run = datetime.now().isoformat()
+        if run.saturated:
+            stats.saturation_depth = run.checked
+        elif run.checked >= run.budget and stats.saturation_depth is not None:
+            # 达到预算仍有新商品,放宽上限
+            stats.saturation_depth = max(stats.saturation_depth, run.checked + self.window)
+
+    def get_statistics(self) -> Dict:
+        """
+        获取本次巡查和累计的关键词统计
+
+        Returns:
+            统计信息字典
+        """
+        checked = sum(run.checked for run in self.runs)
+        hits = sum(run.hits for run in self.runs)
+        seconds = sum(run.seconds for run in self.runs)
+        return {
+            "platform": self.platform,
+            "checked": checked,
+            "hits": hits,
+            "hits_per_hour": hits / seconds * 3600 if seconds else 0.0,
+            "runs": [
+                {
+                    "keyword": run.keyword, "budget": run.budget, "checked": run.checked,
+                    "hits": run.hits, "new_listings": run.new_listings, "saturated": run.saturated
+                }
+                for run in self.runs
+            ],
+            "keywords": {
+                keyword: {
+                    "expected_yield": self._stats(keyword).expected_yield(self.prior_hits, self.prior_misses),
+                    "hits_per_hour": self._stats(keyword).hits_per_hour(),
+                    **asdict(self._stats(keyword))
+                }
+                for keyword in self.keywords
+            }
+        }
@@ -0,0 +1,217 @@
+"""商品近似重复聚类模块
+
+盗版卖家常在多个店铺发布仅有细微改动的相同标题。本模块基于字符 shingle 的
+MinHash 签名和 LSH(局部敏感哈希)索引,以亚线性时间将近似重复的商品归入同一簇,
+用于识别转售网络: 检测报告按簇汇总在多个店铺出现的同一商品。
+"""
+
+import random
+import re
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# 梅森素数,用于 MinHash 的通用哈希 (a * x + b) mod P
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_text(text: str) -> str:
+    """统一大小写并移除标点和空白"""
+    return re.sub(r'[\W_]+', '', (text or '').lower())
+
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    """
+    生成字符 shingle 集合
+
+    Args:
+        text: 输入文本
+        k: shingle 长度
+
+    Returns:
+        shingle 集合(文本短于 k 时返回整段文本)
+    """
+    text = normalize_text(text)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """MinHash 签名生成器"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        """
+        初始化签名生成器
+
+        Args:
+            num_perm: 哈希函数(排列)个数,即签名长度
+            shingle_size: 字符 shingle 长度
+            seed: 随机种子,相同种子生成的签名可相互比较
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._params = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """
+        计算文本的 MinHash 签名
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            长度为 num_perm 的签名
+        """
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles(text, self.shingle_size)]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._params
+        )
+
+    @staticmethod
+    def jaccard(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+        """根据两个签名估计 Jaccard 相似度"""
+        if not sig1 or len(sig1) != len(sig2):
+            return 0.0
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+class LSHIndex:
+    """MinHash 签名的 LSH 分桶索引"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        """
+        初始化索引
+
+        Args:
+            num_perm: 签名长度
+            bands: 分带数,每带 num_perm // bands 行;分带越多召回越高
+        """
+        if num_perm % bands != 0:
+            raise ValueError(f"签名长度 {num_perm} 不能被分带数 {bands} 整除")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def add(self, key: str, signature: Tuple[int, ...]) -> None:
+        """将签名加入索引"""
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def remove(self, key: str, signature: Tuple[int, ...]) -> None:
+        """从索引中移除签名(空桶一并删除)"""
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is None:
+                continue
+            if key in bucket:
+                bucket.remove(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def query(self, signature: Tuple[int, ...]) -> List[str]:
+        """
+        查询候选近似重复项
+
+        Args:
+            signature: 待查询签名
+
+        Returns:
+            至少在一个分带上冲突的键(按首次出现顺序去重)
+        """
+        seen: Dict[str, None] = {}
+        for band, band_key in self._band_keys(signature):
+            for key in self._buckets[band].get(band_key, ()):
+                seen.setdefault(key, None)
+        return list(seen)
+
+
+class ListingClusterer:
+    """
+    商品近似重复聚类器
+
+    每个簇只有代表商品进入 LSH 索引,新商品与候选代表比较估计相似度,
+    达到阈值则并入该簇,否则成为新簇的代表。
+    设置 max_clusters 时按最近使用淘汰簇,长时间运行时索引大小有上限。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        max_clusters: Optional[int] = None
+    ):
+        """
+        初始化聚类器
+
+        Args:
+            threshold: 并入同一簇的最低估计 Jaccard 相似度
+            num_perm: MinHash 签名长度
+            bands: LSH 分带数
+            shingle_size: 字符 shingle 长度
+            max_clusters: 最多保留的簇数,超出时淘汰最久未命中的簇;None 表示不限
+        """
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.index = LSHIndex(num_perm=num_perm, bands=bands)
+        # 簇ID -> 代表签名,按最近命中排序(最久未命中的在前)
+        self._representatives: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self.cluster_sizes: Dict[str, int] = {}
+        self._next_id = 1
+
+    def assign(self, text: str) -> Tuple[str, bool]:
+        """
+        为商品文本分配簇
+
+        Args:
+            text: 商品文本(通常为标题加描述)
+
+        Returns:
+            (簇ID, 是否为新建簇)
+        """
+        signature = self.hasher.signature(text)
+        best_id: Optional[str] = None
+        best_score = self.threshold
+        for cluster_id in self.index.query(signature):
+            score = MinHasher.jaccard(signature, self._representatives[cluster_id])
+            if score >= best_score:
+                best_id, best_score = cluster_id, score
+
+        if best_id is not None:
+            self.cluster_sizes[best_id] += 1
+            self._representatives.move_to_end(best_id)
+            return best_id, False
+
+        cluster_id = f"cluster_{self._next_id}"
+        self._next_id += 1
+        self._representatives[cluster_id] = signature
+        self.index.add(cluster_id, signature)
+        self.cluster_sizes[cluster_id] = 1
+        if self.max_clusters is not None and len(self._representatives) > self.max_clusters:
+            evicted, evicted_signature = self._representatives.popitem(last=False)
+            self.index.remove(evicted, evicted_signature)
+            del self.cluster_sizes[evicted]
+        return cluster_id, True
+
+    def reset(self) -> None:
+        """清空所有簇"""
+        self.index = LSHIndex(num_perm=self.hasher.num_perm, bands=self.index.bands)
+        self._representatives.clear()
+        self.cluster_sizes.clear()
+        self._next_id = 1
@@ -4,6 +4,8 @@
 
 使用方法:
     python main_anti_piracy.py --platform xiaohongshu --keyword "得到" --max-items 10
+    python main_anti_piracy.py --platform xiaohongshu --keyword "得到" --max-items 10 --resume  # 从中断处继续
+    python main_anti_piracy.py --platform xiaohongshu --all-keywords --max-items 30  # 巡查平台配置的全部关键词
 
 功能:
 - 在指定平台(小红书/闲鱼)搜索关键词
@@ -26,9 +28,9 @@ load_dotenv(env_path)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../Open-AutoGLM'))
 
 from phone_agent.model import ModelConfig
-from product_database import ProductDatabase, GenuineProduct
+from product_database import create_product_database, GenuineProduct
 from anti_piracy_agent import AntiPiracyAgent
-from config_anti_piracy import SUPPORTED_PLATFORMS, get_ui_text
+from config_anti_piracy import SUPPORTED_PLATFORMS, PATHS, get_ui_text
 
 
 def parse_args():
@@ -50,6 +52,9 @@ def parse_args():
   # 添加正版商品到数据库
   python main_anti_piracy.py --add-product
 
+  # 批量导入正版商品(CSV/JSONL)
+  python main_anti_piracy.py --import-products catalogue.csv
+
   # 查看数据库统计
   python main_anti_piracy.py --show-stats
 
@@ -100,7 +105,12 @@ def parse_args():
         "--max-items",
         type=int,
         default=10,
-        help="最多检查的商品数量"
+        help="最多检查的商品数量(--all-keywords 时为所有关键词合计)"
+    )
+    parser.add_argument(
+        "--all-keywords",
+        action="store_true",
+        help="巡查平台配置的全部关键词,按历史盗版率分配商品数量(忽略 --keyword)"
     )
 
     # 运行模式
@@ -109,6 +119,11 @@ def parse_args():
         action="store_true",
         help="测试模式(不实际执行举报操作)"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从上次中断的巡查断点继续(需使用相同的平台和关键词)"
+    )
 
     # 数据库管理
     parser.add_argument(
@@ -116,6 +131,12 @@ def parse_args():
         action="store_true",
         help="交互式添加正版商品到数据库"
     )
+    parser.add_argument(
+        "--import-products",
+        type=str,
+        metavar="PATH",
+        help="从 CSV/JSONL 文件批量导入正版商品"
+    )
     parser.add_argument(
         "--show-stats",
         action="store_true",
@@ -125,7 +146,7 @@ def parse_args():
         "--export-report",
         type=str,
         metavar="PATH",
-        help="导出举报记录到文件"
+        help="导出举报记录到文件(按扩展名选择格式: .csv/.jsonl/.json/.parquet,其他为 txt 摘要)"
     )
 
     # 设备配置
@@ -186,7 +207,7 @@ def interactive_add_product():
     )
 
     # 保存到数据库
-    db = ProductDatabase()
+    db = create_product_database(PATHS["product_database"])
     success = db.add_product(product)
 
     if success:
@@ -207,7 +228,7 @@ def show_statistics():
     print("=" * 60)
 
     # 商品数据库统计
-    product_db = ProductDatabase()
+    product_db = create_product_database(PATHS["product_database"])
     product_stats = product_db.get_stats()
 
     print(f"\n📦 正版商品数据库:")
@@ -236,6 +257,11 @@ def main():
         interactive_add_product()
         return
 
+    if args.import_products:
+        from product_import import import_file
+        import_file(args.import_products, db_path=PATHS["product_database"])
+        return
+
     if args.show_stats:
         show_statistics()
         return
@@ -243,7 +269,9 @@ def main():
     if args.export_report:
         from report_manager import ReportManager
         manager = ReportManager()
-        success = manager.export_to_file(args.export_report, format="txt")
+        ext = os.path.splitext(args.export_report)[1].lower().lstrip(".")
+        export_format = ext if ext in ("csv", "jsonl", "json", "parquet") else "txt"
+        success = manager.export_to_file(args.export_report, format=export_format)
         if success:
             print(f"✅ 举报记录已导出到: {args.export_report}")
         return
@@ -283,10 +311,17 @@ def main():
         )
 
         # 开始巡查
-        result = agent.start_patrol(
-            keyword=args.keyword,
-            max_items=args.max_items
-        )
+        if args.all_keywords:
+            result = agent.start_keyword_patrol(
+                total_items=args.max_items,
+                resume=args.resume
+            )
+        else:
+            result = agent.start_patrol(
+                keyword=args.keyword,
+                max_items=args.max_items,
+                resume=args.resume
+            )
 
         # 显示结果
         print("\n" + "=" * 60)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+内存占用基准测试
+
+对比正版商品(GenuineProduct)和举报记录(ReportRecord)改为 __slots__ 紧凑存储前后的内存占用。
+"改造前"使用与原实现相同的普通 dataclass,两者从同一批合成的 JSON 行解析构造,用 tracemalloc
+统计构造完成后仍占用的内存(tracemalloc 开销较大,默认规模约需 1 分钟)。合成数据模拟真实分布: 店铺、平台、类别、状态取值有限且大量重复,
+官方店铺列表按出版方共享,时间为 datetime.isoformat() 字符串。
+
+使用方法:
+    python memory_benchmark.py
+    python memory_benchmark.py --products 100000 --reports 1000000
+
+示例输出(Python 3.11, 100000 个商品 / 200000 条举报):
+    记录类型                 数量         改造前         改造后      节省
+    GenuineProduct     100000    154.2 MB     46.3 MB   70.0%
+    ReportRecord       200000    176.3 MB     81.0 MB   54.1%
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+# 添加项目根目录到路径,以包方式导入反盗版系统模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_piracy_system.product_database import GenuineProduct
+from anti_piracy_system.report_manager import ReportRecord
+
+
+@dataclass
+class LegacyGenuineProduct:
+    """改造前的正版商品(普通 dataclass)"""
+
+    product_id: str
+    product_name: str
+    shop_name: str
+    official_shops: List[str]
+    original_price: float
+    platform: str
+    category: str
+    description: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    created_at: str = None
+    updated_at: str = None
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now().isoformat()
+        if self.updated_at is None:
+            self.updated_at = datetime.now().isoformat()
+        if self.keywords is None:
+            self.keywords = []
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class LegacyReportRecord:
+    """改造前的举报记录(普通 dataclass)"""
+
+    report_id: str
+    platform: str
+    target_title: str
+    target_shop: str
+    target_price: float
+    target_url: Optional[str] = None
+    detection_result: Optional[Dict] = None
+    report_reason: str = ""
+    report_status: str = "pending"
+    evidence_screenshots: List[str] = None
+    reported_at: str = None
+    notes: Optional[str] = None
+
+    def __post_init__(self):
+        if self.reported_at is None:
+            self.reported_at = datetime.now().isoformat()
+        if self.evidence_screenshots is None:
+            self.evidence_screenshots = []
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def product_rows(count: int, seed: int = 0) -> List[Dict]:
+    """生成合成的正版商品记录(模拟从 JSON 文件解析出的字典)"""
+    rng = random.Random(seed)
+    publishers = [f"出版方{i}" for i in range(200)]
+    platforms = ["得到", "众合法考", "樊登读书", "喜马拉雅", "知乎"]
+    categories = ["电子书", "课程", "法考课程", "音频", "会员"]
+    vocabulary = [f"关键词{i}" for i in range(5000)]
+    start = datetime(2025, 1, 1)
+
+    rows = []
+    for i in range(count):
+        publisher = rng.choice(publishers)
+        created = start + timedelta(seconds=rng.randrange(300 * 86400), microseconds=rng.randrange(10 ** 6))
+        rows.append({
+            "product_id": f"product_{i:07d}",
+            "product_name": f"{publisher}精品课程第{i}期（完整版）",
+            "shop_name": f"{publisher}官方旗舰店",
+            "official_shops": [f"{publisher}官方旗舰店", f"{publisher}官方店"],
+            "original_price": float(rng.choice([9.9, 19.9, 99.0, 199.0, 898.0])),
+            "platform": rng.choice(platforms),
+            "category": rng.choice(categories),
+            "description": None,
+            "keywords": rng.sample(vocabulary, 5),
+            "created_at": created.isoformat(),
+            "updated_at": created.isoformat(),
+        })
+    return rows
+
+
+def report_rows(count: int, seed: int = 0) -> List[Dict]:
+    """生成合成的举报记录(模拟从快照和日志解析出的字典)"""
+    rng = random.Random(seed)
+    shops = [f"个人卖家{i}" for i in range(2000)]
+    platforms = ["小红书", "闲鱼", "拼多多"]
+    statuses = ["pending", "submitted", "success", "failed"]
+    reasons = [f"该商品由非官方授权店铺销售,价格仅为原价的{ratio}%,疑似盗版。" for ratio in range(5, 70, 5)]
+    start = datetime(2025, 1, 1)
+
+    rows = []
+    for i in range(count):
+        reported = start + timedelta(seconds=rng.randrange(300 * 86400), microseconds=rng.randrange(10 ** 6))
+        report_id = f"report_{i:026d}"
+        rows.append({
+            "report_id": report_id,
+            "platform": rng.choice(platforms),
+            "target_title": f"精品课程第{rng.randrange(100000)}期 全套资料",
+            "target_shop": rng.choice(shops),
+            "target_price": float(rng.choice([1.0, 5.0, 9.9, 19.9])),
+            "target_url": None,
+            "detection_result": None,
+            "report_reason": rng.choice(reasons),
+            "report_status": rng.choice(statuses),
+            "evidence_screenshots": [f"screenshots/{report_id}.png"] if rng.random() < 0.3 else [],
+            "reported_at": reported.isoformat(),
+            "notes": None,
+        })
+    return rows
+
+
+def measure(factory: Callable[[Dict], object], lines: List[str]) -> int:
+    """
+    统计从 JSON 行解析并构造全部对象后仍占用的内存(字节)
+
+    与实际加载过程一致: 每条记录的字符串由 json.loads 新建,构造完成后解析用的字典被释放。
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(json.loads(line)) for line in lines]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="紧凑记录类型内存占用基准测试")
+    parser.add_argument("--products", type=int, default=100000, help="正版商品数量")
+    parser.add_argument("--reports", type=int, default=200000, help="举报记录数量")
+    args = parser.parse_args()
+
+    cases = [
+        ("GenuineProduct", product_rows(args.products), LegacyGenuineProduct, GenuineProduct),
+        ("ReportRecord", report_rows(args.reports), LegacyReportRecord, ReportRecord),
+    ]
+
+    print(f"{'记录类型':<14}{'数量':>9}{'改造前':>12}{'改造后':>12}{'节省':>8}")
+    for name, rows, legacy_class, compact_class in cases:
+        # 紧凑类型与原 dataclass 的 to_dict 输出一致
+        sample = rows[0]
+        assert compact_class.from_dict(dict(sample)).to_dict() == legacy_class(**sample).to_dict()
+
+        lines = [json.dumps(row, ensure_ascii=False) for row in rows]
+        before = measure(lambda row: legacy_class(**row), lines)
+        after = measure(compact_class.from_dict, lines)
+        saved = 1 - after / before if before else 0.0
+        print(f"{name:<16}{len(rows):>9}{before / 2 ** 20:>9.1f} MB{after / 2 ** 20:>9.1f} MB{saved:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
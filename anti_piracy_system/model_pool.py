@@ -0,0 +1,379 @@
+"""模型服务连接池模块
+
+后台的每个巡查任务、每台设备原先各自创建 PhoneAgent 和 HTTP 客户端,连接不复用,
+多个任务同时运行时也没有全局的并发上限,模型服务过载后返回 502。本模块提供进程内
+共享的 OpenAI 兼容客户端:
+
+1. 连接复用: HTTP/1.1 keep-alive 连接用完放回空闲池,下次请求直接复用
+2. 全局并发上限: 所有任务共用一个信号量,超出上限的请求排队等待
+3. 502/503/504 和连接错误按指数退避加随机抖动(full jitter)重试
+4. 排队与请求统计: 等待数、最长等待、平均延迟、重试次数、新建/复用连接数
+
+PhoneAgent 内部的 ModelClient 通过 openai.OpenAI 调用模型,attach_pool() 把它替换为
+只实现 chat.completions.create 的兼容外观,请求改走共享连接池,响应解析逻辑不变。
+模块只依赖标准库,不依赖包内其他模块。
+"""
+
+import http.client
+import json
+import random
+import threading
+import time
+import urllib.parse
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 可重试的 HTTP 状态码(网关错误、服务过载)
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+# 复用的空闲连接已被服务端关闭时的错误(收到任何响应之前),可以安全地换新连接重发
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class ModelServiceError(Exception):
+    """模型服务请求失败"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ModelClientPool:
+    """共享的模型服务连接池"""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "EMPTY",
+        max_connections: int = 8,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        timeout: float = 120.0
+    ):
+        """
+        初始化连接池
+
+        Args:
+            base_url: OpenAI 兼容服务地址(如 http://localhost:8000/v1)
+            api_key: API Key
+            max_connections: 保留的空闲 keep-alive 连接数上限
+            max_concurrency: 全局同时进行的请求数上限
+            max_retries: 502/503/504 及连接错误的最大重试次数
+            backoff_base: 退避基准(秒),第 n 次重试等待 [0, base * 2^n] 内的随机时间
+            backoff_max: 单次退避的上限(秒)
+            timeout: 单次请求超时(秒)
+        """
+        parsed = urllib.parse.urlsplit(base_url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"无效的模型服务地址: {base_url}")
+        self.base_url = base_url
+        self.api_key = api_key
+        self._connection_class = (
+            http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        )
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._path_prefix = parsed.path.rstrip("/")
+
+        self.max_connections = max(0, max_connections)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._idle: List[http.client.HTTPConnection] = []
+        self._idle_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        # 统计信息
+        self.stats: Dict[str, float] = {
+            "requests": 0, "succeeded": 0, "failed": 0, "retries": 0,
+            "in_flight": 0, "waiting": 0, "max_waiting": 0,
+            "total_wait_seconds": 0.0, "max_wait_seconds": 0.0, "total_latency_seconds": 0.0,
+            "connections_created": 0, "connections_reused": 0
+        }
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += value
+
+    # ---------- 连接管理 ----------
+
+    def _acquire_connection(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """取出空闲连接(后进先出,最近使用的连接最不可能已被服务端关闭),没有时新建"""
+        with self._idle_lock:
+            if self._idle:
+                connection = self._idle.pop()
+                self._count("connections_reused")
+                return connection, True
+        self._count("connections_created")
+        return self._connection_class(self._host, self._port, timeout=self.timeout), False
+
+    def _release_connection(self, connection: http.client.HTTPConnection, keep: bool) -> None:
+        with self._idle_lock:
+            if keep and not self._closed and len(self._idle) < self.max_connections:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _send_once(self, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        """
+        发送一次请求
+
+        复用的空闲连接可能已被服务端关闭: 发送时连接已断开(BrokenPipeError/ConnectionResetError)
+        或服务端没有返回任何响应就关闭了连接(RemoteDisconnected)时,换新连接立即重发一次(不计入重试)。
+        其他错误(尤其是等待响应超时,服务端可能已在处理请求)直接抛出,由 post_json 按重试策略处理。
+
+        Returns:
+            (状态码, 状态说明, 响应内容)
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            "Connection": "keep-alive",
+        }
+        while True:
+            connection, reused = self._acquire_connection()
+            response = None
+            try:
+                connection.request("POST", self._path_prefix + path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                # RemoteDisconnected 是 ConnectionResetError 的子类;收到响应头之后的错误不重发
+                if reused and response is None and isinstance(e, _STALE_CONNECTION_ERRORS):
+                    continue
+                raise
+            self._release_connection(connection, not response.will_close)
+            return response.status, response.reason, data
+
+    # ---------- 请求 ----------
+
+    def post_json(self, path: str, payload: Dict) -> Dict:
+        """
+        发送 JSON 请求(受全局并发上限约束,网关错误自动重试)
+
+        Args:
+            path: 相对 base_url 的路径(如 /chat/completions)
+            payload: 请求体
+
+        Returns:
+            响应 JSON
+
+        Raises:
+            ModelServiceError: 重试耗尽或不可重试的错误
+        """
+        if self._closed:
+            raise ModelServiceError("模型服务连接池已关闭")
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        queued_at = time.monotonic()
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["waiting"] += 1
+            self.stats["max_waiting"] = max(self.stats["max_waiting"], self.stats["waiting"])
+        self._semaphore.acquire()
+        started = time.monotonic()
+        with self._stats_lock:
+            self.stats["waiting"] -= 1
+            self.stats["in_flight"] += 1
+            self.stats["total_wait_seconds"] += started - queued_at
+            self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], started - queued_at)
+
+        try:
+            result = self._send_with_retry(path, body)
+        except ModelServiceError:
+            self._count("failed")
+            raise
+        else:
+            self._count("succeeded")
+            return result
+        finally:
+            self._semaphore.release()
+            with self._stats_lock:
+                self.stats["in_flight"] -= 1
+                self.stats["total_latency_seconds"] += time.monotonic() - started
+
+    def _send_with_retry(self, path: str, body: bytes) -> Dict:
+        """发送请求,可重试的错误按指数退避加随机抖动重试"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, reason, data = self._send_once(path, body)
+            except (OSError, http.client.HTTPException) as e:
+                error = ModelServiceError(f"模型服务连接失败: {e}")
+            else:
+                if status < 300:
+                    try:
+                        return json.loads(data)
+                    except ValueError as e:
+                        raise ModelServiceError(f"模型服务返回了无效的JSON: {e}", status)
+                error = ModelServiceError(
+                    f"模型服务返回 {status} {reason}: {data[:200].decode('utf-8', 'replace')}", status
+                )
+                if status not in RETRY_STATUSES:
+                    raise error
+
+            if attempt == self.max_retries:
+                raise error
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            self._count("retries")
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def chat_completion(self, messages: List[Dict], model: str, **params) -> Dict:
+        """
+        调用 /chat/completions(非流式)
+
+        Args:
+            messages: 对话消息
+            model: 模型名称
+            **params: 其他请求参数(max_tokens、temperature 等)
+
+        Returns:
+            响应 JSON
+        """
+        payload = dict(params, model=model, messages=messages, stream=False)
+        return self.post_json("/chat/completions", payload)
+
+    def get_stats(self) -> Dict:
+        """
+        获取连接池统计
+
+        Returns:
+            统计信息字典(含平均排队时间、平均延迟和空闲连接数)
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self._idle_lock:
+            idle = len(self._idle)
+        started = stats["requests"] - stats["waiting"]
+        finished = stats["succeeded"] + stats["failed"]
+        stats.update({
+            "max_concurrency": self.max_concurrency,
+            "idle_connections": idle,
+            "avg_wait_seconds": stats["total_wait_seconds"] / started if started else 0.0,
+            "avg_latency_seconds": stats["total_latency_seconds"] / finished if finished else 0.0
+        })
+        return stats
+
+    def close(self) -> None:
+        """关闭所有空闲连接;关闭后不再接受请求"""
+        with self._idle_lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+# ---------- PhoneAgent 接入 ----------
+
+def _namespace(value: Any) -> Any:
+    """把响应 JSON 转为可按属性访问的对象(与 openai SDK 的返回值用法一致)"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+class _ChatCompletions:
+    def __init__(self, pool: ModelClientPool):
+        self._pool = pool
+
+    def create(self, model: str, messages: List[Dict], stream: bool = False,
+               extra_body: Optional[Dict] = None, **params) -> Any:
+        """
+        与 openai 的 chat.completions.create 兼容
+
+        流式请求也以非流式方式发送,完整内容作为唯一的增量块返回。
+        """
+        params.pop("timeout", None)
+        params.update(extra_body or {})
+        response = self._pool.chat_completion(messages, model, **params)
+        if not stream:
+            return _namespace(response)
+        return self._as_stream(response)
+
+    @staticmethod
+    def _as_stream(response: Dict) -> Iterator[Any]:
+        for choice in response.get("choices", []):
+            message = choice.get("message") or {}
+            yield _namespace({
+                "id": response.get("id"),
+                "model": response.get("model"),
+                "choices": [{
+                    "index": choice.get("index", 0),
+                    "delta": {"role": message.get("role", "assistant"), "content": message.get("content")},
+                    "finish_reason": choice.get("finish_reason")
+                }]
+            })
+
+
+class PooledOpenAI:
+    """openai.OpenAI 的最小兼容外观,只实现 chat.completions.create"""
+
+    def __init__(self, pool: ModelClientPool):
+        self.pool = pool
+        self.chat = SimpleNamespace(completions=_ChatCompletions(pool))
+
+
+def attach_pool(phone_agent: Any, pool: ModelClientPool) -> bool:
+    """
+    让 PhoneAgent 的模型请求改走共享连接池
+
+    Args:
+        phone_agent: PhoneAgent 实例(其 model_client.client 为 openai.OpenAI)
+        pool: 共享连接池
+
+    Returns:
+        是否接入成功(PhoneAgent 版本不兼容时返回 False,继续使用其自带客户端)
+    """
+    model_client = getattr(phone_agent, "model_client", None)
+    if model_client is None or not hasattr(model_client, "client"):
+        print("⚠️  PhoneAgent 没有可替换的模型客户端,不使用共享连接池")
+        return False
+    model_client.client = PooledOpenAI(pool)
+    return True
+
+
+# ---------- 进程内共享 ----------
+
+_SHARED_POOLS: Dict[Tuple[str, str], ModelClientPool] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def get_shared_pool(base_url: str, api_key: str = "EMPTY", **options) -> ModelClientPool:
+    """
+    获取进程内共享的连接池(同一服务地址和 API Key 共用一个)
+
+    Args:
+        base_url: 模型服务地址
+        api_key: API Key
+        **options: ModelClientPool 的其他参数,仅在首次创建时生效
+
+    Returns:
+        共享连接池
+    """
+    key = (base_url.rstrip("/"), api_key)
+    with _SHARED_LOCK:
+        pool = _SHARED_POOLS.get(key)
+        if pool is None or pool._closed:
+            pool = ModelClientPool(base_url, api_key, **options)
+            _SHARED_POOLS[key] = pool
+        return pool
+
+
+def close_shared_pools() -> None:
+    """关闭全部共享连接池(进程退出或测试清理时调用)"""
+    with _SHARED_LOCK:
+        pools = list(_SHARED_POOLS.values())
+        _SHARED_POOLS.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+本地模型服务替身
+
+实现 OpenAI 兼容的 /v1/chat/completions 和 /v1/models 接口,按脚本返回固定响应,
+用于在没有 GPU 模型服务的环境中测试连接池、压测巡查吞吐量:
+
+1. 脚本响应: 按最后一条用户消息中的关键字匹配,未匹配时按顺序循环返回
+2. 延迟可配置: 固定延迟加随机抖动,模拟模型推理耗时
+3. 故障注入: 前 N 个请求或按比例返回 502,验证重试逻辑
+4. 支持 stream=True(SSE),PhoneAgent 不接入连接池时也能直接使用
+5. 统计请求数、TCP 连接数(验证 keep-alive 复用)和最大并发数
+
+使用方法:
+    python model_stub_server.py --port 8000 --latency 0.8 --jitter 0.4
+    python model_stub_server.py --port 8000 --script stub_script.json --fail-rate 0.05
+
+脚本文件为 JSON 数组,元素为字符串或 {"match": "关键字", "content": "响应内容"}。
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+
+# 未指定脚本时的默认响应(AutoGLM 的 finish 动作)
+DEFAULT_RESPONSES: List[Union[str, Dict[str, str]]] = [
+    {"match": "商品", "content": 'finish(message="{\\"status\\": \\"ok\\", \\"shop_name\\": \\"某个人卖家\\", '
+                                 '\\"title\\": \\"众合法考全套课程\\", \\"price\\": 9.9}")'},
+    'finish(message="done")',
+]
+
+
+def _message_text(messages: List[Dict]) -> str:
+    """取最后一条用户消息的文本(多模态消息只取文本部分)"""
+    for message in reversed(messages or []):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return str(content or "")
+    return ""
+
+
+class StubModelServer:
+    """OpenAI 兼容的本地模型服务替身"""
+
+    def __init__(
+        self,
+        responses: Optional[List[Union[str, Dict[str, str]]]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fail_first: int = 0,
+        fail_rate: float = 0.0,
+        fail_status: int = 502,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化替身服务(调用 start() 后开始监听)
+
+        Args:
+            responses: 脚本响应,字符串按顺序循环返回,{"match", "content"} 按关键字匹配
+            latency: 每个请求的固定延迟(秒)
+            jitter: 额外的随机延迟上限(秒)
+            fail_first: 前 N 个请求返回 fail_status
+            fail_rate: 之后的请求按此比例返回 fail_status
+            fail_status: 注入的错误状态码
+            host: 监听地址
+            port: 监听端口,0 为自动分配
+            seed: 随机数种子(抖动和故障注入可复现)
+        """
+        script = DEFAULT_RESPONSES if responses is None else responses
+        self.rules = [(item["match"], item["content"]) for item in script if isinstance(item, dict)]
+        plain = [item for item in script if isinstance(item, str)]
+        self._cycle = itertools.cycle(plain or ['finish(message="done")'])
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_first = fail_first
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._active = 0
+
+        # 统计信息
+        self.stats: Dict[str, int] = {"requests": 0, "failures": 0, "connections": 0, "max_concurrent": 0}
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        """在后台线程中开始监听,返回服务地址"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="model-stub", daemon=True)
+            self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """停止监听"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "StubModelServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _choose_content(self, messages: List[Dict]) -> str:
+        text = _message_text(messages)
+        for keyword, content in self.rules:
+            if keyword in text:
+                return content
+        with self._lock:
+            return next(self._cycle)
+
+    def _should_fail(self, request_number: int) -> bool:
+        if request_number <= self.fail_first:
+            return True
+        with self._lock:
+            return self.fail_rate > 0 and self._random.random() < self.fail_rate
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _completion(self, payload: Dict, request_number: int) -> Dict[str, Any]:
+        content = self._choose_content(payload.get("messages", []))
+        return {
+            "id": f"chatcmpl-stub-{request_number}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 支持 keep-alive
+            disable_nagle_algorithm = True  # 响应头和响应体分两次写出,避免与延迟确认叠加产生 40ms 停顿
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.stats["connections"] += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, data: Dict) -> None:
+                self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                try:
+                    payload = json.loads(raw or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": {"message": "invalid json"}})
+                    return
+
+                with server._lock:
+                    server.stats["requests"] += 1
+                    request_number = server.stats["requests"]
+                    server._active += 1
+                    server.stats["max_concurrent"] = max(server.stats["max_concurrent"], server._active)
+                try:
+                    time.sleep(server._delay())
+                    if server._should_fail(request_number):
+                        with server._lock:
+                            server.stats["failures"] += 1
+                        self._send(server.fail_status, b"Bad Gateway", "text/plain")
+                        return
+                    completion = server._completion(payload, request_number)
+                finally:
+                    with server._lock:
+                        server._active -= 1
+
+                if not payload.get("stream"):
+                    self._send_json(200, completion)
+                    return
+                choice = completion["choices"][0]
+                chunk = dict(completion, object="chat.completion.chunk", choices=[{
+                    "index": 0, "delta": choice["message"], "finish_reason": "stop"
+                }])
+                body = f"data: {json.dumps(chunk, ensure_ascii=False)}\n\ndata: [DONE]\n\n".encode("utf-8")
+                self._send(200, body, "text/event-stream")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地模型服务替身")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument("--script", help="脚本响应 JSON 文件")
+    parser.add_argument("--latency", type=float, default=0.5, help="每个请求的固定延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外的随机延迟上限(秒)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="返回 502 的请求比例")
+    args = parser.parse_args()
+
+    responses = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            responses = json.load(f)
+
+    server = StubModelServer(
+        responses=responses, latency=args.latency, jitter=args.jitter,
+        fail_rate=args.fail_rate, host=args.host, port=args.port
+    )
+    print(f"🧪 模型服务替身已启动: {server.start()}")
+    print("   按 Ctrl+C 停止")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"\n📊 请求 {server.stats['requests']}, 注入错误 {server.stats['failures']}, "
+              f"TCP 连接 {server.stats['connections']}, 最大并发 {server.stats['max_concurrent']}")
+
+
+if __name__ == "__main__":
+    main()
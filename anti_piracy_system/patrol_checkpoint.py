@@ -0,0 +1,191 @@
+"""巡查断点续查模块
+
+一次巡查要逐个打开几十到几百个商品,中途崩溃(模型服务断开、ADB 掉线)后原先只能
+从第一个商品重新开始。本模块在每个商品处理完后把进度写入断点文件:
+
+1. 搜索关键词、平台和计划检查数,续查时确认是同一次巡查
+2. 页偏移(已滚动次数、当前页已处理数)和下一个商品序号,续查时滚动回原来的位置
+   (Agent 每 5 个商品滚动一次,页内位置由下一个商品序号推出;test/test_detection.py
+   按页面实际显示的商品数翻页,续查时使用记录的当前页已处理数)
+3. 已处理商品的指纹(平台+店铺+标题),列表顺序变化时也不会重复处理
+4. 结果文件(result_sink.py 写入的 JSONL)路径和已写入条数、证据文件路径和会话计数
+5. 已提交但尚未确认举报完成的商品,续查时记为待处理
+
+每个平台+关键词使用独立的断点文件(checkpoint_path),后台同时运行的多个巡查任务互不覆盖。
+断点文件先写入临时文件再替换,崩溃时不会留下写了一半的文件。巡查正常结束后删除。
+"""
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+CHECKPOINT_VERSION = 2
+
+
+def checkpoint_path(base_path: str, platform: str, keyword: str) -> str:
+    """
+    生成某个平台+关键词巡查的断点文件路径: <基础路径>_<平台>_<关键词>_<哈希>.json
+
+    平台和关键词中的特殊字符替换为下划线,哈希区分替换后相同的名称。
+
+    Args:
+        base_path: 配置的断点文件路径(如 data/patrol_checkpoint.json)
+        platform: 平台
+        keyword: 搜索关键词
+
+    Returns:
+        断点文件路径
+    """
+    root, ext = os.path.splitext(base_path)
+    safe_name = re.sub(r'[\\/:*?"<>|\s]', '_', f"{platform}_{keyword}")[:60]
+    digest = hashlib.blake2b(f"{platform}|{keyword}".encode("utf-8"), digest_size=4).hexdigest()
+    return f"{root}_{safe_name}_{digest}{ext or '.json'}"
+
+
+def item_fingerprint(platform: str, shop_name: Optional[str], title: Optional[str]) -> str:
+    """
+    生成商品指纹(规范化的平台、店铺名和标题的哈希)
+
+    Args:
+        platform: 平台名称
+        shop_name: 店铺名称
+        title: 商品标题
+
+    Returns:
+        16 位十六进制指纹
+    """
+    parts = [re.sub(r'[\W_]+', '', (part or '').lower()) for part in (platform, shop_name, title)]
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass
+class PatrolCheckpoint:
+    """巡查进度"""
+    keyword: str                                        # 搜索关键词
+    platform: str                                       # 平台
+    max_items: int                                      # 计划检查的商品数
+    next_index: int = 0                                 # 下一个要处理的商品序号
+    scroll_count: int = 0                               # 已向下滚动(翻页)次数
+    page_position: int = 0                              # 当前页已处理的商品数
+    processed: Set[str] = field(default_factory=set)    # 已处理商品的指纹
+    results_path: Optional[str] = None                  # 检测结果文件(JSONL)
+    result_count: int = 0                               # 结果文件中已确认的条数
+    evidence: List[str] = field(default_factory=list)   # 证据文件路径
+    pending_reports: List[str] = field(default_factory=list)  # 已提交未完成举报的商品指纹
+    counters: Dict[str, int] = field(default_factory=dict)    # 会话计数
+    evidence_dir: Optional[str] = None                  # 证据目录(test_detection.py 使用)
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: Optional[str] = None
+
+    def matches(self, keyword: str, platform: str) -> bool:
+        """是否为同一关键词、同一平台的巡查"""
+        return self.keyword == keyword and self.platform == platform
+
+    def is_processed(self, fingerprint: str) -> bool:
+        return fingerprint in self.processed
+
+    def mark_processed(self, fingerprint: str, result_count: Optional[int] = None,
+                       evidence: Optional[List[str]] = None) -> None:
+        """
+        记录已处理的商品
+
+        Args:
+            fingerprint: 商品指纹
+            result_count: 结果文件中已写入的条数(检测结果本身只写入结果文件)
+            evidence: 该商品的证据文件路径
+        """
+        self.processed.add(fingerprint)
+        if result_count is not None:
+            self.result_count = result_count
+        for path in evidence or ():
+            if path and path not in self.evidence:
+                self.evidence.append(path)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["processed"] = sorted(self.processed)
+        data["version"] = CHECKPOINT_VERSION
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PatrolCheckpoint':
+        """从字典创建对象(忽略未知字段)"""
+        known = {f.name for f in fields(cls)}
+        checkpoint = cls(**{k: v for k, v in data.items() if k in known})
+        checkpoint.processed = set(checkpoint.processed)
+        return checkpoint
+
+
+class CheckpointStore:
+    """断点文件读写"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 断点文件路径(JSON)
+        """
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self, keyword: Optional[str] = None, platform: Optional[str] = None) -> Optional[PatrolCheckpoint]:
+        """
+        读取断点
+
+        Args:
+            keyword: 本次巡查的关键词,指定时断点属于其他关键词则不续查
+            platform: 本次巡查的平台,指定时断点属于其他平台则不续查
+
+        Returns:
+            巡查进度;文件不存在、损坏、版本不符或属于其他巡查时返回 None
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️  断点文件无法读取,忽略: {e}")
+            return None
+        if data.get("version") != CHECKPOINT_VERSION:
+            print(f"⚠️  断点文件版本不符({data.get('version')}),忽略")
+            return None
+        checkpoint = PatrolCheckpoint.from_dict(data)
+        if (keyword is not None and checkpoint.keyword != keyword) or \
+                (platform is not None and checkpoint.platform != platform):
+            print(f"⚠️  断点属于其他巡查({checkpoint.platform}/{checkpoint.keyword}),不续查")
+            return None
+        return checkpoint
+
+    def save(self, checkpoint: PatrolCheckpoint) -> None:
+        """原子写入断点(先写临时文件再替换)"""
+        checkpoint.updated_at = datetime.now().isoformat()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint.to_dict(), f, ensure_ascii=False, default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """巡查完成后删除断点"""
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _json_default(value: Any) -> Any:
+    """序列化 datetime 等非 JSON 类型"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
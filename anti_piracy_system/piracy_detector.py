@@ -4,10 +4,15 @@
 1. 店铺名称匹配
 2. 价格比对(低于原价70%触发)
 3. 内容识别(基于OCR和多模态模型)
+
+三层判断以可配置的规则流水线执行: 规则按成本从低到高依次运行,
+一旦判定结果不会再改变即停止,跳过剩余(通常更昂贵的)规则。
 """
 
 import re
-from dataclasses import dataclass
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict, fields
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
@@ -27,20 +32,36 @@ class ProductInfo:
     url: Optional[str] = None  # 商品链接
     platform: str = "未知平台"  # 平台名称(小红书/闲鱼等)
 
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProductInfo':
+        """从字典创建对象(忽略未知字段)"""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
 
 @dataclass
 class DetectionResult:
     """检测结果"""
 
     is_piracy: bool  # 是否为盗版
-    confidence: float  # 置信度(0-1)
-    reasons: List[str]  # 判定依据列表
+    confidence: float  # 置信度(0-1): 已执行规则中可疑规则的权重之和,跳过的规则不计入
+    reasons: List[str]  # 判定依据列表(跳过的规则以 SKIPPED_REASON_PREFIX 开头注明)
     matched_product: Optional[GenuineProduct] = None  # 匹配到的正版商品
-    shop_check: bool = False  # 店铺检查是否通过
-    price_check: bool = False  # 价格检查是否通过
-    content_check: bool = False  # 内容检查是否通过
+    shop_check: Optional[bool] = False  # 店铺检查是否通过,None表示结果已确定而跳过
+    price_check: Optional[bool] = False  # 价格检查是否通过,None表示结果已确定而跳过
+    content_check: Optional[bool] = False  # 内容检查是否通过,None表示结果已确定而跳过
     price_ratio: Optional[float] = None  # 价格比例
     detected_at: str = None  # 检测时间
+    # 以下性能追踪字段仅在 PiracyDetector(profile=True) 时填充
+    timings: Optional[Dict[str, float]] = None  # 各阶段耗时(毫秒): match/shop_check/price_check/content_check/total
+    match_method: Optional[int] = None  # 匹配成功的方法编号(1-4),未匹配为None
+    match_candidates: Optional[Dict[str, int]] = None  # 各匹配方法检查的候选商品数
+    rules_run: Optional[List[str]] = None  # 实际执行的规则名称(按执行顺序)
+    rules_skipped: Optional[List[str]] = None  # 结果已确定而跳过的规则名称
 
     def __post_init__(self):
         if self.detected_at is None:
@@ -48,7 +69,7 @@ class DetectionResult:
 
     def to_dict(self) -> Dict:
         """转换为字典"""
-        return {
+        data = {
             "is_piracy": self.is_piracy,
             "confidence": self.confidence,
             "reasons": self.reasons,
@@ -58,8 +79,163 @@ class DetectionResult:
             "price_check": self.price_check,
             "content_check": self.content_check,
             "price_ratio": self.price_ratio,
+            "rules_run": self.rules_run,
+            "rules_skipped": self.rules_skipped,
             "detected_at": self.detected_at
         }
+        if self.timings is not None:
+            data["timings"] = self.timings
+            data["match_method"] = self.match_method
+            data["match_candidates"] = self.match_candidates
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict, matched_product: Optional[GenuineProduct] = None) -> 'DetectionResult':
+        """
+        从 to_dict 的结果恢复对象(忽略未知字段)
+
+        Args:
+            data: to_dict 生成的字典
+            matched_product: 匹配到的正版商品(字典中只保存了商品ID)
+        """
+        known = {f.name for f in fields(cls)} - {"matched_product"}
+        return cls(matched_product=matched_product, **{k: v for k, v in data.items() if k in known})
+
+
+@dataclass
+class RuleOutcome:
+    """单条检测规则的执行结果"""
+
+    passed: bool  # 检查是否通过
+    reason: str  # 检查原因说明
+    suspicious: bool  # 是否计入可疑度(累加规则权重)
+    decisive: bool = False  # 是否直接判定为正版(如官方店铺),后续规则不再执行
+    price_ratio: Optional[float] = None  # 价格比例(仅价格规则)
+
+
+class DetectionRule(ABC):
+    """
+    检测规则基类
+
+    每条规则有成本估计(决定执行顺序)和权重(可疑时累加到置信度)。
+    """
+
+    name: str = ""  # 规则名称
+    label: str = ""  # 中文名称(用于判定依据)
+    result_field: str = ""  # 对应的 DetectionResult 布尔字段
+    can_decide: bool = False  # 是否可能直接判定为正版
+
+    def __init__(self, weight: float, cost: float):
+        """
+        初始化规则
+
+        Args:
+            weight: 规则可疑时增加的置信度
+            cost: 相对执行成本,成本低的规则先执行
+        """
+        self.weight = weight
+        self.cost = cost
+        self.stage = f"{self.name}_check"  # 性能追踪中的阶段名称
+
+    @abstractmethod
+    def evaluate(
+        self,
+        detector: 'PiracyDetector',
+        product_info: ProductInfo,
+        matched_product: GenuineProduct
+    ) -> RuleOutcome:
+        """
+        执行规则
+
+        Args:
+            detector: 检测器(提供阈值和检查方法)
+            product_info: 待检测商品信息
+            matched_product: 匹配到的正版商品
+
+        Returns:
+            规则执行结果
+        """
+        pass
+
+
+class ShopRule(DetectionRule):
+    """店铺名称规则: 官方店铺直接判定为正版,否则计入可疑度"""
+
+    name = "shop"
+    label = "店铺"
+    result_field = "shop_check"
+    can_decide = True
+
+    def evaluate(self, detector, product_info, matched_product) -> RuleOutcome:
+        passed, reason = detector._check_shop_name(product_info.shop_name, matched_product)
+        return RuleOutcome(passed=passed, reason=reason, suspicious=not passed, decisive=passed)
+
+
+class PriceRule(DetectionRule):
+    """价格规则: 低于原价阈值时计入可疑度"""
+
+    name = "price"
+    label = "价格"
+    result_field = "price_check"
+
+    def evaluate(self, detector, product_info, matched_product) -> RuleOutcome:
+        passed, reason, price_ratio = detector._check_price(
+            product_info.price,
+            matched_product.original_price
+        )
+        return RuleOutcome(passed=passed, reason=reason, suspicious=not passed, price_ratio=price_ratio)
+
+
+class ContentRule(DetectionRule):
+    """内容规则: 与正版内容高度相似时计入可疑度"""
+
+    name = "content"
+    label = "内容"
+    result_field = "content_check"
+
+    def evaluate(self, detector, product_info, matched_product) -> RuleOutcome:
+        passed, reason = detector._check_content(product_info, matched_product)
+        return RuleOutcome(passed=passed, reason=reason, suspicious=passed)
+
+
+# 跳过的规则在判定依据中的前缀
+SKIPPED_REASON_PREFIX = "⏭️"
+
+# 可用的检测规则
+DETECTION_RULES = {
+    "shop": ShopRule,
+    "price": PriceRule,
+    "content": ContentRule,
+}
+
+# 默认规则配置(与 DETECTOR_CONFIG["rules"] 一致)
+DEFAULT_RULES = [
+    {"name": "shop", "weight": 0.4, "cost": 1},
+    {"name": "price", "weight": 0.4, "cost": 1},
+    {"name": "content", "weight": 0.2, "cost": 10},
+]
+
+
+def create_rules(rule_configs: List[Dict]) -> List[DetectionRule]:
+    """
+    根据配置创建规则列表,按成本从低到高排序(成本相同时保持配置顺序)
+
+    Args:
+        rule_configs: 规则配置列表,每项包含 name/weight/cost
+
+    Returns:
+        排序后的规则列表
+
+    Raises:
+        ValueError: 未知的规则名称
+    """
+    rules = []
+    for config in rule_configs:
+        rule_class = DETECTION_RULES.get(config["name"])
+        if not rule_class:
+            raise ValueError(f"未知的检测规则: {config['name']}，可用规则: {list(DETECTION_RULES.keys())}")
+        rules.append(rule_class(weight=config.get("weight", 0.0), cost=config.get("cost", 1)))
+    return sorted(rules, key=lambda rule: rule.cost)
 
 
 class PiracyDetector:
@@ -69,7 +245,11 @@ class PiracyDetector:
         self,
         product_db: ProductDatabase,
         price_threshold: float = 0.7,  # 价格阈值(低于此比例触发警告)
-        similarity_threshold: float = 0.6  # 内容相似度阈值
+        similarity_threshold: float = 0.6,  # 内容相似度阈值
+        profile: bool = False,  # 是否记录性能追踪信息
+        confidence_threshold: float = 0.7,  # 判定为盗版的置信度阈值
+        rules: Optional[List[Dict]] = None,  # 规则配置,None表示使用 DEFAULT_RULES
+        official_confidence: float = 0.9  # 官方店铺判定为正版时的置信度
     ):
         """
         初始化检测器
@@ -78,10 +258,26 @@ class PiracyDetector:
             product_db: 正版商品数据库
             price_threshold: 价格阈值,低于原价的该比例将触发盗版警告
             similarity_threshold: 内容相似度阈值
+            profile: 为True时在检测结果中填充各阶段耗时、匹配方法和候选数
+            confidence_threshold: 综合置信度达到该值判定为盗版
+            rules: 规则配置列表(name/weight/cost),见 DETECTOR_CONFIG["rules"]
+            official_confidence: 官方店铺判定为正版时的置信度
         """
         self.product_db = product_db
         self.price_threshold = price_threshold
         self.similarity_threshold = similarity_threshold
+        self.profile = profile
+        self.confidence_threshold = confidence_threshold
+        self.official_confidence = official_confidence
+
+        # 规则按成本排序,并预先计算每个位置之后的剩余权重和是否还有可直接判定的规则,
+        # 供检测时判断结果是否已不会改变
+        self.rules = create_rules(rules if rules is not None else DEFAULT_RULES)
+        self._remaining_weight = [0.0] * (len(self.rules) + 1)
+        self._remaining_can_decide = [False] * (len(self.rules) + 1)
+        for i in range(len(self.rules) - 1, -1, -1):
+            self._remaining_weight[i] = self._remaining_weight[i + 1] + self.rules[i].weight
+            self._remaining_can_decide[i] = self._remaining_can_decide[i + 1] or self.rules[i].can_decide
 
     def detect(self, product_info: ProductInfo) -> DetectionResult:
         """
@@ -90,11 +286,44 @@ class PiracyDetector:
         Args:
             product_info: 待检测商品信息
 
+        Returns:
+            检测结果
+        """
+        trace = {"timings": {}, "method": None, "candidates": {}} if self.profile else None
+        start = time.perf_counter()
+
+        # 检测期间固定商品库,不会在多次查询之间读到热加载的修改
+        with self.product_db.pinned():
+            result = self._detect(product_info, trace)
+
+        if trace is not None:
+            trace["timings"]["total"] = (time.perf_counter() - start) * 1000
+            result.timings = trace["timings"]
+            result.match_method = trace["method"]
+            result.match_candidates = trace["candidates"]
+        return result
+
+    @staticmethod
+    def _record_timing(trace: Optional[Dict], stage: str, start: float) -> None:
+        """记录阶段耗时(毫秒),未开启追踪时不做任何事"""
+        if trace is not None:
+            trace["timings"][stage] = (time.perf_counter() - start) * 1000
+
+    def _detect(self, product_info: ProductInfo, trace: Optional[Dict]) -> DetectionResult:
+        """
+        检测实现
+
+        Args:
+            product_info: 待检测商品信息
+            trace: 性能追踪信息,为None时不记录
+
         Returns:
             检测结果
         """
         # Step 1: 尝试匹配正版商品
-        matched_product = self._match_genuine_product(product_info)
+        start = time.perf_counter()
+        matched_product = self._match_genuine_product(product_info, trace)
+        self._record_timing(trace, "match", start)
 
         if not matched_product:
             # 无法匹配到正版商品,无法判断
@@ -105,115 +334,134 @@ class PiracyDetector:
                 matched_product=None
             )
 
-        # Step 2: 店铺名称检查
-        shop_check_passed, shop_reason = self._check_shop_name(
-            product_info.shop_name,
-            matched_product
-        )
-
-        # Step 3: 价格检查
-        price_check_passed, price_reason, price_ratio = self._check_price(
-            product_info.price,
-            matched_product.original_price
-        )
-
-        # Step 4: 内容检查
-        content_check_passed, content_reason = self._check_content(
-            product_info,
-            matched_product
-        )
-
-        # 综合判断
+        # Step 2: 按成本从低到高执行规则
         reasons = []
         confidence = 0.0
-
-        # 如果店铺名称匹配,大概率是正版
-        if shop_check_passed:
-            reasons.append(shop_reason)
-            return DetectionResult(
-                is_piracy=False,
-                confidence=0.9,
-                reasons=reasons,
-                matched_product=matched_product,
-                shop_check=True,
-                price_check=price_check_passed,
-                content_check=content_check_passed,
-                price_ratio=price_ratio
-            )
-
-        # 店铺名称不匹配,检查价格和内容
-        if not shop_check_passed:
-            reasons.append(shop_reason)
-            confidence += 0.4  # 店铺不匹配增加40%可疑度
-
-        if not price_check_passed:
-            reasons.append(price_reason)
-            confidence += 0.4  # 价格异常增加40%可疑度
-
-        if content_check_passed:
-            reasons.append(content_reason)
-            confidence += 0.2  # 内容匹配增加20%可疑度
+        all_suspicious = True  # 已执行的规则是否全部可疑
+        checks = {"matched_product": matched_product, "rules_run": []}
+
+        for i, rule in enumerate(self.rules):
+            start = time.perf_counter()
+            outcome = rule.evaluate(self, product_info, matched_product)
+            self._record_timing(trace, rule.stage, start)
+
+            checks["rules_run"].append(rule.name)
+            checks[rule.result_field] = outcome.passed
+            if outcome.price_ratio is not None:
+                checks["price_ratio"] = outcome.price_ratio
+
+            # 如果店铺名称匹配,大概率是正版
+            if outcome.decisive:
+                reasons = [outcome.reason]
+                self._mark_skipped(checks, reasons)
+                return DetectionResult(
+                    is_piracy=False,
+                    confidence=self.official_confidence,
+                    reasons=reasons,
+                    **checks
+                )
+
+            if outcome.suspicious:
+                reasons.append(outcome.reason)
+                confidence += rule.weight
+            else:
+                all_suspicious = False
+
+            # 置信度已达阈值且后续没有可直接判定正版的规则: 结果已确定为盗版
+            if confidence >= self.confidence_threshold and not self._remaining_can_decide[i + 1]:
+                break
+            # 后续规则全部可疑也无法达到阈值: 结果已确定为非盗版
+            if not all_suspicious and confidence + self._remaining_weight[i + 1] < self.confidence_threshold:
+                break
 
         # 判定为盗版的条件:
-        # 1. 店铺不匹配 + 价格低于阈值 + 内容匹配
-        # 2. 综合置信度超过0.7
-        is_piracy = (not shop_check_passed and not price_check_passed and content_check_passed) or confidence >= 0.7
+        # 1. 所有规则均可疑(店铺不匹配 + 价格低于阈值 + 内容匹配)
+        # 2. 综合置信度达到阈值
+        all_rules_run = bool(self.rules) and len(checks["rules_run"]) == len(self.rules)
+        is_piracy = (all_suspicious and all_rules_run) or confidence >= self.confidence_threshold
+        self._mark_skipped(checks, reasons)
 
         return DetectionResult(
             is_piracy=is_piracy,
             confidence=confidence,
             reasons=reasons,
-            matched_product=matched_product,
-            shop_check=shop_check_passed,
-            price_check=price_check_passed,
-            content_check=content_check_passed,
-            price_ratio=price_ratio
+            **checks
         )
 
-    def _match_genuine_product(self, product_info: ProductInfo) -> Optional[GenuineProduct]:
+    def _mark_skipped(self, checks: Dict, reasons: List[str]) -> None:
+        """
+        为未执行的规则填写跳过标记: 检查字段为 None,判定依据中注明未执行
+
+        Args:
+            checks: 检测结果字段(含 rules_run)
+            reasons: 判定依据列表
+        """
+        skipped = [rule for rule in self.rules if rule.name not in checks["rules_run"]]
+        for rule in skipped:
+            checks[rule.result_field] = None
+            reasons.append(f"{SKIPPED_REASON_PREFIX} 未执行{rule.label}检查: 判定结果已确定")
+        checks["rules_skipped"] = [rule.name for rule in skipped]
+
+    def _match_genuine_product(
+        self,
+        product_info: ProductInfo,
+        trace: Optional[Dict] = None
+    ) -> Optional[GenuineProduct]:
         """
         匹配正版商品
 
         Args:
             product_info: 待检测商品信息
+            trace: 性能追踪信息,不为None时记录成功的方法编号和各方法的候选商品数
 
         Returns:
             匹配到的正版商品,如果没有匹配则返回None
         """
         # 方法1: 通过商品名称精确匹配
         results = self.product_db.search_by_name(product_info.title)
+        if trace is not None:
+            trace["candidates"]["method_1"] = len(results)
         if results:
+            if trace is not None:
+                trace["method"] = 1
             return results[0]
 
         # 方法2: 通过关键词匹配
         keywords = self._extract_keywords(product_info.title)
         if keywords:
             results = self.product_db.search_by_keywords(keywords)
+            if trace is not None:
+                trace["candidates"]["method_2"] = len(results)
             if results:
+                if trace is not None:
+                    trace["method"] = 2
                 return results[0]
 
         # 方法3: 检查商品标题是否包含数据库中商品的关键词
         combined_text = f"{product_info.title} {product_info.description or ''}"
-        for product in self.product_db.get_all_products():
-            if product.keywords:
-                # 计算关键词匹配数
-                match_count = sum(1 for kw in product.keywords if kw in combined_text)
-                # 如果匹配到至少2个关键词，认为匹配成功
-                if match_count >= 2:
-                    return product
-                # 如果匹配到1个关键词且商品名也部分匹配
-                if match_count >= 1 and any(
-                    part in combined_text for part in product.product_name.split()
-                    if len(part) > 1
-                ):
-                    return product
+        candidates = self.product_db.find_by_keyword_text(combined_text)
+        if trace is not None:
+            trace["candidates"]["method_3"] = len(candidates)
+        for product, match_count in candidates:
+            # 如果匹配到至少2个关键词，认为匹配成功
+            # 如果匹配到1个关键词且商品名也部分匹配
+            if match_count >= 2 or any(
+                part in combined_text for part in product.product_name.split()
+                if len(part) > 1
+            ):
+                if trace is not None:
+                    trace["method"] = 3
+                return product
 
         # 方法4: 通过OCR文本匹配
         if product_info.ocr_text:
-            for product in self.product_db.get_all_products():
-                if product.keywords:
-                    if any(kw in product_info.ocr_text for kw in product.keywords):
-                        return product
+            candidates = self.product_db.find_by_keyword_text(product_info.ocr_text)
+            if trace is not None:
+                trace["candidates"]["method_4"] = len(candidates)
+            if candidates:
+                if trace is not None:
+                    trace["method"] = 4
+                return candidates[0][0]
 
         return None
 
@@ -1,64 +1,251 @@
 """正版商品数据库管理模块
 
 用于存储和管理正版商品信息,作为盗版识别的基准数据。
+
+运营人员可以在巡查运行期间直接编辑数据库文件: 查询时按 refresh_interval 轮询文件
+修改时间,发现变化后只替换有差异的商品,并递增 version 通知检测器使缓存失效。
 """
 
 import json
 import os
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, List, Optional, Dict, Set, Tuple, Union
 from datetime import datetime
 
+from .compact import CompactRecord, intern_strings, intern_text, pack_timestamp, unpack_timestamp
+from .file_lock import FileLock
+from .snapshot_cache import load_snapshot, save_snapshot, snapshot_path, source_key
+from .write_behind import DURABILITY_POLICIES, WriteBehindBuffer
+
+# 导入记录中列表字段(官方店铺、关键词)的分隔符
+_LIST_SEPARATORS = re.compile(r'[|;,，；、]')
+
+# 导入记录的必填字段
+_REQUIRED_FIELDS = ("product_id", "product_name", "shop_name", "original_price", "platform", "category")
+
+
+class GenuineProduct(CompactRecord):
+    """
+    正版商品数据模型
+
+    使用 __slots__ 紧凑存储: 店铺、平台、类别、关键词为驻留字符串,官方店铺和关键词
+    保存为元组(相同的官方店铺列表共享同一个元组),时间保存为整数微秒。
+    构造参数、属性名和 to_dict/from_dict 格式与原 dataclass 相同。
+    """
 
-@dataclass
-class GenuineProduct:
-    """正版商品数据模型"""
-
-    product_id: str  # 商品唯一标识
-    product_name: str  # 商品名称
-    shop_name: str  # 官方店铺名称
-    official_shops: List[str]  # 所有官方授权店铺名称列表
-    original_price: float  # 正版原价
-    platform: str  # 所属平台 (如"得到")
-    category: str  # 商品类别 (如"电子书", "课程")
-    description: Optional[str] = None  # 商品描述
-    keywords: Optional[List[str]] = None  # 关键词列表
-    created_at: str = None  # 添加时间
-    updated_at: str = None  # 更新时间
-
-    def __post_init__(self):
-        """初始化时间戳"""
-        if self.created_at is None:
-            self.created_at = datetime.now().isoformat()
-        if self.updated_at is None:
-            self.updated_at = datetime.now().isoformat()
-        if self.keywords is None:
-            self.keywords = []
-
-    def to_dict(self) -> Dict:
-        """转换为字典"""
-        return asdict(self)
-
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'GenuineProduct':
-        """从字典创建对象"""
-        return cls(**data)
+    __slots__ = (
+        "product_id", "product_name", "shop_name", "_official_shops", "original_price",
+        "platform", "category", "description", "_keywords", "_created_at", "_updated_at"
+    )
+    _fields = (
+        "product_id", "product_name", "shop_name", "official_shops", "original_price",
+        "platform", "category", "description", "keywords", "created_at", "updated_at"
+    )
+
+    def __init__(
+        self,
+        product_id: str,  # 商品唯一标识
+        product_name: str,  # 商品名称
+        shop_name: str,  # 官方店铺名称
+        official_shops: Iterable[str],  # 所有官方授权店铺名称列表
+        original_price: float,  # 正版原价
+        platform: str,  # 所属平台 (如"得到")
+        category: str,  # 商品类别 (如"电子书", "课程")
+        description: Optional[str] = None,  # 商品描述
+        keywords: Optional[Iterable[str]] = None,  # 关键词列表
+        created_at: Optional[str] = None,  # 添加时间
+        updated_at: Optional[str] = None  # 更新时间
+    ):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.shop_name = intern_text(shop_name)
+        self.official_shops = official_shops
+        self.original_price = original_price
+        self.platform = intern_text(platform)
+        self.category = intern_text(category)
+        self.description = description
+        self.keywords = keywords
+        # 初始化时间戳
+        self.created_at = created_at if created_at is not None else datetime.now().isoformat()
+        self.updated_at = updated_at if updated_at is not None else datetime.now().isoformat()
+
+    @property
+    def official_shops(self) -> Tuple[str, ...]:
+        return self._official_shops
+
+    @official_shops.setter
+    def official_shops(self, value: Optional[Iterable[str]]) -> None:
+        self._official_shops = intern_strings(value, share=True)
+
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        return self._keywords
+
+    @keywords.setter
+    def keywords(self, value: Optional[Iterable[str]]) -> None:
+        self._keywords = intern_strings(value)
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return unpack_timestamp(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value: Optional[str]) -> None:
+        self._created_at = pack_timestamp(value)
+
+    @property
+    def updated_at(self) -> Optional[str]:
+        return unpack_timestamp(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value: Optional[str]) -> None:
+        self._updated_at = pack_timestamp(value)
+
+
+def _parse_list(value: Any) -> List[str]:
+    """将列表或分隔符连接的字符串解析为去除空白的字符串列表"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = _LIST_SEPARATORS.split(value)
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"无法解析为列表: {value!r}")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def validate_product(data: Any) -> GenuineProduct:
+    """
+    校验导入记录并转换为商品对象
+
+    列表字段可以是 JSON 数组,也可以是以 | ; , 、 分隔的字符串(CSV);
+    未提供官方店铺时使用 shop_name。未知字段被忽略。
+
+    Args:
+        data: 导入记录(CSV 行或 JSON 对象)
+
+    Returns:
+        正版商品对象
+
+    Raises:
+        ValueError: 记录格式错误、缺少必填字段或价格无效
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"记录不是对象: {str(data)[:50]!r}")
+
+    missing = [field for field in _REQUIRED_FIELDS if data.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"缺少必填字段: {', '.join(missing)}")
+
+    try:
+        price = float(data["original_price"])
+    except (TypeError, ValueError):
+        raise ValueError(f"价格无效: {data['original_price']!r}")
+    if price < 0:
+        raise ValueError(f"价格不能为负数: {price}")
+
+    shop_name = str(data["shop_name"]).strip()
+    official_shops = _parse_list(data.get("official_shops")) or [shop_name]
+
+    return GenuineProduct(
+        product_id=str(data["product_id"]).strip(),
+        product_name=str(data["product_name"]).strip(),
+        shop_name=shop_name,
+        official_shops=official_shops,
+        original_price=price,
+        platform=str(data["platform"]).strip(),
+        category=str(data["category"]).strip(),
+        description=data.get("description") or None,
+        keywords=_parse_list(data.get("keywords")),
+        created_at=data.get("created_at") or None,
+        updated_at=data.get("updated_at") or None
+    )
 
 
 class ProductDatabase:
     """正版商品数据库管理类"""
 
-    def __init__(self, db_path: str = "data/genuine_products.json"):
+    def __init__(
+        self,
+        db_path: str = "data/genuine_products.json",
+        durability: str = "sync",
+        flush_interval: float = 2.0,
+        max_batch: int = 500,
+        refresh_interval: float = 1.0,
+        snapshot_cache: bool = True
+    ):
         """
         初始化数据库
 
+        多个进程可以共享同一个数据库文件: 保存时加跨进程文件锁,先合并其他进程
+        保存的修改再写入;查询时每隔 refresh_interval 秒检查一次文件是否被其他进程保存
+        或被手工编辑,并把差异应用到内存。
+
         Args:
             db_path: 数据库文件路径
+            durability: 持久化策略,sync 每次修改后保存; write_behind 修改立即返回,
+                由后台线程合并保存
+            flush_interval: write_behind 策略下两次保存的最长间隔(秒)
+            max_batch: write_behind 策略下累计多少次修改后立即保存
+            refresh_interval: 查询时检查文件变化的最短间隔(秒),0 表示每次查询都检查
+            snapshot_cache: 是否使用二进制快照(<db_path>.snapshot)加速加载,
+                文件未变化时跳过 JSON 解析
         """
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"不支持的持久化策略: {durability},支持: {list(DURABILITY_POLICIES)}")
         self.db_path = db_path
         self.products: Dict[str, GenuineProduct] = {}
+        self.refresh_interval = refresh_interval
+        self.snapshot_cache = snapshot_cache
+        self._lock = FileLock(db_path + ".lock")
+        # 本进程尚未保存的修改(商品ID),合并其他进程的修改时保留
+        self._unsaved: Set[str] = set()
+        # 已读取到的文件版本(锁文件中的版本号,每次保存时递增)和文件状态(手工编辑只改变后者)
+        self._generation = 0
+        self._file_stat: Optional[tuple] = None
+        self._next_refresh = 0.0
+        # 商品库版本号: 每次本进程修改或应用文件差异后递增,检测器据此使缓存失效
+        self.version = 0
+        # pinned() 固定的商品表(按线程)
+        self._local = threading.local()
         self._ensure_db_exists()
         self.load()
+        self._writer = self._create_writer(durability, flush_interval, max_batch)
+
+    def _create_writer(self, durability: str, flush_interval: float, max_batch: int) -> Optional[WriteBehindBuffer]:
+        """write_behind 策略下创建后台保存缓冲区"""
+        self.durability = durability
+        if durability != "write_behind":
+            return None
+        return WriteBehindBuffer(
+            lambda changes: self.save(), flush_interval, max_batch, name="product-db-writer"
+        )
+
+    def _changed(self, product_id: str) -> None:
+        """
+        记录一次修改: sync 策略下立即保存,write_behind 策略下交给后台合并保存
+
+        Args:
+            product_id: 被修改的商品ID
+        """
+        if self._writer is not None:
+            self._writer.submit(product_id)
+        else:
+            self.save()
+
+    def flush(self) -> None:
+        """立即保存 write_behind 策略下尚未保存的修改"""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """保存剩余修改并停止后台保存"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._lock.close()
 
     def _ensure_db_exists(self):
         """确保数据库文件和目录存在"""
@@ -66,30 +253,190 @@ class ProductDatabase:
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
 
-        if not os.path.exists(self.db_path):
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump({}, f, ensure_ascii=False, indent=2)
+        with self._lock:
+            if not os.path.exists(self.db_path):
+                with open(self.db_path, 'w', encoding='utf-8') as f:
+                    json.dump({}, f, ensure_ascii=False, indent=2)
+
+    def _stat(self) -> Optional[tuple]:
+        """数据库文件的 (修改时间, 大小, inode),文件不存在时返回None"""
+        try:
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read_file(self, generation: int) -> Dict[str, GenuineProduct]:
+        """
+        读取数据库文件(需持有文件锁)
+
+        文件未变化时直接读取二进制快照,否则解析 JSON 并重新生成快照。
+
+        Args:
+            generation: 锁文件中的版本号
+        """
+        key = source_key(self.db_path, generation) if self.snapshot_cache else None
+        products = load_snapshot(snapshot_path(self.db_path), "products", key)
+        if products is not None:
+            return products
+        with open(self.db_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        products = {pid: GenuineProduct.from_dict(pdata) for pid, pdata in data.items()}
+        save_snapshot(snapshot_path(self.db_path), "products", key, products)
+        return products
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        检查数据库文件是否被其他进程保存或被手工编辑,把差异应用到内存
+
+        本进程尚未保存的修改保留。pinned() 内不检查(force 除外)。
+
+        Args:
+            force: 忽略 refresh_interval,立即检查
+
+        Returns:
+            是否应用了新的修改
+        """
+        now = time.time()
+        if not force and (now < self._next_refresh or self._pinned_view() is not None):
+            return False
+        self._next_refresh = now + self.refresh_interval
+        with self._lock:
+            generation = self._lock.generation()
+            file_stat = self._stat()
+            if generation == self._generation and file_stat == self._file_stat:
+                return False
+            try:
+                latest = self._read_file(generation)
+            except (OSError, ValueError) as e:
+                # 文件可能正在被编辑器写入,下次查询时重试
+                print(f"⚠️ 读取数据库失败: {e}")
+                return False
+            self._generation = generation
+            self._file_stat = file_stat
+            return self._apply_diff(latest)
+
+    def _apply_diff(self, latest: Dict[str, GenuineProduct]) -> bool:
+        """
+        把文件中的最新商品表与内存商品表的差异应用到内存
+
+        内容未变的商品沿用原对象;新商品表构建完成后整体替换,
+        并发的查询要么看到旧表,要么看到新表,不会看到一半新一半旧的状态。
+
+        Args:
+            latest: 从文件读取的商品表
+
+        Returns:
+            是否有差异
+        """
+        current = self.products
+        for pid in self._unsaved:
+            if pid in current:
+                latest[pid] = current[pid]
+            else:
+                latest.pop(pid, None)
+
+        products = {}
+        added = updated = 0
+        for pid, product in latest.items():
+            old = current.get(pid)
+            if old is None:
+                added += 1
+            elif old == product:
+                product = old
+            else:
+                updated += 1
+            products[pid] = product
+        removed = sum(1 for pid in current if pid not in latest)
+        if not (added or updated or removed):
+            return False
+
+        self.products = products
+        self.version += 1
+        print(f"🔄 商品库已更新(版本 {self.version}): 新增 {added}, 修改 {updated}, 删除 {removed}")
+        return True
+
+    def _pinned_view(self) -> Optional[Dict[str, GenuineProduct]]:
+        return getattr(self._local, "view", None)
+
+    def _snapshot(self) -> Dict[str, GenuineProduct]:
+        """查询使用的商品表: pinned() 内为固定的商品表,否则先检查文件变化"""
+        view = self._pinned_view()
+        if view is not None:
+            return view
+        self.refresh()
+        return self.products
+
+    @contextmanager
+    def pinned(self):
+        """
+        固定当前线程看到的商品表,用于一次检测中的多次查询
+
+        进入时检查一次文件变化,之后本线程的查询都基于同一张商品表,
+        不会在检测中途读到热加载的修改。可以嵌套。
+        """
+        if self._pinned_view() is not None:
+            yield self
+            return
+        self.refresh()
+        self._local.view = self.products
+        try:
+            yield self
+        finally:
+            self._local.view = None
+
+    def _replace(self, changes: Dict[str, Optional[GenuineProduct]]) -> None:
+        """
+        修改内存商品表(调用方持有锁)
+
+        复制后整体替换而不是原地修改,正在遍历旧表的查询和 pinned() 不受影响。
+
+        Args:
+            changes: 商品ID -> 新商品,None 表示删除
+        """
+        products = dict(self.products)
+        for pid, product in changes.items():
+            if product is None:
+                products.pop(pid, None)
+            else:
+                products[pid] = product
+            self._unsaved.add(pid)
+        self.products = products
+        self.version += 1
 
     def load(self) -> None:
         """从文件加载数据库"""
         try:
-            with open(self.db_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.products = {
-                    pid: GenuineProduct.from_dict(pdata)
-                    for pid, pdata in data.items()
-                }
+            with self._lock:
+                self._generation = self._lock.generation()
+                self._file_stat = self._stat()
+                self.products = self._read_file(self._generation)
+                self.version += 1
+                self._next_refresh = time.time() + self.refresh_interval
+                self._unsaved.clear()
             print(f"✅ 已加载 {len(self.products)} 个正版商品信息")
         except Exception as e:
             print(f"⚠️ 加载数据库失败: {e}")
             self.products = {}
 
     def save(self) -> None:
-        """保存数据库到文件"""
+        """
+        保存数据库到文件
+
+        在跨进程锁内先合并其他进程已保存的修改,再写临时文件并原子替换,
+        后台保存中途崩溃不会损坏原文件。
+        """
         try:
-            data = {pid: p.to_dict() for pid, p in self.products.items()}
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                self.refresh(force=True)
+                data = {pid: p.to_dict() for pid, p in self.products.items()}
+                tmp_path = f"{self.db_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.db_path)
+                self._generation = self._lock.bump_generation()
+                self._file_stat = self._stat()
+                self._unsaved.clear()
             print(f"✅ 已保存 {len(self.products)} 个商品信息到数据库")
         except Exception as e:
             print(f"❌ 保存数据库失败: {e}")
@@ -104,15 +451,97 @@ class ProductDatabase:
         Returns:
             是否添加成功
         """
-        if product.product_id in self.products:
-            print(f"⚠️ 商品 {product.product_id} 已存在,将更新信息")
-            product.updated_at = datetime.now().isoformat()
-
-        self.products[product.product_id] = product
-        self.save()
+        with self._lock:
+            if product.product_id in self.products:
+                print(f"⚠️ 商品 {product.product_id} 已存在,将更新信息")
+                product.updated_at = datetime.now().isoformat()
+            self._replace({product.product_id: product})
+        self._changed(product.product_id)
         print(f"✅ 已添加/更新商品: {product.product_name}")
         return True
 
+    def import_products(
+        self,
+        products: Iterable[Union[GenuineProduct, Dict]],
+        batch_size: int = 500,
+        progress_every: int = 1000
+    ) -> Dict:
+        """
+        批量导入商品
+
+        逐条校验并分批写入,导入结束后统一重建索引并保存一次,
+        不逐条打印,每处理 progress_every 条输出一次进度和吞吐量。
+
+        Args:
+            products: 商品对象或导入记录(字典)的可迭代对象,可以是流式读取的生成器
+            batch_size: 每批写入的商品数
+            progress_every: 每处理多少条输出一次进度,0 表示不输出
+
+        Returns:
+            导入统计: total/added/updated/invalid/elapsed,errors 为前10条校验失败原因
+        """
+        stats = {"total": 0, "added": 0, "updated": 0, "invalid": 0, "errors": [], "elapsed": 0.0}
+        start = time.time()
+        batch: List[GenuineProduct] = []
+
+        for item in products:
+            stats["total"] += 1
+            try:
+                product = item if isinstance(item, GenuineProduct) else validate_product(item)
+            except ValueError as e:
+                stats["invalid"] += 1
+                if len(stats["errors"]) < 10:
+                    stats["errors"].append(f"第 {stats['total']} 条: {e}")
+                continue
+
+            batch.append(product)
+            if len(batch) >= batch_size:
+                self._upsert_batch(batch, stats)
+                batch = []
+
+            if progress_every and stats["total"] % progress_every == 0:
+                elapsed = time.time() - start
+                rate = stats["total"] / elapsed if elapsed > 0 else 0.0
+                print(f"   已处理 {stats['total']} 条, 无效 {stats['invalid']} 条 ({rate:.0f} 条/秒)")
+
+        if batch:
+            self._upsert_batch(batch, stats)
+        self._finish_import()
+
+        stats["elapsed"] = time.time() - start
+        rate = stats["total"] / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
+        print(
+            f"✅ 导入完成: 共 {stats['total']} 条, 新增 {stats['added']}, 更新 {stats['updated']}, "
+            f"无效 {stats['invalid']}, 耗时 {stats['elapsed']:.1f} 秒 ({rate:.0f} 条/秒)"
+        )
+        for error in stats["errors"]:
+            print(f"   ⚠️ {error}")
+        return stats
+
+    def _upsert_batch(self, batch: List[GenuineProduct], stats: Dict) -> None:
+        """
+        写入一批商品(不保存文件),并累计新增/更新数
+
+        Args:
+            batch: 已校验的商品列表
+            stats: 导入统计
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            changes = {}
+            for product in batch:
+                if product.product_id in self.products or product.product_id in changes:
+                    product.updated_at = now
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+                changes[product.product_id] = product
+            self._replace(changes)
+
+    def _finish_import(self) -> None:
+        """批量导入结束: 保存一次"""
+        self.save()
+
     def get_product(self, product_id: str) -> Optional[GenuineProduct]:
         """
         根据ID获取商品
@@ -123,7 +552,7 @@ class ProductDatabase:
         Returns:
             商品对象或None
         """
-        return self.products.get(product_id)
+        return self._snapshot().get(product_id)
 
     def search_by_name(self, product_name: str) -> List[GenuineProduct]:
         """
@@ -135,8 +564,9 @@ class ProductDatabase:
         Returns:
             匹配的商品列表
         """
+        products = self._snapshot()
         results = []
-        for product in self.products.values():
+        for product in products.values():
             if product_name.lower() in product.product_name.lower():
                 results.append(product)
         return results
@@ -151,8 +581,9 @@ class ProductDatabase:
         Returns:
             匹配的商品列表
         """
+        products = self._snapshot()
         results = []
-        for product in self.products.values():
+        for product in products.values():
             if not product.keywords:
                 continue
             # 检查是否有任何关键词匹配
@@ -178,14 +609,35 @@ class ProductDatabase:
             return False
 
         # 检查所有商品的官方店铺
-        for product in self.products.values():
+        products = self._snapshot()
+        for product in products.values():
             if shop_name in product.official_shops or shop_name == product.shop_name:
                 return True
         return False
 
+    def find_by_keyword_text(self, text: str) -> List[Tuple[GenuineProduct, int]]:
+        """
+        查找关键词出现在文本中的商品
+
+        Args:
+            text: 待匹配文本(如商品标题、OCR文本)
+
+        Returns:
+            (商品, 出现在文本中的关键词个数) 列表,按商品添加顺序排列,不含个数为0的商品
+        """
+        products = self._snapshot()
+        results = []
+        for product in products.values():
+            if not product.keywords:
+                continue
+            match_count = sum(1 for kw in product.keywords if kw in text)
+            if match_count:
+                results.append((product, match_count))
+        return results
+
     def get_all_products(self) -> List[GenuineProduct]:
         """获取所有商品"""
-        return list(self.products.values())
+        return list(self._snapshot().values())
 
     def delete_product(self, product_id: str) -> bool:
         """
@@ -197,9 +649,12 @@ class ProductDatabase:
         Returns:
             是否删除成功
         """
-        if product_id in self.products:
-            del self.products[product_id]
-            self.save()
+        with self._lock:
+            deleted = product_id in self.products
+            if deleted:
+                self._replace({product_id: None})
+        if deleted:
+            self._changed(product_id)
             print(f"✅ 已删除商品: {product_id}")
             return True
         print(f"⚠️ 商品不存在: {product_id}")
@@ -207,20 +662,48 @@ class ProductDatabase:
 
     def get_stats(self) -> Dict:
         """获取数据库统计信息"""
+        products = self._snapshot()
         platforms = {}
         categories = {}
 
-        for product in self.products.values():
+        for product in products.values():
             platforms[product.platform] = platforms.get(product.platform, 0) + 1
             categories[product.category] = categories.get(product.category, 0) + 1
 
         return {
-            "total_products": len(self.products),
+            "total_products": len(products),
             "platforms": platforms,
             "categories": categories
         }
 
 
+# 数据库工厂
+def create_product_database(db_path: str = "data/genuine_products.json", **options) -> ProductDatabase:
+    """
+    根据文件扩展名创建对应的商品数据库
+
+    Args:
+        db_path: 数据库文件路径(.json 使用 JSON 文件, .db/.sqlite/.sqlite3 使用 SQLite)
+        **options: 持久化选项(durability/flush_interval/max_batch);snapshot_cache 只对 JSON 文件有效,
+            SQLite 数据库本身带磁盘索引,无需快照
+
+    Returns:
+        商品数据库实例
+
+    Raises:
+        ValueError: 不支持的文件类型
+    """
+    ext = os.path.splitext(db_path)[1].lower()
+    if ext == ".json":
+        return ProductDatabase(db_path, **options)
+    if ext in (".db", ".sqlite", ".sqlite3"):
+        from .sqlite_product_database import SqliteProductDatabase
+        options.pop("snapshot_cache", None)
+        return SqliteProductDatabase(db_path, **options)
+
+    raise ValueError(f"不支持的数据库文件类型: {db_path},支持: .json/.db/.sqlite/.sqlite3")
+
+
 # 示例使用
 if __name__ == "__main__":
     # 创建数据库实例
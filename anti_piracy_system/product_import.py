@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+正版商品批量导入脚本
+
+流式读取 CSV 或 JSONL 格式的出版方商品目录,校验后分批写入正版商品数据库,
+导入结束后只重建一次索引、保存一次文件。
+
+使用方法:
+    python product_import.py catalogue.csv
+    python product_import.py catalogue.jsonl --db data/genuine_products.db
+    cat catalogue.jsonl | python product_import.py - --format jsonl
+
+CSV 格式(首行为表头,列表字段用 | 分隔):
+    product_id,product_name,shop_name,official_shops,original_price,platform,category,description,keywords
+    dedao_001,《薛兆丰的经济学课》电子书,得到官方旗舰店,得到官方旗舰店|得到App官方店,199,得到,电子书,,薛兆丰|经济学
+
+JSONL 格式(每行一个 JSON 对象,字段同 GenuineProduct)
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, TextIO, Union
+
+# 添加项目根目录到路径,以包方式导入反盗版系统模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_piracy_system.product_database import create_product_database
+from anti_piracy_system.config_anti_piracy import PATHS
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Union[Dict, str]]:
+    """
+    流式读取导入记录
+
+    Args:
+        stream: 输入文本流
+        fmt: 格式,csv 或 jsonl
+
+    Yields:
+        记录字典;JSONL 中无法解析的行原样产出,由校验步骤记为无效
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield line
+
+
+def detect_format(path: str) -> str:
+    """根据扩展名判断输入格式,标准输入默认为 JSONL"""
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description="批量导入正版商品(CSV/JSONL)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  # 导入 CSV 商品目录
+  python product_import.py catalogue.csv
+
+  # 导入到 SQLite 数据库
+  python product_import.py catalogue.jsonl --db data/genuine_products.db
+        """
+    )
+    parser.add_argument(
+        "input",
+        help="CSV 或 JSONL 文件,'-' 表示标准输入"
+    )
+    parser.add_argument(
+        "--db",
+        default=PATHS["product_database"],
+        help="正版商品数据库路径(.json 或 .db)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl"],
+        default=None,
+        help="输入格式(默认根据扩展名判断)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="每批写入的商品数"
+    )
+    parser.add_argument(
+        "--progress-every",
+        type=int,
+        default=1000,
+        help="每处理多少条输出一次进度(0 表示不输出)"
+    )
+    return parser.parse_args(argv)
+
+
+def import_file(
+    path: str,
+    db_path: str = PATHS["product_database"],
+    fmt: Optional[str] = None,
+    batch_size: int = 500,
+    progress_every: int = 1000
+) -> Dict:
+    """
+    从文件批量导入商品
+
+    Args:
+        path: CSV 或 JSONL 文件路径,'-' 表示标准输入
+        db_path: 正版商品数据库路径
+        fmt: 输入格式,None 表示根据扩展名判断
+        batch_size: 每批写入的商品数
+        progress_every: 每处理多少条输出一次进度
+
+    Returns:
+        导入统计(见 ProductDatabase.import_products)
+    """
+    fmt = fmt or detect_format(path)
+    db = create_product_database(db_path)
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig", newline="")
+    try:
+        return db.import_products(
+            iter_records(stream, fmt),
+            batch_size=batch_size,
+            progress_every=progress_every
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数"""
+    args = parse_args(argv)
+    stats = import_file(
+        args.input,
+        db_path=args.db,
+        fmt=args.format,
+        batch_size=args.batch_size,
+        progress_every=args.progress_every
+    )
+    return 1 if stats["invalid"] and not (stats["added"] or stats["updated"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
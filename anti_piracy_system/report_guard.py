@@ -0,0 +1,311 @@
+"""重复举报防护模块
+
+每次举报要在手机上走完整的多步骤流程(约一分钟),同一店铺或同一商品在每次巡查中
+都可能被再次发现。本模块在举报流程开始前检查是否已在重复举报窗口期内举报过:
+
+1. 持久化布隆过滤器: 从未举报过的店铺/商品直接放行,无需查询磁盘索引
+2. SQLite 精确索引: 布隆过滤器命中时确认上次举报时间
+
+键由平台、规范化店铺名和商品指纹(规范化标题的哈希)组成,店铺级和商品级
+分别配置重复举报窗口。
+
+多个 ReportGuard(后台的多个巡查任务、重启后仍在运行的旧进程)可以共用同一组文件:
+布隆过滤器的读写都在 .bloom.lock 文件锁内进行,写入时与文件中的现有位合并,
+其他实例写入或重建后递增锁文件中的版本号,本实例下次检查前重新读取过滤器。
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from typing import List, Optional
+
+from .file_lock import FileLock
+
+_SECONDS_PER_DAY = 86400
+
+# 布隆过滤器文件头: 魔数、位数组长度(位)、哈希函数个数、已添加元素数
+_BLOOM_MAGIC = b"RGBF"
+_BLOOM_HEADER = struct.Struct("<4sQIQ")
+
+
+def normalize_shop(shop_name: str) -> str:
+    """统一大小写并移除标点和空白"""
+    return re.sub(r'[\W_]+', '', (shop_name or '').lower())
+
+
+def listing_fingerprint(title: str) -> str:
+    """根据规范化标题生成商品指纹"""
+    normalized = re.sub(r'[\W_]+', '', (title or '').lower())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class BloomFilter:
+    """
+    文件持久化的布隆过滤器
+
+    添加元素时只写入被修改的字节。多个实例可共用同一文件: 读写都在文件锁内进行,
+    其他实例写入后(锁文件版本号变化)先重新读取文件,因此写入的字节总是与文件中的现有位合并。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 100000,
+        error_rate: float = 0.01,
+        lock: Optional[FileLock] = None
+    ):
+        """
+        打开或创建布隆过滤器
+
+        Args:
+            path: 过滤器文件路径
+            capacity: 预期元素数(新建时使用)
+            error_rate: 预期误判率(新建时使用)
+            lock: 跨进程文件锁,默认为 path + ".lock"
+        """
+        self.path = path
+        self.error_rate = error_rate
+        self.lock = lock or FileLock(path + ".lock")
+        self._file = None
+        with self.lock:
+            if os.path.exists(path):
+                self._load()
+            else:
+                self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+                self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+                self.count = 0
+                self.bits = bytearray((self.num_bits + 7) // 8)
+                self._write_all()
+                self.lock.bump_generation()
+                self._load()
+            self._generation = self.lock.generation()
+
+    @property
+    def capacity(self) -> int:
+        return int(self.num_bits * math.log(2) ** 2 / -math.log(self.error_rate))
+
+    def _load(self) -> None:
+        """从文件读取过滤器(持有锁时调用)"""
+        with open(self.path, 'rb') as f:
+            magic, num_bits, num_hashes, count = _BLOOM_HEADER.unpack(f.read(_BLOOM_HEADER.size))
+            if magic != _BLOOM_MAGIC:
+                raise ValueError(f"不是有效的布隆过滤器文件: {self.path}")
+            bits = bytearray(f.read())
+        if self._file is not None:
+            self._file.close()
+        self.num_bits, self.num_hashes, self.count, self.bits = num_bits, num_hashes, count, bits
+        self._file = open(self.path, 'r+b')
+
+    def _refresh(self) -> None:
+        """其他实例写入或重建过滤器后重新读取(持有锁时调用)"""
+        generation = self.lock.generation()
+        if generation != self._generation:
+            self._load()
+            self._generation = generation
+
+    def _write_all(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, self.path)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        with self.lock:
+            self._refresh()
+            return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key: str) -> None:
+        """添加元素并写入被修改的字节"""
+        with self.lock:
+            self._refresh()
+            changed = set()
+            for pos in self._positions(key):
+                byte = pos >> 3
+                mask = 1 << (pos & 7)
+                if not self.bits[byte] & mask:
+                    self.bits[byte] |= mask
+                    changed.add(byte)
+            if not changed:
+                return
+            self.count += 1
+            for byte in sorted(changed):
+                self._file.seek(_BLOOM_HEADER.size + byte)
+                self._file.write(self.bits[byte:byte + 1])
+            self._file.seek(0)
+            self._file.write(_BLOOM_HEADER.pack(_BLOOM_MAGIC, self.num_bits, self.num_hashes, self.count))
+            self._file.flush()
+            self._generation = self.lock.bump_generation()
+
+    def close(self) -> None:
+        """关闭过滤器文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ReportGuard:
+    """重复举报防护"""
+
+    def __init__(
+        self,
+        path: str = "data/report_guard.db",
+        shop_window_days: Optional[float] = 7,
+        listing_window_days: Optional[float] = 30,
+        capacity: int = 100000,
+        error_rate: float = 0.01
+    ):
+        """
+        初始化防护索引
+
+        Args:
+            path: SQLite 精确索引路径,布隆过滤器保存在同名 .bloom 文件
+            shop_window_days: 同一店铺再次举报的最短间隔(天),0 表示不按店铺去重,None 表示永不重复举报
+            listing_window_days: 同一商品再次举报的最短间隔(天),含义同上
+            capacity: 布隆过滤器预期元素数,超出后按两倍容量重建
+            error_rate: 布隆过滤器预期误判率
+        """
+        self.path = path
+        self.bloom_path = os.path.splitext(path)[0] + ".bloom"
+        self.shop_window_days = shop_window_days
+        self.listing_window_days = listing_window_days
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        # 布隆过滤器的跨进程锁(重建时也持有,避免其他实例读到一半的文件)
+        self._bloom_lock = FileLock(self.bloom_path + ".lock")
+
+        db_dir = os.path.dirname(path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS reported ("
+                "key TEXT PRIMARY KEY, reported_at REAL NOT NULL, report_count INTEGER NOT NULL)"
+            )
+        self.bloom = self._open_bloom(capacity)
+
+        # 统计信息
+        self.stats = {"checked": 0, "bloom_negative": 0, "index_lookups": 0, "duplicates": 0}
+
+    def _open_bloom(self, capacity: int) -> BloomFilter:
+        """打开布隆过滤器;文件缺失或损坏时根据精确索引重建"""
+        with self._bloom_lock:
+            try:
+                return BloomFilter(self.bloom_path, capacity, self.error_rate, lock=self._bloom_lock)
+            except (ValueError, struct.error, OSError):
+                return self._rebuild_bloom(capacity)
+
+    def _rebuild_bloom(self, capacity: int) -> BloomFilter:
+        """根据精确索引重建布隆过滤器(其他实例通过锁文件版本号得知后重新读取)"""
+        with self._bloom_lock:
+            if os.path.exists(self.bloom_path):
+                os.remove(self.bloom_path)
+            total = self._conn.execute("SELECT COUNT(*) FROM reported").fetchone()[0]
+            bloom = BloomFilter(self.bloom_path, max(capacity, total * 2), self.error_rate, lock=self._bloom_lock)
+            for (key,) in self._conn.execute("SELECT key FROM reported"):
+                bloom.add(key)
+            return bloom
+
+    def _keys(self, platform: str, shop_name: str, title: Optional[str]) -> List[tuple]:
+        """生成 (键, 窗口天数, 说明) 列表,跳过窗口为 0 的级别"""
+        shop = normalize_shop(shop_name)
+        keys = []
+        if self.shop_window_days != 0 and shop:
+            keys.append((f"shop|{platform}|{shop}", self.shop_window_days, f"店铺 {shop_name}"))
+        if self.listing_window_days != 0 and title:
+            keys.append((
+                f"listing|{platform}|{shop}|{listing_fingerprint(title)}",
+                self.listing_window_days,
+                f"商品 {title}"
+            ))
+        return keys
+
+    def check(
+        self,
+        platform: str,
+        shop_name: str,
+        title: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        检查是否为重复举报
+
+        Args:
+            platform: 平台名称
+            shop_name: 店铺名称
+            title: 商品标题
+            now: 当前时间戳(秒),默认为当前时间
+
+        Returns:
+            重复举报的原因说明,可以举报时返回None
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self.stats["checked"] += 1
+            for key, window_days, label in self._keys(platform, shop_name, title):
+                if key not in self.bloom:
+                    self.stats["bloom_negative"] += 1
+                    continue
+                self.stats["index_lookups"] += 1
+                row = self._conn.execute(
+                    "SELECT reported_at FROM reported WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                elapsed_days = (now - row[0]) / _SECONDS_PER_DAY
+                if window_days is None or elapsed_days < window_days:
+                    self.stats["duplicates"] += 1
+                    return f"{label} 已于 {elapsed_days:.1f} 天前举报过"
+        return None
+
+    def record(
+        self,
+        platform: str,
+        shop_name: str,
+        title: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> None:
+        """
+        记录一次成功的举报
+
+        Args:
+            platform: 平台名称
+            shop_name: 店铺名称
+            title: 商品标题
+            now: 举报时间戳(秒),默认为当前时间
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            keys = [key for key, _, _ in self._keys(platform, shop_name, title)]
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO reported (key, reported_at, report_count) VALUES (?, ?, 1) "
+                    "ON CONFLICT(key) DO UPDATE SET reported_at = excluded.reported_at, "
+                    "report_count = report_count + 1",
+                    [(key, now) for key in keys]
+                )
+            with self._bloom_lock:
+                for key in keys:
+                    self.bloom.add(key)
+                if self.bloom.count > self.bloom.capacity:
+                    self.bloom.close()
+                    self.bloom = self._rebuild_bloom(self.bloom.capacity * 2)
+
+    def close(self) -> None:
+        """关闭索引文件"""
+        with self._lock:
+            self.bloom.close()
+            self._bloom_lock.close()
+            self._conn.close()
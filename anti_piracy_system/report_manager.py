@@ -1,98 +1,566 @@
 """举报流程管理模块
 
 负责记录举报历史、管理举报证据、生成举报报告
+
+举报记录持久化为快照文件(report_history.json)加追加写日志(report_history.json.journal):
+每次修改只向日志追加一行事件,加载时在快照上重放日志;日志达到一定条数后在后台线程中
+合并为新快照,因此单次修改的写入开销与历史记录数量无关。
 """
 
+import base64
+import bisect
+import csv
+import heapq
 import json
 import os
-from dataclasses import dataclass, asdict
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
-import base64
-
-
-@dataclass
-class ReportRecord:
-    """举报记录"""
-
-    report_id: str  # 举报ID
-    platform: str  # 平台名称(小红书/闲鱼等)
-    target_title: str  # 目标商品标题
-    target_shop: str  # 目标店铺名称
-    target_price: float  # 目标价格
-    target_url: Optional[str] = None  # 目标链接
-    detection_result: Optional[Dict] = None  # 检测结果
-    report_reason: str = ""  # 举报理由
-    report_status: str = "pending"  # 举报状态: pending/submitted/success/failed
-    evidence_screenshots: List[str] = None  # 证据截图路径列表
-    reported_at: str = None  # 举报时间
-    notes: Optional[str] = None  # 备注
-
-    def __post_init__(self):
-        if self.reported_at is None:
-            self.reported_at = datetime.now().isoformat()
-        if self.evidence_screenshots is None:
-            self.evidence_screenshots = []
-
-    def to_dict(self) -> Dict:
-        """转换为字典"""
-        return asdict(self)
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+
+from .compact import CompactRecord, intern_text, pack_timestamp, unpack_timestamp
+from .id_generator import new_id
+from .file_lock import FileLock
+from .snapshot_cache import load_snapshot, save_snapshot, snapshot_path, source_key
+from .write_behind import DURABILITY_POLICIES, WriteBehindBuffer
+
+# 日志刷盘策略: always 每条事件 fsync; interval 距上次 fsync 超过 fsync_interval 秒时 fsync;
+# never 只写入操作系统缓冲区
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# 二级索引: 索引名 -> 从举报记录取索引键的函数(date 按举报日期分桶)
+_INDEX_KEYS = {
+    "platform": lambda r: r.platform,
+    "status": lambda r: r.report_status,
+    "shop": lambda r: r.target_shop,
+    "date": lambda r: (r.reported_at or "")[:10],
+    "merchant": lambda r: (r.platform, r.target_shop),
+}
+
+QUERY_ORDERS = ("desc", "asc")
+
+
+def _encode_cursor(data: Dict) -> str:
+    """将分页位置编码为不透明游标"""
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, kind: str) -> Dict:
+    """
+    解码分页游标
+
+    Raises:
+        ValueError: 游标无效或不属于该查询类型
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    if not isinstance(data, dict) or data.get("k") != kind or not isinstance(data.get("s"), int):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return data
+
+
+class ReportRecord(CompactRecord):
+    """
+    举报记录
+
+    使用 __slots__ 紧凑存储: 平台、店铺、状态、举报理由为驻留字符串,
+    证据截图保存为元组,举报时间保存为整数微秒。
+    构造参数、属性名和 to_dict/from_dict 格式与原 dataclass 相同。
+    """
+
+    __slots__ = (
+        "report_id", "platform", "target_title", "target_shop", "target_price", "target_url",
+        "detection_result", "report_reason", "_report_status", "_evidence_screenshots",
+        "_reported_at", "notes"
+    )
+    _fields = (
+        "report_id", "platform", "target_title", "target_shop", "target_price", "target_url",
+        "detection_result", "report_reason", "report_status", "evidence_screenshots",
+        "reported_at", "notes"
+    )
 
-    @classmethod
-    def from_dict(cls, data: Dict) -> 'ReportRecord':
-        """从字典创建对象"""
-        return cls(**data)
+    def __init__(
+        self,
+        report_id: str,  # 举报ID
+        platform: str,  # 平台名称(小红书/闲鱼等)
+        target_title: str,  # 目标商品标题
+        target_shop: str,  # 目标店铺名称
+        target_price: float,  # 目标价格
+        target_url: Optional[str] = None,  # 目标链接
+        detection_result: Optional[Dict] = None,  # 检测结果
+        report_reason: str = "",  # 举报理由
+        report_status: str = "pending",  # 举报状态: pending/submitted/success/failed
+        evidence_screenshots: Optional[Iterable[str]] = None,  # 证据截图路径列表
+        reported_at: Optional[str] = None,  # 举报时间
+        notes: Optional[str] = None  # 备注
+    ):
+        self.report_id = report_id
+        self.platform = intern_text(platform)
+        self.target_title = target_title
+        self.target_shop = intern_text(target_shop)
+        self.target_price = target_price
+        self.target_url = target_url
+        self.detection_result = detection_result
+        self.report_reason = intern_text(report_reason)
+        self.report_status = report_status
+        self.evidence_screenshots = evidence_screenshots
+        self.reported_at = reported_at if reported_at is not None else datetime.now().isoformat()
+        self.notes = notes
+
+    @property
+    def report_status(self) -> str:
+        return self._report_status
+
+    @report_status.setter
+    def report_status(self, value: str) -> None:
+        self._report_status = intern_text(value)
+
+    @property
+    def evidence_screenshots(self) -> Tuple[str, ...]:
+        return self._evidence_screenshots
+
+    @evidence_screenshots.setter
+    def evidence_screenshots(self, value: Optional[Iterable[str]]) -> None:
+        self._evidence_screenshots = tuple(value) if value else ()
+
+    @property
+    def reported_at(self) -> Optional[str]:
+        return unpack_timestamp(self._reported_at)
+
+    @reported_at.setter
+    def reported_at(self, value: Optional[str]) -> None:
+        self._reported_at = pack_timestamp(value)
 
 
 class ReportManager:
     """举报管理器"""
 
-    def __init__(self, log_path: str = "logs/report_history.json"):
+    def __init__(
+        self,
+        log_path: str = "logs/report_history.json",
+        fsync_policy: str = "always",
+        fsync_interval: float = 1.0,
+        compact_threshold: int = 1000,
+        durability: str = "sync",
+        flush_interval: float = 1.0,
+        max_batch: int = 100,
+        snapshot_cache: bool = True
+    ):
         """
         初始化举报管理器
 
         Args:
-            log_path: 举报记录文件路径
+            log_path: 举报记录快照文件路径,日志文件为同名加 .journal 后缀
+            fsync_policy: 日志刷盘策略(always/interval/never)
+            fsync_interval: interval 策略下两次 fsync 的最小间隔(秒)
+            compact_threshold: 日志累计多少条事件后在后台合并为快照,0 表示不自动合并
+            durability: 持久化策略,sync 每次修改同步写日志; write_behind 修改立即返回,
+                由后台线程批量写日志(进程崩溃时可能丢失最近 flush_interval 秒内的修改)
+            flush_interval: write_behind 策略下两次批量写入的最长间隔(秒)
+            max_batch: write_behind 策略下待写事件达到该数量时立即写入
+            snapshot_cache: 是否使用二进制快照(<log_path>.snapshot)缓存快照文件解析后的记录和索引,
+                快照文件未变化时跳过 JSON 解析和索引重建
         """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"不支持的刷盘策略: {fsync_policy},支持: {list(FSYNC_POLICIES)}")
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"不支持的持久化策略: {durability},支持: {list(DURABILITY_POLICIES)}")
+
         self.log_path = log_path
+        self.journal_path = log_path + ".journal"
+        self._compacting_path = self.journal_path + ".compacting"
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        self.snapshot_cache = snapshot_cache
         self.reports: Dict[str, ReportRecord] = {}
+
+        # 二级索引: 每条记录按加入顺序分配序号,索引值为有序的序号列表,
+        # 列表长度即该键的计数
+        self._order: List[str] = []
+        self._seq: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[str, List[int]]] = {name: {} for name in _INDEX_KEYS}
+
+        # 跨进程锁: 多个进程共享同一快照和日志时,写日志、合并、重新加载互斥
+        self._lock = FileLock(log_path + ".lock")
+        self._journal = None
+        self._journal_events = 0
+        self._last_fsync = 0.0
+        self._compact_thread: Optional[threading.Thread] = None
+
+        # 已读取到的合并版本(锁文件中的版本号,每次合并改名日志时递增)和日志偏移,
+        # 版本号不变时日志只增不改,从偏移处增量读取其他进程追加的事件
+        self._generation = 0
+        self._journal_offset = 0
+
+        self.durability = durability
+        self._writer: Optional[WriteBehindBuffer] = None
         self._ensure_log_exists()
         self.load()
 
+        if durability == "write_behind":
+            self._writer = WriteBehindBuffer(
+                self._write_events, flush_interval, max_batch, name="report-journal-writer"
+            )
+
     def _ensure_log_exists(self):
         """确保日志文件和目录存在"""
         log_dir = os.path.dirname(self.log_path)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir, exist_ok=True)
 
-        if not os.path.exists(self.log_path):
-            with open(self.log_path, 'w', encoding='utf-8') as f:
-                json.dump({}, f, ensure_ascii=False, indent=2)
+        with self._lock:
+            if not os.path.exists(self.log_path):
+                with open(self.log_path, 'w', encoding='utf-8') as f:
+                    json.dump({}, f, ensure_ascii=False, indent=2)
 
     def load(self) -> None:
-        """加载举报记录"""
-        try:
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.reports = {
-                    rid: ReportRecord.from_dict(rdata)
-                    for rid, rdata in data.items()
-                }
-            print(f"✅ 已加载 {len(self.reports)} 条举报记录")
-        except Exception as e:
-            print(f"⚠️ 加载举报记录失败: {e}")
+        """加载举报快照并重放日志"""
+        with self._lock:
+            if self._journal is not None:
+                # 日志可能已被其他进程合并改名
+                self._journal.close()
+                self._journal = None
+            self._generation = self._lock.generation()
             self.reports = {}
+            self._order = []
+            self._seq = {}
+            self._indexes = {name: {} for name in _INDEX_KEYS}
+            try:
+                self._load_snapshot_file()
+            except Exception as e:
+                print(f"⚠️ 加载举报记录失败: {e}")
+
+            # 先重放上次未完成合并的日志,再重放当前日志
+            self._truncate_torn_tail(self.journal_path)
+            self._journal_events = self._replay_journal(self._compacting_path)[0]
+            count, self._journal_offset = self._replay_journal(self.journal_path)
+            self._journal_events += count
+            print(f"✅ 已加载 {len(self.reports)} 条举报记录")
+
+    def _load_snapshot_file(self) -> None:
+        """
+        加载快照文件中的记录并建立索引(需持有文件锁)
+
+        快照文件未变化时直接读取二进制快照中的记录和索引,否则解析 JSON 并重新生成二进制快照。
+        """
+        key = source_key(self.log_path, self._generation) if self.snapshot_cache else None
+        state = load_snapshot(snapshot_path(self.log_path), "reports", key)
+        if state is not None:
+            records, self._indexes = state
+            self.reports = {report.report_id: report for report in records}
+            self._order = list(self.reports)
+            self._seq = {report_id: seq for seq, report_id in enumerate(self._order)}
+            return
+
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for rdata in data.values():
+            self._put_report(ReportRecord.from_dict(rdata))
+        save_snapshot(snapshot_path(self.log_path), "reports", key, (list(self.reports.values()), self._indexes))
+
+    def refresh(self) -> int:
+        """
+        读取其他进程写入的修改
+
+        合并版本不变时日志只增不改,从上次的偏移处增量重放;其他进程执行了合并
+        (日志被改名)时重新加载。
+
+        Returns:
+            0 表示没有新修改,1 表示增量重放了新事件,2 表示重新加载
+        """
+        with self._lock:
+            if self._lock.generation() != self._generation:
+                self._reload_keeping_pending()
+                return 2
+            try:
+                size = os.path.getsize(self.journal_path)
+            except FileNotFoundError:
+                return 0
+            if size <= self._journal_offset:
+                return 0
+
+            count, self._journal_offset = self._replay_journal(self.journal_path, self._journal_offset)
+            self._journal_events += count
+            return 1 if count else 0
+
+    def _reload_keeping_pending(self) -> None:
+        """重新加载,并重新应用 write_behind 策略下尚未写入的本进程修改"""
+        self.load()
+        if self._writer is not None:
+            for event in self._writer.pending():
+                self._apply_event(event)
+
+    @staticmethod
+    def _truncate_torn_tail(path: str) -> None:
+        """截掉日志末尾不完整的一行(进程在写入中途崩溃),避免后续事件接在其后"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                print(f"⚠️ 已截断日志末尾不完整的事件: {path}")
+
+    def _replay_journal(self, path: str, offset: int = 0) -> Tuple[int, int]:
+        """
+        在内存状态上重放日志文件
+
+        事件重放是幂等的,快照已包含的事件再次重放不会改变结果。
+        只处理完整的行,末尾未写完的行留到下次读取。
+
+        Args:
+            path: 日志文件路径
+            offset: 开始读取的字节偏移
+
+        Returns:
+            (重放的事件数, 已读取到的字节偏移)
+        """
+        if not os.path.exists(path):
+            return 0, 0
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+
+        count = 0
+        for line_no, line in enumerate(data[:end].split(b"\n"), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self._apply_event(json.loads(line))
+                count += 1
+            except (ValueError, KeyError, TypeError) as e:
+                # 进程崩溃可能留下不完整的最后一行
+                print(f"⚠️ 跳过无法解析的日志 {path}@{offset}+{line_no}: {e}")
+        return count, offset + end
+
+    def _apply_event(self, event: Dict) -> None:
+        """
+        将单个修改事件应用到内存状态
+
+        Args:
+            event: 日志事件,op 为 create/status/screenshot
+        """
+        op = event["op"]
+        if op == "create":
+            self._put_report(ReportRecord.from_dict(event["report"]))
+            return
+
+        report = self.reports.get(event["report_id"])
+        if report is None:
+            raise KeyError(f"举报记录不存在: {event['report_id']}")
+        if op == "status":
+            self._set_status(report, event["status"], event.get("notes"))
+        elif op == "screenshot":
+            if event["path"] not in report.evidence_screenshots:
+                report.evidence_screenshots += (event["path"],)
+        else:
+            raise ValueError(f"未知的日志事件: {op}")
+
+    def _put_report(self, report: ReportRecord) -> None:
+        """
+        加入或替换举报记录并更新索引(替换时保留原序号)
+
+        Args:
+            report: 举报记录
+        """
+        old = self.reports.get(report.report_id)
+        if old is not None:
+            seq = self._seq[report.report_id]
+            self._unindex(old, seq)
+        else:
+            seq = len(self._order)
+            self._order.append(report.report_id)
+            self._seq[report.report_id] = seq
+        self.reports[report.report_id] = report
+        self._index(report, seq)
+
+    def _set_status(self, report: ReportRecord, status: str, notes: Optional[str] = None) -> None:
+        """更新举报状态并调整状态索引"""
+        seq = self._seq[report.report_id]
+        self._remove_from_index("status", report.report_status, seq)
+        report.report_status = status
+        if notes:
+            report.notes = notes
+        bisect.insort(self._indexes["status"].setdefault(status, []), seq)
+
+    def _index(self, report: ReportRecord, seq: int) -> None:
+        for name, key_func in _INDEX_KEYS.items():
+            bisect.insort(self._indexes[name].setdefault(key_func(report), []), seq)
+
+    def _unindex(self, report: ReportRecord, seq: int) -> None:
+        for name, key_func in _INDEX_KEYS.items():
+            self._remove_from_index(name, key_func(report), seq)
+
+    def _remove_from_index(self, name: str, key: str, seq: int) -> None:
+        seqs = self._indexes[name].get(key)
+        if not seqs:
+            return
+        i = bisect.bisect_left(seqs, seq)
+        if i < len(seqs) and seqs[i] == seq:
+            del seqs[i]
+        if not seqs:
+            del self._indexes[name][key]
+
+    def _lookup(self, name: str, key: str) -> List[ReportRecord]:
+        """按索引键返回举报记录(按加入顺序)"""
+        return [self.reports[self._order[seq]] for seq in self._indexes[name].get(key, ())]
+
+    def _append_event(self, event: Dict) -> None:
+        """
+        追加一条修改事件到日志(write_behind 策略下只放入待写队列)
+
+        Args:
+            event: 日志事件
+        """
+        if self._writer is not None:
+            self._writer.submit(event)
+        else:
+            self._write_events([event])
+
+    def _write_events(self, events: List[Dict]) -> None:
+        """
+        将一批事件写入日志,按刷盘策略 fsync,必要时触发后台合并
+
+        Args:
+            events: 日志事件列表
+        """
+        if not events:
+            return
+        with self._lock:
+            # 先读取其他进程的修改,事件在日志中排在它们之后,内存中也按同样顺序重新应用,
+            # 保证内存状态与重放日志的结果一致
+            refreshed = self.refresh()
+            if refreshed:
+                for event in events:
+                    if refreshed == 2 or event["op"] != "create":
+                        self._apply_event(event)
+
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events))
+            self._journal.flush()
+            self._journal_offset = self._journal.tell()
+
+            now = time.time()
+            if self.fsync_policy == "always" or (
+                self.fsync_policy == "interval" and now - self._last_fsync >= self.fsync_interval
+            ):
+                os.fsync(self._journal.fileno())
+                self._last_fsync = now
+
+            self._journal_events += len(events)
+            if self.compact_threshold and self._journal_events >= self.compact_threshold:
+                self.compact(background=True)
+
+    def compact(self, background: bool = False) -> bool:
+        """
+        将当前状态合并为新快照并清空日志
+
+        在锁内把日志改名为 .compacting 并复制当前状态,之后的修改写入新日志;
+        快照写入完成后才删除 .compacting 文件,中途崩溃时加载会重放它。
+        每次改名都递增合并版本;快照写入前其他进程又执行了合并(其状态包含本次
+        合并的全部事件)时,本次合并放弃替换快照,以后一次合并的结果为准。
+
+        Args:
+            background: 是否在后台线程中写入快照
+
+        Returns:
+            是否开始合并(已有合并在进行或没有新事件时返回False)
+        """
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return False
+            self.refresh()
+            if self._journal_events == 0 and not os.path.exists(self._compacting_path):
+                return False
+
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self._compacting_path):
+                    # 上次合并失败,把当前日志接到未完成的日志后面
+                    with open(self.journal_path, 'r', encoding='utf-8') as src, \
+                            open(self._compacting_path, 'a', encoding='utf-8') as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self._compacting_path)
 
-    def save(self) -> None:
-        """保存举报记录"""
-        try:
             data = {rid: r.to_dict() for rid, r in self.reports.items()}
-            with open(self.log_path, 'w', encoding='utf-8') as f:
+            self._journal_events = 0
+            self._journal_offset = 0
+            self._generation = self._lock.bump_generation()
+            generation = self._generation
+
+            if background:
+                self._compact_thread = threading.Thread(
+                    target=self._write_snapshot, args=(data, generation),
+                    name="report-compaction", daemon=True
+                )
+                self._compact_thread.start()
+                return True
+
+        self._write_snapshot(data, generation)
+        return True
+
+    def _write_snapshot(self, data: Dict, generation: int) -> None:
+        """
+        原子写入快照文件,成功后删除已合并的日志
+
+        Args:
+            data: 举报记录字典
+            generation: 本次合并的版本号,其他进程已执行了更新的合并时放弃
+        """
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"✅ 已保存 {len(self.reports)} 条举报记录")
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                if self._lock.generation() != generation:
+                    os.remove(tmp_path)
+                    print("⚠️ 其他进程已接手合并,放弃本次快照")
+                    return
+                os.replace(tmp_path, self.log_path)
+                if os.path.exists(self._compacting_path):
+                    os.remove(self._compacting_path)
         except Exception as e:
             print(f"❌ 保存举报记录失败: {e}")
 
+    def flush(self) -> None:
+        """立即写入 write_behind 策略下尚未写入的事件"""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def save(self) -> None:
+        """立即将当前状态合并为快照(同步)"""
+        self.flush()
+        self.compact(background=False)
+
+    def close(self) -> None:
+        """写入剩余事件,等待后台合并结束并关闭日志文件"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        thread = self._compact_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        self._lock.close()
+
     def create_report(
         self,
         platform: str,
@@ -116,8 +584,8 @@ class ReportManager:
         Returns:
             举报记录对象
         """
-        # 生成举报ID
-        report_id = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.reports)}"
+        # 生成举报ID(按时间排序,多进程/多设备写入同一存储也不会重复)
+        report_id = new_id("report")
 
         # 生成举报理由
         report_reason = self._generate_report_reason(detection_result)
@@ -135,8 +603,9 @@ class ReportManager:
             report_status="pending"
         )
 
-        self.reports[report_id] = report
-        self.save()
+        with self._lock:
+            self._put_report(report)
+            self._append_event({"op": "create", "report": report.to_dict()})
 
         print(f"✅ 创建举报记录: {report_id}")
         return report
@@ -178,14 +647,16 @@ class ReportManager:
         Returns:
             是否添加成功
         """
+        self.refresh()
         if report_id not in self.reports:
             print(f"❌ 举报记录不存在: {report_id}")
             return False
 
         report = self.reports[report_id]
         if screenshot_path not in report.evidence_screenshots:
-            report.evidence_screenshots.append(screenshot_path)
-            self.save()
+            with self._lock:
+                report.evidence_screenshots += (screenshot_path,)
+                self._append_event({"op": "screenshot", "report_id": report_id, "path": screenshot_path})
             print(f"✅ 已添加截图: {screenshot_path}")
             return True
 
@@ -208,16 +679,14 @@ class ReportManager:
         Returns:
             是否更新成功
         """
+        self.refresh()
         if report_id not in self.reports:
             print(f"❌ 举报记录不存在: {report_id}")
             return False
 
-        report = self.reports[report_id]
-        report.report_status = status
-        if notes:
-            report.notes = notes
-
-        self.save()
+        with self._lock:
+            self._set_status(self.reports[report_id], status, notes)
+            self._append_event({"op": "status", "report_id": report_id, "status": status, "notes": notes})
         print(f"✅ 已更新举报状态: {report_id} -> {status}")
         return True
 
@@ -231,6 +700,7 @@ class ReportManager:
         Returns:
             举报记录对象或None
         """
+        self.refresh()
         return self.reports.get(report_id)
 
     def get_reports_by_platform(self, platform: str) -> List[ReportRecord]:
@@ -243,7 +713,8 @@ class ReportManager:
         Returns:
             举报记录列表
         """
-        return [r for r in self.reports.values() if r.platform == platform]
+        self.refresh()
+        return self._lookup("platform", platform)
 
     def get_reports_by_status(self, status: str) -> List[ReportRecord]:
         """
@@ -255,30 +726,267 @@ class ReportManager:
         Returns:
             举报记录列表
         """
-        return [r for r in self.reports.values() if r.report_status == status]
+        self.refresh()
+        return self._lookup("status", status)
 
-    def get_statistics(self) -> Dict:
+    def get_reports_by_shop(self, shop_name: str) -> List[ReportRecord]:
         """
-        获取统计信息
+        根据店铺获取举报记录
+
+        Args:
+            shop_name: 目标店铺名称
 
         Returns:
-            统计信息字典
+            举报记录列表
         """
-        total = len(self.reports)
-        by_platform = {}
-        by_status = {}
+        self.refresh()
+        return self._lookup("shop", shop_name)
 
-        for report in self.reports.values():
-            # 统计平台分布
-            by_platform[report.platform] = by_platform.get(report.platform, 0) + 1
+    def get_reports_by_date(self, start_date: str, end_date: Optional[str] = None) -> List[ReportRecord]:
+        """
+        根据举报日期获取举报记录
 
-            # 统计状态分布
-            by_status[report.report_status] = by_status.get(report.report_status, 0) + 1
+        Args:
+            start_date: 起始日期(YYYY-MM-DD,含)
+            end_date: 结束日期(YYYY-MM-DD,含),默认与起始日期相同
 
+        Returns:
+            举报记录列表(按加入顺序)
+        """
+        self.refresh()
+        end_date = end_date or start_date
+        seqs = sorted(
+            seq
+            for day, day_seqs in self._indexes["date"].items()
+            if start_date <= day <= end_date
+            for seq in day_seqs
+        )
+        return [self.reports[self._order[seq]] for seq in seqs]
+
+    def query_reports(
+        self,
+        platform: Optional[str] = None,
+        status: Optional[str] = None,
+        shop: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None,
+        order: str = "desc",
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        分页查询举报记录
+
+        从平台/状态/店铺中最小的索引(或日期分桶)取候选序号,
+        游标记录上一页最后一条的序号,翻页时在每个索引列表(日期分桶)中二分定位,
+        按序号顺序惰性合并,取到 limit + 1 条即停止,每页耗时与记录总数无关。
+
+        Args:
+            platform: 平台名称
+            status: 举报状态
+            shop: 目标店铺名称
+            start_date: 起始日期(YYYY-MM-DD,含)
+            end_date: 结束日期(YYYY-MM-DD,含)
+            min_confidence: 最低检测置信度(含)
+            max_confidence: 最高检测置信度(含)
+            order: 按举报先后排序,desc 为最新在前,asc 为最早在前
+            limit: 每页条数
+            cursor: 上一页返回的 next_cursor,None 表示第一页
+
+        Returns:
+            {"items": 举报记录列表, "next_cursor": 下一页游标(没有更多时为None)}
+
+        Raises:
+            ValueError: 排序方式、每页条数或游标无效
+        """
+        if order not in QUERY_ORDERS:
+            raise ValueError(f"不支持的排序方式: {order},支持: {list(QUERY_ORDERS)}")
+        if limit <= 0:
+            raise ValueError(f"每页条数必须为正数: {limit}")
+        last_seq = _decode_cursor(cursor, f"reports:{order}")["s"] if cursor else None
+
+        filters = {"platform": platform, "status": status, "shop": shop}
+        with self._lock:
+            self.refresh()
+            items: List[ReportRecord] = []
+            has_more = False
+            for seq in self._iter_candidates(filters, start_date, end_date, order == "desc", last_seq):
+                report = self.reports[self._order[seq]]
+                if not self._matches(report, filters, start_date, end_date, min_confidence, max_confidence):
+                    continue
+                if len(items) == limit:
+                    has_more = True
+                    break
+                items.append(report)
+
+            next_cursor = None
+            if has_more:
+                next_cursor = _encode_cursor({"k": f"reports:{order}", "s": self._seq[items[-1].report_id]})
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _iter_candidates(
+        self,
+        filters: Dict[str, Optional[str]],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        descending: bool = False,
+        after: Optional[int] = None
+    ) -> Iterator[int]:
+        """
+        按序号顺序惰性遍历候选序号(调用方持有锁)
+
+        有平台/状态/店铺过滤时只遍历其中最短的索引列表;只按日期过滤时把范围内的日期分桶
+        按序号合并;都没有时遍历全部记录。
+
+        Args:
+            filters: 平台/状态/店铺过滤条件
+            start_date: 起始日期(含)
+            end_date: 结束日期(含)
+            descending: 是否从新到旧遍历
+            after: 从该序号之后(降序时为之前)开始,None 表示从头开始
+
+        Yields:
+            候选记录的序号
+        """
+        smallest = None
+        for name, key in filters.items():
+            if key is None:
+                continue
+            size = len(self._indexes[name].get(key, ()))
+            if smallest is None or size < smallest[2]:
+                smallest = (name, key, size)
+        if smallest is not None:
+            return self._iter_index(smallest[0], smallest[1], descending, after)
+
+        if start_date or end_date:
+            days = [
+                day for day in self._indexes["date"]
+                if (not start_date or day >= start_date) and (not end_date or day <= end_date)
+            ]
+            return heapq.merge(
+                *(self._iter_index("date", day, descending, after) for day in days), reverse=descending
+            )
+
+        if descending:
+            return iter(range((len(self._order) if after is None else after) - 1, -1, -1))
+        return iter(range(0 if after is None else after + 1, len(self._order)))
+
+    def _iter_index(self, name: str, key: str, descending: bool, after: Optional[int]) -> Iterator[int]:
+        """
+        按序号顺序惰性遍历一个索引列表
+
+        每一步都重新取索引列表并按上一个序号二分定位,遍历间隙中索引被修改(状态变更、
+        重新加载)也不会错位或重复。
+
+        Args:
+            name: 索引名称
+            key: 索引键
+            descending: 是否从新到旧遍历
+            after: 从该序号之后(降序时为之前)开始,None 表示从头开始
+
+        Yields:
+            序号
+        """
+        last = after
+        while True:
+            seqs = self._indexes[name].get(key, ())
+            if descending:
+                pos = len(seqs) if last is None else bisect.bisect_left(seqs, last)
+                if pos == 0:
+                    return
+                last = seqs[pos - 1]
+            else:
+                pos = 0 if last is None else bisect.bisect_right(seqs, last)
+                if pos >= len(seqs):
+                    return
+                last = seqs[pos]
+            yield last
+
+    @staticmethod
+    def _matches(
+        report: ReportRecord,
+        filters: Dict[str, Optional[str]],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        min_confidence: Optional[float],
+        max_confidence: Optional[float]
+    ) -> bool:
+        """检查举报记录是否满足全部过滤条件"""
+        for name, key in filters.items():
+            if key is not None and _INDEX_KEYS[name](report) != key:
+                return False
+        day = _INDEX_KEYS["date"](report)
+        if (start_date and day < start_date) or (end_date and day > end_date):
+            return False
+        if min_confidence is not None or max_confidence is not None:
+            confidence = (report.detection_result or {}).get("confidence")
+            if confidence is None:
+                return False
+            if (min_confidence is not None and confidence < min_confidence) or \
+                    (max_confidence is not None and confidence > max_confidence):
+                return False
+        return True
+
+    def query_merchants(
+        self,
+        platform: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        分页查询被举报的商家(平台+店铺),按最近一次举报排序,最新在前
+
+        Args:
+            platform: 平台名称
+            limit: 每页条数
+            cursor: 上一页返回的 next_cursor,None 表示第一页
+
+        Returns:
+            {"items": [{"platform", "shop", "report_count", "latest_report"}],
+             "next_cursor": 下一页游标(没有更多时为None)}
+
+        Raises:
+            ValueError: 每页条数或游标无效
+        """
+        if limit <= 0:
+            raise ValueError(f"每页条数必须为正数: {limit}")
+        last_seq = _decode_cursor(cursor, "merchants")["s"] if cursor else None
+
+        with self._lock:
+            self.refresh()
+            latest = (
+                (seqs[-1], key, len(seqs))
+                for key, seqs in self._indexes["merchant"].items()
+                if (platform is None or key[0] == platform) and (last_seq is None or seqs[-1] < last_seq)
+            )
+            page = heapq.nlargest(limit + 1, latest)
+            items = [
+                {
+                    "platform": key[0],
+                    "shop": key[1],
+                    "report_count": count,
+                    "latest_report": self.reports[self._order[seq]]
+                }
+                for seq, key, count in page[:limit]
+            ]
+        next_cursor = _encode_cursor({"k": "merchants", "s": page[limit - 1][0]}) if len(page) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def get_statistics(self) -> Dict:
+        """
+        获取统计信息
+
+        Returns:
+            统计信息字典
+        """
+        self.refresh()
+        # 各索引键的记录数即为计数,与记录总数无关
         return {
-            "total_reports": total,
-            "by_platform": by_platform,
-            "by_status": by_status
+            "total_reports": len(self.reports),
+            "by_platform": {k: len(v) for k, v in self._indexes["platform"].items()},
+            "by_status": {k: len(v) for k, v in self._indexes["status"].items()}
         }
 
     def generate_report_summary(self, report_id: str) -> str:
@@ -294,59 +1002,227 @@ class ReportManager:
         report = self.get_report(report_id)
         if not report:
             return "举报记录不存在"
+        return _format_summary(report)
 
-        summary = f"""
-=== 举报摘要 ===
-举报ID: {report.report_id}
-平台: {report.platform}
-商品标题: {report.target_title}
-店铺名称: {report.target_shop}
-商品价格: ¥{report.target_price}
-举报状态: {report.report_status}
-举报时间: {report.reported_at}
-
-举报理由:
-{report.report_reason}
+    def iter_chunks(
+        self,
+        chunk_size: int = 1000,
+        platform: Optional[str] = None,
+        status: Optional[str] = None,
+        shop: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        max_confidence: Optional[float] = None
+    ) -> Iterable[List[ReportRecord]]:
+        """
+        按举报先后分批遍历举报记录
 
-证据截图数量: {len(report.evidence_screenshots)}
-"""
-        if report.notes:
-            summary += f"\n备注: {report.notes}"
+        整个遍历只创建一次候选序号的合并迭代器(日期分桶只合并一次),每批在锁内从中取出
+        chunk_size 条,内存占用与 chunk_size 和日期分桶数成正比,与记录总数无关。
 
-        return summary
+        Args:
+            chunk_size: 每批记录数
+            platform/status/shop/start_date/end_date/min_confidence/max_confidence: 过滤条件,同 query_reports
 
-    def export_to_file(self, output_path: str, format: str = "json") -> bool:
+        Yields:
+            举报记录列表(每批不超过 chunk_size 条)
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"每批条数必须为正数: {chunk_size}")
+        filters = {"platform": platform, "status": status, "shop": shop}
+        candidates: Optional[Iterator[int]] = None
+        while True:
+            chunk: List[ReportRecord] = []
+            with self._lock:
+                self.refresh()
+                if candidates is None:
+                    candidates = self._iter_candidates(filters, start_date, end_date)
+                for seq in candidates:
+                    report = self.reports[self._order[seq]]
+                    if self._matches(report, filters, start_date, end_date, min_confidence, max_confidence):
+                        chunk.append(report)
+                        if len(chunk) == chunk_size:
+                            break
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+
+    def export_to_file(
+        self,
+        output_path: str,
+        format: str = "json",
+        chunk_size: int = 1000,
+        **filters
+    ) -> bool:
         """
         导出举报记录到文件
 
+        记录分批流式写出,内存占用与 chunk_size 成正比,与记录总数无关。
+
         Args:
             output_path: 输出文件路径
-            format: 导出格式(json/txt)
+            format: 导出格式(json/jsonl/csv/parquet/txt),parquet 需要安装 pyarrow
+            chunk_size: 每批写出的记录数
+            **filters: 过滤条件(platform/status/shop/start_date/end_date/
+                min_confidence/max_confidence),同 query_reports
 
         Returns:
             是否导出成功
         """
-        try:
-            if format == "json":
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    data = {rid: r.to_dict() for rid, r in self.reports.items()}
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-            elif format == "txt":
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    for report in self.reports.values():
-                        f.write(self.generate_report_summary(report.report_id))
-                        f.write("\n" + "=" * 50 + "\n\n")
-            else:
-                print(f"❌ 不支持的导出格式: {format}")
-                return False
+        exporter = EXPORTERS.get(format)
+        if exporter is None:
+            print(f"❌ 不支持的导出格式: {format},支持: {list(EXPORTERS.keys())}")
+            return False
 
-            print(f"✅ 已导出举报记录到: {output_path}")
+        try:
+            count = exporter(self.iter_chunks(chunk_size, **filters), output_path)
+            print(f"✅ 已导出 {count} 条举报记录到: {output_path}")
             return True
         except Exception as e:
             print(f"❌ 导出失败: {e}")
             return False
 
 
+def _format_summary(report: ReportRecord) -> str:
+    """生成单条举报记录的摘要文本"""
+    summary = f"""
+=== 举报摘要 ===
+举报ID: {report.report_id}
+平台: {report.platform}
+商品标题: {report.target_title}
+店铺名称: {report.target_shop}
+商品价格: ¥{report.target_price}
+举报状态: {report.report_status}
+举报时间: {report.reported_at}
+
+举报理由:
+{report.report_reason}
+
+证据截图数量: {len(report.evidence_screenshots)}
+"""
+    if report.notes:
+        summary += f"\n备注: {report.notes}"
+
+    return summary
+
+
+# ==================== 流式导出 ====================
+
+# 表格导出(CSV/Parquet)的列,检测结果只保留置信度和匹配的正版商品名
+EXPORT_COLUMNS = [
+    "report_id", "platform", "target_title", "target_shop", "target_price", "target_url",
+    "report_status", "reported_at", "confidence", "matched_product_name",
+    "report_reason", "evidence_screenshots", "notes"
+]
+
+
+def _export_row(report: ReportRecord) -> Dict:
+    """将举报记录展开为一行表格数据"""
+    detection = report.detection_result or {}
+    return {
+        "report_id": report.report_id,
+        "platform": report.platform,
+        "target_title": report.target_title,
+        "target_shop": report.target_shop,
+        "target_price": report.target_price,
+        "target_url": report.target_url,
+        "report_status": report.report_status,
+        "reported_at": report.reported_at,
+        "confidence": detection.get("confidence"),
+        "matched_product_name": detection.get("matched_product_name"),
+        "report_reason": report.report_reason,
+        "evidence_screenshots": list(report.evidence_screenshots),
+        "notes": report.notes,
+    }
+
+
+def _export_json(chunks: Iterable[List[ReportRecord]], output_path: str) -> int:
+    """导出为 JSON 对象(与 report_history.json 格式相同),逐条写出"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("{")
+        for chunk in chunks:
+            for report in chunk:
+                body = json.dumps(report.to_dict(), ensure_ascii=False, indent=2).replace("\n", "\n  ")
+                f.write(f'{"," if count else ""}\n  {json.dumps(report.report_id, ensure_ascii=False)}: {body}')
+                count += 1
+        f.write("\n}" if count else "}")
+    return count
+
+
+def _export_jsonl(chunks: Iterable[List[ReportRecord]], output_path: str) -> int:
+    """导出为 JSONL,每行一条完整记录"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.writelines(json.dumps(r.to_dict(), ensure_ascii=False) + "\n" for r in chunk)
+            count += len(chunk)
+    return count
+
+
+def _export_csv(chunks: Iterable[List[ReportRecord]], output_path: str) -> int:
+    """导出为 CSV(UTF-8 BOM,便于 Excel 打开),截图路径以 | 连接"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for chunk in chunks:
+            rows = [_export_row(r) for r in chunk]
+            for row in rows:
+                row["evidence_screenshots"] = "|".join(row["evidence_screenshots"])
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _export_parquet(chunks: Iterable[List[ReportRecord]], output_path: str) -> int:
+    """导出为 Parquet 列式文件,每批写为一个 row group(需要 pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("导出 Parquet 需要安装 pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (name, pa.float64() if name in ("target_price", "confidence")
+         else pa.list_(pa.string()) if name == "evidence_screenshots"
+         else pa.string())
+        for name in EXPORT_COLUMNS
+    ])
+    count = 0
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist([_export_row(r) for r in chunk], schema=schema))
+            count += len(chunk)
+        if count == 0:
+            writer.write_table(schema.empty_table())
+    return count
+
+
+def _export_txt(chunks: Iterable[List[ReportRecord]], output_path: str) -> int:
+    """导出为可读的举报摘要文本"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            for report in chunk:
+                f.write(_format_summary(report))
+                f.write("\n" + "=" * 50 + "\n\n")
+            count += len(chunk)
+    return count
+
+
+# 导出格式 -> 导出函数(接收分批记录和输出路径,返回导出条数)
+EXPORTERS: Dict[str, Callable[[Iterable[List[ReportRecord]], str], int]] = {
+    "json": _export_json,
+    "jsonl": _export_jsonl,
+    "csv": _export_csv,
+    "parquet": _export_parquet,
+    "txt": _export_txt,
+}
+
+
 # 示例使用
 if __name__ == "__main__":
     # 创建举报管理器
@@ -0,0 +1,212 @@
+"""
+举报流水线模块
+
+小红书举报要在手机上走完整的七步流程,与浏览检测串行执行时,每次举报都会让后续商品的
+浏览停顿几分钟。ReportPipeline 把巡查拆成两个阶段: 浏览阶段把检测出的盗版商品放入
+有界队列,举报阶段从队列取出执行。举报阶段有三种方式:
+
+1. inline: 不排队,在浏览设备上立即举报(原有的串行行为)
+2. deferred: 排队,巡查结束后在浏览设备上批量举报
+3. device: 排队,由后台线程在登录同一账号的第二台设备上并行举报
+
+队列满时的处理(背压策略):
+
+- block: 等待队列腾出空间(deferred 方式下没有并行的消费者,等待永远不会结束,
+  按 drop 处理;巡查中途批量举报会在浏览设备上打开其他商品,打断浏览)
+- inline: 在浏览设备上立即举报当前商品(浏览设备此时正停留在该商品详情页,无需重新打开)
+- drop: 不举报,交给 drop 回调(例如记为待处理)
+
+队列深度、等待时间等统计见 get_stats()。
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# 举报方式
+REPORT_MODES = ("inline", "deferred", "device")
+# 队列满时的背压策略
+BACKPRESSURE_POLICIES = ("block", "inline", "drop")
+
+
+@dataclass
+class ReportJob:
+    """待举报的商品"""
+    product_info: Any                       # 商品信息
+    detection_result: Any                   # 检测结果
+    enqueued_at: float = field(default_factory=time.time)  # 入队时间
+
+
+class ReportPipeline:
+    """浏览与举报解耦的举报流水线"""
+
+    def __init__(
+        self,
+        report_queued: Callable[[ReportJob], bool],
+        report_inline: Callable[[ReportJob], bool],
+        on_drop: Optional[Callable[[ReportJob], None]] = None,
+        mode: str = "inline",
+        queue_size: int = 20,
+        backpressure: str = "block",
+        name: str = "report-worker"
+    ):
+        """
+        初始化流水线,device 方式下启动后台举报线程
+
+        Args:
+            report_queued: 举报排队的商品(需要先重新打开商品详情页),返回是否成功
+            report_inline: 在浏览设备当前页面上举报商品,返回是否成功
+            on_drop: drop 背压策略下丢弃商品时的回调
+            mode: 举报方式(inline/deferred/device)
+            queue_size: 队列容量
+            backpressure: 队列满时的处理(block/inline/drop)
+            name: 后台线程名称
+        """
+        if mode not in REPORT_MODES:
+            raise ValueError(f"不支持的举报方式: {mode},支持: {list(REPORT_MODES)}")
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"不支持的背压策略: {backpressure},支持: {list(BACKPRESSURE_POLICIES)}")
+        if mode == "deferred" and backpressure == "block":
+            # deferred 方式只在 close() 时举报,巡查中途不能占用浏览设备
+            print("⚠️  deferred 举报方式不支持 block 背压策略,队列满时按 drop 处理")
+            backpressure = "drop"
+        self.report_queued = report_queued
+        self.report_inline = report_inline
+        self.on_drop = on_drop
+        self.mode = mode
+        self.backpressure = backpressure
+        self.queue_size = max(1, queue_size)
+        self._queue: "queue.Queue[Optional[ReportJob]]" = queue.Queue(maxsize=self.queue_size)
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        # 统计信息
+        self.stats: Dict[str, float] = {
+            "enqueued": 0, "processed": 0, "succeeded": 0, "failed": 0,
+            "inline": 0, "dropped": 0, "max_depth": 0,
+            "blocked_seconds": 0.0, "total_wait_seconds": 0.0
+        }
+
+        self._thread: Optional[threading.Thread] = None
+        if mode == "device":
+            self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += value
+
+    def submit(self, job: ReportJob) -> str:
+        """
+        提交待举报的商品
+
+        Args:
+            job: 待举报的商品
+
+        Returns:
+            处理方式: inline(已在浏览设备上举报)、queued(已入队)、dropped(已丢弃)
+        """
+        if self.mode == "inline" or self._closed:
+            self._process(job, self.report_inline, inline=True)
+            return "inline"
+
+        job.enqueued_at = time.time()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            if self.backpressure == "inline":
+                self._process(job, self.report_inline, inline=True)
+                return "inline"
+            if self.backpressure == "drop":
+                self._count("dropped")
+                if self.on_drop is not None:
+                    self.on_drop(job)
+                return "dropped"
+            started = time.time()
+            self._queue.put(job)
+            self._count("blocked_seconds", time.time() - started)
+
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+        return "queued"
+
+    def _process(self, job: ReportJob, handler: Callable[[ReportJob], bool], inline: bool = False) -> bool:
+        """执行一次举报并更新统计"""
+        if inline:
+            self._count("inline")
+        else:
+            self._count("total_wait_seconds", time.time() - job.enqueued_at)
+        try:
+            success = bool(handler(job))
+        except Exception as e:
+            print(f"❌ 举报出错: {e}")
+            success = False
+        with self._stats_lock:
+            self.stats["processed"] += 1
+            self.stats["succeeded" if success else "failed"] += 1
+        return success
+
+    def _run(self) -> None:
+        """device 方式的后台举报线程"""
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._process(job, self.report_queued)
+            finally:
+                self._queue.task_done()
+
+    def drain(self) -> int:
+        """
+        在当前线程中举报队列中的全部商品(deferred 方式,由 close() 调用)
+
+        Returns:
+            处理的商品数
+        """
+        if self.mode == "device":
+            self._queue.join()
+            return 0
+        count = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return count
+            self._process(job, self.report_queued)
+            self._queue.task_done()
+            count += 1
+
+    def close(self) -> None:
+        """举报剩余的商品并停止后台线程;关闭后提交的商品立即在浏览设备上举报"""
+        if self._closed:
+            return
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        else:
+            self.drain()
+        self._closed = True
+
+    def get_stats(self) -> Dict:
+        """
+        获取队列统计
+
+        Returns:
+            统计信息字典(含当前队列深度和平均排队时间)
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        queued_processed = stats["processed"] - stats["inline"]
+        stats.update({
+            "mode": self.mode,
+            "backpressure": self.backpressure,
+            "capacity": self.queue_size,
+            "depth": self._queue.qsize(),
+            "avg_wait_seconds": stats["total_wait_seconds"] / queued_processed if queued_processed else 0.0
+        })
+        return stats
@@ -38,7 +38,7 @@ class PlatformReporter(ABC):
     定义了举报流程的标准接口，不同平台需要实现各自的举报逻辑
     """
 
-    def __init__(self, agent, report_manager, screenshot_dir: str = "screenshots"):
+    def __init__(self, agent, report_manager, screenshot_dir: str = "screenshots", guard=None, response_cache=None):
         """
         初始化举报器
 
@@ -46,10 +46,14 @@ class PlatformReporter(ABC):
             agent: PhoneAgent 实例，用于执行自动化操作
             report_manager: ReportManager 实例，用于管理举报记录
             screenshot_dir: 截图保存目录
+            guard: ReportGuard 实例，用于跳过重复举报（可选）
+            response_cache: ResponseCache 实例（可选），只有配置为可缓存的步骤才会查询缓存
         """
         self.agent = agent
         self.report_manager = report_manager
         self.screenshot_dir = screenshot_dir
+        self.guard = guard
+        self.response_cache = response_cache
         os.makedirs(screenshot_dir, exist_ok=True)
 
     @abstractmethod
@@ -65,6 +69,28 @@ class PlatformReporter(ABC):
         """
         pass
 
+    def check_duplicate(self, context: ReportContext) -> Optional[str]:
+        """
+        检查是否在重复举报窗口期内
+
+        execute_report 不再检查(AntiPiracyAgent 在创建举报记录前已检查过一次),
+        单独使用举报器时由调用方在举报前调用。
+
+        Args:
+            context: 举报上下文
+
+        Returns:
+            重复举报的原因说明，可以举报时返回None
+        """
+        if self.guard is None:
+            return None
+        return self.guard.check(context.platform, context.shop_name, context.product_title)
+
+    def record_reported(self, context: ReportContext):
+        """记录举报成功，后续窗口期内不再重复举报"""
+        if self.guard is not None:
+            self.guard.record(context.platform, context.shop_name, context.product_title)
+
     def save_evidence_screenshot(self, context: ReportContext) -> Optional[str]:
         """
         保存证据截图
@@ -122,7 +148,9 @@ class PlatformReporter(ABC):
         lines.append(f"【判定依据】置信度：{context.confidence:.0%}")
         for reason in context.detection_reasons:
             # 移除 emoji 以适应举报输入框
-            clean_reason = reason.replace("✅", "[通过]").replace("❌", "[异常]").replace("⚠️", "[警告]")
+            clean_reason = (
+                reason.replace("✅", "[通过]").replace("❌", "[异常]").replace("⚠️", "[警告]").replace("⏭️", "[未执行]")
+            )
             lines.append(f"• {clean_reason}")
 
         return "\n".join(lines)
@@ -268,7 +296,7 @@ class XiaohongshuReporter(PlatformReporter):
             prompt = self.PROMPTS["fill_report_content"].format(
                 report_reason=report_reason
             )
-            if not self._execute_step_with_prompt(prompt):
+            if not self._execute_step_with_prompt(prompt, "fill_report_content"):
                 print("   填写举报内容失败")
                 # 继续尝试提交
             time.sleep(1.5)
@@ -294,6 +322,7 @@ class XiaohongshuReporter(PlatformReporter):
             print(f"\n{'='*50}")
             print(f"举报流程完成")
             print(f"{'='*50}")
+            self.record_reported(context)
             return True
 
         except Exception as e:
@@ -317,20 +346,26 @@ class XiaohongshuReporter(PlatformReporter):
             print(f"   未知步骤: {step_name}")
             return False
 
-        return self._execute_step_with_prompt(prompt)
+        return self._execute_step_with_prompt(prompt, step_name)
 
-    def _execute_step_with_prompt(self, prompt: str) -> bool:
+    def _execute_step_with_prompt(self, prompt: str, step_name: str = "custom") -> bool:
         """
         使用指定提示词执行步骤
 
+        举报步骤都是操作任务，除非在响应缓存中显式配置，否则不会命中缓存。
+
         Args:
             prompt: 提示词
+            step_name: 步骤名称（响应缓存的任务ID为 xiaohongshu_report.<步骤名称>）
 
         Returns:
             是否执行成功
         """
         try:
-            self.agent.run(prompt)
+            if self.response_cache is not None:
+                self.response_cache.run(self.agent.run, f"xiaohongshu_report.{step_name}", prompt)
+            else:
+                self.agent.run(prompt)
             return True
         except Exception as e:
             print(f"   步骤执行失败: {e}")
@@ -366,7 +401,9 @@ def create_reporter(
     platform: str,
     agent,
     report_manager,
-    screenshot_dir: str = "screenshots"
+    screenshot_dir: str = "screenshots",
+    guard=None,
+    response_cache=None
 ) -> PlatformReporter:
     """
     创建平台对应的举报器
@@ -376,6 +413,8 @@ def create_reporter(
         agent: PhoneAgent 实例
         report_manager: ReportManager 实例
         screenshot_dir: 截图保存目录
+        guard: ReportGuard 实例（可选）
+        response_cache: ResponseCache 实例（可选）
 
     Returns:
         对应平台的举报器实例
@@ -391,7 +430,7 @@ def create_reporter(
 
     reporter_class = reporters.get(platform)
     if reporter_class:
-        return reporter_class(agent, report_manager, screenshot_dir)
+        return reporter_class(agent, report_manager, screenshot_dir, guard, response_cache)
 
     raise ValueError(f"不支持的平台: {platform}，支持的平台: {list(reporters.keys())}")
 
@@ -0,0 +1,266 @@
+"""模型响应缓存模块
+
+巡查过程中相同的屏幕会被反复发送给模型,例如上次巡查已经提取过的商品详情页、
+提取失败后再次单独识别店铺名称。本模块在 PhoneAgent.run 外加一层缓存:
+
+1. 键由屏幕指纹、任务提示词 ID、提示词参数和提示词内容组成;屏幕指纹是裁掉状态栏后
+   全分辨率像素的精确哈希,状态栏时间变化不影响指纹,页面上任何其他像素不同都不会命中
+2. 按任务类型配置是否缓存及有效期: 只读的信息提取任务可以缓存,
+   点击、返回、举报等操作任务必须真正执行,永不缓存
+3. SQLite 磁盘存储,按最近使用淘汰(LRU)并按有效期(TTL)过期,多个进程可共享
+4. 统计命中率(总计及按任务类型)
+
+不使用感知哈希: 不同商品的详情页布局相同,缩略图的差值哈希只差几位甚至完全相同,
+命中后会返回其他商品的店铺和价格。裁剪状态栏需要 Pillow(phone_agent 的依赖);
+未安装 Pillow 时使用截图文件内容的精确哈希。
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# 计算屏幕指纹前裁掉的顶部状态栏比例(时间、电量、信号每次截图都不同)
+STATUS_BAR_RATIO = 0.06
+
+
+def screen_fingerprint(png: bytes) -> str:
+    """
+    计算截图的屏幕指纹
+
+    裁掉状态栏后对全分辨率像素计算精确哈希。screencap 输出无损 PNG,同一页面除状态栏外
+    像素完全相同;不同商品只要店铺名、价格等任何文字不同,指纹就不同。
+    未安装 Pillow 时使用截图内容的精确哈希(状态栏变化后不再命中)。
+
+    Args:
+        png: 截图文件内容(PNG/JPEG)
+
+    Returns:
+        指纹字符串,"p:" 前缀为裁剪后像素的哈希,"x:" 前缀为截图文件的哈希
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return "x:" + hashlib.blake2b(png, digest_size=16).hexdigest()
+
+    with Image.open(io.BytesIO(png)) as image:
+        width, height = image.size
+        body = image.crop((0, int(height * STATUS_BAR_RATIO), width, height)).convert("RGB")
+        digest = hashlib.blake2b(f"{width}x{height}".encode("ascii"), digest_size=16)
+        digest.update(body.tobytes())
+    return "p:" + digest.hexdigest()
+
+
+def capture_screen(device_id: Optional[str] = None, timeout: float = 10.0) -> Optional[bytes]:
+    """
+    通过 ADB 截取设备当前屏幕
+
+    Args:
+        device_id: 设备ID,None 表示唯一连接的设备
+        timeout: 超时时间(秒)
+
+    Returns:
+        PNG 截图内容,失败时返回None
+    """
+    command = ["adb"] + (["-s", device_id] if device_id else []) + ["exec-out", "screencap", "-p"]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return result.stdout
+
+
+class ResponseCache:
+    """模型响应缓存"""
+
+    def __init__(
+        self,
+        path: str = "data/response_cache.db",
+        tasks: Optional[Dict[str, Optional[float]]] = None,
+        max_entries: int = 5000,
+        screen_provider: Optional[Callable[[], Optional[bytes]]] = None
+    ):
+        """
+        打开或创建缓存
+
+        Args:
+            path: SQLite 缓存文件路径
+            tasks: 可缓存的任务及有效期(秒),None 表示不过期;未列出的任务不缓存。
+                只能列出只读的信息提取任务,会操作手机的任务必须真正执行
+            max_entries: 最多保留的缓存条数,超出后淘汰最久未使用的条目
+            screen_provider: 返回当前屏幕截图(PNG)的函数,截图失败时返回None
+        """
+        self.path = path
+        self.tasks = dict(tasks or {})
+        self.max_entries = max_entries
+        self.screen_provider = screen_provider
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, task TEXT NOT NULL, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+        # 统计信息: bypassed 为不可缓存的任务或截图失败,expired 同时计入 misses
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "bypassed": 0, "stored": 0, "evictions": 0}
+        self.task_stats: Dict[str, Dict[str, int]] = {}
+
+    def cacheable(self, task_id: str) -> bool:
+        """任务是否允许缓存"""
+        return task_id in self.tasks
+
+    @staticmethod
+    def make_key(fingerprint: str, task_id: str, prompt: str, args: Optional[Dict] = None) -> str:
+        """
+        生成缓存键
+
+        Args:
+            fingerprint: 屏幕指纹
+            task_id: 任务提示词ID
+            prompt: 格式化后的提示词(提示词模板修改后旧缓存自动失效)
+            args: 提示词参数
+
+        Returns:
+            缓存键
+        """
+        material = json.dumps([fingerprint, task_id, args or {}, prompt], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.blake2b(material.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _count(self, task_id: str, name: str) -> None:
+        self.stats[name] += 1
+        counters = self.task_stats.setdefault(task_id, {"hits": 0, "misses": 0})
+        if name in counters:
+            counters[name] += 1
+
+    def get(self, key: str, task_id: str, now: Optional[float] = None) -> Optional[Any]:
+        """
+        查询缓存
+
+        Args:
+            key: 缓存键
+            task_id: 任务提示词ID(决定有效期)
+            now: 当前时间戳(秒),默认为当前时间
+
+        Returns:
+            缓存的响应,未命中或已过期时返回None
+        """
+        now = time.time() if now is None else now
+        ttl = self.tasks.get(task_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and ttl is not None and now - row[1] > ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self._count(task_id, "misses")
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._count(task_id, "hits")
+            return json.loads(row[0])
+
+    def put(self, key: str, task_id: str, response: Any, now: Optional[float] = None) -> None:
+        """
+        写入缓存,超出容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            task_id: 任务提示词ID
+            response: 模型响应(可 JSON 序列化)
+            now: 当前时间戳(秒),默认为当前时间
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, task, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, task_id, json.dumps(response, ensure_ascii=False, default=str), now, now)
+            )
+            self.stats["stored"] += 1
+            overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats["evictions"] += overflow
+
+    def run(self, runner: Callable[[str], Any], task_id: str, prompt: str, args: Optional[Dict] = None) -> Any:
+        """
+        执行任务,可缓存的任务先按当前屏幕查询缓存
+
+        Args:
+            runner: 实际执行提示词的函数(如 PhoneAgent.run)
+            task_id: 任务提示词ID
+            prompt: 格式化后的提示词
+            args: 提示词参数
+
+        Returns:
+            模型响应
+        """
+        png = self.screen_provider() if self.cacheable(task_id) and self.screen_provider else None
+        if png is None:
+            self.stats["bypassed"] += 1
+            return runner(prompt)
+
+        key = self.make_key(screen_fingerprint(png), task_id, prompt, args)
+        cached = self.get(key, task_id)
+        if cached is not None:
+            print(f"   ♻️  命中响应缓存: {task_id}")
+            return cached
+        response = runner(prompt)
+        if response:
+            self.put(key, task_id, response)
+        return response
+
+    def get_statistics(self) -> Dict:
+        """
+        获取命中率统计
+
+        Returns:
+            统计信息字典(总计、按任务类型的命中率和当前条目数)
+        """
+        def hit_rate(hits: int, misses: int) -> float:
+            return hits / (hits + misses) if hits + misses else 0.0
+
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            **self.stats,
+            "hit_rate": hit_rate(self.stats["hits"], self.stats["misses"]),
+            "entries": entries,
+            "by_task": {
+                task_id: {**counters, "hit_rate": hit_rate(counters["hits"], counters["misses"])}
+                for task_id, counters in self.task_stats.items()
+            }
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """关闭缓存文件"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,179 @@
+"""模型响应解析模块
+
+从模型返回的文本中提取 JSON,并把各种字段名统一为标准字段:
+
+1. extract_json: 单次线性扫描找出括号平衡的 JSON 对象/数组(正确处理字符串和转义),
+   逐个解析候选片段;支持纯 JSON、```json 代码块和夹杂在说明文字中的 JSON
+2. normalize_fields: 按预编译的别名表把"商品标题"、"卖家昵称"、"售价"等字段名
+   映射为 title/shop_name/price 等标准字段
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 标准字段 -> 别名(按优先级排列,取第一个非空值)
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "title": ("title", "商品标题", "product_title"),
+    "shop_name": (
+        "shop_name", "店铺名称", "卖家昵称", "卖家名称", "商家名称",
+        "seller_name", "store_name", "shopName", "seller", "shop",
+    ),
+    "price": ("price", "价格", "商品价格", "售价"),
+    "description": ("description", "商品描述"),
+    "ocr_text": ("ocr_text", "all_text"),
+}
+
+# 预编译: 别名 -> (标准字段, 优先级)
+_ALIAS_INDEX: Dict[str, Tuple[str, int]] = {
+    alias: (field, priority)
+    for field, aliases in FIELD_ALIASES.items()
+    for priority, alias in enumerate(aliases)
+}
+
+_OPENERS = {"{": "}", "[": "]"}
+_CLOSERS = frozenset("}]")
+
+
+def _scan(text: str) -> Iterator[Tuple[int, int, int]]:
+    """
+    单次扫描找出括号平衡的片段
+
+    只在括号内部识别字符串(说明文字中的引号不影响扫描),括号不匹配时丢弃当前片段。
+
+    Args:
+        text: 模型响应文本
+
+    Yields:
+        (起始位置, 结束位置(不含), 嵌套深度),内层片段先于外层片段产出
+    """
+    stack: List[Tuple[int, str]] = []
+    in_string = False
+    escaped = False
+    for pos, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char in _OPENERS:
+            stack.append((pos, _OPENERS[char]))
+        elif not stack:
+            continue
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            start, expected = stack.pop()
+            if char != expected:
+                stack.clear()
+                continue
+            yield start, pos + 1, len(stack)
+
+
+def _parse_span(text: str, span: Tuple[int, int], children: Dict[int, List[Tuple[int, int]]]) -> Optional[Any]:
+    """解析片段,失败时依次尝试其直接包含的子片段(取最长的成功结果)"""
+    start, end = span
+    try:
+        return json.loads(text[start:end])
+    except (ValueError, RecursionError):
+        pass
+    best = None
+    best_length = 0
+    for child in children.get(start, ()):
+        result = _parse_span(text, child, children)
+        if result is not None and child[1] - child[0] > best_length:
+            best, best_length = result, child[1] - child[0]
+    return best
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    从模型响应中提取 JSON
+
+    扫描一次文本得到所有括号平衡的片段,先解析最外层片段,失败时再解析其内部片段;
+    多个最外层片段都能解析时优先返回对象(或对象数组),其次取最长的一个
+    (与原先"取最长匹配"的行为一致)。
+
+    Args:
+        text: 模型响应文本
+
+    Returns:
+        解析出的字典/列表,找不到有效 JSON 时返回None
+        (嵌套过深超出解释器递归限制的片段同样视为无效)
+    """
+    if not text:
+        return None
+    stripped = text.strip()
+    if stripped[:1] in _OPENERS:
+        try:
+            return json.loads(stripped)
+        except (ValueError, RecursionError):
+            pass
+
+    # 按外层片段的起始位置记录其直接子片段;内层片段先产出,遇到外层时归入
+    top_level: List[Tuple[int, int]] = []
+    children: Dict[int, List[Tuple[int, int]]] = {}
+    pending: List[Tuple[int, int, int]] = []
+    for start, end, depth in _scan(text):
+        direct = []
+        while pending and pending[-1][0] > start and pending[-1][2] == depth + 1:
+            direct.append(pending.pop()[:2])
+        # 不属于当前片段的更深层片段(括号不匹配后遗留)直接丢弃
+        while pending and pending[-1][0] > start:
+            pending.pop()
+        if direct:
+            children[start] = direct[::-1]
+        if depth == 0:
+            top_level.append((start, end))
+        else:
+            pending.append((start, end, depth))
+
+    best = None
+    best_score = (False, 0)
+    for span in top_level:
+        try:
+            result = _parse_span(text, span, children)
+        except RecursionError:
+            continue
+        if result is None:
+            continue
+        score = (_is_record(result), span[1] - span[0])
+        if score > best_score:
+            best, best_score = result, score
+    return best
+
+
+def _is_record(value: Any) -> bool:
+    """是否为对象或对象数组(坐标 [500, 300] 之类的数组优先级更低)"""
+    if isinstance(value, dict):
+        return True
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def normalize_fields(data: Dict) -> Dict:
+    """
+    把别名字段统一为标准字段
+
+    每个标准字段取优先级最高的非空别名值;不在别名表中的字段(如 status)原样保留。
+
+    Args:
+        data: 模型返回的字典
+
+    Returns:
+        新字典,包含标准字段和未识别的原始字段
+    """
+    result: Dict[str, Any] = {}
+    priorities: Dict[str, int] = {}
+    for key, value in data.items():
+        entry = _ALIAS_INDEX.get(key)
+        if entry is None:
+            result.setdefault(key, value)
+            continue
+        field, priority = entry
+        if value in (None, "", [], {}):
+            continue
+        if field not in priorities or priority < priorities[field]:
+            priorities[field] = priority
+            result[field] = value
+    return result
@@ -0,0 +1,116 @@
+"""巡查结果流式存储模块
+
+长时间巡查(上千个商品)时,把每个商品的检测结果都留在内存中、最后再拼接成一个大字符串,
+内存占用随商品数线性增长。本模块把每次巡查的结果逐条追加到独立的 JSONL 文件:
+
+1. ResultSink: 每产生一条结果立即写入一行并刷新,内存中只保留条数
+2. 续查时截断到断点记录的条数(崩溃前已写入但未记入断点的结果会重新处理),再继续追加
+3. iter_results: 逐行读取结果,用于流式生成巡查报告
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+
+def session_results_path(directory: str, keyword: str) -> str:
+    """
+    生成本次巡查的结果文件路径: <目录>/<时间戳>_<关键词>.jsonl
+
+    Args:
+        directory: 结果目录
+        keyword: 搜索关键词
+    """
+    safe_keyword = re.sub(r'[\\/:*?"<>|\s]', '_', keyword)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(directory, f"{timestamp}_{safe_keyword}.jsonl")
+
+
+def iter_results(path: Optional[str]) -> Iterator[Dict]:
+    """
+    逐条读取结果文件(跳过写了一半的末行)
+
+    Args:
+        path: 结果文件路径,None 或文件不存在时不产出任何结果
+
+    Yields:
+        结果字典
+    """
+    if not path or not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _json_default(value: Any) -> Any:
+    """序列化 datetime 等非 JSON 类型"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class ResultSink:
+    """追加写入的 JSONL 结果文件"""
+
+    def __init__(self, path: str, keep: Optional[int] = None):
+        """
+        打开结果文件
+
+        Args:
+            path: 结果文件路径
+            keep: 续查时保留的条数(之后的行被截断);None 时新建(覆盖同名文件)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.count = 0
+        if keep is None or not os.path.exists(path):
+            self._file = open(path, "w", encoding="utf-8")
+        else:
+            self._truncate(keep)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def _truncate(self, keep: int) -> None:
+        """只保留前 keep 条完整的结果"""
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if self.count >= keep or not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                self.count += 1
+        with open(self.path, "r+b") as f:
+            f.truncate(offset)
+
+    def append(self, record: Dict) -> None:
+        """
+        追加一条结果并立即刷新到磁盘
+
+        Args:
+            record: 可 JSON 序列化的结果字典
+        """
+        self._file.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter_results(self.path)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
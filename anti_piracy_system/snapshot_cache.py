@@ -0,0 +1,129 @@
+"""
+二进制快照缓存模块
+
+AntiPiracyAgent 每次构造(backend 的每个巡查任务、api_server 启动的每个检测子进程)都要重新解析
+JSON 商品库和举报历史并重建二级索引。本模块把加载完成的内存结构(记录对象和索引)保存为带版本号
+的二进制快照 <源文件>.snapshot,源文件未变化时直接反序列化快照,跳过 JSON 解析和索引重建。
+
+快照只缩短加载时间,不减少内存占用: 文件通过只读内存映射交给 pickle(省去先把整个文件读入
+缓冲区的一次拷贝),但反序列化出的记录和索引仍是每个进程堆上的普通对象,进程之间不共享,
+常驻内存与解析 JSON 后相同。
+
+快照文件格式:
+
+    | 8 字节魔数 | 4 字节头部长度 | 头部(格式版本, 快照类型, 源文件标识) | 数据 |
+
+- 头部和数据使用标准库 pickle 序列化(无需额外依赖),相同的字符串和元组在快照中只保存一份
+- 记录类型的字段或快照内容变化时递增 SNAPSHOT_VERSION,旧快照自动失效
+- 源文件标识为 (锁文件版本号, 设备号, inode, 大小, 修改时间),源文件被保存、合并或手工编辑后
+  标识变化,下次加载时重新解析并生成快照
+
+快照只由本系统在数据目录中生成,与源文件具有相同的信任级别;读取失败时退回解析源文件。
+"""
+
+import gc
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Optional
+
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b"APSNAP\x00\x01"
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def snapshot_path(source_path: str) -> str:
+    """源文件对应的快照文件路径"""
+    return source_path + ".snapshot"
+
+
+def source_key(source_path: str, generation: int = 0) -> Optional[tuple]:
+    """
+    源文件标识
+
+    Args:
+        source_path: 源文件路径
+        generation: 源文件锁文件中的版本号(本系统每次替换源文件时递增)
+
+    Returns:
+        标识元组,源文件不存在时返回None
+    """
+    try:
+        st = os.stat(source_path)
+    except FileNotFoundError:
+        return None
+    return generation, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def load_snapshot(path: str, kind: str, key: Optional[tuple]) -> Optional[Any]:
+    """
+    读取快照(反序列化出的对象在本进程堆上新建,不引用映射的文件)
+
+    Args:
+        path: 快照文件路径
+        kind: 快照类型(如 "products"、"reports")
+        key: 当前源文件标识
+
+    Returns:
+        快照数据;快照不存在、版本或源文件标识不匹配、文件损坏时返回None
+    """
+    if key is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                if bytes(view[:len(_MAGIC)]) != _MAGIC:
+                    return None
+                start = len(_MAGIC) + _HEADER_LENGTH.size
+                (header_length,) = _HEADER_LENGTH.unpack_from(view, len(_MAGIC))
+                header = pickle.loads(view[start:start + header_length])
+                if header != (SNAPSHOT_VERSION, kind, key):
+                    return None
+                # 反序列化大量对象时暂停循环垃圾回收,避免反复扫描新建的对象
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    return pickle.loads(view[start + header_length:])
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+            finally:
+                view.release()
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError, struct.error, AttributeError, TypeError) as e:
+        print(f"⚠️ 读取快照失败,将重新解析源文件: {e}")
+        return None
+
+
+def save_snapshot(path: str, kind: str, key: Optional[tuple], payload: Any) -> bool:
+    """
+    写入快照(先写临时文件再原子替换)
+
+    Args:
+        path: 快照文件路径
+        kind: 快照类型
+        key: 生成快照时的源文件标识
+        payload: 快照数据
+
+    Returns:
+        是否写入成功
+    """
+    if key is None:
+        return False
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        header = pickle.dumps((SNAPSHOT_VERSION, kind, key), protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, pickle.PicklingError) as e:
+        print(f"⚠️ 写入快照失败: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
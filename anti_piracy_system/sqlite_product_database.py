@@ -0,0 +1,603 @@
+"""SQLite 正版商品数据库模块
+
+与 ProductDatabase 接口相同的 SQLite 实现。商品ID、小写商品名、官方店铺名和
+关键词均建立索引,名称/关键词的子串搜索使用 FTS5 trigram 全文索引;
+单个商品的增删改只写入对应的行,启动时无需加载整个商品库。
+
+首次打开空数据库时,如果同目录下存在同名 .json 文件,会自动迁移其中的商品。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .product_database import GenuineProduct, ProductDatabase
+from .write_behind import DURABILITY_POLICIES
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    product_id TEXT NOT NULL UNIQUE,
+    product_name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    shop_name TEXT NOT NULL,
+    official_shops TEXT NOT NULL,
+    original_price REAL NOT NULL,
+    platform TEXT,
+    category TEXT,
+    description TEXT,
+    keywords TEXT NOT NULL,
+    keywords_text TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_products_name_lower ON products(name_lower);
+CREATE TABLE IF NOT EXISTS product_shops (
+    product_rowid INTEGER NOT NULL,
+    shop_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_product_shops_shop ON product_shops(shop_name, product_rowid);
+CREATE INDEX IF NOT EXISTS idx_product_shops_product ON product_shops(product_rowid);
+CREATE TABLE IF NOT EXISTS product_keywords (
+    product_rowid INTEGER NOT NULL,
+    keyword TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_product_keywords_keyword ON product_keywords(keyword, product_rowid);
+CREATE INDEX IF NOT EXISTS idx_product_keywords_product ON product_keywords(product_rowid);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name_lower, keywords_text, tokenize='trigram'
+);
+"""
+
+_COLUMNS = (
+    "product_id, product_name, shop_name, official_shops, original_price, platform, "
+    "category, description, keywords, created_at, updated_at"
+)
+
+# trigram 索引只能检索长度不小于 3 的子串
+_FTS_MIN_LENGTH = 3
+
+
+def _fts_phrase(column: str, text: str) -> str:
+    """构造 FTS5 单列短语查询"""
+    return f'{column} : "{text.replace(chr(34), chr(34) * 2)}"'
+
+
+class SqliteProductDatabase(ProductDatabase):
+    """SQLite 正版商品数据库"""
+
+    def __init__(
+        self,
+        db_path: str = "data/genuine_products.db",
+        json_path: Optional[str] = None,
+        durability: str = "sync",
+        flush_interval: float = 2.0,
+        max_batch: int = 500
+    ):
+        """
+        初始化数据库
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            json_path: 待迁移的 JSON 数据库路径,默认为同目录下的同名 .json 文件
+            durability: 持久化策略,sync 每次修改单独提交事务; write_behind 修改留在
+                未提交的事务中立即返回,由后台线程合并提交(提交前其他进程无法写入)
+            flush_interval: write_behind 策略下两次提交的最长间隔(秒)
+            max_batch: write_behind 策略下累计多少次修改后立即提交
+        """
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"不支持的持久化策略: {durability},支持: {list(DURABILITY_POLICIES)}")
+        self.db_path = db_path
+        self.json_path = json_path or os.path.splitext(db_path)[0] + ".json"
+        self._lock = threading.RLock()
+        self._keyword_vocab: Optional[Set[str]] = None
+        self._max_keyword_length = 0
+        self.version = 0
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._fts = self._create_schema()
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self.load()
+        self._writer = self._create_writer(durability, flush_interval, max_batch)
+
+    def _create_schema(self) -> bool:
+        """
+        创建表结构
+
+        Returns:
+            是否启用 FTS5 全文索引(SQLite 未编译 FTS5/trigram 时退化为逐行子串匹配)
+        """
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+                fts = True
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ SQLite 不支持 FTS5 trigram,名称搜索将逐行匹配: {e}")
+                fts = False
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),)
+            )
+        return fts
+
+    def load(self) -> None:
+        """打开数据库,必要时从 JSON 文件迁移"""
+        try:
+            if self._fts and self._get_meta("fts_dirty"):
+                # 上次批量导入未完成索引重建
+                self._rebuild_fts()
+            if self._get_meta("migrated_from") is None and os.path.exists(self.json_path):
+                self._migrate_from_json()
+            print(f"✅ 已加载 {self._count()} 个正版商品信息")
+        except Exception as e:
+            print(f"⚠️ 加载数据库失败: {e}")
+
+    def _migrate_from_json(self) -> None:
+        """将 JSON 数据库中的商品导入空的 SQLite 数据库(单个事务)"""
+        with self._lock:
+            if self._count() > 0:
+                # 数据库已有数据,不再迁移
+                with self._conn:
+                    self._set_meta("migrated_from", "")
+                return
+            with open(self.json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            products = [GenuineProduct.from_dict(pdata) for pdata in data.values()]
+            with self._conn:
+                for product in products:
+                    self._upsert(product)
+                self._set_meta("migrated_from", os.path.abspath(self.json_path))
+            self._invalidate()
+            print(f"✅ 已从 {self.json_path} 迁移 {len(products)} 个商品到 SQLite")
+
+    def save(self) -> None:
+        """提交未完成的写入(sync 策略下每次修改已在各自的事务中提交)"""
+        with self._lock:
+            self._conn.commit()
+
+    def close(self) -> None:
+        """提交剩余修改并关闭数据库连接"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _invalidate(self) -> None:
+        """商品库发生修改: 丢弃关键词词表缓存并递增版本号(调用方持有锁)"""
+        self._keyword_vocab = None
+        self.version += 1
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        检查其他进程(连接)是否提交了修改,有则丢弃关键词词表缓存并递增版本号
+
+        查询本身直接读取数据库,总能看到其他进程已提交的修改;只有进程内缓存需要失效。
+
+        Args:
+            force: 与 ProductDatabase.refresh 保持一致,SQLite 每次都检查
+
+        Returns:
+            是否有其他连接提交的修改
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            self._invalidate()
+            return True
+
+    @contextmanager
+    def pinned(self):
+        """
+        在一个读事务内执行一次检测中的多次查询
+
+        WAL 模式下读事务看到的是开始时的快照,检测中途其他进程提交的修改不可见;
+        期间持有连接锁,本进程的其他线程等待检测结束后再写入。
+        """
+        with self._lock:
+            self.refresh()
+            began = not self._conn.in_transaction
+            if began:
+                self._conn.execute("BEGIN")
+            try:
+                yield self
+            finally:
+                if began and self._conn.in_transaction:
+                    self._conn.commit()
+
+    @contextmanager
+    def _mutation(self, product_id: str):
+        """
+        单次修改的事务范围
+
+        sync 策略下立即提交;write_behind 策略下在未提交的事务内用保存点隔离,
+        出错时只回滚本次修改,成功后交给后台线程合并提交。
+
+        Args:
+            product_id: 被修改的商品ID
+        """
+        if self._writer is None:
+            with self._conn:
+                yield
+            return
+
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+        self._conn.execute("SAVEPOINT mutation")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK TO mutation")
+            self._conn.execute("RELEASE mutation")
+            raise
+        self._conn.execute("RELEASE mutation")
+        self._writer.submit(product_id)
+
+    @property
+    def products(self) -> Dict[str, GenuineProduct]:
+        """所有商品(按添加顺序),兼容直接访问 products 的旧代码"""
+        return {p.product_id: p for p in self.get_all_products()}
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    @staticmethod
+    def _row_to_product(row: sqlite3.Row) -> GenuineProduct:
+        """将查询行转换为商品对象"""
+        return GenuineProduct(
+            product_id=row["product_id"],
+            product_name=row["product_name"],
+            shop_name=row["shop_name"],
+            official_shops=json.loads(row["official_shops"]),
+            original_price=row["original_price"],
+            platform=row["platform"],
+            category=row["category"],
+            description=row["description"],
+            keywords=json.loads(row["keywords"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"]
+        )
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[GenuineProduct]:
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        return [self._row_to_product(row) for row in rows]
+
+    def _upsert(self, product: GenuineProduct, index_fts: bool = True) -> None:
+        """
+        写入或更新单个商品及其索引行(调用方负责事务)
+
+        Args:
+            product: 正版商品对象
+            index_fts: 是否同时写入全文索引(批量导入时为False,结束后统一重建)
+        """
+        keywords = product.keywords or []
+        name_lower = product.product_name.lower()
+        keywords_text = ' '.join(keywords).lower()
+        row = self._conn.execute(
+            f"INSERT INTO products ({_COLUMNS}, name_lower, keywords_text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(product_id) DO UPDATE SET "
+            "product_name = excluded.product_name, shop_name = excluded.shop_name, "
+            "official_shops = excluded.official_shops, original_price = excluded.original_price, "
+            "platform = excluded.platform, category = excluded.category, "
+            "description = excluded.description, keywords = excluded.keywords, "
+            "created_at = excluded.created_at, updated_at = excluded.updated_at, "
+            "name_lower = excluded.name_lower, keywords_text = excluded.keywords_text "
+            "RETURNING id",
+            (
+                product.product_id, product.product_name, product.shop_name,
+                json.dumps(product.official_shops, ensure_ascii=False), product.original_price,
+                product.platform, product.category, product.description,
+                json.dumps(keywords, ensure_ascii=False), product.created_at, product.updated_at,
+                name_lower, keywords_text
+            )
+        ).fetchone()
+        rowid = row[0]
+
+        self._delete_index_rows(rowid)
+        shops = dict.fromkeys([product.shop_name, *product.official_shops])
+        self._conn.executemany(
+            "INSERT INTO product_shops (product_rowid, shop_name) VALUES (?, ?)",
+            [(rowid, shop) for shop in shops]
+        )
+        # 关键词按原样保存(含重复),用于统计文本中出现的关键词个数
+        self._conn.executemany(
+            "INSERT INTO product_keywords (product_rowid, keyword) VALUES (?, ?)",
+            [(rowid, kw) for kw in keywords]
+        )
+        if self._fts and index_fts:
+            self._conn.execute(
+                "INSERT INTO products_fts (rowid, name_lower, keywords_text) VALUES (?, ?, ?)",
+                (rowid, name_lower, keywords_text)
+            )
+
+    def _delete_index_rows(self, rowid: int) -> None:
+        """删除商品的店铺、关键词和全文索引行"""
+        self._conn.execute("DELETE FROM product_shops WHERE product_rowid = ?", (rowid,))
+        self._conn.execute("DELETE FROM product_keywords WHERE product_rowid = ?", (rowid,))
+        if self._fts:
+            self._conn.execute("DELETE FROM products_fts WHERE rowid = ?", (rowid,))
+
+    def add_product(self, product: GenuineProduct) -> bool:
+        """
+        添加正版商品
+
+        Args:
+            product: 正版商品对象
+
+        Returns:
+            是否添加成功
+        """
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM products WHERE product_id = ?", (product.product_id,)
+            ).fetchone()
+            if exists:
+                print(f"⚠️ 商品 {product.product_id} 已存在,将更新信息")
+                product.updated_at = datetime.now().isoformat()
+            try:
+                with self._mutation(product.product_id):
+                    self._upsert(product)
+            except sqlite3.Error as e:
+                print(f"❌ 保存数据库失败: {e}")
+                return False
+            self._invalidate()
+        print(f"✅ 已添加/更新商品: {product.product_name}")
+        return True
+
+    def _upsert_batch(self, batch: List[GenuineProduct], stats: Dict) -> None:
+        """
+        在单个事务中写入一批商品,全文索引延迟到导入结束时重建
+
+        Args:
+            batch: 已校验的商品列表
+            stats: 导入统计
+        """
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            if self._fts:
+                self._set_meta("fts_dirty", "1")
+            for product in batch:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM products WHERE product_id = ?", (product.product_id,)
+                ).fetchone()
+                if exists:
+                    product.updated_at = now
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+                self._upsert(product, index_fts=False)
+
+    def _finish_import(self) -> None:
+        """批量导入结束: 重建全文索引并使关键词词表失效"""
+        with self._lock:
+            if self._fts:
+                self._rebuild_fts()
+            self._invalidate()
+
+    def _rebuild_fts(self) -> None:
+        """根据商品表重建全文索引"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM products_fts")
+            self._conn.execute(
+                "INSERT INTO products_fts (rowid, name_lower, keywords_text) "
+                "SELECT id, name_lower, keywords_text FROM products"
+            )
+            self._conn.execute("DELETE FROM meta WHERE key = 'fts_dirty'")
+
+    def get_product(self, product_id: str) -> Optional[GenuineProduct]:
+        """
+        根据ID获取商品
+
+        Args:
+            product_id: 商品ID
+
+        Returns:
+            商品对象或None
+        """
+        results = self._query(f"SELECT {_COLUMNS} FROM products WHERE product_id = ?", (product_id,))
+        return results[0] if results else None
+
+    def _substring_query(self, column: str, text: str, extra_where: str = "") -> Tuple[str, List]:
+        """
+        构造子串匹配的 WHERE 条件
+
+        长度足够时先用 trigram 全文索引筛选候选行,再用 instr 精确确认,
+        结果与 JSON 实现的 `text in column` 语义一致。
+        """
+        if self._fts and len(text) >= _FTS_MIN_LENGTH:
+            return (
+                f"(id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?) "
+                f"AND instr({column}, ?) > 0{extra_where})",
+                [_fts_phrase(column, text), text]
+            )
+        return f"(instr({column}, ?) > 0{extra_where})", [text]
+
+    def search_by_name(self, product_name: str) -> List[GenuineProduct]:
+        """
+        根据商品名称搜索
+
+        Args:
+            product_name: 商品名称(支持部分匹配)
+
+        Returns:
+            匹配的商品列表
+        """
+        where, params = self._substring_query("name_lower", product_name.lower())
+        return self._query(f"SELECT {_COLUMNS} FROM products WHERE {where} ORDER BY id", params)
+
+    def search_by_keywords(self, keywords: List[str]) -> List[GenuineProduct]:
+        """
+        根据关键词搜索
+
+        Args:
+            keywords: 关键词列表
+
+        Returns:
+            匹配的商品列表
+        """
+        if not keywords:
+            return []
+        clauses, params = [], []
+        for kw in keywords:
+            where, kw_params = self._substring_query(
+                "keywords_text", kw.lower(), extra_where=" AND keywords != '[]'"
+            )
+            clauses.append(where)
+            params.extend(kw_params)
+        return self._query(
+            f"SELECT {_COLUMNS} FROM products WHERE {' OR '.join(clauses)} ORDER BY id", params
+        )
+
+    def _load_keyword_vocab(self) -> Set[str]:
+        """加载关键词词表(写入后或其他进程提交修改后失效,下次使用时重新加载)"""
+        with self._lock:
+            self.refresh()
+            if self._keyword_vocab is None:
+                rows = self._conn.execute("SELECT DISTINCT keyword FROM product_keywords").fetchall()
+                self._keyword_vocab = {row[0] for row in rows if row[0]}
+                self._max_keyword_length = max((len(kw) for kw in self._keyword_vocab), default=0)
+            return self._keyword_vocab
+
+    def find_by_keyword_text(self, text: str) -> List[Tuple[GenuineProduct, int]]:
+        """
+        查找关键词出现在文本中的商品
+
+        枚举文本中长度不超过最长关键词的子串并与词表求交,
+        耗时与文本长度相关,与商品库规模无关。
+
+        Args:
+            text: 待匹配文本(如商品标题、OCR文本)
+
+        Returns:
+            (商品, 出现在文本中的关键词个数) 列表,按商品添加顺序排列,不含个数为0的商品
+        """
+        vocab = self._load_keyword_vocab()
+        max_len = self._max_keyword_length
+        present = {
+            text[i:i + length]
+            for i in range(len(text))
+            for length in range(1, min(max_len, len(text) - i) + 1)
+        } & vocab
+        if not present:
+            return []
+
+        placeholders = ", ".join("?" * len(present))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join('p.' + c.strip() for c in _COLUMNS.split(','))}, "
+                "COUNT(*) AS match_count "
+                "FROM product_keywords k JOIN products p ON p.id = k.product_rowid "
+                f"WHERE k.keyword IN ({placeholders}) GROUP BY p.id ORDER BY p.id",
+                tuple(present)
+            ).fetchall()
+        return [(self._row_to_product(row), row["match_count"]) for row in rows]
+
+    def is_official_shop(self, shop_name: str, product_id: str = None) -> bool:
+        """
+        检查是否为官方店铺
+
+        Args:
+            shop_name: 店铺名称
+            product_id: 可选的商品ID,如果提供则只检查该商品
+
+        Returns:
+            是否为官方店铺
+        """
+        with self._lock:
+            if product_id:
+                row = self._conn.execute(
+                    "SELECT 1 FROM product_shops s JOIN products p ON p.id = s.product_rowid "
+                    "WHERE s.shop_name = ? AND p.product_id = ? LIMIT 1",
+                    (shop_name, product_id)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT 1 FROM product_shops WHERE shop_name = ? LIMIT 1", (shop_name,)
+                ).fetchone()
+        return row is not None
+
+    def get_all_products(self) -> List[GenuineProduct]:
+        """获取所有商品"""
+        return self._query(f"SELECT {_COLUMNS} FROM products ORDER BY id")
+
+    def delete_product(self, product_id: str) -> bool:
+        """
+        删除商品
+
+        Args:
+            product_id: 商品ID
+
+        Returns:
+            是否删除成功
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM products WHERE product_id = ?", (product_id,)
+            ).fetchone()
+            if row is None:
+                print(f"⚠️ 商品不存在: {product_id}")
+                return False
+            with self._mutation(product_id):
+                self._delete_index_rows(row["id"])
+                self._conn.execute("DELETE FROM products WHERE id = ?", (row["id"],))
+            self._invalidate()
+        print(f"✅ 已删除商品: {product_id}")
+        return True
+
+    def get_stats(self) -> Dict:
+        """获取数据库统计信息"""
+        with self._lock:
+            platforms = {
+                row[0]: row[1] for row in self._conn.execute(
+                    "SELECT platform, COUNT(*) FROM products GROUP BY platform ORDER BY MIN(id)"
+                )
+            }
+            categories = {
+                row[0]: row[1] for row in self._conn.execute(
+                    "SELECT category, COUNT(*) FROM products GROUP BY category ORDER BY MIN(id)"
+                )
+            }
+            total = self._count()
+
+        return {
+            "total_products": total,
+            "platforms": platforms,
+            "categories": categories
+        }
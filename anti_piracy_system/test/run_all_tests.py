@@ -50,6 +50,21 @@ def main():
         ("test_prompts.py", "提示词配置测试"),
         ("test_detection.py", "盗版检测逻辑测试"),
         ("test_reporter.py", "举报模块测试"),
+        ("test_piracy_detector.py", "盗版检测引擎测试"),
+        ("test_bulk_detect.py", "离线批量检测测试"),
+        ("test_product_database.py", "正版商品数据库测试"),
+        ("test_report_manager.py", "举报记录管理测试"),
+        ("test_report_guard.py", "重复举报防护测试"),
+        ("test_id_generator.py", "ID 生成器测试"),
+        ("test_compact.py", "紧凑记录类型测试"),
+        ("test_snapshot_cache.py", "二进制快照缓存测试"),
+        ("test_response_cache.py", "模型响应缓存测试"),
+        ("test_response_parser.py", "模型响应解析测试"),
+        ("test_report_pipeline.py", "举报流水线测试"),
+        ("test_patrol_checkpoint.py", "巡查断点测试"),
+        ("test_model_pool.py", "模型服务连接池测试"),
+        ("test_keyword_scheduler.py", "多关键词巡查调度测试"),
+        ("test_result_sink.py", "巡查结果流式存储测试"),
     ]
 
     results = []
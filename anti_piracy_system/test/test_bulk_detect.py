@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+离线批量检测测试
+
+验证 bulk_detect 的 JSONL 流式检测:
+1. 结果按输入顺序输出
+2. 非法输入行输出错误记录而不中断
+3. 进程池与进程内两种模式结果一致
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_bulk_detect.py
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.bulk_detect import iter_detections
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "genuine_products.json")
+
+LISTINGS = [
+    {"title": "2026众合法考客观题学习包", "shop_name": "方圆众合教育", "price": 898.0, "platform": "小红书"},
+    {"title": "众合法考客观题学习包 超值", "shop_name": "某个人卖家", "price": 99.0, "platform": "小红书"},
+    {"title": "Python 编程教程", "shop_name": "某教育机构", "price": 99.0, "platform": "淘宝"},
+]
+
+
+def _input_lines():
+    lines = [json.dumps(item, ensure_ascii=False) for item in LISTINGS]
+    lines.insert(2, "not json")
+    return lines * 5
+
+
+def _run(workers):
+    return [
+        (status, json.loads(line))
+        for status, line in iter_detections(_input_lines(), db_path=DB_PATH, workers=workers, chunk_size=2)
+    ]
+
+
+def test_inline_order_and_errors():
+    """进程内模式: 顺序与错误记录"""
+    print("\n" + "=" * 60)
+    print("测试 1: 进程内批量检测")
+    print("=" * 60)
+
+    results = _run(workers=0)
+    statuses = [status for status, _ in results]
+    print(f"   输出 {len(results)} 条, 状态: {statuses[:4]}")
+
+    assert len(results) == 20
+    assert [record["line"] for _, record in results] == list(range(1, 21))
+    assert statuses[:4] == ["normal", "piracy", "error", "normal"]
+    assert "error" in results[2][1]
+    print("   ✅ 顺序与错误记录正确")
+
+
+def test_process_pool_matches_inline():
+    """进程池模式与进程内模式结果一致"""
+    print("\n" + "=" * 60)
+    print("测试 2: 进程池批量检测")
+    print("=" * 60)
+
+    inline = _run(workers=0)
+    pooled = _run(workers=2)
+
+    def verdicts(results):
+        return [
+            (record["line"], status, record.get("detection_result", {}).get("confidence"))
+            for status, record in results
+        ]
+
+    assert verdicts(pooled) == verdicts(inline)
+    print(f"   ✅ 进程池结果与进程内一致 ({len(pooled)} 条)")
+
+
+if __name__ == "__main__":
+    test_inline_order_and_errors()
+    test_process_pool_matches_inline()
+    print("\n✅ 批量检测测试通过")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+紧凑记录类型测试
+
+验证 GenuineProduct / ReportRecord 改为 __slots__ 紧凑存储后:
+1. to_dict/from_dict 与原 dataclass 格式一致,时间字符串无损往返
+2. 重复的店铺、平台等字符串和官方店铺列表共享同一个对象
+3. 实例没有 __dict__,不能随意添加属性
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_compact.py
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.compact import pack_timestamp, unpack_timestamp
+from anti_piracy_system.product_database import GenuineProduct
+from anti_piracy_system.report_manager import ReportRecord
+
+PRODUCT = {
+    "product_id": "zhonghe_001",
+    "product_name": "2026众合法考客观题学习包",
+    "shop_name": "方圆众合教育",
+    "official_shops": ["方圆众合教育", "众合法考官方旗舰店"],
+    "original_price": 898.0,
+    "platform": "众合法考",
+    "category": "法考课程",
+    "description": None,
+    "keywords": ["众合", "法考"],
+    "created_at": "2025-01-01T00:00:00",
+    "updated_at": "2025-12-27T12:00:00.123456",
+}
+
+REPORT = {
+    "report_id": "report_20250101_120000_0",
+    "platform": "小红书",
+    "target_title": "众合法考客观题 超值",
+    "target_shop": "某个人卖家",
+    "target_price": 99.0,
+    "target_url": None,
+    "detection_result": {"is_piracy": True, "reasons": ["价格异常"]},
+    "report_reason": "疑似盗版",
+    "report_status": "pending",
+    "evidence_screenshots": ["screenshots/a.png"],
+    "reported_at": "2025-01-01T12:00:00+08:00",
+    "notes": None,
+}
+
+
+def test_round_trip():
+    """to_dict/from_dict 与原格式一致"""
+    print("\n" + "=" * 60)
+    print("测试 1: 序列化往返")
+    print("=" * 60)
+
+    for cls, data in ((GenuineProduct, PRODUCT), (ReportRecord, REPORT)):
+        record = cls.from_dict(json.loads(json.dumps(data)))
+        assert record.to_dict() == data
+        assert cls.from_dict(record.to_dict()) == record
+        # to_dict 返回副本,修改其中的列表和字典不影响记录
+        for value in record.to_dict().values():
+            if isinstance(value, (list, dict)):
+                value.clear()
+        assert record.to_dict() == data
+
+    report = ReportRecord.from_dict(dict(REPORT))
+    assert isinstance(report._reported_at, str)  # 带时区的时间原样保留
+    product = GenuineProduct.from_dict(dict(PRODUCT))
+    assert isinstance(product._created_at, int) and isinstance(product._updated_at, int)
+    product.updated_at = "2026-01-02T03:04:05"
+    assert product.to_dict()["updated_at"] == "2026-01-02T03:04:05"
+    for value in ("2025-01-01", "2025-01-01 12:00:00", "2025-01-01T12:00:00.000000", None):
+        assert unpack_timestamp(pack_timestamp(value)) == value
+    print("   ✅ 序列化格式不变")
+
+
+def test_sharing_and_slots():
+    """重复字符串和官方店铺列表共享,实例无 __dict__"""
+    print("\n" + "=" * 60)
+    print("测试 2: 共享与 __slots__")
+    print("=" * 60)
+
+    first = GenuineProduct.from_dict(json.loads(json.dumps(PRODUCT)))
+    second = GenuineProduct.from_dict(json.loads(json.dumps(dict(PRODUCT, product_id="zhonghe_002"))))
+    assert first.shop_name is second.shop_name
+    assert first.official_shops is second.official_shops
+    assert first.official_shops == ("方圆众合教育", "众合法考官方旗舰店")
+
+    report = ReportRecord.from_dict(json.loads(json.dumps(REPORT)))
+    report.report_status = "".join(["sub", "mitted"])
+    assert report.report_status is sys.intern("submitted")
+    report.evidence_screenshots += ("screenshots/b.png",)
+    assert report.to_dict()["evidence_screenshots"] == ["screenshots/a.png", "screenshots/b.png"]
+
+    assert not hasattr(first, "__dict__")
+    try:
+        first.unknown_field = 1
+        raise AssertionError("不应允许添加未声明的属性")
+    except AttributeError:
+        pass
+    print("   ✅ 共享与 __slots__ 正确")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_sharing_and_slots()
+    print("\n✅ 紧凑记录类型测试通过")
@@ -16,6 +16,7 @@
     cd /Users/Apple/Documents/GUI/anti_piracy_system
     source venv/bin/activate
     python test/test_detection.py
+    python test/test_detection.py -n 200 --resume   # 从上次中断的商品继续
 
 前提条件:
     1. 手机已通过 USB 或 WiFi 连接 ADB
@@ -30,8 +31,8 @@ import json
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # 加载环境变量 (可选)
 try:
@@ -42,6 +43,13 @@ try:
 except ImportError:
     pass
 
+from anti_piracy_system.listing_cluster import ListingClusterer
+from anti_piracy_system.report_guard import ReportGuard
+from anti_piracy_system.patrol_checkpoint import (
+    CheckpointStore, PatrolCheckpoint, checkpoint_path, item_fingerprint
+)
+from anti_piracy_system.result_sink import ResultSink
+
 
 # 小红书 App 配置
 XIAOHONGSHU_PACKAGE = "com.xingin.xhs"
@@ -50,6 +58,16 @@ SEARCH_KEYWORD = "众合法考"
 # 每页可见商品数（双列布局，约2行）
 PRODUCTS_PER_PAGE = 4
 
+# 近似重复标题聚类阈值（用于识别转售网络）
+CLUSTER_THRESHOLD = 0.8
+
+# 重复举报防护索引（与 AntiPiracyAgent 共用）
+REPORT_GUARD_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "report_guard.db")
+REPORT_PLATFORM = "小红书"
+
+# 检测断点（每检测完一个商品写入，--resume 时从断点继续；实际文件按关键词区分）
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "detection_checkpoint.json")
+
 # 官方店铺列表 - 这些店铺不需要举报
 OFFICIAL_SHOPS = [
     "方圆众合教育",
@@ -106,18 +124,28 @@ class EvidenceManager:
         └── ...
     """
 
-    def __init__(self, keyword: str):
-        """初始化证据管理器"""
-        # 生成时间戳
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # 清理关键词中的特殊字符
-        safe_keyword = re.sub(r'[\\/:*?"<>|]', '_', keyword)
-        # 创建文件夹名: 时间戳_关键词
-        folder_name = f"{self.timestamp}_{safe_keyword}"
-
-        # 基础目录
-        base_dir = os.path.join(os.path.dirname(__file__), "evidence")
-        self.evidence_dir = os.path.join(base_dir, folder_name)
+    def __init__(self, keyword: str, evidence_dir: Optional[str] = None):
+        """
+        初始化证据管理器
+
+        Args:
+            keyword: 搜索关键词
+            evidence_dir: 已有的证据目录（从断点继续时沿用上次的目录）
+        """
+        if evidence_dir:
+            self.evidence_dir = evidence_dir
+            self.timestamp = os.path.basename(evidence_dir)[:15]
+        else:
+            # 生成时间戳
+            self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # 清理关键词中的特殊字符
+            safe_keyword = re.sub(r'[\\/:*?"<>|]', '_', keyword)
+            # 创建文件夹名: 时间戳_关键词
+            folder_name = f"{self.timestamp}_{safe_keyword}"
+
+            # 基础目录
+            base_dir = os.path.join(os.path.dirname(__file__), "evidence")
+            self.evidence_dir = os.path.join(base_dir, folder_name)
         os.makedirs(self.evidence_dir, exist_ok=True)
 
         self.keyword = keyword
@@ -125,6 +153,13 @@ class EvidenceManager:
 
         print(f"\n📁 证据保存目录: {self.evidence_dir}")
 
+    def discard_if_empty(self):
+        """未能开始检测时删除本次创建的空证据目录（续查沿用的目录不为空，保持不动）"""
+        try:
+            os.rmdir(self.evidence_dir)
+        except OSError:
+            pass
+
     def get_shop_dir(self, shop_name: str) -> str:
         """获取或创建店铺文件夹"""
         # 清理店铺名中的特殊字符
@@ -158,21 +193,35 @@ class EvidenceManager:
             "timestamp": self.timestamp,
             "detection_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "total_shops": len(self.shops),
-            "shops": []
+            "shops": [],
+            "clusters": {}
         }
 
+        # 按标题对店铺做近似重复聚类，同一簇的多个店铺可能属于同一转售网络
+        clusterer = ListingClusterer(threshold=CLUSTER_THRESHOLD)
+
         for shop_name, data in self.shops.items():
+            title = data["info"].get("title")
+            cluster_id = clusterer.assign(title)[0] if title else None
             shop_info = {
                 "shop_name": shop_name,
                 "folder": re.sub(r'[\\/:*?"<>|]', '_', shop_name),
-                "title": data["info"].get("title"),
+                "title": title,
                 "price": data["info"].get("price"),
+                "cluster_id": cluster_id,
                 "screenshots": {
                     "product": os.path.basename(data["screenshots"].get("product", "")),
                     "shop": os.path.basename(data["screenshots"].get("shop", ""))
                 }
             }
             report["shops"].append(shop_info)
+            if cluster_id:
+                report["clusters"].setdefault(cluster_id, []).append(shop_name)
+
+        # 只保留包含多个店铺的簇
+        report["clusters"] = {
+            cid: shops for cid, shops in report["clusters"].items() if len(shops) > 1
+        }
 
         report_path = os.path.join(self.evidence_dir, "report.json")
         with open(report_path, "w", encoding="utf-8") as f:
@@ -1597,7 +1646,8 @@ def extract_single_product(adb: ADBController, extractor: ProductExtractor,
                            evidence: EvidenceManager, product_index: int,
                            visible_index: int, enable_report: bool = False,
                            keyword: str = SEARCH_KEYWORD,
-                           debug: bool = False) -> Optional[Dict]:
+                           debug: bool = False,
+                           report_guard: Optional[ReportGuard] = None) -> Optional[Dict]:
     """
     提取单个商品信息（可选举报）
 
@@ -1619,6 +1669,7 @@ def extract_single_product(adb: ADBController, extractor: ProductExtractor,
         visible_index: 当前页面可见位置索引 (0-3)
         enable_report: 是否执行举报流程
         keyword: 搜索关键词
+        report_guard: 重复举报防护，窗口期内已举报过的店铺/商品跳过举报
         debug: 是否启用调试模式
 
     Returns:
@@ -1741,12 +1792,22 @@ def extract_single_product(adb: ADBController, extractor: ProductExtractor,
     skip_report = False
 
     if enable_report:
-        # 检查是否为官方店铺
+        # 检查是否为官方店铺，以及窗口期内是否已举报过
+        duplicate_reason = None
+        if report_guard and not is_official_shop(shop_name, keyword):
+            duplicate_reason = report_guard.check(REPORT_PLATFORM, shop_name, final_info.get("title"))
+
         if is_official_shop(shop_name, keyword):
             print(f"\n6. ✅ 官方店铺，跳过举报: {shop_name}")
             skip_report = True
             final_info["is_official"] = True
             final_info["reported"] = False
+        elif duplicate_reason:
+            print(f"\n6. ⏭️  跳过重复举报: {duplicate_reason}")
+            skip_report = True
+            final_info["is_official"] = False
+            final_info["reported"] = False
+            final_info["duplicate"] = True
         else:
             print("\n6. 执行举报流程...")
             final_info["is_official"] = False
@@ -1761,6 +1822,8 @@ def extract_single_product(adb: ADBController, extractor: ProductExtractor,
                 debug=debug
             )
             final_info["reported"] = report_success
+            if report_success and report_guard:
+                report_guard.record(REPORT_PLATFORM, shop_name, final_info.get("title"))
 
     # 步骤7: 返回列表
     step_num = 7 if enable_report else 6
@@ -1777,8 +1840,35 @@ def extract_single_product(adb: ADBController, extractor: ProductExtractor,
     return final_info
 
 
+def load_detection_checkpoint(store: CheckpointStore, keyword: str,
+                              num_products: int) -> Optional[PatrolCheckpoint]:
+    """
+    读取检测断点
+
+    Args:
+        store: 断点文件
+        keyword: 搜索关键词（与断点不一致时不续查）
+        num_products: 本次要检测的商品数量
+
+    Returns:
+        可续查的断点，没有时返回 None
+    """
+    checkpoint = store.load(keyword=keyword, platform=REPORT_PLATFORM)
+    if checkpoint is None:
+        print("\n⚠️  没有可用的断点，从头开始检测")
+        return None
+    if not checkpoint.evidence_dir or not os.path.isdir(checkpoint.evidence_dir):
+        print("\n⚠️  断点的证据目录不存在，从头开始检测")
+        return None
+    checkpoint.max_items = num_products
+    print(f"\n♻️  从断点继续: 已完成 {checkpoint.next_index} 个商品，"
+          f"翻页 {checkpoint.scroll_count} 次，证据 {len(checkpoint.evidence)} 个文件")
+    return checkpoint
+
+
 def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
-                  enable_report: bool = False, debug: bool = False):
+                  enable_report: bool = False, debug: bool = False,
+                  resume: bool = False):
     """
     运行盗版检测
 
@@ -1787,6 +1877,10 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
         keyword: 搜索关键词
         enable_report: 是否启用举报功能
         debug: 是否启用调试模式
+        resume: 是否从上次中断的断点继续（沿用证据目录，翻页到原位置后从下一个商品开始）
+
+    Returns:
+        检测结果文件路径（证据目录下的 results.jsonl，每行一个商品），无法连接设备或启动应用时返回 None
     """
     print("\n" + "=" * 60)
     print("盗版检测 - 小红书商品信息提取")
@@ -1803,11 +1897,21 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
     print(f"   调试模式: {'是' if debug else '否'}")
 
     # 初始化
-    evidence = EvidenceManager(keyword)
+    checkpoint_store = CheckpointStore(checkpoint_path(CHECKPOINT_PATH, REPORT_PLATFORM, keyword))
+    checkpoint = load_detection_checkpoint(checkpoint_store, keyword, num_products) if resume else None
+    if checkpoint is None:
+        evidence = EvidenceManager(keyword)
+        checkpoint = PatrolCheckpoint(
+            keyword=keyword, platform=REPORT_PLATFORM, max_items=num_products,
+            evidence_dir=evidence.evidence_dir
+        )
+    else:
+        evidence = EvidenceManager(keyword, evidence_dir=checkpoint.evidence_dir)
     adb = ADBController(evidence_manager=evidence)
 
     if not adb.check_connection():
         print("\n❌ 测试终止: 无法连接设备")
+        evidence.discard_if_empty()
         return None
 
     width, height = adb.get_screen_size()
@@ -1815,8 +1919,25 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
 
     xhs = XiaohongshuController(adb)
     if not xhs.launch():
+        evidence.discard_if_empty()
         return None
 
+    # 检测结果逐条写入结果文件，内存中只保留计数；续查时截断到断点记录的条数
+    if checkpoint.results_path:
+        sink = ResultSink(checkpoint.results_path, keep=checkpoint.result_count)
+    else:
+        checkpoint.results_path = os.path.join(evidence.evidence_dir, "results.jsonl")
+        sink = ResultSink(checkpoint.results_path)
+    counters = {"detected": sink.count, "reported": 0, "duplicate": 0}
+
+    # 恢复断点中已完成的商品
+    for entry in sink:
+        info = entry["info"]
+        evidence.save_shop_info(info["shop_name"], info)
+        evidence.shops[info["shop_name"]]["screenshots"].update(entry.get("screenshots", {}))
+        counters["reported"] += bool(info.get("reported"))
+        counters["duplicate"] += bool(info.get("duplicate"))
+
     xhs.search(keyword)
     xhs.switch_to_products_tab()
 
@@ -1824,12 +1945,17 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
     time.sleep(2)
 
     extractor = ProductExtractor(adb)
-    results = []
+    report_guard = ReportGuard(REPORT_GUARD_PATH) if enable_report else None
+
+    # 续查时翻页到中断时的位置
+    for page in range(checkpoint.scroll_count):
+        print(f"\n📜 翻页回断点位置 ({page + 1}/{checkpoint.scroll_count})")
+        adb.swipe_up_list(delay=2.0)
 
     # 当前页面已处理的商品数
-    current_page_processed = 0
+    current_page_processed = checkpoint.page_position
 
-    for i in range(num_products):
+    for i in range(checkpoint.next_index, num_products):
         # 计算当前商品在可见区域的位置索引
         visible_index = current_page_processed
 
@@ -1837,6 +1963,7 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
         if visible_index >= PRODUCTS_PER_PAGE:
             print(f"\n📜 翻页: 已处理 {current_page_processed} 个商品，滑动加载更多...")
             adb.swipe_up_list(delay=2.0)
+            checkpoint.scroll_count += 1
             current_page_processed = 0
             visible_index = 0
 
@@ -1844,10 +1971,22 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
             info = extract_single_product(
                 adb, extractor, evidence, i, visible_index,
                 enable_report=enable_report, keyword=keyword,
-                debug=debug
+                debug=debug, report_guard=report_guard
             )
             if info:
-                results.append(info)
+                fingerprint = item_fingerprint(REPORT_PLATFORM, info["shop_name"], info.get("title"))
+                if checkpoint.is_processed(fingerprint):
+                    # 列表顺序变化时，上次已检测的商品可能出现在新位置
+                    print(f"\n⏭️  上次已检测过该商品，不重复记录: {info['shop_name']}")
+                else:
+                    screenshots = dict(evidence.shops.get(info["shop_name"], {}).get("screenshots", {}))
+                    sink.append({"fingerprint": fingerprint, "info": info, "screenshots": screenshots})
+                    checkpoint.mark_processed(
+                        fingerprint, result_count=sink.count, evidence=list(screenshots.values())
+                    )
+                    counters["detected"] = sink.count
+                    counters["reported"] += bool(info.get("reported"))
+                    counters["duplicate"] += bool(info.get("duplicate"))
                 current_page_processed += 1
         except Exception as e:
             print(f"\n❌ 提取商品 {i + 1} 时出错: {e}")
@@ -1856,28 +1995,34 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
             adb.back(delay=1.5)
             current_page_processed += 1
 
+        # 每个商品处理完后写入断点
+        checkpoint.next_index = i + 1
+        checkpoint.page_position = current_page_processed
+        checkpoint.counters = dict(counters)
+        checkpoint_store.save(checkpoint)
+
         if i < num_products - 1:
             time.sleep(1)
 
-    # 保存报告
+    # 保存报告，检测完成后删除断点
+    sink.close()
     evidence.save_report()
+    checkpoint_store.clear()
 
-    # 输出总结
+    # 输出总结（逐条读取结果文件）
     print("\n" + "=" * 60)
     print("检测结果总结")
     print("=" * 60)
 
-    # 统计举报结果
-    reported_count = sum(1 for info in results if info.get("reported", False))
-
-    print(f"\n成功检测 {len(results)}/{num_products} 个商品:\n")
+    print(f"\n成功检测 {counters['detected']}/{num_products} 个商品:\n")
 
-    for info in results:
+    for entry in sink:
+        info = entry["info"]
         print(f"[{info['index']}] {info['title'] or '未知标题'}")
         print(f"    店铺: {info['shop_name']}")
         print(f"    价格: ¥{info['price'] or '未提取到'}")
         if enable_report:
-            status = '✅ 已举报' if info.get('reported') else '❌ 未举报'
+            status = '✅ 已举报' if info.get('reported') else ('⏭️  重复跳过' if info.get('duplicate') else '❌ 未举报')
             print(f"    举报: {status}")
         print()
 
@@ -1885,15 +2030,18 @@ def run_detection(num_products: int = 3, keyword: str = SEARCH_KEYWORD,
     print(f"   - 共 {len(evidence.shops)} 个店铺文件夹")
     print(f"   - 每个店铺包含: 1_商品介绍.png + 2_店铺信息.png")
     print(f"   - 检测报告: report.json")
+    print(f"   - 检测结果: {os.path.basename(sink.path)}")
 
     if enable_report:
-        print(f"\n📢 举报统计: {reported_count}/{len(results)} 个商品已举报")
+        print(f"\n📢 举报统计: {counters['reported']}/{counters['detected']} 个商品已举报，"
+              f"{counters['duplicate']} 个重复跳过")
+        report_guard.close()
 
     print("\n" + "=" * 60)
     print("检测完成")
     print("=" * 60)
 
-    return results
+    return sink.path
 
 
 def run_mock_report_test(keyword: str = SEARCH_KEYWORD):
@@ -2073,6 +2221,8 @@ if __name__ == "__main__":
                         help="运行 Mock 测试（无需真实设备，测试举报流程逻辑）")
     parser.add_argument("--debug-report-page", action="store_true",
                         help="调试举报页面（保存当前页面 UI 信息）")
+    parser.add_argument("--resume", action="store_true",
+                        help="从上次中断的检测断点继续（需使用相同的关键词）")
 
     args = parser.parse_args()
 
@@ -2088,5 +2238,6 @@ if __name__ == "__main__":
             num_products=args.num,
             keyword=args.keyword,
             enable_report=args.report,
-            debug=args.debug
+            debug=args.debug,
+            resume=args.resume
         )
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ID 生成器测试
+
+验证 IdGenerator:
+1. 多线程、多生成器(模拟多进程/多设备)并发生成的 ID 不重复
+2. 同一线程内 ID 严格递增,字符串顺序与生成顺序一致
+3. 可以从 ID 解析生成时间,并按时间下界做范围扫描
+4. 举报记录使用新 ID,不再依赖当前记录数
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_id_generator.py
+"""
+
+import sys
+import os
+import bisect
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.id_generator import IdGenerator, new_id, id_timestamp, id_lower_bound
+from anti_piracy_system.report_manager import ReportManager
+
+
+def test_unique_and_ordered():
+    """并发生成的 ID 不重复,单线程内严格递增"""
+    print("\n" + "=" * 60)
+    print("测试 1: 唯一性与有序性")
+    print("=" * 60)
+
+    # 两个节点号相同的生成器模拟同一台机器上的两个进程
+    generators = [IdGenerator(node=7), IdGenerator(node=7), IdGenerator(node="device-2")]
+    per_thread = {}
+
+    def worker(index):
+        generator = generators[index % len(generators)]
+        per_thread[index] = [generator.next_id("report") for _ in range(2000)]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [id_ for ids in per_thread.values() for id_ in ids]
+    assert len(set(all_ids)) == len(all_ids) == 12000
+    for ids in per_thread.values():
+        assert ids == sorted(ids)
+        assert all(id_.startswith("report_") and len(id_) == len("report_") + 26 for id_ in ids)
+
+    first = new_id("patrol")
+    time.sleep(0.002)
+    assert new_id("patrol") > first
+    print("   ✅ 12000 个 ID 无重复,单线程内有序")
+
+
+def test_timestamp_range_scan():
+    """解析生成时间并按时间下界做范围扫描"""
+    print("\n" + "=" * 60)
+    print("测试 2: 时间解析与范围扫描")
+    print("=" * 60)
+
+    # 时间戳由单调时钟推算,与墙上时间允许少量偏差
+    before = datetime.now() - timedelta(seconds=1)
+    ids = []
+    for _ in range(3):
+        ids.append(new_id("report"))
+        time.sleep(0.005)
+    middle = id_timestamp(ids[1])
+    assert before <= id_timestamp(ids[0]) <= middle <= id_timestamp(ids[2]) <= datetime.now() + timedelta(seconds=1)
+
+    start = bisect.bisect_left(ids, id_lower_bound(middle, "report"))
+    assert ids[start:] == ids[1:]
+    assert id_timestamp("report_20250101_120000_0") is None
+    print("   ✅ 时间解析与范围扫描正确")
+
+
+def test_report_ids():
+    """举报记录 ID 唯一且按创建顺序排序"""
+    print("\n" + "=" * 60)
+    print("测试 3: 举报记录 ID")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "report_history.json")
+        first = ReportManager(path, fsync_policy="never")
+        second = ReportManager(path, fsync_policy="never")
+        ids = [first.create_report("小红书", f"商品{i}", "某个人卖家", 9.9).report_id for i in range(3)]
+        # 另一个实例的记录数同样从 0 开始,旧格式下会生成相同的 ID
+        ids.append(second.create_report("小红书", "商品3", "某个人卖家", 9.9).report_id)
+        assert len(set(ids)) == 4
+        assert ids[:3] == sorted(ids[:3])
+        first.close()
+        second.close()
+        print("   ✅ 举报记录 ID 不再重复")
+
+
+if __name__ == "__main__":
+    test_unique_and_ordered()
+    test_timestamp_range_scan()
+    test_report_ids()
+    print("\n✅ ID 生成器测试通过")
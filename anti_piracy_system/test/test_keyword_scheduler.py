@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+多关键词巡查调度测试
+
+验证 KeywordScheduler:
+1. 预算按期望盗版率分配,每个关键词至少 min_items 个,收益递减深度作为上限
+2. 连续一页没有新商品时判定为收益递减,重复商品不重复计入盗版数
+3. 统计跨巡查持久化,文件损坏时重新统计
+4. 多个巡查任务同时写入统计时彼此的结果都被计入
+5. 模拟多次巡查: 按收益分配比平均分配检出更多盗版
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_keyword_scheduler.py
+"""
+
+import sys
+import os
+import random
+import tempfile
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.keyword_scheduler import KeywordScheduler, KeywordStatsStore
+
+PLATFORM = "xiaohongshu"
+
+
+def test_allocate():
+    """预算分配"""
+    print("\n" + "=" * 60)
+    print("测试 1: 预算分配")
+    print("=" * 60)
+
+    scheduler = KeywordScheduler(PLATFORM, ["众合法考", "众合法考客观题", "众合法考学习包"], thompson=False)
+    # 新关键词先验相同,平均分配
+    assert sorted(budget for _, budget in scheduler.allocate(30)) == [10, 10, 10]
+
+    hot = scheduler.stats[(PLATFORM, "众合法考客观题")]
+    hot.checked, hot.hits = 20, 10
+    cold = scheduler.stats[(PLATFORM, "众合法考学习包")]
+    cold.checked, cold.hits, cold.saturation_depth = 20, 0, 3
+
+    plan = scheduler.allocate(30)
+    assert [keyword for keyword, _ in plan] == ["众合法考客观题", "众合法考", "众合法考学习包"]
+    assert sum(budget for _, budget in plan) == 30
+    budgets = dict(plan)
+    assert budgets["众合法考学习包"] == 3  # 上次第 3 个商品后收益递减
+    assert budgets["众合法考客观题"] > budgets["众合法考"]
+
+    # 预算不足时只分给收益最高的关键词,每个至少 min_items 个
+    assert scheduler.allocate(3) == [("众合法考客观题", 2), ("众合法考", 1)]
+    assert scheduler.allocate(30, ["众合法考学习包"]) == [("众合法考学习包", 3)]
+    print(f"   分配结果: {plan}")
+    print("   ✅ 按收益比例分配正确")
+
+
+def test_saturation():
+    """收益递减检测"""
+    print("\n" + "=" * 60)
+    print("测试 2: 收益递减")
+    print("=" * 60)
+
+    scheduler = KeywordScheduler(PLATFORM, ["A", "B"], window=3, min_new=1, thompson=False)
+    first = scheduler.start_run("A", 10)
+    for i in range(6):
+        assert not first.observe(f"商品{i}", is_piracy=i % 2 == 0)
+    scheduler.finish_run(first)
+    assert (first.checked, first.hits, first.new_listings) == (6, 3, 6)
+
+    # B 先搜出 1 个新商品,随后连续 3 个都是 A 下见过的商品
+    second = scheduler.start_run("B", 10)
+    assert not second.observe("商品新", is_piracy=True)
+    assert not second.observe("商品0", is_piracy=True)
+    assert not second.observe("商品1", is_piracy=False)
+    assert second.observe("商品2", is_piracy=True)
+    scheduler.finish_run(second)
+    assert second.saturated and second.hits == 1 and second.new_listings == 1
+    assert scheduler.stats[(PLATFORM, "B")].saturation_depth == 4
+
+    stats = scheduler.get_statistics()
+    assert stats["checked"] == 10 and stats["hits"] == 4
+    assert [run["saturated"] for run in stats["runs"]] == [False, True]
+    print("   ✅ 连续一页无新商品时提前结束")
+
+
+def test_persistence():
+    """统计持久化"""
+    print("\n" + "=" * 60)
+    print("测试 3: 统计持久化")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = KeywordStatsStore(os.path.join(tmpdir, "data", "keyword_stats.json"))
+        scheduler = KeywordScheduler(PLATFORM, ["A", "B"], store=store)
+        run = scheduler.start_run("A", 5)
+        for i in range(5):
+            run.observe(f"商品{i}", is_piracy=i < 2)
+        scheduler.finish_run(run)
+
+        reloaded = KeywordScheduler(PLATFORM, ["A", "B", "C"], store=store)
+        a = reloaded.stats[(PLATFORM, "A")]
+        assert (a.runs, a.checked, a.hits) == (1, 5, 2) and a.last_run
+        assert reloaded.stats[(PLATFORM, "C")].checked == 0
+        # 其他平台的统计互不影响
+        assert KeywordScheduler("xianyu", ["A"], store=store).stats[("xianyu", "A")].checked == 0
+
+        with open(store.path, "w", encoding="utf-8") as f:
+            f.write("{")
+        assert store.load() == {}
+        print("   ✅ 统计跨巡查保存")
+
+
+def test_concurrent_tasks():
+    """多个巡查任务同时写入统计"""
+    print("\n" + "=" * 60)
+    print("测试 4: 多任务同时写入")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "data", "keyword_stats.json")
+        tasks, rounds = 4, 5
+
+        def patrol(task):
+            # 每个任务在巡查开始时读取统计,各自持有一份过期的副本
+            scheduler = KeywordScheduler(PLATFORM, ["A", "B"], store=KeywordStatsStore(path))
+            for i in range(rounds):
+                run = scheduler.start_run("A" if i % 2 else "B", 3)
+                for j in range(3):
+                    run.observe(f"任务{task}-{i}-{j}", is_piracy=j == 0)
+                scheduler.finish_run(run)
+            scheduler.store.close()
+
+        threads = [threading.Thread(target=patrol, args=(task,)) for task in range(tasks)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = KeywordStatsStore(path).load()
+        a, b = stats[(PLATFORM, "A")], stats[(PLATFORM, "B")]
+        assert a.runs + b.runs == tasks * rounds
+        assert a.checked + b.checked == tasks * rounds * 3
+        assert a.hits + b.hits == tasks * rounds
+        assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")] == []
+        print(f"   {tasks} 个任务共 {a.runs + b.runs} 次关键词巡查全部计入,没有遗留临时文件")
+        print("   ✅ 多任务写入不丢失")
+
+
+def _listings(rate: float, size: int, prefix: str, seed: int):
+    rng = random.Random(seed)
+    return [(f"{prefix}{i}", rng.random() < rate) for i in range(size)]
+
+
+def _simulate(scheduler_factory, runs: int, budget: int, adaptive: bool) -> int:
+    """模拟多次巡查,返回检出的盗版总数"""
+    catalog = {
+        "高收益": _listings(0.5, 60, "高", 1),
+        "低收益": _listings(0.05, 60, "低", 2),
+    }
+    # 重复关键词: 前 4 个新商品之后全是"高收益"下的商品
+    catalog["重复"] = _listings(0.05, 4, "重", 3) + catalog["高收益"]
+
+    total_hits = 0
+    for _ in range(runs):
+        scheduler = scheduler_factory()
+        pending = list(catalog)
+        remaining = budget
+        while pending and remaining > 0:
+            if adaptive:
+                keyword, allotted = scheduler.allocate(remaining, pending)[0]
+            else:
+                keyword, allotted = pending[0], budget // len(catalog)
+            pending.remove(keyword)
+            run = scheduler.start_run(keyword, allotted)
+            for fingerprint, is_piracy in catalog[keyword][:allotted]:
+                if run.observe(fingerprint, is_piracy) and adaptive:
+                    break
+            scheduler.finish_run(run)
+            remaining -= run.checked if run.saturated and adaptive else allotted
+        total_hits += sum(run.hits for run in scheduler.runs)
+    return total_hits
+
+
+def test_bandit_beats_uniform():
+    """按收益分配 vs 平均分配"""
+    print("\n" + "=" * 60)
+    print("测试 5: 多次巡查模拟")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = KeywordStatsStore(os.path.join(tmpdir, "keyword_stats.json"))
+        rng = random.Random(7)
+        adaptive_hits = _simulate(
+            lambda: KeywordScheduler(PLATFORM, ["高收益", "低收益", "重复"], store=store, rng=rng),
+            runs=10, budget=30, adaptive=True
+        )
+    uniform_hits = _simulate(
+        lambda: KeywordScheduler(PLATFORM, ["高收益", "低收益", "重复"]),
+        runs=10, budget=30, adaptive=False
+    )
+    print(f"   10 次巡查 x 30 个商品: 按收益分配检出 {adaptive_hits} 个, 平均分配检出 {uniform_hits} 个")
+    assert adaptive_hits > uniform_hits * 1.3
+    print("   ✅ 按收益分配检出更多盗版")
+
+
+if __name__ == "__main__":
+    test_allocate()
+    test_saturation()
+    test_persistence()
+    test_concurrent_tasks()
+    test_bandit_beats_uniform()
+    print("\n✅ 多关键词巡查调度测试通过")
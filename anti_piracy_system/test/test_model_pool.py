@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+模型服务连接池测试
+
+使用本地模型服务替身(model_stub_server.py)验证 ModelClientPool:
+1. 顺序请求复用同一个 keep-alive 连接
+2. 全局并发上限生效,超出的请求排队并计入排队统计
+3. 502 按退避重试,重试耗尽或不可重试的错误抛出 ModelServiceError
+4. 复用的连接已被服务端关闭时换新连接重发,等待响应超时时按重试策略处理(不静默重发)
+5. PhoneAgent 的模型客户端替换为兼容外观,流式/非流式调用都能取到脚本响应
+6. 同一服务地址共用一个共享连接池
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_model_pool.py
+"""
+
+import sys
+import os
+import http.client
+import json
+import threading
+import urllib.parse
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.model_pool import (
+    ModelClientPool, ModelServiceError, attach_pool, close_shared_pools, get_shared_pool
+)
+from anti_piracy_system.model_stub_server import StubModelServer
+
+MESSAGES = [{"role": "user", "content": "提取商品信息"}]
+
+
+def test_keep_alive():
+    """顺序请求复用连接"""
+    print("\n" + "=" * 60)
+    print("测试 1: keep-alive 连接复用")
+    print("=" * 60)
+
+    with StubModelServer(responses=["响应A", "响应B"]) as stub:
+        pool = ModelClientPool(stub.base_url)
+        contents = [
+            pool.chat_completion(MESSAGES, model="stub")["choices"][0]["message"]["content"]
+            for _ in range(10)
+        ]
+        assert contents[:3] == ["响应A", "响应B", "响应A"]
+        stats = pool.get_stats()
+        assert stub.stats["connections"] == 1
+        assert stats["connections_created"] == 1 and stats["connections_reused"] == 9
+        assert stats["succeeded"] == 10 and stats["idle_connections"] == 1
+        pool.close()
+        print(f"   10 个请求, TCP 连接 {stub.stats['connections']} 个")
+        print("   ✅ 连接复用正确")
+
+
+def test_concurrency_limit():
+    """全局并发上限"""
+    print("\n" + "=" * 60)
+    print("测试 2: 全局并发上限")
+    print("=" * 60)
+
+    with StubModelServer(latency=0.05) as stub:
+        pool = ModelClientPool(stub.base_url, max_concurrency=2, max_connections=2)
+        threads = [
+            threading.Thread(target=lambda: pool.chat_completion(MESSAGES, model="stub"))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = pool.get_stats()
+        assert stub.stats["max_concurrent"] <= 2
+        assert stub.stats["connections"] <= 2
+        assert stats["succeeded"] == 8 and stats["in_flight"] == 0 and stats["waiting"] == 0
+        assert stats["max_waiting"] >= 1 and stats["avg_wait_seconds"] > 0
+        pool.close()
+        print(f"   服务端最大并发 {stub.stats['max_concurrent']}, 最多排队 {stats['max_waiting']:.0f} 个, "
+              f"平均排队 {stats['avg_wait_seconds'] * 1000:.0f} ms")
+        print("   ✅ 并发上限与排队统计正确")
+
+
+def test_retry():
+    """502 重试"""
+    print("\n" + "=" * 60)
+    print("测试 3: 502 重试")
+    print("=" * 60)
+
+    with StubModelServer(fail_first=2) as stub:
+        pool = ModelClientPool(stub.base_url, max_retries=3, backoff_base=0.01)
+        pool.chat_completion(MESSAGES, model="stub")
+        assert stub.stats["requests"] == 3 and pool.get_stats()["retries"] == 2
+        pool.close()
+
+    with StubModelServer(fail_first=5) as stub:
+        pool = ModelClientPool(stub.base_url, max_retries=1, backoff_base=0.01)
+        try:
+            pool.chat_completion(MESSAGES, model="stub")
+            raise AssertionError("应抛出 ModelServiceError")
+        except ModelServiceError as e:
+            assert e.status == 502 and "502 Bad Gateway" in str(e)
+        assert stub.stats["requests"] == 2
+
+        # 404 不重试
+        try:
+            pool.post_json("/unknown", {})
+            raise AssertionError("应抛出 ModelServiceError")
+        except ModelServiceError as e:
+            assert e.status == 404
+        stats = pool.get_stats()
+        assert stats["failed"] == 2 and stats["retries"] == 1
+        pool.close()
+
+    # 服务不可达
+    pool = ModelClientPool("http://127.0.0.1:9/v1", max_retries=1, backoff_base=0.01, timeout=2)
+    try:
+        pool.chat_completion(MESSAGES, model="stub")
+        raise AssertionError("应抛出 ModelServiceError")
+    except ModelServiceError as e:
+        assert e.status is None
+    print("   ✅ 重试与错误处理正确")
+
+
+def test_stale_connection():
+    """复用连接失效时只在收到响应前重发"""
+    print("\n" + "=" * 60)
+    print("测试 4: 失效连接重发与超时")
+    print("=" * 60)
+
+    class StaleConnection(http.client.HTTPConnection):
+        """第二次请求时模拟服务端已关闭 keep-alive 连接(未发送请求、没有任何响应)"""
+
+        def request(self, *args, **kwargs):
+            self.used = getattr(self, "used", 0) + 1
+            if self.used == 2:
+                return
+            super().request(*args, **kwargs)
+
+        def getresponse(self):
+            if self.used == 2:
+                raise http.client.RemoteDisconnected("Remote end closed connection without response")
+            return super().getresponse()
+
+    with StubModelServer() as stub:
+        pool = ModelClientPool(stub.base_url, max_retries=0)
+        pool._connection_class = StaleConnection
+        for _ in range(2):
+            pool.chat_completion(MESSAGES, model="stub")
+        stats = pool.get_stats()
+        assert stub.stats["requests"] == 2 and stats["retries"] == 0 and stats["succeeded"] == 2
+        assert stats["connections_created"] == 2
+        pool.close()
+
+    # 服务端已收到请求后等待响应超时: 不在复用连接失败的名义下重发,按重试策略计数
+    with StubModelServer() as stub:
+        pool = ModelClientPool(stub.base_url, max_retries=1, backoff_base=0.01, timeout=0.3)
+        pool.chat_completion(MESSAGES, model="stub")
+        stub.latency = 1.0
+        try:
+            pool.chat_completion(MESSAGES, model="stub")
+            raise AssertionError("应抛出 ModelServiceError")
+        except ModelServiceError as e:
+            assert e.status is None
+        stats = pool.get_stats()
+        assert stub.stats["requests"] == 3 and stats["retries"] == 1 and stats["failed"] == 1
+        pool.close()
+    print("   ✅ 失效连接静默重发,超时按重试策略处理")
+
+
+def test_phone_agent_facade():
+    """PhoneAgent 模型客户端替换"""
+    print("\n" + "=" * 60)
+    print("测试 5: PhoneAgent 接入")
+    print("=" * 60)
+
+    script = [{"match": "店铺", "content": 'finish(message="某个人卖家")'}, "do(action=\"Back\")"]
+    with StubModelServer(responses=script) as stub:
+        pool = ModelClientPool(stub.base_url)
+        agent = SimpleNamespace(model_client=SimpleNamespace(client=object()))
+        assert attach_pool(agent, pool)
+        assert not attach_pool(SimpleNamespace(), pool)
+
+        client = agent.model_client.client
+        stream = client.chat.completions.create(
+            model="stub", messages=[{"role": "user", "content": [{"type": "text", "text": "提取店铺名称"}]}],
+            stream=True, max_tokens=100, extra_body={"skip_special_tokens": False}
+        )
+        chunks = [chunk.choices[0].delta.content for chunk in stream if chunk.choices]
+        assert chunks == ['finish(message="某个人卖家")']
+
+        response = client.chat.completions.create(model="stub", messages=MESSAGES)
+        assert response.choices[0].message.content == 'do(action="Back")'
+
+        # 替身服务本身也支持 SSE 流式响应(PhoneAgent 不接入连接池时使用)
+        connection = http.client.HTTPConnection("127.0.0.1", urllib.parse.urlsplit(stub.base_url).port)
+        connection.request("POST", "/v1/chat/completions", json.dumps({"messages": MESSAGES, "stream": True}),
+                           {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        body = response.read().decode("utf-8")
+        connection.close()
+        assert response.getheader("Content-Type") == "text/event-stream"
+        assert body.endswith("data: [DONE]\n\n")
+        assert json.loads(body.split("\n")[0][len("data: "):])["choices"][0]["delta"]["content"]
+        pool.close()
+        print("   ✅ 流式与非流式调用正确")
+
+
+def test_shared_pool():
+    """共享连接池"""
+    print("\n" + "=" * 60)
+    print("测试 6: 共享连接池")
+    print("=" * 60)
+
+    first = get_shared_pool("http://127.0.0.1:8000/v1/", max_concurrency=3)
+    assert get_shared_pool("http://127.0.0.1:8000/v1") is first
+    assert first.max_concurrency == 3
+    assert get_shared_pool("http://127.0.0.1:8000/v1", api_key="other") is not first
+    close_shared_pools()
+    assert get_shared_pool("http://127.0.0.1:8000/v1") is not first
+    close_shared_pools()
+    print("   ✅ 同一服务地址共用连接池")
+
+
+if __name__ == "__main__":
+    test_keep_alive()
+    test_concurrency_limit()
+    test_retry()
+    test_stale_connection()
+    test_phone_agent_facade()
+    test_shared_pool()
+    print("\n✅ 模型服务连接池测试通过")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+巡查断点测试
+
+验证 patrol_checkpoint:
+1. 断点写入后可完整读回,写入过程不留临时文件;文件损坏、版本不符或属于其他巡查时不续查;
+   每个平台+关键词使用独立的断点文件
+2. 商品指纹忽略大小写、空白和标点,已处理商品不重复记录
+3. 模拟第 3 个商品处崩溃后续查: 从下一个商品继续,不重复处理已完成的商品,结果文件截断到断点记录的条数
+4. 检测结果经 to_dict/from_dict 恢复后字段一致
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_patrol_checkpoint.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.patrol_checkpoint import CheckpointStore, PatrolCheckpoint, checkpoint_path, item_fingerprint
+from anti_piracy_system.piracy_detector import DetectionResult
+from anti_piracy_system.result_sink import ResultSink, iter_results
+from anti_piracy_system.product_database import GenuineProduct
+
+
+def test_save_and_load():
+    """断点读写"""
+    print("\n" + "=" * 60)
+    print("测试 1: 断点读写")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = CheckpointStore(os.path.join(tmpdir, "data", "checkpoint.json"))
+        assert store.load() is None
+
+        checkpoint = PatrolCheckpoint(keyword="众合法考", platform="小红书", max_items=200)
+        checkpoint.next_index = 5
+        checkpoint.scroll_count = 1
+        checkpoint.page_position = 1
+        checkpoint.results_path = "evidence/results.jsonl"
+        checkpoint.mark_processed("abc", result_count=1,
+                                  evidence=["evidence/1_商品介绍.png", "evidence/2_店铺信息.png", None])
+        checkpoint.counters = {"checked_count": 5}
+        store.save(checkpoint)
+        assert not os.path.exists(store.path + ".tmp")
+
+        loaded = store.load()
+        assert loaded.matches("众合法考", "小红书") and not loaded.matches("得到", "小红书")
+        assert (loaded.next_index, loaded.scroll_count, loaded.page_position) == (5, 1, 1)
+        assert loaded.processed == {"abc"} and loaded.counters == {"checked_count": 5}
+        assert loaded.evidence == ["evidence/1_商品介绍.png", "evidence/2_店铺信息.png"]
+        assert (loaded.results_path, loaded.result_count) == ("evidence/results.jsonl", 1)
+        assert loaded.updated_at is not None
+
+        # 已处理指纹在内存中为集合,文件中为有序列表
+        loaded.mark_processed("abc")
+        loaded.mark_processed("0ab")
+        assert loaded.to_dict()["processed"] == ["0ab", "abc"]
+
+        # 属于其他关键词或平台的断点不续查
+        assert store.load(keyword="众合法考", platform="小红书") is not None
+        assert store.load(keyword="得到", platform="小红书") is None
+        assert store.load(keyword="众合法考", platform="闲鱼") is None
+
+        # 版本不符或文件损坏时忽略
+        data = loaded.to_dict()
+        data["version"] = 0
+        with open(store.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert store.load() is None
+        with open(store.path, "w", encoding="utf-8") as f:
+            f.write('{"keyword": "众合')
+        assert store.load() is None
+
+        store.clear()
+        assert not store.exists()
+        store.clear()  # 重复删除不报错
+
+        # 每个平台+关键词的断点文件互不相同
+        base = os.path.join(tmpdir, "data", "patrol_checkpoint.json")
+        paths = {
+            checkpoint_path(base, platform, keyword)
+            for platform in ("xiaohongshu", "xianyu")
+            for keyword in ("众合法考", "众合 法考", "众合/法考", "得到")
+        }
+        assert len(paths) == 8
+        assert checkpoint_path(base, "xiaohongshu", "众合法考") == checkpoint_path(base, "xiaohongshu", "众合法考")
+        assert all(os.path.dirname(path) == os.path.dirname(base) for path in paths)
+        print("   ✅ 断点读写正确")
+
+
+def test_fingerprint():
+    """商品指纹"""
+    print("\n" + "=" * 60)
+    print("测试 2: 商品指纹")
+    print("=" * 60)
+
+    a = item_fingerprint("小红书", "某个人 卖家", "众合法考2025 全套")
+    assert a == item_fingerprint("小红书", "某个人卖家!", "众合法考2025全套")
+    assert a != item_fingerprint("闲鱼", "某个人卖家", "众合法考2025全套")
+    assert a != item_fingerprint("小红书", "另一个卖家", "众合法考2025全套")
+    assert item_fingerprint("小红书", None, None) == item_fingerprint("小红书", "", "")
+
+    checkpoint = PatrolCheckpoint(keyword="众合法考", platform="小红书", max_items=10)
+    checkpoint.mark_processed(a, result_count=1)
+    checkpoint.mark_processed(a)
+    assert checkpoint.processed == {a} and checkpoint.is_processed(a)
+    assert checkpoint.result_count == 1
+    print("   ✅ 指纹规范化与去重正确")
+
+
+def _patrol(store, listing, results_path, crash_at=None, resume=False):
+    """
+    模拟巡查: 按断点跳过已完成的商品,结果写入结果文件,每处理完一个写入断点
+
+    Args:
+        crash_at: 在该商品处崩溃(结果已写入结果文件,但断点未更新)
+
+    Returns:
+        本次实际处理的商品
+    """
+    checkpoint = store.load() if resume else None
+    if checkpoint is None:
+        checkpoint = PatrolCheckpoint(keyword="众合法考", platform="小红书", max_items=len(listing))
+        checkpoint.results_path = results_path
+        sink = ResultSink(results_path)
+    else:
+        sink = ResultSink(checkpoint.results_path, keep=checkpoint.result_count)
+    handled = []
+    with sink:
+        for i in range(checkpoint.next_index, len(listing)):
+            shop, title = listing[i]
+            fingerprint = item_fingerprint("小红书", shop, title)
+            if not checkpoint.is_processed(fingerprint):
+                handled.append(shop)
+                sink.append({"fingerprint": fingerprint, "shop_name": shop})
+                if i == crash_at:
+                    raise RuntimeError("模型服务断开")
+                checkpoint.mark_processed(fingerprint, result_count=sink.count,
+                                          evidence=[f"{shop}/1_商品介绍.png"])
+            if (i + 1) % 2 == 0:
+                checkpoint.scroll_count += 1
+            checkpoint.next_index = i + 1
+            store.save(checkpoint)
+    store.clear()
+    return handled, checkpoint
+
+
+def test_crash_and_resume():
+    """崩溃后续查"""
+    print("\n" + "=" * 60)
+    print("测试 3: 崩溃后续查")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = CheckpointStore(os.path.join(tmpdir, "checkpoint.json"))
+        results_path = os.path.join(tmpdir, "results.jsonl")
+        listing = [(f"卖家{i}", f"众合法考{i}") for i in range(6)]
+
+        try:
+            _patrol(store, listing, results_path, crash_at=3)
+        except RuntimeError:
+            pass
+        saved = store.load()
+        assert saved.next_index == 3 and saved.scroll_count == 1
+        assert saved.result_count == 3 and len(saved.evidence) == 3
+        # 崩溃的商品已写入结果文件但未记入断点
+        assert len(list(iter_results(results_path))) == 4
+
+        # 续查时列表刷新,已处理的卖家1出现在第 4 个位置
+        listing[3] = ("卖家1", "众合法考1")
+        handled, checkpoint = _patrol(store, listing, results_path, resume=True)
+        assert handled == ["卖家4", "卖家5"]
+        assert [r["shop_name"] for r in iter_results(results_path)] == [f"卖家{i}" for i in (0, 1, 2, 4, 5)]
+        assert checkpoint.result_count == 5 and checkpoint.scroll_count == 3
+        assert not store.exists()
+        print("   ✅ 从第 4 个商品继续,未重复处理")
+
+
+def test_detection_result_round_trip():
+    """检测结果恢复"""
+    print("\n" + "=" * 60)
+    print("测试 4: 检测结果恢复")
+    print("=" * 60)
+
+    product = GenuineProduct(
+        product_id="p001", product_name="众合法考客观题", shop_name="方圆众合教育",
+        official_shops=["方圆众合教育"], original_price=898.0, platform="小红书", category="课程"
+    )
+    result = DetectionResult(
+        is_piracy=True, confidence=0.85, reasons=["非官方店铺", "价格过低"],
+        matched_product=product, shop_check=False, price_check=True, price_ratio=0.1,
+        rules_run=["shop", "price"]
+    )
+    data = json.loads(json.dumps(result.to_dict(), ensure_ascii=False))
+    restored = DetectionResult.from_dict(data, matched_product=product)
+    assert restored.to_dict() == result.to_dict()
+    assert restored.matched_product is product
+    assert DetectionResult.from_dict(data).matched_product is None
+    print("   ✅ 检测结果恢复一致")
+
+
+if __name__ == "__main__":
+    test_save_and_load()
+    test_fingerprint()
+    test_crash_and_resume()
+    test_detection_result_round_trip()
+    print("\n✅ 巡查断点测试通过")
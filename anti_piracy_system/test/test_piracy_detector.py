@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+盗版检测引擎测试
+
+验证 PiracyDetector 的规则流水线、性能追踪信息、商品库热加载后使用新数据,
+以及报告分组使用的近似重复聚类(簇数有上限时按最近命中淘汰)。
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_piracy_detector.py
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.product_database import ProductDatabase
+from anti_piracy_system.piracy_detector import PiracyDetector, ProductInfo
+from anti_piracy_system.listing_cluster import ListingClusterer
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "genuine_products.json")
+
+
+def _detector(**kwargs) -> PiracyDetector:
+    return PiracyDetector(ProductDatabase(DB_PATH), price_threshold=0.7, **kwargs)
+
+
+def test_profile_trace():
+    """开启 profile 时记录各阶段耗时、匹配方法和候选数"""
+    print("\n" + "=" * 60)
+    print("测试: 检测性能追踪")
+    print("=" * 60)
+
+    detector = _detector(profile=True)
+    cases = [
+        # (标题, 店铺, 价格, 预期匹配方法)
+        ("2026众合法考客观题学习包", "方圆众合教育", 898.0, 1),
+        ("众合 法考 资料", "某个人卖家", 99.0, 2),
+        ("众合法考客观题学习包 超值", "某个人卖家", 99.0, 3),
+        ("Python 编程教程", "某教育机构", 99.0, None),
+    ]
+
+    for title, shop, price, expected_method in cases:
+        result = detector.detect(ProductInfo(title=title, shop_name=shop, price=price))
+        data = result.to_dict()
+        print(f"   {title}: 方法={result.match_method}, 候选={result.match_candidates}, "
+              f"总耗时={result.timings['total']:.3f}ms")
+
+        assert result.match_method == expected_method
+        assert "total" in result.timings and "match" in result.timings
+        assert data["timings"] is result.timings
+        if expected_method is not None:
+            assert {f"{rule}_check" for rule in result.rules_run} <= set(result.timings)
+            assert f"method_{expected_method}" in result.match_candidates
+
+    print("   ✅ 追踪信息正确")
+
+
+def test_rule_pipeline_short_circuit():
+    """规则按成本执行,结果确定后跳过剩余规则"""
+    print("\n" + "=" * 60)
+    print("测试: 规则流水线短路")
+    print("=" * 60)
+
+    detector = _detector()
+    cases = [
+        # (标题, 店铺, 价格, 预期盗版, 预期执行的规则)
+        ("2026众合法考客观题学习包", "方圆众合教育", 99.0, False, ["shop"]),
+        ("众合法考客观题学习包 超值", "某个人卖家", 99.0, True, ["shop", "price"]),
+        ("众合法考客观题学习包 超值", "某个人卖家", 898.0, False, ["shop", "price"]),
+    ]
+    for title, shop, price, expected_piracy, expected_rules in cases:
+        result = detector.detect(ProductInfo(title=title, shop_name=shop, price=price))
+        print(f"   {shop} ¥{price}: 盗版={result.is_piracy}, 置信度={result.confidence:.0%}, 规则={result.rules_run}")
+        assert result.is_piracy == expected_piracy
+        assert result.rules_run == expected_rules
+        assert result.to_dict()["rules_run"] == expected_rules
+
+    # 官方店铺仍判定为正版,置信度来自配置
+    official = detector.detect(ProductInfo(title="2026众合法考客观题学习包", shop_name="方圆众合教育", price=898.0))
+    assert official.shop_check and official.confidence == 0.9
+    print("   ✅ 短路执行正确")
+
+
+def test_skipped_rules_reasons():
+    """跳过的规则在检查字段和判定依据中明确标记"""
+    detector = _detector()
+    official = detector.detect(ProductInfo(title="2026众合法考客观题学习包", shop_name="方圆众合教育", price=99.0))
+    assert official.reasons == [
+        "✅ 店铺名称匹配官方店铺: '方圆众合教育'",
+        "⏭️ 未执行价格检查: 判定结果已确定",
+        "⏭️ 未执行内容检查: 判定结果已确定",
+    ]
+    assert (official.shop_check, official.price_check, official.content_check) == (True, None, None)
+    assert official.rules_skipped == ["price", "content"]
+
+    piracy = detector.detect(ProductInfo(title="众合法考客观题学习包 超值", shop_name="某个人卖家", price=99.0))
+    assert piracy.reasons == [
+        "❌ 店铺名称'某个人卖家'不在官方授权列表中(官方店铺: 方圆众合教育, 众合法考官方旗舰店, 众合教育官方店)",
+        "❌ 价格异常: ¥99.0 仅为原价¥898.0的11%,低于70%阈值",
+        "⏭️ 未执行内容检查: 判定结果已确定",
+    ]
+    # 置信度只累加已执行规则的权重
+    assert abs(piracy.confidence - 0.8) < 1e-9
+    assert (piracy.shop_check, piracy.price_check, piracy.content_check) == (False, False, None)
+    data = piracy.to_dict()
+    assert data["content_check"] is None and data["rules_skipped"] == ["content"]
+
+    # 全部规则执行时没有跳过标记
+    detector = _detector(rules=[{"name": "shop", "weight": 0.5, "cost": 1}], confidence_threshold=0.7)
+    result = detector.detect(ProductInfo(title="众合法考客观题学习包 超值", shop_name="某个人卖家", price=99.0))
+    assert result.rules_skipped == [] and not any(r.startswith("⏭️") for r in result.reasons)
+
+
+def test_rule_config():
+    """规则权重和成本来自配置"""
+    # 内容规则排在最前且权重足以单独达到阈值,但店铺规则仍可能判定为正版,因此继续执行
+    detector = _detector(
+        rules=[
+            {"name": "shop", "weight": 0.1, "cost": 5},
+            {"name": "content", "weight": 0.8, "cost": 1},
+        ],
+        confidence_threshold=0.7
+    )
+    assert [rule.name for rule in detector.rules] == ["content", "shop"]
+
+    result = detector.detect(ProductInfo(title="2026众合法考客观题学习包 书课包 技术流", shop_name="某个人卖家", price=898.0))
+    assert result.rules_run == ["content", "shop"]
+    assert result.is_piracy and abs(result.confidence - 0.9) < 1e-9
+
+    # 内容不相似时剩余权重无法达到阈值,跳过店铺规则
+    result = detector.detect(ProductInfo(title="2026众合法考客观题学习包", shop_name="某个人卖家", price=898.0))
+    assert result.rules_run == ["content"] and not result.is_piracy
+
+    try:
+        _detector(rules=[{"name": "unknown", "weight": 1.0, "cost": 1}])
+        assert False, "未知规则应抛出 ValueError"
+    except ValueError:
+        pass
+
+
+def test_profile_disabled():
+    """未开启 profile 时结果不包含追踪字段"""
+    result = _detector().detect(ProductInfo(title="众合法考客观题学习包 超值", shop_name="某个人卖家", price=99.0))
+    assert result.is_piracy
+    assert result.timings is None and result.match_method is None
+    assert "timings" not in result.to_dict()
+
+
+def test_listing_clusterer():
+    """近似重复标题归入同一簇,不相关标题单独成簇"""
+    print("\n" + "=" * 60)
+    print("测试: 近似重复聚类")
+    print("=" * 60)
+
+    clusterer = ListingClusterer(threshold=0.7)
+    titles = [
+        "2026众合法考客观题学习包 书课包 技术流 全套资料",
+        "2026众合法考客观题学习包 书课包 技术流 全套资料!!",
+        "2026 众合法考 客观题学习包 书课包 技术流 全套资料",
+        "Python 编程从入门到实践 电子版",
+    ]
+    assigned = [clusterer.assign(title) for title in titles]
+    for title, (cluster_id, is_new) in zip(titles, assigned):
+        print(f"   {cluster_id} {'(新)' if is_new else '    '} {title}")
+
+    assert assigned[0] == ("cluster_1", True)
+    assert assigned[1] == ("cluster_1", False)
+    assert assigned[2] == ("cluster_1", False)
+    assert assigned[3] == ("cluster_2", True)
+    assert clusterer.cluster_sizes == {"cluster_1": 3, "cluster_2": 1}
+    print("   ✅ 聚类结果正确")
+
+
+def test_clusterer_bounded():
+    """设置 max_clusters 时按最近命中淘汰簇"""
+    clusterer = ListingClusterer(threshold=0.7, max_clusters=2)
+    titles = ["众合法考客观题学习包 超值 全套", "Python 编程从入门到实践 电子版", "考研英语真题解析 电子版 全套"]
+    for title in titles:
+        clusterer.assign(title)
+    assert set(clusterer.cluster_sizes) == {"cluster_2", "cluster_3"}
+    assert "cluster_1" not in clusterer.index.query(clusterer.hasher.signature(titles[0]))
+
+    # 被淘汰的商品再次出现时新建簇
+    assert clusterer.assign(titles[0]) == ("cluster_4", True)
+    assert set(clusterer.cluster_sizes) == {"cluster_3", "cluster_4"}
+
+    clusterer.reset()
+    assert clusterer.assign(titles[1]) == ("cluster_1", True)
+
+
+def test_cache_invalidated_on_reload():
+    """商品库文件被编辑后,检测使用修改后的商品信息"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "genuine_products.json")
+        shutil.copy(DB_PATH, json_path)
+        db = ProductDatabase(json_path, refresh_interval=0)
+        detector = PiracyDetector(db, price_threshold=0.7)
+
+        rep = detector.detect(ProductInfo(title="众合法考客观题学习包 超值 全套", shop_name="某个人卖家", price=99.0))
+        assert rep.matched_product.original_price == 898.0
+
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["zhonghe_001"]["original_price"] = 100.0
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        st = os.stat(json_path)
+        os.utime(json_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        version = db.version
+        dup = detector.detect(ProductInfo(title="众合法考客观题学习包 超值 全套!", shop_name="某个人卖家", price=99.0))
+        assert db.version == version + 1
+        assert dup.matched_product.original_price == 100.0
+        assert not dup.is_piracy
+        db.close()
+
+
+if __name__ == "__main__":
+    test_profile_trace()
+    test_rule_pipeline_short_circuit()
+    test_skipped_rules_reasons()
+    test_rule_config()
+    test_profile_disabled()
+    test_listing_clusterer()
+    test_clusterer_bounded()
+    test_cache_invalidated_on_reload()
+    print("\n✅ 盗版检测引擎测试通过")
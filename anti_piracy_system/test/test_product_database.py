@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+正版商品数据库测试
+
+验证 SQLite 商品数据库:
+1. 首次打开时从同名 JSON 文件自动迁移
+2. 搜索、店铺校验、统计结果与 JSON 实现一致
+3. 增删改只影响对应商品,重新打开后数据保留
+4. CSV/JSONL 批量导入分批写入、只保存一次
+5. write_behind 策略下连续修改合并为一次保存/提交
+6. 多个实例(进程)共享同一 JSON 文件: 保存时合并其他实例的修改,查询时读取其他实例的修改
+7. 文件被手工编辑后热加载差异,pinned() 期间的查询不受影响
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_product_database.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.product_database import ProductDatabase, GenuineProduct, create_product_database
+from anti_piracy_system.sqlite_product_database import SqliteProductDatabase
+from anti_piracy_system.product_import import import_file, iter_records
+
+PRODUCTS = [
+    GenuineProduct(
+        product_id="zhonghe_001",
+        product_name="2026众合法考客观题学习包（书课包，不过全退，技术流）",
+        shop_name="方圆众合教育",
+        official_shops=["方圆众合教育", "众合法考官方旗舰店"],
+        original_price=898.0,
+        platform="众合法考",
+        category="法考课程",
+        keywords=["众合", "法考", "众合法考", "客观题", "学习包"],
+        created_at="2025-01-01T00:00:00",
+        updated_at="2025-01-01T00:00:00"
+    ),
+    GenuineProduct(
+        product_id="dedao_001",
+        product_name="《薛兆丰的经济学课》电子书",
+        shop_name="得到官方旗舰店",
+        official_shops=["得到App官方店"],
+        original_price=199.0,
+        platform="得到",
+        category="电子书",
+        keywords=["薛兆丰", "经济学", "得到", "电子书"],
+        created_at="2025-01-01T00:00:00",
+        updated_at="2025-01-01T00:00:00"
+    ),
+    GenuineProduct(
+        product_id="python_001",
+        product_name="Python Crash Course 中文版",
+        shop_name="图灵教育",
+        official_shops=[],
+        original_price=89.0,
+        platform="图灵",
+        category="电子书",
+        created_at="2025-01-01T00:00:00",
+        updated_at="2025-01-01T00:00:00"
+    ),
+]
+
+
+def _open_both(tmpdir):
+    """写入 JSON 数据库,并打开从中迁移得到的 SQLite 数据库"""
+    json_path = os.path.join(tmpdir, "products.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({p.product_id: p.to_dict() for p in PRODUCTS}, f, ensure_ascii=False)
+    return ProductDatabase(json_path), create_product_database(os.path.join(tmpdir, "products.db"))
+
+
+def _ids(products):
+    return [p.product_id for p in products]
+
+
+def test_migration_and_parity():
+    """自动迁移后查询结果与 JSON 实现一致"""
+    print("\n" + "=" * 60)
+    print("测试 1: JSON 迁移与查询一致性")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_db, sqlite_db = _open_both(tmpdir)
+        assert isinstance(sqlite_db, SqliteProductDatabase)
+        assert [p.to_dict() for p in sqlite_db.get_all_products()] == [p.to_dict() for p in PRODUCTS]
+
+        for name in ["众合法考", "经济学", "python", "PYTHON CRASH", "课", "", "不存在的商品"]:
+            assert _ids(sqlite_db.search_by_name(name)) == _ids(json_db.search_by_name(name)), name
+
+        for keywords in [["法考"], ["经济"], ["得", "众合"], ["客观题 学习"], ["不存在"], []]:
+            assert _ids(sqlite_db.search_by_keywords(keywords)) == _ids(json_db.search_by_keywords(keywords)), keywords
+
+        for text in ["众合法考客观题学习包 超值", "薛兆丰 经济学 电子书", "Python", ""]:
+            expected = [(p.product_id, n) for p, n in json_db.find_by_keyword_text(text)]
+            assert [(p.product_id, n) for p, n in sqlite_db.find_by_keyword_text(text)] == expected, text
+
+        for shop, product_id in [("方圆众合教育", None), ("得到App官方店", "dedao_001"),
+                                 ("得到App官方店", "zhonghe_001"), ("某个人卖家", None)]:
+            assert sqlite_db.is_official_shop(shop, product_id) == json_db.is_official_shop(shop, product_id)
+
+        assert sqlite_db.get_stats() == json_db.get_stats()
+        sqlite_db.close()
+        print("   ✅ 迁移完整,查询结果一致")
+
+
+def test_incremental_writes():
+    """增删改写入后重新打开,数据保留且不会重复迁移"""
+    print("\n" + "=" * 60)
+    print("测试 2: 增量写入")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _, db = _open_both(tmpdir)
+        updated = GenuineProduct.from_dict({**PRODUCTS[1].to_dict(), "keywords": ["薛兆丰", "经济学课"]})
+        db.add_product(updated)
+        db.delete_product("python_001")
+        assert not db.delete_product("python_001")
+        db.close()
+
+        db = SqliteProductDatabase(os.path.join(tmpdir, "products.db"))
+        assert _ids(db.get_all_products()) == ["zhonghe_001", "dedao_001"]
+        assert db.get_product("dedao_001").keywords == ("薛兆丰", "经济学课")
+        assert db.get_product("dedao_001").updated_at != PRODUCTS[1].updated_at
+        assert db.search_by_keywords(["电子书"]) == []
+        assert [(p.product_id, n) for p, n in db.find_by_keyword_text("经济学课 薛兆丰")] == [("dedao_001", 2)]
+        assert db.get_product("python_001") is None
+        db.close()
+        print("   ✅ 增量写入正确")
+
+
+CSV_CATALOGUE = """product_id,product_name,shop_name,official_shops,original_price,platform,category,description,keywords
+zhonghe_001,2026众合法考客观题学习包,方圆众合教育,方圆众合教育|众合法考官方旗舰店,898,众合法考,法考课程,,众合|法考|客观题
+dedao_001,《薛兆丰的经济学课》电子书,得到官方旗舰店,,199,得到,电子书,经济学入门,薛兆丰、经济学
+bad_001,缺少价格的商品,某店铺,,,得到,电子书,,
+dedao_001,《薛兆丰的经济学课》电子书,得到官方旗舰店,,99,得到,电子书,,薛兆丰
+"""
+
+
+def test_bulk_import():
+    """批量导入: 校验、去重更新、单次保存,两种数据库结果一致"""
+    print("\n" + "=" * 60)
+    print("测试 3: 批量导入")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        csv_path = os.path.join(tmpdir, "catalogue.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_CATALOGUE)
+
+        json_path = os.path.join(tmpdir, "imported.json")
+        saves = []
+        db = ProductDatabase(json_path)
+        original_save = db.save
+        db.save = lambda: (saves.append(1), original_save())
+        with open(csv_path, encoding="utf-8") as f:
+            stats = db.import_products(iter_records(f, "csv"), batch_size=2, progress_every=2)
+        assert len(saves) == 1
+        assert (stats["total"], stats["added"], stats["updated"], stats["invalid"]) == (4, 2, 1, 1)
+        assert "original_price" in stats["errors"][0]
+
+        product = ProductDatabase(json_path).get_product("dedao_001")
+        assert product.original_price == 99.0 and product.keywords == ("薛兆丰",)
+        assert product.official_shops == ("得到官方旗舰店",)
+
+        db_path = os.path.join(tmpdir, "catalogue.db")
+        stats = import_file(csv_path, db_path=db_path, batch_size=2)
+        assert (stats["added"], stats["updated"], stats["invalid"]) == (2, 1, 1)
+
+        sqlite_db = SqliteProductDatabase(db_path)
+        json_db = ProductDatabase(json_path)
+        assert _ids(sqlite_db.search_by_name("经济学")) == _ids(json_db.search_by_name("经济学")) == ["dedao_001"]
+        assert _ids(sqlite_db.search_by_keywords(["客观题"])) == ["zhonghe_001"]
+        assert sqlite_db.get_product("zhonghe_001").keywords == ("众合", "法考", "客观题")
+        sqlite_db.close()
+
+        jsonl_path = os.path.join(tmpdir, "catalogue.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(PRODUCTS[2].to_dict(), ensure_ascii=False) + "\n")
+            f.write("not json\n")
+        stats = import_file(jsonl_path, db_path=db_path)
+        assert (stats["added"], stats["invalid"]) == (1, 1)
+        print("   ✅ 批量导入正确")
+
+
+def test_write_behind():
+    """write_behind 策略: 连续修改立即返回,合并保存,关闭时写入剩余修改"""
+    print("\n" + "=" * 60)
+    print("测试 4: 延迟合并写入")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "products.json")
+        db = ProductDatabase(json_path, durability="write_behind", flush_interval=60, max_batch=1000)
+        saves = []
+        original_save = db.save
+        db.save = lambda: (saves.append(1), original_save())
+        for product in PRODUCTS:
+            db.add_product(product)
+        db.delete_product("python_001")
+        assert saves == []
+        assert ProductDatabase(json_path).get_all_products() == []
+        db.close()
+        assert len(saves) == 1
+        assert _ids(ProductDatabase(json_path).get_all_products()) == ["zhonghe_001", "dedao_001"]
+
+        db_path = os.path.join(tmpdir, "catalogue.db")
+        db = SqliteProductDatabase(db_path, durability="write_behind", flush_interval=60, max_batch=1000)
+        for product in PRODUCTS:
+            db.add_product(product)
+        db.delete_product("python_001")
+        # 未提交的修改对本连接可见
+        assert db._conn.in_transaction
+        assert _ids(db.search_by_keywords(["法考"])) == ["zhonghe_001"]
+        db.close()
+        reopened = SqliteProductDatabase(db_path)
+        assert _ids(reopened.get_all_products()) == ["zhonghe_001", "dedao_001"]
+        reopened.close()
+        print("   ✅ 延迟合并写入正确")
+
+
+def test_shared_file():
+    """多个实例共享同一 JSON 文件,互不覆盖"""
+    print("\n" + "=" * 60)
+    print("测试 5: 多实例共享")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "products.json")
+        first = ProductDatabase(json_path, refresh_interval=0)
+        second = ProductDatabase(json_path, refresh_interval=0)
+
+        first.add_product(PRODUCTS[0])
+        # second 保存前先合并 first 的修改,不会覆盖
+        second.add_product(PRODUCTS[1])
+        first.add_product(PRODUCTS[2])
+        first.delete_product("zhonghe_001")
+        assert _ids(second.get_all_products()) == ["dedao_001", "python_001"]
+        assert _ids(ProductDatabase(json_path).get_all_products()) == ["dedao_001", "python_001"]
+
+        # refresh_interval 内不重复检查文件
+        third = ProductDatabase(json_path, refresh_interval=60)
+        second.delete_product("dedao_001")
+        assert len(third.get_all_products()) == 2
+        assert third.refresh(force=True)
+        assert _ids(third.get_all_products()) == ["python_001"]
+        for db in (first, second, third):
+            db.close()
+        print("   ✅ 多实例共享正确")
+
+
+def _edit_file(json_path, edit):
+    """模拟运营人员直接编辑数据库文件(修改时间后移,避免与上次读取落在同一时间戳)"""
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    edit(data)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    st = os.stat(json_path)
+    os.utime(json_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_hot_reload():
+    """手工编辑文件后只替换有差异的商品"""
+    print("\n" + "=" * 60)
+    print("测试 6: 热加载")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "products.json")
+        db = ProductDatabase(json_path, refresh_interval=0)
+        for product in PRODUCTS:
+            db.add_product(product)
+        unchanged = db.get_product("dedao_001")
+        version = db.version
+
+        def edit(data):
+            data["zhonghe_001"]["original_price"] = 699.0
+            del data["python_001"]
+            data["new_001"] = dict(data["dedao_001"], product_id="new_001", product_name="新商品")
+
+        _edit_file(json_path, edit)
+        assert _ids(db.get_all_products()) == ["zhonghe_001", "dedao_001", "new_001"]
+        assert db.version == version + 1
+        assert db.get_product("zhonghe_001").original_price == 699.0
+        # 未修改的商品沿用原对象
+        assert db.get_product("dedao_001") is unchanged
+
+        # pinned() 期间看不到新的修改,退出后再次查询时应用
+        with db.pinned():
+            _edit_file(json_path, lambda data: data.pop("new_001"))
+            assert db.get_product("new_001") is not None
+        assert db.get_product("new_001") is None
+        assert db.version == version + 2
+
+        # 文件写到一半(无法解析)时保留内存数据,修复后再应用
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write("{")
+        assert not db.refresh(force=True)
+        assert len(db.get_all_products()) == 2
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"dedao_001": unchanged.to_dict()}, f, ensure_ascii=False)
+        assert db.refresh(force=True)
+        assert _ids(db.get_all_products()) == ["dedao_001"]
+        db.close()
+        print("   ✅ 热加载正确")
+
+
+if __name__ == "__main__":
+    test_migration_and_parity()
+    test_incremental_writes()
+    test_bulk_import()
+    test_write_behind()
+    test_shared_file()
+    test_hot_reload()
+    print("\n✅ 商品数据库测试通过")
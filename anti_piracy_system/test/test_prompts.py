@@ -40,6 +40,12 @@ def test_prompts():
             "required_keywords": ["店铺名称", "shop_name", "JSON"],
             "description": "列表页信息提取"
         },
+        {
+            "key": "enter_and_extract",
+            "required_keywords": ["第3个商品", "店铺名称", "shop_name", "status", "not_found", "JSON"],
+            "description": "进入详情并提取(合并模式)",
+            "kwargs": {"index": 3}
+        },
         {
             "key": "extract_shop_name_only",
             "required_keywords": ["店铺名称", "卖家"],
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+重复举报防护测试
+
+验证 ReportGuard:
+1. 从未举报过的店铺/商品由布隆过滤器直接放行
+2. 店铺级、商品级重复举报窗口分别生效
+3. 索引与布隆过滤器持久化,重新打开后依然生效,过滤器损坏时自动重建
+4. 多个实例共用同一组文件: 互相看到对方的举报,交替写入不丢失布隆过滤器的位
+5. 举报器不重复检查(由调用方检查一次),举报成功后记录
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_report_guard.py
+"""
+
+import sys
+import os
+import tempfile
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.report_guard import ReportGuard, BloomFilter
+from anti_piracy_system.reporter import XiaohongshuReporter, ReportContext
+
+DAY = 86400
+NOW = 1_760_000_000.0
+
+
+def test_windows():
+    """店铺级和商品级重复举报窗口"""
+    print("\n" + "=" * 60)
+    print("测试 1: 重复举报窗口")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        guard = ReportGuard(os.path.join(tmpdir, "guard.db"), shop_window_days=7, listing_window_days=30)
+        assert guard.check("小红书", "某个人卖家", "众合法考 客观题", now=NOW) is None
+        assert guard.stats["index_lookups"] == 0
+
+        guard.record("小红书", "某个人卖家", "众合法考 客观题", now=NOW)
+        # 店铺名大小写、空白、标点不同也视为同一店铺
+        assert "店铺" in guard.check("小红书", " 某个人 卖家!", "另一个商品", now=NOW + DAY)
+        assert guard.check("闲鱼", "某个人卖家", "众合法考 客观题", now=NOW + DAY) is None
+
+        # 店铺窗口过后,同一商品仍在商品窗口内
+        assert "商品" in guard.check("小红书", "某个人卖家", "众合法考，客观题", now=NOW + 8 * DAY)
+        assert guard.check("小红书", "某个人卖家", "另一个商品", now=NOW + 8 * DAY) is None
+        assert guard.check("小红书", "某个人卖家", "众合法考 客观题", now=NOW + 31 * DAY) is None
+        guard.close()
+
+        # 0 表示不按该级别去重,None 表示永不重复举报
+        guard = ReportGuard(os.path.join(tmpdir, "guard2.db"), shop_window_days=0, listing_window_days=None)
+        guard.record("小红书", "某个人卖家", "众合法考 客观题", now=NOW)
+        assert guard.check("小红书", "某个人卖家", "另一个商品", now=NOW) is None
+        assert guard.check("小红书", "某个人卖家", "众合法考 客观题", now=NOW + 1000 * DAY)
+        guard.close()
+        print("   ✅ 窗口判断正确")
+
+
+def test_persistence():
+    """重新打开后依然生效,布隆过滤器损坏或写满时重建"""
+    print("\n" + "=" * 60)
+    print("测试 2: 持久化与重建")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "guard.db")
+        guard = ReportGuard(path, capacity=10)
+        for i in range(20):
+            guard.record("小红书", f"店铺{i}", f"商品{i}", now=NOW)
+        # 超出容量后按两倍容量重建
+        assert guard.bloom.capacity > 10 and guard.bloom.count <= guard.bloom.capacity
+        guard.close()
+
+        guard = ReportGuard(path, capacity=10)
+        assert all(guard.check("小红书", f"店铺{i}", now=NOW) for i in range(20))
+        misses = [guard.check("小红书", f"新店铺{i}", now=NOW) for i in range(200)]
+        assert not any(misses)
+        # 绝大多数新店铺由布隆过滤器直接放行,不查询磁盘索引
+        assert guard.stats["bloom_negative"] > 180
+        guard.close()
+
+        with open(guard.bloom_path, "wb") as f:
+            f.write(b"garbage")
+        guard = ReportGuard(path)
+        assert guard.check("小红书", "店铺3", now=NOW)
+        assert isinstance(guard.bloom, BloomFilter) and guard.bloom.capacity >= 80
+        guard.close()
+        print("   ✅ 持久化与重建正确")
+
+
+def test_shared_files():
+    """多个实例共用同一组文件"""
+    print("\n" + "=" * 60)
+    print("测试 3: 多实例共用")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "guard.db")
+        first = ReportGuard(path, capacity=1000)
+        second = ReportGuard(path, capacity=1000)
+
+        # 运行中的另一个实例立即看到新的举报
+        first.record("小红书", "店铺A", "商品A", now=NOW)
+        assert second.check("小红书", "店铺A", now=NOW)
+
+        # 两个实例交替写入(后台多个巡查任务),过程中容量翻倍重建
+        def record_all(guard, prefix):
+            for i in range(300):
+                guard.record("小红书", f"{prefix}{i}", f"{prefix}商品{i}", now=NOW)
+
+        threads = [
+            threading.Thread(target=record_all, args=(first, "甲")),
+            threading.Thread(target=record_all, args=(second, "乙")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(first.check("小红书", f"乙{i}", now=NOW) for i in range(300))
+        assert all(second.check("小红书", f"甲{i}", now=NOW) for i in range(300))
+        first.close()
+        second.close()
+
+        # 重启后只看布隆过滤器: 所有已举报的店铺都不能被判为未举报
+        restarted = ReportGuard(path)
+        reported = ["店铺A"] + [f"{prefix}{i}" for prefix in ("甲", "乙") for i in range(300)]
+        assert all(restarted._keys("小红书", shop, None)[0][0] in restarted.bloom for shop in reported)
+        assert restarted.stats["bloom_negative"] == 0
+        restarted.close()
+        print("   ✅ 601 个已举报店铺在重启后全部拦截")
+
+
+def test_reporter_skips_duplicates():
+    """举报器不重复检查,举报成功后记录"""
+    print("\n" + "=" * 60)
+    print("测试 4: 举报器集成")
+    print("=" * 60)
+
+    class MockAgent:
+        def __init__(self):
+            self.calls = 0
+
+        def run(self, prompt):
+            self.calls += 1
+            return "完成"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        guard = ReportGuard(os.path.join(tmpdir, "guard.db"))
+        agent = MockAgent()
+        reporter = XiaohongshuReporter(agent, None, os.path.join(tmpdir, "screenshots"), guard=guard)
+        reporter.save_evidence_screenshot = lambda context: None
+        context = ReportContext(
+            product_title="薛兆丰经济学课程 超低价",
+            shop_name="某个人卖家",
+            price=9.9,
+            platform="小红书",
+            detection_reasons=["店铺不在官方授权列表中"],
+            confidence=0.8
+        )
+
+        import anti_piracy_system.reporter as reporter_module
+        original_sleep = reporter_module.time.sleep
+        reporter_module.time.sleep = lambda seconds: None
+        try:
+            assert reporter.check_duplicate(context) is None
+            assert reporter.execute_report(context)
+            # 举报流程本身不再查询防护索引(调用方已检查过一次)
+            assert guard.stats["checked"] == 1
+            assert "店铺" in reporter.check_duplicate(context)
+        finally:
+            reporter_module.time.sleep = original_sleep
+        guard.close()
+        print("   ✅ 举报成功后记录,再次检查时跳过")
+
+
+if __name__ == "__main__":
+    test_windows()
+    test_persistence()
+    test_shared_files()
+    test_reporter_skips_duplicates()
+    print("\n✅ 重复举报防护测试通过")
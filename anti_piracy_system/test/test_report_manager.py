@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+举报记录管理测试
+
+验证 ReportManager 的追加写日志:
+1. 每次修改只追加一行日志,不改写快照
+2. 重新加载时在快照上重放日志
+3. 合并后快照包含全部记录、日志被清空
+4. 不完整的日志行和中断的合并可以恢复
+5. 平台/状态/店铺/日期索引和统计计数随修改更新
+6. 游标分页查询与全量过滤结果一致,日期范围翻页每页只访问本页附近的序号
+7. CSV/JSONL/JSON/txt 流式导出与过滤
+8. write_behind 策略下修改立即返回,后台批量写入,关闭时写入剩余事件
+9. 多个进程同时写入同一日志(含合并)不丢记录,读者增量读取其他进程的修改
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_report_manager.py
+"""
+
+import sys
+import os
+import csv
+import json
+import tempfile
+import time
+import multiprocessing
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.report_manager import ReportManager
+
+DETECTION_RESULT = {
+    "is_piracy": True,
+    "confidence": 0.8,
+    "reasons": ["❌ 店铺名称'某个人卖家'不在官方授权列表中"],
+    "matched_product_name": "2026众合法考客观题学习包"
+}
+
+
+def _create(manager, title="众合法考客观题学习包 超值"):
+    report = manager.create_report(
+        platform="小红书",
+        target_title=title,
+        target_shop="某个人卖家",
+        target_price=99.0,
+        detection_result=DETECTION_RESULT
+    )
+    manager.update_status(report.report_id, "submitted")
+    manager.add_screenshot(report.report_id, f"screenshots/{report.report_id}.png")
+    manager.update_status(report.report_id, "success", "举报成功")
+    return report
+
+
+def _line_count(path):
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def test_journal_append_and_replay():
+    """修改追加到日志,快照不变,重新加载后状态一致"""
+    print("\n" + "=" * 60)
+    print("测试 1: 日志追加与重放")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, "report_history.json")
+        manager = ReportManager(log_path, compact_threshold=0)
+        with open(log_path, encoding="utf-8") as f:
+            snapshot = f.read()
+
+        reports = [_create(manager, f"商品 {i}") for i in range(3)]
+        manager.close()
+
+        with open(log_path, encoding="utf-8") as f:
+            assert f.read() == snapshot
+        assert _line_count(manager.journal_path) == 12
+
+        reloaded = ReportManager(log_path, compact_threshold=0)
+        assert {rid: r.to_dict() for rid, r in reloaded.reports.items()} == \
+            {r.report_id: r.to_dict() for r in reports}
+        assert reloaded.get_report(reports[0].report_id).report_status == "success"
+        assert reloaded.get_report(reports[0].report_id).notes == "举报成功"
+        reloaded.close()
+        print("   ✅ 日志重放正确")
+
+
+def test_compaction():
+    """合并为快照后清空日志,后台合并不阻塞写入"""
+    print("\n" + "=" * 60)
+    print("测试 2: 日志合并")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, "report_history.json")
+        manager = ReportManager(log_path, fsync_policy="never", compact_threshold=5)
+        reports = [_create(manager, f"商品 {i}") for i in range(3)]
+        manager.close()
+
+        # 12 条事件触发过后台合并,剩余事件仍在日志中
+        reloaded = ReportManager(log_path)
+        assert len(reloaded.reports) == 3
+        assert reloaded.get_report(reports[2].report_id).evidence_screenshots == \
+            (f"screenshots/{reports[2].report_id}.png",)
+
+        reloaded.save()
+        assert not os.path.exists(reloaded.journal_path)
+        with open(log_path, encoding="utf-8") as f:
+            assert set(json.load(f)) == {r.report_id for r in reports}
+        reloaded.close()
+        print("   ✅ 合并正确")
+
+
+def test_recovery():
+    """不完整的最后一行被截断,中断的合并在加载时重放"""
+    print("\n" + "=" * 60)
+    print("测试 3: 崩溃恢复")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, "report_history.json")
+        manager = ReportManager(log_path, compact_threshold=0)
+        first = _create(manager, "商品 1")
+        manager.close()
+
+        # 模拟合并中断: 日志已改名但快照尚未写入
+        os.replace(manager.journal_path, manager.journal_path + ".compacting")
+        manager = ReportManager(log_path, compact_threshold=0)
+        second = _create(manager, "商品 2")
+        manager.close()
+        with open(manager.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "status", "report_id": ')
+
+        reloaded = ReportManager(log_path, compact_threshold=0)
+        assert set(reloaded.reports) == {first.report_id, second.report_id}
+        assert reloaded.get_report(first.report_id).report_status == "success"
+        reloaded.update_status(second.report_id, "failed")
+        assert _line_count(reloaded.journal_path) == 5
+
+        reloaded.save()
+        assert not os.path.exists(reloaded.journal_path + ".compacting")
+        reloaded.close()
+        final = ReportManager(log_path)
+        assert set(final.reports) == {first.report_id, second.report_id}
+        assert final.get_report(second.report_id).report_status == "failed"
+        print("   ✅ 恢复正确")
+
+
+def test_indexes_and_statistics():
+    """索引查询和统计计数与全量扫描一致,并在状态更新和重新加载后保持正确"""
+    print("\n" + "=" * 60)
+    print("测试 4: 二级索引与统计计数")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, "report_history.json")
+        manager = ReportManager(log_path, compact_threshold=0)
+        reports = []
+        for i, platform in enumerate(["小红书", "闲鱼", "小红书", "淘宝"]):
+            reports.append(manager.create_report(
+                platform=platform,
+                target_title=f"商品 {i}",
+                target_shop="某个人卖家" if i % 2 else "盗版书屋",
+                target_price=99.0
+            ))
+        manager.update_status(reports[0].report_id, "submitted")
+        manager.update_status(reports[2].report_id, "submitted")
+        manager.update_status(reports[0].report_id, "success")
+
+        def check(m):
+            values = list(m.reports.values())
+            for platform in ["小红书", "闲鱼", "淘宝", "京东"]:
+                assert m.get_reports_by_platform(platform) == [r for r in values if r.platform == platform]
+            for status in ["pending", "submitted", "success", "failed"]:
+                assert m.get_reports_by_status(status) == [r for r in values if r.report_status == status]
+            assert m.get_reports_by_shop("某个人卖家") == [r for r in values if r.target_shop == "某个人卖家"]
+            today = values[0].reported_at[:10]
+            assert m.get_reports_by_date(today) == values
+            assert m.get_reports_by_date("2000-01-01", "2000-12-31") == []
+            assert m.get_statistics() == {
+                "total_reports": 4,
+                "by_platform": {"小红书": 2, "闲鱼": 1, "淘宝": 1},
+                "by_status": {"pending": 2, "submitted": 1, "success": 1}
+            }
+
+        check(manager)
+        manager.close()
+        reloaded = ReportManager(log_path)
+        check(reloaded)
+        reloaded.save()
+        reloaded.close()
+        check(ReportManager(log_path))
+        print("   ✅ 索引与统计正确")
+
+
+def _collect_pages(query, **kwargs):
+    """逐页读取查询结果"""
+    items, cursor, pages = [], None, 0
+    while True:
+        page = query(cursor=cursor, **kwargs)
+        items.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+def test_query_pagination():
+    """分页查询覆盖全部匹配记录且不重复,游标与排序方式绑定"""
+    print("\n" + "=" * 60)
+    print("测试 5: 游标分页查询")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = ReportManager(os.path.join(tmpdir, "report_history.json"), compact_threshold=0)
+        for i in range(25):
+            report = manager.create_report(
+                platform=["小红书", "闲鱼"][i % 2],
+                target_title=f"商品 {i}",
+                target_shop=f"店铺 {i % 4}",
+                target_price=99.0,
+                detection_result={"confidence": i / 25, "reasons": []}
+            )
+            if i % 3 == 0:
+                manager.update_status(report.report_id, "submitted")
+        values = list(manager.reports.values())
+        today = values[0].reported_at[:10]
+
+        cases = [
+            ({}, values),
+            ({"platform": "小红书"}, [r for r in values if r.platform == "小红书"]),
+            ({"status": "submitted", "shop": "店铺 0"},
+             [r for r in values if r.report_status == "submitted" and r.target_shop == "店铺 0"]),
+            ({"start_date": today, "min_confidence": 0.3, "max_confidence": 0.6},
+             [r for r in values if 0.3 <= r.detection_result["confidence"] <= 0.6]),
+            ({"end_date": "2000-01-01"}, []),
+        ]
+        for filters, expected in cases:
+            asc, pages = _collect_pages(manager.query_reports, order="asc", limit=4, **filters)
+            desc, _ = _collect_pages(manager.query_reports, limit=4, **filters)
+            print(f"   {filters}: {len(asc)} 条, {pages} 页")
+            assert asc == expected
+            assert desc == expected[::-1]
+            assert pages == max(1, -(-len(expected) // 4))
+
+        asc_cursor = manager.query_reports(order="asc", limit=4)["next_cursor"]
+        for bad in [asc_cursor, "not-a-cursor"]:
+            try:
+                manager.query_reports(order="desc", cursor=bad)
+                assert False, "无效游标应抛出 ValueError"
+            except ValueError:
+                pass
+
+        merchants, _ = _collect_pages(manager.query_merchants, limit=3)
+        assert [(m["platform"], m["shop"]) for m in merchants] == [
+            ("小红书", "店铺 0"), ("闲鱼", "店铺 3"), ("小红书", "店铺 2"), ("闲鱼", "店铺 1")
+        ]
+        assert merchants[0]["report_count"] == 7 and merchants[0]["latest_report"] is values[24]
+        xhs, _ = _collect_pages(manager.query_merchants, platform="小红书", limit=1)
+        assert [m["shop"] for m in xhs] == ["店铺 0", "店铺 2"]
+        manager.close()
+        print("   ✅ 分页查询正确")
+
+
+def _manager_over_days(tmpdir, days, per_day):
+    """创建跨多天的举报记录(写入快照后重新加载),记录按日期交错加入"""
+    path = os.path.join(tmpdir, "report_history.json")
+    template = ReportManager(path, compact_threshold=0)
+    base = template.create_report(
+        platform="小红书", target_title="商品", target_shop="店铺", target_price=99.0,
+        detection_result=DETECTION_RESULT
+    ).to_dict()
+    template.close()
+    data = {}
+    for i in range(days * per_day):
+        record = dict(base, report_id=f"R{i:06d}", target_title=f"商品 {i}")
+        record["reported_at"] = f"2026-01-{i % days + 1:02d}T10:00:00"
+        data[record["report_id"]] = record
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.remove(path + ".journal")
+    return ReportManager(path, compact_threshold=0)
+
+
+def _count_visits(manager):
+    """统计遍历索引列表时访问的序号数"""
+    visited = []
+    original = manager._iter_index
+
+    def counting(*args):
+        for seq in original(*args):
+            visited.append(seq)
+            yield seq
+
+    manager._iter_index = counting
+    return visited
+
+
+def test_date_range_pages():
+    """日期范围翻页只访问本页附近的序号,与记录总数无关"""
+    print("\n" + "=" * 60)
+    print("测试 6: 日期范围翻页")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        days, per_day, limit = 20, 100, 10
+        manager = _manager_over_days(tmpdir, days, per_day)
+        values = list(manager.reports.values())
+        expected = [r for r in values if "2026-01-05" <= r.reported_at[:10] <= "2026-01-14"]
+        visited = _count_visits(manager)
+
+        asc, pages = _collect_pages(
+            manager.query_reports, order="asc", limit=limit, start_date="2026-01-05", end_date="2026-01-14"
+        )
+        assert asc == expected and pages == -(-len(expected) // limit)
+        # 每页: 每个日期分桶预取 1 个,再取 limit + 1 条
+        assert len(visited) <= pages * (10 + limit + 1)
+        desc, _ = _collect_pages(manager.query_reports, limit=limit, start_date="2026-01-05", end_date="2026-01-14")
+        assert desc == expected[::-1]
+
+        # 翻页间隙中修改状态不影响后续页
+        visited.clear()
+        first = manager.query_reports(order="asc", limit=limit, start_date="2026-01-05")
+        manager.update_status(first["items"][0].report_id, "success")
+        manager.update_status(values[-1].report_id, "failed")
+        second = manager.query_reports(order="asc", limit=limit, start_date="2026-01-05", cursor=first["next_cursor"])
+        expected = [r for r in values if r.reported_at[:10] >= "2026-01-05"]
+        assert first["items"] + second["items"] == expected[:2 * limit]
+        assert len(visited) <= 2 * (days - 4 + limit + 1)
+        manager.close()
+        print(f"   ✅ {days * per_day} 条记录,每页访问不超过 {10 + limit + 1} 个序号")
+
+
+def test_streaming_export():
+    """分批导出各格式,结果与全量导出一致并支持过滤"""
+    print("\n" + "=" * 60)
+    print("测试 7: 流式导出")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = ReportManager(os.path.join(tmpdir, "report_history.json"), compact_threshold=0)
+        reports = [_create(manager, f"商品 {i}") for i in range(5)]
+        manager.update_status(reports[1].report_id, "failed")
+
+        path = os.path.join(tmpdir, "export.json")
+        assert manager.export_to_file(path, "json", chunk_size=2)
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == json.dumps(
+                {r.report_id: r.to_dict() for r in reports}, ensure_ascii=False, indent=2
+            )
+
+        path = os.path.join(tmpdir, "export.jsonl")
+        assert manager.export_to_file(path, "jsonl", chunk_size=2, status="success")
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line)["report_id"] for line in f] == \
+                [r.report_id for r in reports if r.report_status == "success"]
+
+        path = os.path.join(tmpdir, "export.csv")
+        assert manager.export_to_file(path, "csv", chunk_size=3)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["report_id"] for row in rows] == [r.report_id for r in reports]
+        assert rows[0]["confidence"] == "0.8" and rows[0]["evidence_screenshots"] == reports[0].evidence_screenshots[0]
+
+        path = os.path.join(tmpdir, "export.txt")
+        assert manager.export_to_file(path, "txt", chunk_size=2, platform="闲鱼")
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == ""
+
+        assert not manager.export_to_file(os.path.join(tmpdir, "export.xml"), "xml")
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            assert not manager.export_to_file(os.path.join(tmpdir, "export.parquet"), "parquet")
+            print("   ⚠️ 未安装 pyarrow,跳过 Parquet 导出内容检查")
+        else:
+            path = os.path.join(tmpdir, "export.parquet")
+            assert manager.export_to_file(path, "parquet", chunk_size=2)
+            table = pq.read_table(path)
+            assert table.column("report_id").to_pylist() == [r.report_id for r in reports]
+            assert pq.ParquetFile(path).num_row_groups == 3
+        manager.close()
+        print("   ✅ 流式导出正确")
+
+    # 按日期过滤的长时间范围导出: 日期分桶只合并一次,每条记录只访问一次
+    with tempfile.TemporaryDirectory() as tmpdir:
+        days, per_day = 20, 100
+        manager = _manager_over_days(tmpdir, days, per_day)
+        expected = [r.report_id for r in manager.reports.values() if r.reported_at[:10] >= "2026-01-03"]
+        visited = _count_visits(manager)
+        chunks = list(manager.iter_chunks(chunk_size=64, start_date="2026-01-03"))
+        assert [r.report_id for chunk in chunks for r in chunk] == expected
+        assert all(len(chunk) == 64 for chunk in chunks[:-1])
+        assert len(visited) == len(expected) == len(set(visited))
+
+        path = os.path.join(tmpdir, "export.jsonl")
+        assert manager.export_to_file(path, "jsonl", chunk_size=64, start_date="2026-01-03", end_date="2026-01-04")
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 2 * per_day
+        manager.close()
+        print(f"   ✅ 按日期导出 {len(expected)} 条记录,每条只访问一次")
+
+
+def test_write_behind():
+    """write_behind 策略: 修改不直接写日志,按批量/关闭时写入"""
+    print("\n" + "=" * 60)
+    print("测试 8: 延迟合并写入")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "report_history.json")
+        # 间隔足够长,只有达到 max_batch 或手动 flush/close 时才写入
+        manager = ReportManager(path, fsync_policy="never", durability="write_behind",
+                                flush_interval=60, max_batch=1000)
+        reports = [_create(manager, f"商品{i}") for i in range(5)]
+        assert not os.path.exists(manager.journal_path)
+        assert manager.get_statistics()["by_status"]["success"] == 5
+
+        manager.flush()
+        assert _line_count(manager.journal_path) == 20
+        _create(manager, "商品5")
+        manager.close()
+        assert _line_count(manager.journal_path) == 24
+
+        reloaded = ReportManager(path)
+        assert len(reloaded.reports) == 6
+        assert reloaded.get_report(reports[0].report_id).report_status == "success"
+        reloaded.close()
+
+        # 达到 max_batch 时后台线程立即写入
+        manager = ReportManager(path, fsync_policy="never", durability="write_behind",
+                                flush_interval=60, max_batch=8)
+        _create(manager, "商品6")
+        _create(manager, "商品7")
+        deadline = time.time() + 5
+        while _line_count(manager.journal_path) < 32 and time.time() < deadline:
+            time.sleep(0.01)
+        assert _line_count(manager.journal_path) == 32
+        manager.close()
+        print("   ✅ 延迟合并写入正确")
+
+
+def _write_from_process(path, worker, count):
+    """子进程: 创建举报记录并更新状态,合并阈值很小以便与其他进程的合并交错"""
+    manager = ReportManager(path, fsync_policy="never", compact_threshold=7)
+    for i in range(count):
+        report = manager.create_report("小红书", f"进程{worker}-商品{i}", f"店铺{worker}", 9.9)
+        manager.update_status(report.report_id, "submitted")
+    manager.close()
+
+
+def test_multi_process():
+    """多进程共享日志: 不丢记录,读者增量读取"""
+    print("\n" + "=" * 60)
+    print("测试 9: 多进程并发写入")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "report_history.json")
+        reader = ReportManager(path, fsync_policy="never", compact_threshold=0)
+        first = reader.create_report("小红书", "读者自己的记录", "某个人卖家", 9.9)
+
+        processes = [
+            multiprocessing.Process(target=_write_from_process, args=(path, worker, 20))
+            for worker in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        # 读者无需手动重新加载即可看到其他进程的记录
+        stats = reader.get_statistics()
+        assert stats["total_reports"] == 81
+        assert stats["by_status"] == {"pending": 1, "submitted": 80}
+        assert len(reader.get_reports_by_shop("店铺3")) == 20
+
+        # 读者的修改排在其他进程之后,重新加载结果一致
+        reader.update_status(first.report_id, "success")
+        reader.close()
+        reloaded = ReportManager(path)
+        assert len(reloaded.reports) == 81
+        assert reloaded.get_report(first.report_id).report_status == "success"
+        assert {r.to_dict()["report_status"] for r in reloaded.reports.values()} == {"submitted", "success"}
+        reloaded.close()
+        print("   ✅ 4 个进程并发写入 80 条记录,无丢失")
+
+
+if __name__ == "__main__":
+    test_journal_append_and_replay()
+    test_compaction()
+    test_recovery()
+    test_indexes_and_statistics()
+    test_query_pagination()
+    test_date_range_pages()
+    test_streaming_export()
+    test_write_behind()
+    test_multi_process()
+    print("\n✅ 举报记录管理测试通过")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+举报流水线测试
+
+验证 ReportPipeline:
+1. inline 方式立即在浏览设备上举报
+2. deferred 方式排队,关闭时批量举报;队列满时按背压策略立即举报或丢弃,
+   block 策略按 drop 处理,巡查途中不操作浏览设备
+3. device 方式由后台线程举报,浏览阶段不等待;队列满时 block 策略等待空位
+4. 队列深度、排队时间等统计正确
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_report_pipeline.py
+"""
+
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.report_pipeline import ReportJob, ReportPipeline
+
+
+class Recorder:
+    """记录举报顺序和方式"""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.events = []
+        self.lock = threading.Lock()
+
+    def queued(self, job):
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(self.delay)
+        with self.lock:
+            self.events.append(("queued", job.product_info))
+        return job.product_info != "失败商品"
+
+    def inline(self, job):
+        with self.lock:
+            self.events.append(("inline", job.product_info))
+        return True
+
+    def dropped(self, job):
+        with self.lock:
+            self.events.append(("dropped", job.product_info))
+
+
+def _pipeline(recorder, **options):
+    return ReportPipeline(recorder.queued, recorder.inline, recorder.dropped, **options)
+
+
+def test_inline_and_deferred():
+    """inline 立即举报, deferred 关闭时批量举报"""
+    print("\n" + "=" * 60)
+    print("测试 1: inline 与 deferred")
+    print("=" * 60)
+
+    recorder = Recorder()
+    pipeline = _pipeline(recorder, mode="inline")
+    assert pipeline.submit(ReportJob("商品A", None)) == "inline"
+    assert recorder.events == [("inline", "商品A")]
+    assert pipeline.get_stats()["enqueued"] == 0
+
+    recorder = Recorder()
+    pipeline = _pipeline(recorder, mode="deferred", queue_size=5)
+    for name in ("商品A", "失败商品", "商品C"):
+        assert pipeline.submit(ReportJob(name, None)) == "queued"
+    assert recorder.events == []
+    assert pipeline.get_stats()["depth"] == 3
+    pipeline.close()
+    assert recorder.events == [("queued", "商品A"), ("queued", "失败商品"), ("queued", "商品C")]
+    stats = pipeline.get_stats()
+    assert stats["depth"] == 0 and stats["max_depth"] == 3
+    assert stats["succeeded"] == 2 and stats["failed"] == 1
+    # 关闭后提交的商品立即举报
+    assert pipeline.submit(ReportJob("商品D", None)) == "inline"
+    print("   ✅ inline 与 deferred 正确")
+
+
+def test_backpressure():
+    """队列满时的三种背压策略"""
+    print("\n" + "=" * 60)
+    print("测试 2: 背压策略")
+    print("=" * 60)
+
+    # deferred 方式下 block 按 drop 处理: 队列满时不在浏览设备上重新打开商品
+    recorder = Recorder()
+    pipeline = _pipeline(recorder, mode="deferred", queue_size=2, backpressure="block")
+    assert pipeline.backpressure == "drop"
+    results = [pipeline.submit(ReportJob(f"商品{i}", None)) for i in range(4)]
+    assert results == ["queued", "queued", "dropped", "dropped"]
+    assert recorder.events == [("dropped", "商品2"), ("dropped", "商品3")]
+    assert pipeline.get_stats()["depth"] == 2 and pipeline.get_stats()["processed"] == 0
+    pipeline.close()
+    assert recorder.events[2:] == [("queued", "商品0"), ("queued", "商品1")]
+
+    recorder = Recorder()
+    pipeline = _pipeline(recorder, mode="deferred", queue_size=2, backpressure="inline")
+    results = [pipeline.submit(ReportJob(f"商品{i}", None)) for i in range(3)]
+    assert results == ["queued", "queued", "inline"]
+    assert recorder.events == [("inline", "商品2")]
+    pipeline.close()
+
+    recorder = Recorder()
+    pipeline = _pipeline(recorder, mode="deferred", queue_size=2, backpressure="drop")
+    results = [pipeline.submit(ReportJob(f"商品{i}", None)) for i in range(3)]
+    assert results == ["queued", "queued", "dropped"]
+    pipeline.close()
+    assert recorder.events == [("dropped", "商品2"), ("queued", "商品0"), ("queued", "商品1")]
+    assert pipeline.get_stats()["dropped"] == 1
+    print("   ✅ block/inline/drop 策略正确,deferred 队列满时不占用浏览设备")
+
+
+def test_device_worker():
+    """第二台设备的后台举报线程"""
+    print("\n" + "=" * 60)
+    print("测试 3: device 后台举报")
+    print("=" * 60)
+
+    gate = threading.Event()
+    recorder = Recorder(gate=gate)
+    pipeline = _pipeline(recorder, mode="device", queue_size=2, backpressure="block")
+
+    started = time.time()
+    assert pipeline.submit(ReportJob("商品0", None)) == "queued"
+    while pipeline.get_stats()["depth"]:  # 等后台线程取出第 1 个(阻塞在 gate 上)
+        time.sleep(0.01)
+    for i in (1, 2):
+        assert pipeline.submit(ReportJob(f"商品{i}", None)) == "queued"
+    assert time.time() - started < 1.0  # 浏览阶段不等待举报
+
+    def release():
+        time.sleep(0.2)
+        gate.set()
+
+    threading.Thread(target=release).start()
+    assert pipeline.submit(ReportJob("商品3", None)) == "queued"  # 队列满,等待空位
+    pipeline.close()
+
+    assert [name for _, name in recorder.events] == ["商品0", "商品1", "商品2", "商品3"]
+    stats = pipeline.get_stats()
+    assert stats["processed"] == 4 and stats["succeeded"] == 4
+    assert stats["blocked_seconds"] > 0.1
+    assert stats["avg_wait_seconds"] > 0
+    print(f"   阻塞 {stats['blocked_seconds']:.2f} 秒, 平均排队 {stats['avg_wait_seconds']:.2f} 秒")
+    print("   ✅ 后台举报与 block 背压正确")
+
+
+if __name__ == "__main__":
+    test_inline_and_deferred()
+    test_backpressure()
+    test_device_worker()
+    print("\n✅ 举报流水线测试通过")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+模型响应缓存测试
+
+验证 ResponseCache:
+1. 相同屏幕、相同提示词的提取任务命中缓存,屏幕或参数变化时重新调用模型
+2. 未配置为可缓存的操作任务(进入详情、返回、举报步骤)每次都真正执行
+3. 有效期过后重新调用模型,超出容量时淘汰最久未使用的条目
+4. 缓存持久化,重新打开后依然命中;命中率统计正确
+5. 布局相同的不同商品详情页截图指纹不同,不会返回其他商品的结果;enter_and_extract 不缓存
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_response_cache.py
+"""
+
+import glob
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.config_anti_piracy import RESPONSE_CACHE_CONFIG, get_task_prompt
+from anti_piracy_system.response_cache import ResponseCache, screen_fingerprint
+from anti_piracy_system.reporter import XiaohongshuReporter
+
+DAY = 86400
+NOW = 1_760_000_000.0
+
+
+class FakeModel:
+    """记录调用次数的模型"""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, prompt):
+        self.calls.append(prompt)
+        return f'{{"shop_name": "某个人卖家", "call": {len(self.calls)}}}'
+
+
+class FakeScreen:
+    """可切换内容的屏幕"""
+
+    def __init__(self):
+        self.content = b"detail-page-1"
+
+    def __call__(self):
+        return self.content
+
+
+def test_hit_and_bypass():
+    """提取任务命中缓存,操作任务每次执行"""
+    print("\n" + "=" * 60)
+    print("测试 1: 命中与绕过")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        screen = FakeScreen()
+        model = FakeModel()
+        cache = ResponseCache(
+            os.path.join(tmpdir, "cache.db"),
+            tasks={"extract_info": DAY},
+            screen_provider=screen
+        )
+
+        first = cache.run(model.run, "extract_info", "提取信息", {})
+        assert cache.run(model.run, "extract_info", "提取信息", {}) == first
+        assert len(model.calls) == 1
+
+        # 屏幕、参数或提示词内容变化都视为新请求
+        screen.content = b"detail-page-2"
+        cache.run(model.run, "extract_info", "提取信息", {})
+        cache.run(model.run, "extract_info", "提取信息", {"index": 2})
+        cache.run(model.run, "extract_info", "提取信息(新版)", {"index": 2})
+        assert len(model.calls) == 4
+
+        # 操作任务不缓存
+        for _ in range(2):
+            cache.run(model.run, "back_to_list", "返回列表", {})
+        assert len(model.calls) == 6
+
+        stats = cache.get_statistics()
+        assert stats["hits"] == 1 and stats["misses"] == 4 and stats["bypassed"] == 2
+        assert stats["by_task"]["extract_info"]["hit_rate"] == 0.2
+        assert stats["entries"] == 4
+        cache.close()
+        print("   ✅ 命中、绕过与统计正确")
+
+
+def test_ttl_lru_and_persistence():
+    """有效期、LRU 淘汰与持久化"""
+    print("\n" + "=" * 60)
+    print("测试 2: 有效期、淘汰与持久化")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "cache.db")
+        cache = ResponseCache(path, tasks={"extract_info": DAY, "extract_shop_name_only": None}, max_entries=2)
+        cache.put("a", "extract_info", "响应A", now=NOW)
+        assert cache.get("a", "extract_info", now=NOW + DAY - 1) == "响应A"
+        assert cache.get("a", "extract_info", now=NOW + DAY + 1) is None
+        assert cache.stats["expired"] == 1
+
+        cache.put("b", "extract_shop_name_only", ["列表"], now=NOW)
+        cache.put("c", "extract_shop_name_only", ["列表C"], now=NOW + 1)
+        assert cache.get("b", "extract_shop_name_only", now=NOW + 100 * DAY) == ["列表"]  # 不过期,刷新最近使用时间
+        cache.put("d", "extract_shop_name_only", ["列表D"], now=NOW + 2)
+        assert cache.stats["evictions"] == 1
+        assert cache.get("c", "extract_shop_name_only", now=NOW + 3) is None
+        cache.close()
+
+        reopened = ResponseCache(path, tasks={"extract_shop_name_only": None}, max_entries=2)
+        assert reopened.get("b", "extract_shop_name_only") == ["列表"]
+        assert reopened.get("d", "extract_shop_name_only") == ["列表D"]
+        reopened.close()
+        print("   ✅ 有效期、淘汰与持久化正确")
+
+
+def test_reporter_steps_not_cached():
+    """举报步骤经过缓存层但始终真正执行"""
+    print("\n" + "=" * 60)
+    print("测试 3: 举报步骤不缓存")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model = FakeModel()
+        cache = ResponseCache(
+            os.path.join(tmpdir, "cache.db"),
+            tasks={"extract_info": DAY},
+            screen_provider=FakeScreen()
+        )
+
+        class MockReportManager:
+            pass
+
+        reporter = XiaohongshuReporter(
+            model, MockReportManager(), os.path.join(tmpdir, "screenshots"), response_cache=cache
+        )
+        for _ in range(2):
+            assert reporter._execute_step("open_menu")
+        assert len(model.calls) == 2
+        assert cache.stats["bypassed"] == 2 and cache.stats["hits"] == 0
+        cache.close()
+        print("   ✅ 举报步骤每次都执行")
+
+
+def test_distinct_listings():
+    """不同商品的详情页截图得到不同的指纹"""
+    print("\n" + "=" * 60)
+    print("测试 4: 不同商品不会互相命中")
+    print("=" * 60)
+
+    # 证据目录中各店铺的商品详情页截图: 页面布局相同,缩略图差值哈希只差几位
+    evidence_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evidence")
+    shots = {}
+    for path in sorted(glob.glob(os.path.join(evidence_root, "*", "*", "1_商品介绍.png"))):
+        with open(path, "rb") as f:
+            shots.setdefault(f.read(), os.path.basename(os.path.dirname(path)))
+    fingerprints = {}
+    for content, shop in shots.items():
+        fingerprint = screen_fingerprint(content)
+        assert screen_fingerprint(content) == fingerprint
+        # 不同店铺的截图不能得到相同的指纹
+        assert fingerprints.setdefault(fingerprint, shop) == shop, f"{shop} 与 {fingerprints[fingerprint]} 指纹相同"
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        screen = FakeScreen()
+        model = FakeModel()
+        cache = ResponseCache(
+            os.path.join(tmpdir, "cache.db"),
+            tasks=RESPONSE_CACHE_CONFIG["tasks"],
+            screen_provider=screen
+        )
+        prompt = get_task_prompt("extract_info")
+        for content in shots:
+            screen.content = content
+            cache.run(model.run, "extract_info", prompt, {})
+        assert cache.stats["misses"] == len(fingerprints) and cache.stats["hits"] == len(shots) - len(fingerprints)
+
+        # 合并提取任务在列表页上执行,不缓存
+        assert "enter_and_extract" not in RESPONSE_CACHE_CONFIG["tasks"]
+        cache.run(model.run, "enter_and_extract", get_task_prompt("enter_and_extract", index=1), {"index": 1})
+        assert cache.stats["bypassed"] == 1
+        cache.close()
+    print(f"   ✅ {len(shots)} 张详情页截图({len(set(shots.values()))} 个店铺),不同店铺互不命中")
+
+
+if __name__ == "__main__":
+    test_hit_and_bypass()
+    test_ttl_lru_and_persistence()
+    test_reporter_steps_not_cached()
+    test_distinct_listings()
+    print("\n✅ 模型响应缓存测试通过")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+模型响应解析测试
+
+验证 response_parser:
+1. 纯 JSON、代码块、夹杂在说明文字中的 JSON 都能提取,字符串中的括号和转义不影响扫描
+2. 外层片段不是合法 JSON 时提取内部的 JSON,多个候选时优先对象、其次最长
+3. 长响应单次扫描,耗时随长度线性增长
+4. 嵌套过深(超出递归限制)的片段视为无效,不抛出 RecursionError
+5. 字段别名统一为标准字段,取优先级最高的非空值
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_response_parser.py
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.response_parser import extract_json, normalize_fields
+
+
+def test_extract_json():
+    """各种格式的 JSON 提取"""
+    print("\n" + "=" * 60)
+    print("测试 1: JSON 提取")
+    print("=" * 60)
+
+    cases = [
+        ('{"shop_name": "方圆众合教育"}', {"shop_name": "方圆众合教育"}),
+        ('好的，结果如下：\n```json\n{"shop_name": "方圆{众合}教育", "price": 898.0}\n```\n以上',
+         {"shop_name": "方圆{众合}教育", "price": 898.0}),
+        ('[{"index": 0, "title": "众合法考"}]', [{"index": 0, "title": "众合法考"}]),
+        ('标题是"众合" {"title": "含\\"引号\\"和 } 的标题", "info": {"tags": [1, 2]}}',
+         {"title": '含"引号"和 } 的标题', "info": {"tags": [1, 2]}}),
+        ('思考 {这不是JSON {"title": "x"} 结束}', {"title": "x"}),
+        ('点击 [500, 300] 后看到 {"a": 1}', {"a": 1}),
+        ('{"a": 1} 以及更完整的 {"a": 1, "b": 2}', {"a": 1, "b": 2}),
+        ('{"a": 1] 之后 {"b": {"c": 2}}', {"b": {"c": 2}}),
+        ('没有任何JSON', None),
+        ('{"a": "未结束', None),
+        ('', None),
+    ]
+    for text, expected in cases:
+        result = extract_json(text)
+        assert result == expected, f"{text!r}: {result!r}"
+    print(f"   ✅ {len(cases)} 个格式全部正确")
+
+
+def test_linear_time():
+    """长响应的扫描耗时随长度线性增长"""
+    print("\n" + "=" * 60)
+    print("测试 2: 线性时间")
+    print("=" * 60)
+
+    def response(repeat):
+        noise = "模型思考过程 {step} [x, y] 引号\" " * repeat
+        return noise + '```json\n{"shop_name": "某个人卖家", "price": 9.9}\n```'
+
+    timings = []
+    for repeat in (2000, 8000):
+        text = response(repeat)
+        started = time.perf_counter()
+        assert extract_json(text) == {"shop_name": "某个人卖家", "price": 9.9}
+        timings.append(time.perf_counter() - started)
+    print(f"   2000 段: {timings[0] * 1000:.1f} ms, 8000 段: {timings[1] * 1000:.1f} ms")
+    assert timings[1] < timings[0] * 12
+    print("   ✅ 耗时线性增长")
+
+
+def test_deep_nesting():
+    """嵌套过深的响应不抛出 RecursionError"""
+    print("\n" + "=" * 60)
+    print("测试 3: 深层嵌套")
+    print("=" * 60)
+
+    depth = 20000
+    assert extract_json("[" * depth) is None
+    assert extract_json("[" * depth + "]" * depth) is None
+    assert extract_json("结果 " + "{" * depth) is None
+    # 深层嵌套之外的有效 JSON 仍能提取
+    assert extract_json("[" * depth + "]" * depth + ' {"shop_name": "某个人卖家"}') == {"shop_name": "某个人卖家"}
+    print("   ✅ 深层嵌套返回None")
+
+
+def test_normalize_fields():
+    """字段别名统一"""
+    print("\n" + "=" * 60)
+    print("测试 4: 字段别名")
+    print("=" * 60)
+
+    fields = normalize_fields({
+        "商品标题": "众合法考客观题",
+        "卖家昵称": "",
+        "seller": "备选卖家",
+        "店铺名称": "某个人卖家",
+        "售价": "¥99",
+        "all_text": "全部文字",
+        "status": "ok",
+    })
+    assert fields == {
+        "title": "众合法考客观题",
+        "shop_name": "某个人卖家",
+        "price": "¥99",
+        "ocr_text": "全部文字",
+        "status": "ok",
+    }
+    assert normalize_fields({"shop": "小店", "shopName": None})["shop_name"] == "小店"
+    assert "shop_name" not in normalize_fields({"shop_name": None})
+    print("   ✅ 别名统一正确")
+
+
+if __name__ == "__main__":
+    test_extract_json()
+    test_linear_time()
+    test_deep_nesting()
+    test_normalize_fields()
+    print("\n✅ 模型响应解析测试通过")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+巡查结果流式存储测试
+
+验证 result_sink:
+1. 结果逐条写入 JSONL 文件后可按顺序读回,每次巡查使用独立的文件
+2. 续查时截断到断点记录的条数,写了一半的末行被丢弃,之后继续追加
+3. 读取上千条结果时内存占用不随条数增长
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_result_sink.py
+"""
+
+import sys
+import os
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system.piracy_detector import DetectionResult, ProductInfo
+from anti_piracy_system.result_sink import ResultSink, iter_results, session_results_path
+
+
+def _record(i: int) -> dict:
+    product = ProductInfo(
+        title=f"众合法考2025全套资料 第{i}份", shop_name=f"卖家{i}", price=9.9,
+        description="网盘发货", platform="小红书"
+    )
+    detection = DetectionResult(is_piracy=i % 3 == 0, confidence=0.9, reasons=["价格异常"])
+    return {
+        "index": i,
+        "recorded_at": datetime.now(),
+        "product_info": product.to_dict(),
+        "detection_result": detection.to_dict()
+    }
+
+
+def test_append_and_iterate():
+    """逐条写入与读取"""
+    print("\n" + "=" * 60)
+    print("测试 1: 逐条写入与读取")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = session_results_path(os.path.join(tmpdir, "patrol_results"), "众合 法考/2025")
+        assert os.path.basename(path).endswith("_众合_法考_2025.jsonl")
+        assert path != session_results_path(os.path.join(tmpdir, "patrol_results"), "众合 法考/2025")
+
+        with ResultSink(path) as sink:
+            for i in range(1, 4):
+                sink.append(_record(i))
+            # 每条写入后立即可读
+            assert [r["index"] for r in iter_results(path)] == [1, 2, 3]
+        assert sink.count == 3
+        records = list(sink)
+        assert records[0]["product_info"]["shop_name"] == "卖家1"
+        assert records[2]["detection_result"]["is_piracy"] is True
+        assert isinstance(records[0]["recorded_at"], str)
+
+        # 新建同名文件时覆盖
+        with ResultSink(path) as sink:
+            sink.append(_record(9))
+        assert [r["index"] for r in iter_results(path)] == [9]
+        assert list(iter_results(None)) == [] and list(iter_results(os.path.join(tmpdir, "无"))) == []
+        print("   ✅ 写入与读取正确")
+
+
+def test_resume_truncate():
+    """续查截断"""
+    print("\n" + "=" * 60)
+    print("测试 2: 续查截断")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.jsonl")
+        with ResultSink(path) as sink:
+            for i in range(1, 5):
+                sink.append(_record(i))
+        # 进程在写第 5 条时被终止
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"index": 5, "product_info": {"title": "众合')
+        assert [r["index"] for r in iter_results(path)] == [1, 2, 3, 4]
+
+        # 断点只记录了 3 条: 第 4 条和写了一半的第 5 条都被截断
+        with ResultSink(path, keep=3) as sink:
+            assert sink.count == 3
+            sink.append(_record(6))
+        assert [r["index"] for r in iter_results(path)] == [1, 2, 3, 6]
+
+        # 断点记录的条数多于文件中完整的行数时保留全部完整行
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"index": 7')
+        with ResultSink(path, keep=10) as sink:
+            assert sink.count == 4
+            sink.append(_record(8))
+        assert [r["index"] for r in iter_results(path)] == [1, 2, 3, 6, 8]
+
+        # 文件已不存在时新建
+        missing = os.path.join(tmpdir, "missing.jsonl")
+        with ResultSink(missing, keep=3) as sink:
+            assert sink.count == 0
+        print("   ✅ 截断到断点条数后继续追加")
+
+
+def test_streaming_memory():
+    """流式读取的内存占用"""
+    print("\n" + "=" * 60)
+    print("测试 3: 上千条结果的内存占用")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "results.jsonl")
+
+        def peak(count: int) -> int:
+            tracemalloc.start()
+            with ResultSink(path) as sink:
+                for i in range(count):
+                    sink.append(_record(i))
+            piracy = sum(1 for r in iter_results(path) if r["detection_result"]["is_piracy"])
+            assert piracy == (count + 2) // 3
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak_bytes
+
+        peak(2000)  # 预热: 首次编码时 json 模块的内部缓存也会计入
+        small, large = peak(100), peak(2000)
+        print(f"   100 条峰值 {small / 1024:.0f} KB, 2000 条峰值 {large / 1024:.0f} KB, "
+              f"文件 {os.path.getsize(path) / 1024:.0f} KB")
+        assert large < small * 2
+        assert large < os.path.getsize(path) / 4
+        print("   ✅ 内存占用不随结果条数增长")
+
+
+if __name__ == "__main__":
+    test_append_and_iterate()
+    test_resume_truncate()
+    test_streaming_memory()
+    print("\n✅ 巡查结果流式存储测试通过")
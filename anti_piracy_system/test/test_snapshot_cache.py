@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+二进制快照缓存测试
+
+验证商品库和举报记录的二进制快照:
+1. 首次加载后生成快照,再次加载时从快照读取,结果与解析 JSON 一致
+2. 保存、合并或手工编辑源文件后快照失效,重新解析并生成新快照
+3. 快照损坏或格式版本不匹配时退回解析源文件
+
+使用方法:
+    cd /Users/Apple/Documents/GUI/anti_piracy_system
+    source venv/bin/activate
+    python test/test_snapshot_cache.py
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from anti_piracy_system import snapshot_cache
+from anti_piracy_system.snapshot_cache import load_snapshot, snapshot_path, source_key
+from anti_piracy_system.product_database import GenuineProduct, ProductDatabase
+from anti_piracy_system.report_manager import ReportManager
+
+
+def _product(index):
+    return GenuineProduct(
+        product_id=f"zhonghe_{index:03d}",
+        product_name=f"2026众合法考客观题学习包 第{index}册",
+        shop_name="方圆众合教育",
+        official_shops=["方圆众合教育", "众合法考官方旗舰店"],
+        original_price=898.0,
+        platform="众合法考",
+        category="法考课程",
+        keywords=["众合", "法考"]
+    )
+
+
+def _snapshot_hit(source, kind, generation):
+    """源文件当前的快照是否有效"""
+    return load_snapshot(snapshot_path(source), kind, source_key(source, generation)) is not None
+
+
+def test_product_snapshot():
+    """商品库快照生成、命中与失效"""
+    print("\n" + "=" * 60)
+    print("测试 1: 商品库快照")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "genuine_products.json")
+        db = ProductDatabase(json_path)
+        for i in range(5):
+            db.add_product(_product(i))
+        db.close()
+
+        first = ProductDatabase(json_path)
+        assert _snapshot_hit(json_path, "products", first._generation)
+        second = ProductDatabase(json_path)
+        assert second.products == first.products
+        assert second.get_product("zhonghe_003").official_shops == ("方圆众合教育", "众合法考官方旗舰店")
+        print("   ✅ 再次加载命中快照,内容一致")
+
+        # 其他进程保存后快照失效,刷新时重新解析
+        second.add_product(_product(5))
+        assert not _snapshot_hit(json_path, "products", second._generation)
+        assert first.refresh(force=True)
+        assert "zhonghe_005" in first.products
+        assert _snapshot_hit(json_path, "products", first._generation)
+
+        # 手工编辑(修改时间后移)
+        with open(json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["zhonghe_000"]["original_price"] = 698.0
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        st = os.stat(json_path)
+        os.utime(json_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        third = ProductDatabase(json_path)
+        assert third.get_product("zhonghe_000").original_price == 698.0
+        for db in (first, second, third):
+            db.close()
+        print("   ✅ 保存和手工编辑后快照失效")
+
+
+def test_report_snapshot():
+    """举报记录快照包含记录和索引,合并后失效"""
+    print("\n" + "=" * 60)
+    print("测试 2: 举报记录快照")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_path = os.path.join(tmpdir, "report_history.json")
+        manager = ReportManager(log_path, compact_threshold=0)
+        for i in range(6):
+            report = manager.create_report(
+                platform="小红书" if i % 2 else "闲鱼",
+                target_title=f"众合法考客观题 {i}",
+                target_shop=f"个人卖家{i % 3}",
+                target_price=99.0
+            )
+            if i % 3 == 0:
+                manager.update_status(report.report_id, "submitted")
+        manager.compact()
+        manager.close()
+
+        plain = ReportManager(log_path, compact_threshold=0, snapshot_cache=False)
+        first = ReportManager(log_path, compact_threshold=0)
+        second = ReportManager(log_path, compact_threshold=0)
+        assert _snapshot_hit(log_path, "reports", second._generation)
+        for loaded in (first, second):
+            assert list(loaded.reports) == list(plain.reports)
+            assert loaded._indexes == plain._indexes
+            assert loaded.get_statistics() == plain.get_statistics()
+            assert len(loaded.get_reports_by_shop("个人卖家1")) == 2
+        print("   ✅ 记录顺序、索引和统计与解析 JSON 一致")
+
+        # 快照之后的日志照常重放;合并后快照失效
+        new_report = second.create_report(
+            platform="小红书", target_title="众合法考 新增", target_shop="个人卖家9", target_price=9.9
+        )
+        third = ReportManager(log_path, compact_threshold=0)
+        assert third.get_report(new_report.report_id) is not None
+        second.compact()
+        assert not _snapshot_hit(log_path, "reports", second._generation)
+        fourth = ReportManager(log_path, compact_threshold=0)
+        assert len(fourth.reports) == 7
+        assert _snapshot_hit(log_path, "reports", fourth._generation)
+        for manager in (plain, first, second, third, fourth):
+            manager.close()
+        print("   ✅ 日志重放正常,合并后快照失效")
+
+
+def test_invalid_snapshot():
+    """损坏或旧版本的快照退回解析源文件"""
+    print("\n" + "=" * 60)
+    print("测试 3: 快照损坏与版本不匹配")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "genuine_products.json")
+        db = ProductDatabase(json_path)
+        db.add_product(_product(0))
+        db.close()
+        ProductDatabase(json_path).close()
+
+        with open(snapshot_path(json_path), "r+b") as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b"\xff" * 8)
+        db = ProductDatabase(json_path)
+        assert db.get_product("zhonghe_000") is not None
+        assert _snapshot_hit(json_path, "products", db._generation)  # 解析后重新生成
+        db.close()
+
+        original_version = snapshot_cache.SNAPSHOT_VERSION
+        snapshot_cache.SNAPSHOT_VERSION = original_version + 1
+        try:
+            assert not _snapshot_hit(json_path, "products", db._generation)
+            db = ProductDatabase(json_path)
+            assert db.get_product("zhonghe_000") is not None
+            db.close()
+        finally:
+            snapshot_cache.SNAPSHOT_VERSION = original_version
+        print("   ✅ 快照无效时退回解析 JSON")
+
+
+if __name__ == "__main__":
+    test_product_snapshot()
+    test_report_snapshot()
+    test_invalid_snapshot()
+    print("\n✅ 二进制快照缓存测试通过")
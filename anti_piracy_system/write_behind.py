@@ -0,0 +1,139 @@
+"""
+延迟合并写入模块
+
+巡查过程中举报记录、商品数据会被连续修改,如果每次修改都同步落盘,热路径会被磁盘 IO 阻塞。
+WriteBehindBuffer 把修改暂存在内存中,由后台线程批量写入:
+
+1. 修改只追加到待写队列并置脏标记,立即返回
+2. 距上次写入满 flush_interval 秒,或待写条数达到 max_batch 时,后台线程一次写入整批
+3. close() 或进程退出(atexit)时写入剩余修改
+
+写入失败时整批放回队列头部,下次重试。
+"""
+
+import atexit
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+# 持久化策略: sync 每次修改同步写入; write_behind 由后台线程批量写入
+DURABILITY_POLICIES = ("sync", "write_behind")
+
+
+class WriteBehindBuffer:
+    """延迟合并写入缓冲区"""
+
+    def __init__(
+        self,
+        flush_func: Callable[[List[Any]], None],
+        flush_interval: float = 1.0,
+        max_batch: int = 100,
+        name: str = "write-behind"
+    ):
+        """
+        初始化缓冲区并启动后台写入线程
+
+        Args:
+            flush_func: 写入函数,参数为一批待写条目(只置脏标记时为空列表)
+            flush_interval: 两次后台写入的最长间隔(秒)
+            max_batch: 待写条目达到该数量时立即唤醒后台写入
+            name: 后台线程名称
+        """
+        self.flush_func = flush_func
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self._pending: List[Any] = []
+        self._dirty = False
+        self._closed = False
+        self._cond = threading.Condition()
+        # 保证批次按提交顺序写入(后台线程与手动 flush 不会交错)
+        self._flush_lock = threading.Lock()
+
+        # 统计信息
+        self.stats: Dict[str, float] = {"flushes": 0, "items_flushed": 0, "max_pending": 0, "errors": 0}
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def dirty(self) -> bool:
+        """是否有尚未写入的修改"""
+        return self._dirty
+
+    def pending(self) -> List[Any]:
+        """尚未写入的条目(副本,不含正在写入的批次)"""
+        with self._cond:
+            return list(self._pending)
+
+    def submit(self, item: Any = None) -> None:
+        """
+        提交一次修改,立即返回
+
+        关闭后提交的修改同步写入。
+
+        Args:
+            item: 待写条目,为 None 时只置脏标记(由 flush_func 写入完整状态)
+        """
+        with self._cond:
+            closed = self._closed
+            if not closed:
+                if item is not None:
+                    self._pending.append(item)
+                    self.stats["max_pending"] = max(self.stats["max_pending"], len(self._pending))
+                self._dirty = True
+                if len(self._pending) >= self.max_batch:
+                    self._cond.notify()
+        if closed:
+            with self._flush_lock:
+                self.flush_func([] if item is None else [item])
+
+    def flush(self) -> int:
+        """
+        立即写入所有待写修改
+
+        Returns:
+            写入的条目数
+        """
+        with self._flush_lock:
+            with self._cond:
+                if not self._dirty:
+                    return 0
+                batch, self._pending, self._dirty = self._pending, [], False
+            try:
+                self.flush_func(batch)
+            except Exception:
+                with self._cond:
+                    self._pending[:0] = batch
+                    self._dirty = True
+                    self.stats["errors"] += 1
+                raise
+            self.stats["flushes"] += 1
+            self.stats["items_flushed"] += len(batch)
+            return len(batch)
+
+    def _run(self) -> None:
+        """后台写入循环"""
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ 后台写入失败,稍后重试: {e}")
+                time.sleep(self.flush_interval)
+
+    def close(self) -> None:
+        """停止后台线程并写入剩余修改"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
@@ -11,7 +11,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import uvicorn
@@ -27,7 +27,7 @@ try:
     from anti_piracy_system.product_database import ProductDatabase
     from anti_piracy_system.report_manager import ReportManager
     from anti_piracy_system.anti_piracy_agent import AntiPiracyAgent
-    from anti_piracy_system.config_anti_piracy import SUPPORTED_PLATFORMS
+    from anti_piracy_system.config_anti_piracy import SUPPORTED_PLATFORMS, PATHS, REPORT_LOG_CONFIG
     ANTI_PIRACY_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Anti-piracy modules not available: {e}")
@@ -90,8 +90,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 分页游标通过响应头返回
 )
 
+# 举报记录管理器(与巡查 Agent 共用 anti_piracy_system/logs 下的举报记录)
+report_manager = None
+if ANTI_PIRACY_AVAILABLE:
+    report_manager = ReportManager(
+        str(Path(__file__).parent.parent / "anti_piracy_system" / PATHS["report_log"]),
+        **REPORT_LOG_CONFIG
+    )
+
+
+def _format_report(report) -> Dict[str, Any]:
+    """将 ReportManager 的举报记录转换为前端 ReportRecord 格式"""
+    detection = report.detection_result or {}
+    price_ratio = detection.get("price_ratio")
+    loss_prevented = 0.0
+    if price_ratio:
+        # 正版原价 = 售价 / 价格比例
+        loss_prevented = round(report.target_price / price_ratio - report.target_price, 2)
+    return {
+        "id": report.report_id,
+        "reportNumber": report.report_id,
+        "merchantName": report.target_shop,
+        "productName": report.target_title,
+        "price": report.target_price,
+        "lossPrevented": loss_prevented,
+        "reason": report.report_reason,
+        "date": (report.reported_at or "")[:10],
+        "screenshots": report.evidence_screenshots,
+    }
+
+
+def _format_merchant(merchant: Dict[str, Any]) -> Dict[str, Any]:
+    """将 ReportManager.query_merchants 的商家转换为前端 Merchant 格式"""
+    latest = merchant["latest_report"]
+    return {
+        "id": f"{merchant['platform']}:{merchant['shop']}",
+        "name": merchant["shop"],
+        "platform": merchant["platform"],
+        "status": "pirated",
+        "imageUrl": latest.evidence_screenshots[0] if latest.evidence_screenshots else "",
+        "uid": merchant["shop"],
+        "reasoning": latest.report_reason,
+        "evidenceImages": latest.evidence_screenshots,
+        "reportNumber": latest.report_id,
+        "reportDate": (latest.reported_at or "")[:16].replace("T", " "),
+    }
+
 # In-memory storage for tasks (in production, use a proper task queue)
 # patrol_tasks: Dict[str, Dict[str, Any]] = {}  # 使用 task_manager 替代
 
@@ -146,14 +193,32 @@ MOCK_REPORTS = [
 async def root():
     return {"message": "GUI-Stride API Server", "status": "online"}
 
+# 查询举报记录的接口为同步函数: ReportManager 查询会等待跨进程文件锁,
+# 由 FastAPI 放到线程池中执行,不阻塞事件循环
 @app.get("/api/merchants", response_model=List[Merchant])
-async def get_merchants(limit: int = 20, platform: Optional[str] = None):
-    """Get list of merchants (pirated/official)"""
-    # TODO: Replace with real data from report manager
-    merchants = MOCK_MERCHANTS
-    if platform:
-        merchants = [m for m in merchants if m["platform"] == platform]
-    return merchants[:limit]
+def get_merchants(
+    response: Response,
+    limit: int = 20,
+    platform: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    """Get reported merchants, most recently reported first.
+
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
+    """
+    if report_manager is None:
+        merchants = MOCK_MERCHANTS
+        if platform:
+            merchants = [m for m in merchants if m["platform"] == platform]
+        return merchants[:limit]
+
+    try:
+        page = report_manager.query_merchants(platform=platform, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return [_format_merchant(m) for m in page["items"]]
 
 @app.get("/api/logs", response_model=List[LogEntry])
 async def get_logs(limit: int = 50):
@@ -161,11 +226,47 @@ async def get_logs(limit: int = 50):
     # TODO: Replace with real logs
     return MOCK_LOGS[:limit]
 
+# 同步函数,原因同 get_merchants
 @app.get("/api/reports", response_model=List[ReportRecord])
-async def get_reports(limit: int = 50):
-    """Get report history"""
-    # TODO: Replace with real reports from report manager
-    return MOCK_REPORTS[:limit]
+def get_reports(
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    platform: Optional[str] = None,
+    status: Optional[str] = None,
+    shop: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    order: str = "desc"
+):
+    """Get one page of report history.
+
+    Dates are YYYY-MM-DD (inclusive). Pass the X-Next-Cursor response header
+    back as `cursor` to fetch the next page; the header is absent on the last page.
+    """
+    if report_manager is None:
+        return MOCK_REPORTS[:limit]
+
+    try:
+        page = report_manager.query_reports(
+            platform=platform,
+            status=status,
+            shop=shop,
+            start_date=start_date,
+            end_date=end_date,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence,
+            order=order,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return [_format_report(r) for r in page["items"]]
 
 @app.post("/api/patrol", response_model=PatrolResponse)
 async def start_patrol(request: PatrolRequest):
@@ -211,6 +312,11 @@ async def get_new_patrol_logs(task_id: str):
         raise HTTPException(status_code=404, detail="任务不存在")
     return logs
 
+@app.get("/api/model-pool/stats")
+async def get_model_pool_stats():
+    """获取共享模型连接池统计（并发、排队、重试）"""
+    return task_manager.get_model_pool_stats()
+
 @app.get("/api/platforms")
 async def get_platforms():
     """Get supported platforms"""
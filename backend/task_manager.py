@@ -2,12 +2,14 @@
 任务管理器 - 负责执行巡查任务并捕获实时日志
 """
 
+import os
 import sys
 import io
 import threading
 import queue
 import time
 import json
+import uuid
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from pathlib import Path
@@ -18,7 +20,9 @@ try:
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
     from anti_piracy_system.anti_piracy_agent import AntiPiracyAgent
-    from anti_piracy_system.config_anti_piracy import SUPPORTED_PLATFORMS
+    from anti_piracy_system.config_anti_piracy import SUPPORTED_PLATFORMS, MODEL_POOL_CONFIG
+    from anti_piracy_system.id_generator import new_id
+    from anti_piracy_system.model_pool import ModelClientPool, get_shared_pool
     from phone_agent.model import ModelConfig
     ANTI_PIRACY_AVAILABLE = True
 except ImportError as e:
@@ -26,7 +30,34 @@ except ImportError as e:
     ANTI_PIRACY_AVAILABLE = False
     AntiPiracyAgent = None
     ModelConfig = None
+    ModelClientPool = None
+    get_shared_pool = None
     SUPPORTED_PLATFORMS = {}
+    MODEL_POOL_CONFIG = {}
+
+    def new_id(prefix: str) -> str:
+        """模拟模式下的任务ID(反盗版模块不可用时)"""
+        return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+# 模型服务(与 main_anti_piracy.py 相同的环境变量和默认值)
+MODEL_SERVICE = {
+    "base_url": os.getenv("PHONE_AGENT_BASE_URL", "http://localhost:8000/v1"),
+    "model_name": os.getenv("PHONE_AGENT_MODEL", "autoglm-phone-9b"),
+    "api_key": os.getenv("PHONE_AGENT_API_KEY", "EMPTY"),
+}
+
+
+def model_pool_enabled() -> bool:
+    """是否启用共享模型连接池(反盗版模块不可用时视为关闭)"""
+    return ANTI_PIRACY_AVAILABLE and MODEL_POOL_CONFIG.get("enabled", True)
+
+
+def get_model_pool() -> Optional["ModelClientPool"]:
+    """所有巡查任务共用的模型服务连接池,未启用时返回 None"""
+    if not model_pool_enabled():
+        return None
+    pool_options = {k: v for k, v in MODEL_POOL_CONFIG.items() if k != "enabled"}
+    return get_shared_pool(MODEL_SERVICE["base_url"], MODEL_SERVICE["api_key"], **pool_options)
 
 
 class TaskLog:
@@ -141,18 +172,15 @@ class PatrolTask:
 
             else:
                 # 真实模式：使用 AntiPiracyAgent
-                # 配置模型（使用默认值，可以从环境变量读取）
-                model_config = ModelConfig(
-                    base_url="http://localhost:8000/v1",  # 默认本地模型服务
-                    model_name="autoglm-phone-9b",
-                    api_key="EMPTY"
-                )
+                # 配置模型（环境变量 PHONE_AGENT_*，默认本地模型服务）
+                model_config = ModelConfig(**MODEL_SERVICE)
 
-                # 创建 Agent
+                # 创建 Agent，模型请求走所有任务共用的连接池（keep-alive、全局并发上限、502 重试）
                 agent = AntiPiracyAgent(
                     model_config=model_config,
                     platform=self.platform,
-                    test_mode=self.test_mode
+                    test_mode=self.test_mode,
+                    model_pool=get_model_pool()
                 )
 
                 # 重定向标准输出到日志捕获器
@@ -230,7 +258,7 @@ class TaskManager:
 
     def create_task(self, platform: str, keyword: str, max_items: int, test_mode: bool = True) -> str:
         """创建新任务并返回任务ID"""
-        task_id = f"patrol_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.tasks)}"
+        task_id = new_id("patrol")
 
         task = PatrolTask(
             task_id=task_id,
@@ -265,6 +293,13 @@ class TaskManager:
             return []
         return task.log_manager.get_logs(since_id)
 
+    def get_model_pool_stats(self) -> Dict[str, Any]:
+        """获取共享模型连接池统计（排队数、等待时间、重试次数等）；未启用连接池时不创建连接池"""
+        pool = get_model_pool()
+        if pool is None:
+            return {"enabled": False}
+        return {"enabled": True, **pool.get_stats()}
+
     def get_new_task_logs(self, task_id: str) -> List[Dict[str, Any]]:
         """获取任务新日志（实时）"""
         task = self.get_task(task_id)
@@ -71,6 +71,40 @@ export async function fetchReports(limit: number = 50): Promise<ReportRecord[]>
   return response.json();
 }
 
+export interface ReportQuery {
+  limit?: number;
+  cursor?: string;
+  platform?: string;
+  status?: string;
+  shop?: string;
+  start_date?: string;
+  end_date?: string;
+  min_confidence?: number;
+  max_confidence?: number;
+  order?: 'desc' | 'asc';
+}
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+/**
+ * Fetch one page of reports; pass nextCursor back as cursor for the next page
+ */
+export async function fetchReportsPage(query: ReportQuery = {}): Promise<Page<ReportRecord>> {
+  const params = new URLSearchParams();
+  Object.entries(query).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') params.append(key, String(value));
+  });
+
+  const response = await fetch(`${API_BASE_URL}/api/reports?${params}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch reports: ${response.statusText}`);
+  }
+  return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
+}
+
 /**
  * Start a new patrol task
  */